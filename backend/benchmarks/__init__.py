@@ -0,0 +1 @@
+"""Micro-benchmarks for hot paths in the turn pipeline (run with python -m)."""
@@ -0,0 +1,73 @@
+"""
+Benchmark: incremental Knowledge Graph index at large history sizes.
+
+Each turn adds one new multi-word phrase drawn from a Zipf-like
+vocabulary, so common tokens ("aime", "veux") get long postings lists
+while rare ones stay short. Before the postings index, cross-turn
+shared-vocabulary linking compared every pair of phrases (O(P²)).
+
+Reported per history length N:
+- apply ms/turn  — mean cost of GraphIndex.sync() for one new turn
+- nodes/links ms — serialization cost of the graph endpoints
+- links          — links returned after the degree cap
+
+Run:  python -m backend.benchmarks.bench_graph_index [--turns 1000 10000 30000] [--repeat N]
+"""
+
+import argparse
+import random
+import time
+
+from backend.models import ConversationTurn, SessionState, TutorResponse
+from backend.services.graph_index import GraphIndex
+
+_VERBS = ["j'aime", "je veux", "je mange", "je vois", "je cherche", "j'achète", "je prends", "j'adore"]
+_NOUNS = [f"objet{i}" for i in range(3000)]
+_ADJS = [f"qualité{i}" for i in range(400)]
+
+
+def _turn(rng: random.Random, n: int) -> ConversationTurn:
+    phrase = f"{rng.choice(_VERBS)} le {_NOUNS[int(rng.paretovariate(1.2)) % len(_NOUNS)]} {rng.choice(_ADJS)} {n}"
+    return ConversationTurn(
+        turn_number=n,
+        user_said=phrase,
+        response=TutorResponse(
+            spoken_response="Très bien !", translation_hint="", user_level_assessment="A2", border_update="",
+            validated_user_units=[{"text": phrase, "kind": "sentence", "source": "as_said",
+                                   "confidence": 0.8, "is_accepted": True}],
+        ),
+    )
+
+
+def _best(fn, repeat: int) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, result
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--turns", type=int, nargs="+", default=[1000, 10000, 30000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'turns':>6} {'apply ms/turn':>14} {'nodes ms':>9} {'links ms':>9} {'links':>7}")
+    for n in args.turns:
+        rng = random.Random(n)
+        state, index = SessionState(), GraphIndex()
+        t0 = time.perf_counter()
+        for i in range(1, n + 1):
+            state.conversation_history.append(_turn(rng, i))
+            index.sync(state.conversation_history)
+        apply_ms = (time.perf_counter() - t0) * 1000 / n
+        state.turn = n + 1
+        t_nodes, _ = _best(lambda: index.nodes(state), args.repeat)
+        t_links, links = _best(index.links, args.repeat)
+        print(f"{n:6d} {apply_ms:14.3f} {t_nodes:9.1f} {t_links:9.1f} {len(links):7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: incremental JSON parser vs. regex-over-accumulated extraction.
+
+Baseline is the pre-parser logic of OpenAIService._groq_generate_streaming:
+append each delta to a string and re-run the spoken_response regex over
+the whole buffer until it matches, then json.loads() the full text.
+
+Run:  python -m backend.benchmarks.bench_json_stream [--repeat N] [--scales 1 4 16]
+"""
+
+import argparse
+import json
+import re
+import time
+
+from backend.services.json_stream import IncrementalJSONParser
+
+_SPOKEN_RE = re.compile(r'"spoken_response"\s*:\s*"((?:[^"\\]|\\.)*)(?:"|$)')
+
+
+def regex_baseline(chunks: list[str]) -> tuple[str | None, dict]:
+    accumulated = ""
+    early = None
+    for delta in chunks:
+        accumulated += delta
+        if early is None and '"spoken_response"' in accumulated:
+            match = _SPOKEN_RE.search(accumulated)
+            if match and match.group(0).endswith('"'):
+                early = match.group(1).replace('\\"', '"').replace('\\n', '\n')
+    return early, json.loads(accumulated)
+
+
+def incremental(chunks: list[str]) -> tuple[str | None, dict]:
+    parser = IncrementalJSONParser()
+    early = None
+    for delta in chunks:
+        for event in parser.feed(delta):
+            if event.kind == "field" and event.key == "spoken_response" and early is None:
+                early = event.value
+    return early, parser.close()
+
+
+def _vocab(n: int) -> list[dict]:
+    return [
+        {"word": f"mot{i}", "translation": f"word {i}", "part_of_speech": "noun"}
+        for i in range(n)
+    ]
+
+
+def _chunk(text: str, size: int) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def scenarios(scale: int = 1) -> dict[str, list[str]]:
+    typical = {
+        "spoken_response": "Très bien ! Tu aimes le café. Et le matin, qu'est-ce que tu bois ?",
+        "translation_hint": "Very good! You like coffee. And in the morning, what do you drink?",
+        "vocabulary_breakdown": _vocab(4),
+        "new_elements": ["le matin", "boire"],
+        "mastery_scores": {"café": 0.4},
+    }
+    # Long spoken_response still streaming: the regex re-scans it from the
+    # start on every chunk until the closing quote arrives
+    long_spoken = {
+        "spoken_response": "Alors, raconte-moi ta journée. " * (20 * scale),
+        "translation_hint": "So, tell me about your day.",
+    }
+    # spoken_response emitted last: substring check over the whole buffer per chunk
+    long_late = {
+        "vocabulary_breakdown": _vocab(60 * scale),
+        "user_vocabulary": [f"mot{i}" for i in range(60 * scale)],
+        "spoken_response": "D'accord. " * 10,
+    }
+    # Key text repeated inside earlier strings + heavy escaping, 1-char tokens
+    adversarial = {
+        "translation_hint": '\\"spoken_response\\": \\"' * (15 * scale),
+        "corrected_form": '"spoken_response": "' * (15 * scale),
+        "spoken_response": 'Il a dit \"oui\" \\ puis \"non\".\n' * (8 * scale),
+    }
+    return {
+        "typical reply (4-char tokens)": _chunk(json.dumps(typical, ensure_ascii=False), 4),
+        "long spoken first (4-char tokens)": _chunk(json.dumps(long_spoken, ensure_ascii=False), 4),
+        "long arrays, spoken last (4-char)": _chunk(json.dumps(long_late, ensure_ascii=False), 4),
+        "adversarial escapes (1-char tokens)": _chunk(json.dumps(adversarial, ensure_ascii=False), 1),
+    }
+
+
+def _time(fn, chunks: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(chunks)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--scales", type=int, nargs="+", default=[1, 4, 16])
+    args = ap.parse_args()
+
+    print(f"{'scenario':38} {'bytes':>7} {'chunks':>7} {'regex ms':>9} {'parser ms':>9} {'speedup':>8}")
+    for scale in args.scales:
+        for name, chunks in scenarios(scale).items():
+            if scale > 1 and name.startswith("typical"):
+                continue
+            base_spoken, base_obj = regex_baseline(chunks)
+            inc_spoken, inc_obj = incremental(chunks)
+            assert inc_obj == base_obj
+            if base_spoken != inc_spoken:
+                name += " *"
+            t_base = _time(regex_baseline, chunks, args.repeat)
+            t_inc = _time(incremental, chunks, args.repeat)
+            size = sum(len(c) for c in chunks)
+            print(f"{name:38} {size:7d} {len(chunks):7d} {t_base:9.3f} {t_inc:9.3f} {t_base / t_inc:7.1f}x")
+    print("* regex baseline returned a wrong spoken_response (mis-decoded escapes, or")
+    print("  an empty match when a chunk ended right after the opening quote)")
+
+
+if __name__ == "__main__":
+    main()
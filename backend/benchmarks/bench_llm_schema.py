@@ -0,0 +1,125 @@
+"""
+Benchmark: compact vs. verbose LLM output schema.
+
+A local stand-in provider replays each reply token by token with the
+timing of a hosted model (time to first token, then a steady decode
+rate), feeding the same IncrementalJSONParser the Groq path uses. The
+replies are the pre-scripted tutor turns (mock_data), sent once in the
+verbose schema and once encoded with compact_schema.
+
+Reported per reply and schema:
+- out tok   — output tokens (tiktoken cl100k_base when installed, else
+              word pieces of at most 4 letters)
+- spoken ms — until spoken_response is complete (when TTS can start)
+- done ms   — until the object closes and validates into TutorResponse
+
+Run:  python -m backend.benchmarks.bench_llm_schema [--provider groq|openai] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+
+from backend.mock_data import MOCK_CONVERSATION
+from backend.models import TutorResponse
+from backend.services.compact_schema import LONG_KEYS, SPOKEN_KEY, encode_compact, validate_compact
+from backend.services.json_stream import IncrementalJSONParser
+
+# (time to first token s, output tokens/s) — rough public figures
+_PROVIDERS = {"groq": (0.20, 275.0), "openai": (0.45, 85.0)}
+
+_PIECE = re.compile(r"\s*(?:[^\W\d_]{1,4}|\d{1,3}|_|[^\w\s])|\s+")
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # Not installed, or encoding files unavailable offline
+    _encoding = None
+
+
+def tokenize(text: str) -> list[str]:
+    """Output-token pieces: tiktoken's when available, else ≤4-letter word pieces."""
+    if _encoding is not None:
+        return [_encoding.decode([token]) for token in _encoding.encode(text)]
+    return _PIECE.findall(text)
+
+
+class ReplayProvider:
+    """Streams text as tokens on a fixed schedule: ttft, then 1/rate per token."""
+
+    def __init__(self, ttft_s: float, tokens_per_s: float):
+        self.ttft_s = ttft_s
+        self.tokens_per_s = tokens_per_s
+
+    async def stream(self, text: str):
+        start = time.perf_counter()
+        for i, token in enumerate(tokenize(text)):
+            # Absolute deadlines, so sleep overshoot does not accumulate
+            delay = start + self.ttft_s + i / self.tokens_per_s - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield token
+
+
+async def run_turn(provider: ReplayProvider, text: str, compact: bool) -> tuple[float, float]:
+    """(spoken ms, done ms) for one streamed reply."""
+    spoken_key = SPOKEN_KEY if compact else "spoken_response"
+    parser = IncrementalJSONParser()
+    spoken_ms = 0.0
+    t0 = time.perf_counter()
+    async for token in provider.stream(text):
+        for event in parser.feed(token):
+            if event.kind == "field" and event.key == spoken_key and not spoken_ms:
+                spoken_ms = (time.perf_counter() - t0) * 1000
+    parsed = parser.close()
+    response = validate_compact(parsed) if compact else TutorResponse.model_validate(parsed)
+    assert response.spoken_response
+    return spoken_ms, (time.perf_counter() - t0) * 1000
+
+
+def replies() -> list[dict]:
+    return [
+        {key: value for key, value in turn["response"].items() if key in LONG_KEYS}
+        for turn in MOCK_CONVERSATION
+    ]
+
+
+async def main_async(args) -> None:
+    provider = ReplayProvider(*_PROVIDERS[args.provider])
+    print(f"provider stand-in: {args.provider} (ttft {provider.ttft_s * 1000:.0f} ms, "
+          f"{provider.tokens_per_s:.0f} tok/s), tokens: {'tiktoken' if _encoding else 'estimate'}")
+    print(f"{'reply':6} {'schema':8} {'out tok':>8} {'spoken ms':>10} {'done ms':>9}")
+    totals = {"verbose": [0, 0.0, 0.0], "compact": [0, 0.0, 0.0]}
+    for n, reply in enumerate(replies()):
+        wire = {
+            "verbose": json.dumps(reply, ensure_ascii=False),
+            "compact": json.dumps(encode_compact(reply), ensure_ascii=False),
+        }
+        assert validate_compact(json.loads(wire["compact"])) == TutorResponse.model_validate(reply)
+        for schema, text in wire.items():
+            best = (float("inf"), float("inf"))
+            for _ in range(args.repeat):
+                best = min(best, await run_turn(provider, text, schema == "compact"))
+            tokens = len(tokenize(text))
+            for i, value in enumerate((tokens, *best)):
+                totals[schema][i] += value
+            print(f"{n:<6} {schema:8} {tokens:8d} {best[0]:10.1f} {best[1]:9.1f}")
+    verbose, compact = totals["verbose"], totals["compact"]
+    print(f"{'total':6} {'verbose':8} {verbose[0]:8d} {verbose[1]:10.1f} {verbose[2]:9.1f}")
+    print(f"{'total':6} {'compact':8} {compact[0]:8d} {compact[1]:10.1f} {compact[2]:9.1f}")
+    print(f"compact saves {1 - compact[0] / verbose[0]:.0%} output tokens, "
+          f"{1 - compact[2] / verbose[2]:.0%} completion time")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--provider", choices=sorted(_PROVIDERS), default="groq")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
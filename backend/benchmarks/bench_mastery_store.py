@@ -0,0 +1,74 @@
+"""
+Benchmark: node mastery for the whole graph, per-node loop vs. columnar batch.
+
+Before MasteryStore, every graph fetch computed confidence / reuse /
+recency and the blend with the tutor's mastery_scores in a Python loop
+over the unit stats dicts. The batch kernel evaluates the same formula
+(plus wall-clock decay) over NumPy columns.
+
+Reported per node count N:
+- loop ms   — the former per-node formula over stats dicts
+- batch ms  — MasteryStore.mastery() for all node rows, with time decay
+- nodes ms  — GraphIndex-style serialization of every node (dicts)
+
+Run:  python -m backend.benchmarks.bench_mastery_store [--nodes 10000 50000 200000] [--repeat N]
+"""
+
+import argparse
+import random
+import time
+
+from backend.services.mastery_store import MasteryStore
+
+
+def _loop(stats: dict[str, dict], turn: int, scores: dict[str, float]) -> list[float]:
+    out = []
+    for word, stat in stats.items():
+        avg_conf = stat["sum_conf"] / max(1, stat["count"])
+        reuse_score = min(1.0, (stat["count"] - 1) / 4)
+        recency_decay = max(0.0, 1.0 - ((turn - stat["last_turn"]) * 0.08))
+        learned = 0.22 + (avg_conf * 0.38) + (reuse_score * 0.30) + (recency_decay * 0.10)
+        if stat["unit_kind"] in ("pattern", "sentence"):
+            learned += 0.05
+        out.append(min(1.0, max(0.15, (learned * 0.65) + (scores.get(word, learned) * 0.35))))
+    return out
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--nodes", type=int, nargs="+", default=[10000, 50000, 200000])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'nodes':>7} {'loop ms':>9} {'batch ms':>9} {'nodes ms':>9}")
+    for n in args.nodes:
+        rng = random.Random(n)
+        store = MasteryStore()
+        now = time.time()
+        for i in range(n):
+            store.observe(f"mot{i}", rng.randint(1, n), rng.uniform(0.4, 1.0), now - rng.uniform(0, 3e6),
+                          "vocab", rng.choice(["word", "chunk", "sentence"]), is_node=True)
+        stats = {word: store.get(word) for word in store.words}
+        scores = {f"mot{rng.randrange(n)}": rng.random() for _ in range(n // 10)}
+        rows = store.node_rows()
+
+        t_loop = _best(lambda: _loop(stats, n + 1, scores), args.repeat)
+        t_batch = _best(lambda: store.mastery(rows, n + 1, scores, now, 72 * 3600), args.repeat)
+        t_nodes = _best(lambda: [
+            {"label": store.words[row], "mastery": m}
+            for row, m in zip(rows.tolist(), store.mastery(rows, n + 1, scores, now, 72 * 3600).tolist())
+        ], args.repeat)
+        print(f"{n:7d} {t_loop:9.1f} {t_batch:9.1f} {t_nodes:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
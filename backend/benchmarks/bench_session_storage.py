@@ -0,0 +1,116 @@
+"""
+Benchmark: single-row session saves vs. normalized per-turn deltas.
+
+Baseline is the format-1 save: every turn serializes and upserts the
+whole conversation_history (plus all mastery scores) as one row. The
+normalized save (backend.services.session_store) sends only the header,
+the new turn (and the previous one, in case a late analysis rewrote it)
+and the mastery scores that changed.
+
+Reported per session length N:
+- save @N    — serialize + payload bytes of the save after turn N
+- total      — write volume of a whole N-turn session (sum over turns)
+
+Run:  python -m backend.benchmarks.bench_session_storage [--turns 1000 10000] [--repeat N]
+"""
+
+import argparse
+import json
+import time
+
+from backend.models import ConversationTurn, TutorResponse
+from backend.services.session_registry import LearnerSession
+from backend.services.session_store import mastery_rows, session_delta, turn_rows
+
+
+def _turn(n: int) -> ConversationTurn:
+    return ConversationTurn(
+        turn_number=n,
+        user_said=f"J'aime le café numéro {n} le matin avec mes amis",
+        response=TutorResponse(
+            spoken_response="Très bien ! Et le week-end, qu'est-ce que tu fais ?",
+            translation_hint="Very good! And at the weekend, what do you do?",
+            vocabulary_breakdown=[
+                {"word": "café", "translation": "coffee", "part_of_speech": "noun"},
+                {"word": "matin", "translation": "morning", "part_of_speech": "noun"},
+            ],
+            new_elements=["le matin"],
+            reactivated_elements=["café"],
+            user_level_assessment="A2",
+            border_update="Can talk about daily habits.",
+            mastery_scores={f"mot{n % 400}": 0.5, "café": 0.6},
+            user_vocabulary=["j'aime le café"],
+        ),
+    )
+
+
+def _session(turns: int) -> LearnerSession:
+    session = LearnerSession("bench", profile_id="bench")
+    for n in range(1, turns + 1):
+        turn = _turn(n)
+        session.state.conversation_history.append(turn)
+        session.state.mastery_scores.update(turn.response.mastery_scores)
+    session.state.turn = turns + 1
+    return session
+
+
+def legacy_payload(session: LearnerSession) -> bytes:
+    state = session.state
+    return json.dumps({
+        "profile_id": session.profile_id,
+        "conversation_history": [t.model_dump() for t in state.conversation_history],
+        "mastery_scores": state.mastery_scores,
+        "level": state.level,
+        "turn": state.turn,
+    }).encode()
+
+
+def normalized_payload(session: LearnerSession) -> bytes:
+    delta = session_delta(session)
+    return json.dumps({
+        "turns": turn_rows(session.profile_id, delta),
+        "mastery": mastery_rows(session.profile_id, delta),
+        "header": delta["header"],
+    }).encode()
+
+
+def _best(fn, repeat: int) -> tuple[float, int]:
+    best, size = float("inf"), 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        size = len(fn())
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, size
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--turns", type=int, nargs="+", default=[1000, 10000])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    turn_bytes = len(json.dumps(_turn(1).model_dump()).encode())
+    print(f"one turn ≈ {turn_bytes} bytes of JSON\n")
+    print(f"{'turns':>6} {'legacy save ms':>15} {'legacy KB':>10} {'delta save ms':>14} {'delta KB':>9}"
+          f" {'legacy total MB':>16} {'delta total MB':>15}")
+    for n in args.turns:
+        session = _session(n)
+        t_legacy, b_legacy = _best(lambda: legacy_payload(session), args.repeat)
+
+        def one_turn_delta() -> bytes:
+            # State as it is right after turn N was appended
+            session.persisted_turns = n - 1
+            session.persisted_mastery = {k: v for k, v in session.state.mastery_scores.items() if k != f"mot{n % 400}"}
+            return normalized_payload(session)
+
+        t_delta, b_delta = _best(one_turn_delta, args.repeat)
+        # Whole-session write volume: legacy rewrites the prefix each turn (≈ quadratic),
+        # deltas write ≈ two turns each (linear)
+        legacy_total = sum(i * turn_bytes for i in range(1, n + 1))
+        delta_total = n * b_delta
+        print(f"{n:6d} {t_legacy:15.2f} {b_legacy / 1024:10.1f} {t_delta:14.3f} {b_delta / 1024:9.2f}"
+              f" {legacy_total / 2**20:16.1f} {delta_total / 2**20:15.2f}")
+
+
+if __name__ == "__main__":
+    main()
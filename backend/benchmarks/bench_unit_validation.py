@@ -0,0 +1,70 @@
+"""
+Benchmark: pedagogical unit validation (unit_validation.validate_units).
+
+Scenarios grow the two inputs that drove the cost of the former gate —
+which re-tokenized the source text for every unit and scanned every
+accepted unit for coverage:
+- typical   — one short utterance, a handful of candidates
+- long      — a 300-word utterance (monologue / pasted text)
+- many      — 400 candidate units from the tutor
+- long+many — both
+
+Reported: µs per validate_units() call (best of --repeat runs of --calls).
+
+Run:  python -m backend.benchmarks.bench_unit_validation [--calls 200] [--repeat 5]
+"""
+
+import argparse
+import random
+import time
+
+from backend.services.unit_validation import validate_units
+
+_WORDS = (
+    "je suis étudiant j'aime le chocolat noir et la pizza nous allons au cinéma ce soir "
+    "il fait beau aujourd'hui ma sœur habite à lyon depuis deux ans elle travaille dans un hôpital"
+).split()
+
+
+def _scenario(rng: random.Random, words: int, candidates: int) -> tuple[str, str, list[str], str]:
+    user_text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    said = user_text.split()
+    units = []
+    for _ in range(candidates):
+        start = rng.randrange(len(said))
+        units.append(" ".join(said[start:start + rng.randint(1, 4)]))
+    return user_text, user_text, units, "Talk about your weekend plans and favourite food"
+
+
+def _best_us(args: tuple, calls: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            validate_units(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best / calls * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--calls", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    scenarios = {
+        "typical": (12, 6),
+        "long": (300, 6),
+        "many": (12, 400),
+        "long+many": (300, 400),
+    }
+    print(f"{'scenario':>10} {'words':>6} {'units':>6} {'µs/call':>10}")
+    for name, (words, candidates) in scenarios.items():
+        case = _scenario(rng, words, candidates)
+        calls = max(1, args.calls // (10 if candidates > 100 else 1))
+        print(f"{name:>10} {words:6d} {candidates:6d} {_best_us(case, calls, args.repeat):10.1f}")
+
+
+if __name__ == "__main__":
+    main()
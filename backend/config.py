@@ -27,3 +27,95 @@ OPENAI_ORG_ID = os.getenv("OPENAI_ORG_ID", "")
 # Supabase - Persistence & Profiles
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY", "")
+
+# Session registry — per-learner state kept resident in this worker
+SESSION_MAX_ACTIVE = int(os.getenv("SESSION_MAX_ACTIVE", "500"))
+SESSION_IDLE_TTL_SECONDS = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "1800"))
+# Newest turns loaded with a session — older ones are read on demand
+# (/api/session/history), so loading does not grow with session length
+SESSION_LOAD_TURNS = int(os.getenv("SESSION_LOAD_TURNS", "200"))
+
+# Write-behind persistence — snapshots are journaled locally and flushed to
+# Supabase in the background, coalesced per profile
+PERSIST_JOURNAL_PATH = os.getenv(
+    "PERSIST_JOURNAL_PATH", str(Path(__file__).resolve().parent / ".data" / "persist_journal.jsonl"),
+)
+PERSIST_FLUSH_DELAY_S = float(os.getenv("PERSIST_FLUSH_DELAY_S", "0.05"))
+
+# LLM hedging — launch the next provider once the current one passes its
+# recent latency percentile; hedged launches are capped by a token budget
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() in ("true", "1", "yes")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.9"))
+LLM_HEDGE_DEFAULT_DELAY_S = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_S", "1.5"))
+LLM_HEDGE_TOKENS_PER_MIN = int(os.getenv("LLM_HEDGE_TOKENS_PER_MIN", "20000"))
+
+# Two-stage LLM turns — a short spoken call gates TTS; the pedagogical analysis
+# runs alongside and is merged if it lands within LLM_ANALYSIS_WAIT_S of the
+# spoken reply, otherwise it is pushed later as a "turn_update" message
+LLM_SPLIT_MODE = os.getenv("LLM_SPLIT_MODE", "true").lower() in ("true", "1", "yes")
+LLM_ANALYSIS_WAIT_S = float(os.getenv("LLM_ANALYSIS_WAIT_S", "2.0"))
+
+# Compact LLM output schema — Groq/OpenAI are asked for one-letter keys and
+# positional vocabulary/graph-link rows (decoded strictly back into the
+# TutorResponse fields), fewer output tokens per turn. Opt-in; sessions can
+# also choose with ?llm_schema=compact|verbose on the conversation WebSocket
+LLM_COMPACT_SCHEMA = os.getenv("LLM_COMPACT_SCHEMA", "false").lower() in ("true", "1", "yes")
+
+# LLM conversation history — the prompt carries the newest exchanges that fit
+# in LLM_HISTORY_TOKENS (learner text + spoken replies only); older ones are
+# folded in the background into a rolling summary of about
+# LLM_SUMMARY_TOKENS sent ahead of them
+LLM_HISTORY_TOKENS = int(os.getenv("LLM_HISTORY_TOKENS", "400"))
+LLM_SUMMARY_TOKENS = int(os.getenv("LLM_SUMMARY_TOKENS", "120"))
+
+# LLM response cache — provider replies to short inputs (up to
+# LLM_CACHE_MAX_CHARS) are reused when language, stage, mission context and
+# the history window match, on the normalized text or its token set;
+# at most LLM_CACHE_MAX_ENTRIES, each for LLM_CACHE_TTL_S. Sessions opt out
+# with ?llm_cache=off on the conversation WebSocket
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("true", "1", "yes")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+LLM_CACHE_TTL_S = float(os.getenv("LLM_CACHE_TTL_S", "3600"))
+LLM_CACHE_MAX_CHARS = int(os.getenv("LLM_CACHE_MAX_CHARS", "80"))
+
+# Knowledge Graph — cross-turn shared-vocabulary links: each new phrase links
+# to at most GRAPH_PHRASE_LINKS_TOP_K earlier phrases (by IDF weight of shared
+# tokens), scanning at most GRAPH_POSTINGS_SCAN recent postings per token
+GRAPH_PHRASE_LINKS_TOP_K = int(os.getenv("GRAPH_PHRASE_LINKS_TOP_K", "3"))
+GRAPH_POSTINGS_SCAN = int(os.getenv("GRAPH_POSTINGS_SCAN", "512"))
+
+# Knowledge Graph — node mastery: the recency term also halves every
+# GRAPH_MASTERY_HALF_LIFE_H hours since a unit was last used (0 disables),
+# on a GRAPH_DECAY_STEP_S clock so nodes re-publish at most once per step
+GRAPH_MASTERY_HALF_LIFE_H = float(os.getenv("GRAPH_MASTERY_HALF_LIFE_H", "72"))
+GRAPH_DECAY_STEP_S = float(os.getenv("GRAPH_DECAY_STEP_S", "600"))
+
+# Spaced repetition — a unit used confidently comes back after the learning
+# step, then after the graduating interval, then interval × ease (SM-2);
+# SRS_PROMPT_DUE_K due units are woven into each tutor prompt
+SRS_LEARNING_STEP_MIN = float(os.getenv("SRS_LEARNING_STEP_MIN", "10"))
+SRS_GRADUATING_INTERVAL_H = float(os.getenv("SRS_GRADUATING_INTERVAL_H", "24"))
+SRS_PROMPT_DUE_K = int(os.getenv("SRS_PROMPT_DUE_K", "5"))
+
+# Grammar pattern packs — extra *.json packs (same format as
+# backend/grammar_packs) loaded at startup on top of the built-in ones
+GRAMMAR_PACKS_DIR = os.getenv("GRAMMAR_PACKS_DIR", "")
+
+# TTS audio cache — synthesized MP3 keyed by (provider, voice, rate, text):
+# an in-memory LRU of TTS_CACHE_MEMORY_MB and, when TTS_CACHE_DIR is set, a
+# disk tier of up to TTS_CACHE_DISK_MB that survives restarts; texts longer
+# than TTS_CACHE_MAX_CHARS are never cached
+TTS_CACHE_MEMORY_MB = float(os.getenv("TTS_CACHE_MEMORY_MB", "32"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "")
+TTS_CACHE_DISK_MB = float(os.getenv("TTS_CACHE_DISK_MB", "512"))
+TTS_CACHE_MAX_CHARS = int(os.getenv("TTS_CACHE_MAX_CHARS", "400"))
+
+# Opener bank — category-starter turns (mission_context.is_opener) are answered
+# from backend/opener_bank/*.json plus OPENER_BANK_DIR without an LLM call
+# (not in MOCK_MODE, which keeps its scripted replies); packs are re-read when
+# a file changes, checked at most every OPENER_BANK_RECHECK_S seconds. Audio is
+# pre-rendered at startup for OPENER_PRERENDER_LANGS (comma-separated, "*" =
+# every language, "" = none)
+OPENER_BANK_DIR = os.getenv("OPENER_BANK_DIR", "")
+OPENER_BANK_RECHECK_S = float(os.getenv("OPENER_BANK_RECHECK_S", "10"))
+OPENER_PRERENDER_LANGS = os.getenv("OPENER_PRERENDER_LANGS", "fr")
@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -16,10 +18,44 @@ _project_root = str(Path(__file__).resolve().parent.parent)
 if _project_root not in sys.path:
     sys.path.insert(0, _project_root)
 
+def _prerender_openers(bank) -> asyncio.Task | None:
+    """Background synthesis of the opener bank for OPENER_PRERENDER_LANGS."""
+    from backend.config import OPENER_PRERENDER_LANGS
+    languages = {lang.strip() for lang in OPENER_PRERENDER_LANGS.split(",") if lang.strip()}
+    try:
+        from backend.routes.conversation import _tts_service
+    except Exception as exc:
+        logger.warning("Opener audio not pre-rendered: %s", exc)
+        return None
+    if not languages or _tts_service.mock_mode:
+        return None
+    return asyncio.create_task(bank.prerender(_tts_service, None if "*" in languages else languages))
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    """Compile grammar packs, load the opener bank (audio pre-rendered in the
+    background) and replay unsaved session snapshots on startup; flush the
+    journal on shutdown."""
+    from backend.routes.session import get_journal
+    from backend.services.grammar_patterns import get_matcher
+    from backend.services.opener_bank import get_opener_bank
+    get_matcher()
+    prerender = _prerender_openers(get_opener_bank())
+    journal = get_journal()
+    await journal.replay()
+    yield
+    if prerender is not None:
+        prerender.cancel()
+    await journal.drain()
+    await journal.stop()
+
+
 app = FastAPI(
     title="Neural-Sync Language Lab",
     description="Voice-first adaptive language learning platform API",
     version="0.1.0",
+    lifespan=_lifespan,
 )
 
 # CORS middleware — allow frontend dev server origin
@@ -29,6 +65,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
@@ -38,6 +75,27 @@ async def health_check():
     return "OK"
 
 
+@app.get("/health/providers")
+async def provider_health():
+    """Circuit-breaker state, p50/p95 latency and error rate per provider."""
+    from backend.services.provider_health import health
+    return health.snapshot()
+
+
+@app.get("/health/llm-cache")
+async def llm_cache_stats():
+    """LLM response cache: exact / near-duplicate hits, misses, hit rate."""
+    from backend.services.openai_service import _response_cache
+    return _response_cache.snapshot()
+
+
+@app.get("/health/tts-cache")
+async def tts_cache_stats():
+    """TTS audio cache: hits per tier, coalesced requests, hit rate, saved synthesis ms."""
+    from backend.routes.conversation import _tts_service
+    return _tts_service.cache.snapshot()
+
+
 # Mount route routers — log warnings if any fail to import so
 # missing routes are immediately visible in the server logs.
 def _mount_routes() -> None:
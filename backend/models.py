@@ -134,6 +134,9 @@ class ConversationTurn(BaseModel):
     turn_number: int = Field(..., ge=1, description="1-indexed turn number")
     user_said: str = Field(..., description="What the user spoke in the target language (STT output)")
     response: TutorResponse = Field(..., description="Full tutor response for this turn")
+    recorded_at: Optional[float] = Field(
+        default=None, description="Unix time the turn was recorded (drives time-based mastery decay)"
+    )
 
 
 class GraphNode(BaseModel):
@@ -193,6 +196,11 @@ class SessionState(BaseModel):
         default_factory=list,
         description="List of completed conversation turns",
     )
+    earlier_turns: int = Field(
+        default=0,
+        ge=0,
+        description="Stored turns older than conversation_history that were not loaded",
+    )
     demo_complete: bool = Field(
         default=False,
         description="Whether all mock turns have been exhausted",
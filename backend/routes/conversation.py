@@ -5,13 +5,23 @@ Handles real-time voice conversation flow over WebSocket at /ws/conversation.
 Orchestrates the STT -> OpenAI -> Backboard -> TTS pipeline for each turn.
 Sends progress status messages during processing so the frontend can show updates.
 
+Connect with ?profile_id=<id> (optionally &session_id=<id>) to use that
+learner's isolated session; connections without one share the default session.
+
 Frontend sends:
     {"type": "text", "content": "Bonjour"}       — text input
     {"type": "audio", "content": "<base64>"}      — audio input (webm/opus)
 
+Streaming audio (no base64, STT runs while the learner speaks):
+    {"type": "audio_start", "encoding": "webm"|"pcm_s16le", "mission_context": {...}}
+    <binary frames>                               — raw audio as it is recorded
+    {"type": "audio_end"}                         — end of utterance → turn runs
+    {"type": "audio_cancel"}                      — discard the utterance
+
 Backend responds:
     {"type": "status", "step": "..."}             — progress update
     {"type": "turn_response", "turn": {...}}       — full conversation turn
+    {"type": "turn_update", "turn": {...}}         — late analysis for a sent turn
     {"type": "demo_complete", "message": "..."}    — all mock turns exhausted
     {"type": "error", "message": "..."}            — error during processing
 """
@@ -19,401 +29,25 @@ Backend responds:
 import asyncio
 import json
 import logging
-import re
 import time
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
-from backend.config import MOCK_MODE
+from backend.config import LLM_ANALYSIS_WAIT_S, LLM_SPLIT_MODE, MOCK_MODE, SRS_PROMPT_DUE_K
 from backend.mock_data import MOCK_CONVERSATION
 from backend.models import ConversationTurn, TutorResponse
-from backend.routes.session import get_session_state
-from backend.services.backboard_service import BackboardService
-from backend.services.openai_service import OpenAIService
-from backend.services.speechmatics_service import SpeechmaticsService
+from backend.routes.graph import publish_graph
+from backend.routes.session import get_registry
+from backend.services.openai_service import merge_analysis
+from backend.services.opener_bank import get_opener_bank
+from backend.services.session_registry import LearnerSession
+from backend.services.speechmatics_service import SpeechmaticsService, StreamingAudioInput
+from backend.services.tts_pipeline import AudioStreamSender, SpeechPipeline
 from backend.services.tts_service import TTSService
+from backend.services.unit_validation import extract_user_vocabulary, normalize_text, validate_units
 
 logger = logging.getLogger(__name__)
 
-# Common stop words across supported languages — used to filter out
-# function words from fallback vocabulary extraction. This is a best-effort
-# set covering the most frequent function words; the AI's user_vocabulary
-# field is the primary source of vocabulary units.
-_STOP_WORDS = {
-    # Filler / interjections (universal)
-    "euh", "um", "uh", "ah", "oh", "hm", "hmm", "ben", "bah", "hein",
-    # English (interface language)
-    "i", "me", "my", "you", "your", "he", "she", "it", "we", "they",
-    "the", "a", "an", "is", "am", "are", "was", "were", "be", "been",
-    "do", "does", "did", "have", "has", "had", "and", "or", "but", "not",
-    "yes", "no", "so", "if", "in", "on", "at", "to", "of", "for",
-    # French
-    "je", "tu", "il", "elle", "on", "nous", "vous", "ils", "elles",
-    "le", "la", "les", "un", "une", "des", "du", "de", "d",
-    "à", "au", "aux", "en", "et", "ou", "mais", "donc", "car",
-    "que", "qui", "ne", "pas", "est", "ont", "sont", "c",
-    "ce", "se", "y", "l", "s", "n", "oui", "non", "très",
-    "suis", "es", "sommes", "avons", "avez", "fait", "ca", "ça",
-    # Spanish
-    "yo", "tú", "él", "ella", "usted", "nosotros", "ellos", "ellas",
-    "el", "lo", "las", "los", "es", "son", "sí",
-    "que", "de", "en", "y", "no", "por", "con", "para",
-    # German
-    "ich", "du", "er", "sie", "wir", "ihr", "das", "der", "die",
-    "ist", "bin", "sind", "und", "oder", "aber", "nicht", "ja", "nein",
-    "ein", "eine", "den", "dem", "des",
-    # Italian
-    "io", "lui", "lei", "noi", "voi", "loro",
-    "è", "sono", "di", "che", "con", "per", "sì",
-    # Portuguese
-    "eu", "ele", "ela", "nós", "eles", "elas",
-    "é", "são", "sim", "não", "com", "para",
-    # Chinese / Japanese / Korean — single-char particles
-    "的", "了", "是", "在", "我", "你", "他", "她",
-    "は", "が", "を", "に", "で", "の", "と",
-    "은", "는", "이", "가", "을", "를",
-}
-
-
-def _extract_user_vocabulary(user_text: str) -> list[str]:
-    """Extract meaningful words/phrases from user's spoken text (any language).
-
-    Used as a fallback when OpenAI doesn't return user_vocabulary.
-    Works with Latin scripts (incl. contractions), CJK, Cyrillic, Arabic, Devanagari.
-    """
-    text = user_text.strip()
-    if not text:
-        return []
-
-    # Match word tokens: Latin (with accents + contractions), CJK characters,
-    # Cyrillic, Arabic, Devanagari, Hangul
-    tokens = re.findall(
-        r"[a-zA-ZàâäéèêëïîôùûüÿçœæÀÂÄÉÈÊËÏÎÔÙÛÜŸÇŒÆáíóúñÁÍÓÚÑößÖÜÄ]+"
-        r"(?:'[a-zA-ZàâäéèêëïîôùûüÿçœæÀÂÄÉÈÊËÏÎÔÙÛÜŸÇŒÆáíóúñÁÍÓÚÑößÖÜÄ]+)?"
-        r"|[\u4e00-\u9fff\u3400-\u4dbf]+"   # CJK
-        r"|[\u3040-\u309f\u30a0-\u30ff]+"    # Hiragana + Katakana
-        r"|[\uac00-\ud7af\u1100-\u11ff]+"    # Hangul
-        r"|[\u0400-\u04ff]+"                 # Cyrillic
-        r"|[\u0600-\u06ff\u0750-\u077f]+"    # Arabic
-        r"|[\u0900-\u097f]+"                 # Devanagari
-        , text
-    )
-
-    result = []
-    for token in tokens:
-        lower = token.lower()
-        if lower in _STOP_WORDS or len(lower) < 2:
-            continue
-        result.append(token)
-
-    # If everything was filtered out, keep the original text as-is
-    if not result and text:
-        result = [text]
-
-    return result
-
-
-def _normalize_text(value: str) -> str:
-    return " ".join((value or "").strip().lower().replace("\u2019", "'").split())
-
-
-def _contains_space(value: str) -> bool:
-    return " " in _normalize_text(value)
-
-
-def _tokenize(value: str) -> list[str]:
-    return re.findall(r"\w+", _normalize_text(value))
-
-
-def _extract_pattern_candidates(corrected_text: str) -> list[dict]:
-    """Extract grammar pattern candidates from corrected text.
-
-    Language-agnostic: patterns are detected from multi-word phrases
-    that the AI already corrected. Specific pattern detection for
-    individual languages can be added here as needed.
-    """
-    candidates: list[dict] = []
-    # French patterns (only fire if text contains French markers)
-    if re.search(r"\bje suis\s+\w+", corrected_text):
-        candidates.append({
-            "text": "je suis + [noun]",
-            "kind": "pattern",
-            "source": "corrected",
-            "canonical_key": "pattern:identity_je_suis_noun",
-        })
-    if re.search(r"\bj'aime\s+.+", corrected_text):
-        candidates.append({
-            "text": "j'aime + [object]",
-            "kind": "pattern",
-            "source": "corrected",
-            "canonical_key": "pattern:preference_jaime_object",
-        })
-    if re.search(r"\b(?:ça va|ca va)\b", corrected_text):
-        candidates.append({
-            "text": "ça va",
-            "kind": "pattern",
-            "source": "corrected",
-            "canonical_key": "pattern:greeting_ca_va",
-        })
-    # Spanish patterns
-    if re.search(r"\bme llamo\s+\w+", corrected_text):
-        candidates.append({
-            "text": "me llamo + [name]",
-            "kind": "pattern",
-            "source": "corrected",
-            "canonical_key": "pattern:identity_me_llamo",
-        })
-    if re.search(r"\bme gusta\s+.+", corrected_text):
-        candidates.append({
-            "text": "me gusta + [object]",
-            "kind": "pattern",
-            "source": "corrected",
-            "canonical_key": "pattern:preference_me_gusta",
-        })
-    # German patterns
-    if re.search(r"\bich bin\s+\w+", corrected_text):
-        candidates.append({
-            "text": "ich bin + [noun/adj]",
-            "kind": "pattern",
-            "source": "corrected",
-            "canonical_key": "pattern:identity_ich_bin",
-        })
-    return candidates
-
-
-def _mission_keywords(mission_hint: str) -> set[str]:
-    words = _tokenize(mission_hint)
-    return {w for w in words if len(w) >= 4 and w not in _STOP_WORDS}
-
-
-def _canonicalize_candidates(raw_units: list[str], corrected_text: str, source_text: str) -> list[dict]:
-    """Canonicalize candidates with precedence pattern > sentence > chunk > word."""
-    items: list[dict] = _extract_pattern_candidates(corrected_text)
-    seen_norm: set[str] = set()
-
-    for idx, raw in enumerate(raw_units):
-        text = _normalize_text(raw)
-        if not text or text in seen_norm:
-            continue
-        seen_norm.add(text)
-        tokens = _tokenize(text)
-        # Sentence = multi-word phrase with 3+ tokens (typically the first item from the LLM)
-        if _contains_space(text) and len(tokens) >= 3:
-            kind = "sentence"
-        elif _contains_space(text):
-            kind = "chunk"
-        else:
-            kind = "word"
-        canonical_key = f"{kind}:{text}"
-        # Detect common patterns across languages and promote to pattern kind
-        pattern_map = {
-            # French
-            "je suis ": ("pattern:identity_je_suis_noun", "je suis + [noun]"),
-            "j'aime ": ("pattern:preference_jaime_object", "j'aime + [object]"),
-            # Spanish
-            "me llamo ": ("pattern:identity_me_llamo", "me llamo + [name]"),
-            "me gusta ": ("pattern:preference_me_gusta", "me gusta + [object]"),
-            # German
-            "ich bin ": ("pattern:identity_ich_bin", "ich bin + [noun/adj]"),
-            "ich mag ": ("pattern:preference_ich_mag", "ich mag + [object]"),
-        }
-        matched_pattern = False
-        for prefix, (pkey, ptext) in pattern_map.items():
-            if text.startswith(prefix):
-                canonical_key = pkey
-                kind = "pattern"
-                text = ptext
-                matched_pattern = True
-                break
-        if not matched_pattern and text in {"ca va", "ça va"}:
-            canonical_key = "pattern:greeting_ca_va"
-            kind = "pattern"
-            text = "ça va"
-        items.append({
-            "text": text,
-            "kind": kind,
-            "source": "as_said" if text in source_text else "corrected",
-            "canonical_key": canonical_key,
-        })
-
-    # Only add individual word fallbacks if we have zero sentence/chunk/pattern candidates
-    has_phrases = any(i["kind"] in ("sentence", "chunk", "pattern") for i in items)
-    if not has_phrases:
-        for tok in _tokenize(corrected_text):
-            if tok in _STOP_WORDS or len(tok) <= 1:
-                continue
-            key = f"word:{tok}"
-            if any(i.get("canonical_key") == key for i in items):
-                continue
-            items.append({
-                "text": tok,
-                "kind": "word",
-                "source": "corrected",
-                "canonical_key": key,
-            })
-
-    # Group by canonical key and keep best by precedence.
-    rank = {"pattern": 4, "sentence": 3, "chunk": 2, "word": 1}
-    grouped: dict[str, dict] = {}
-    for item in items:
-        key = item["canonical_key"]
-        if key not in grouped or rank.get(item["kind"], 0) > rank.get(grouped[key]["kind"], 0):
-            grouped[key] = item
-    return list(grouped.values())
-
-
-def _strict_validate_units(
-    user_text: str,
-    corrected_form: str,
-    raw_units: list[str],
-    mission_hint: str,
-) -> tuple[list[dict], list[dict], float]:
-    source_text = _normalize_text(user_text)
-    corrected_text = _normalize_text(corrected_form) if corrected_form else source_text
-    candidates = raw_units or _extract_user_vocabulary(user_text)
-    canonical_items = _canonicalize_candidates(candidates, corrected_text, source_text)
-    mission_kw = _mission_keywords(mission_hint)
-
-    accepted: list[dict] = []
-    rejected: list[dict] = []
-    selected_token_sets: list[set[str]] = []
-    selected_pattern_token_sets: list[set[str]] = []
-
-    for item in canonical_items:
-        text = item["text"]
-        kind = item["kind"]
-        canonical_key = item["canonical_key"]
-        tokens = set(_tokenize(text))
-
-        if kind not in ("pattern", "sentence"):
-            # Reject incomplete patterns (verb stubs without complements)
-            _INCOMPLETE_PATTERNS = {
-                "je suis", "j'aime", "j'ai envie de", "jai envie de",  # French
-                "me llamo", "me gusta",  # Spanish
-                "ich bin", "ich mag",  # German
-                "io sono", "mi piace",  # Italian
-            }
-            if kind == "chunk" and text in _INCOMPLETE_PATTERNS:
-                rejected.append({
-                    "text": text, "kind": kind, "source": item["source"],
-                    "confidence": 0.45, "is_accepted": False, "reject_reason": "incomplete_pattern",
-                    "canonical_key": canonical_key, "mission_relevance": 0.0,
-                })
-                continue
-            if kind == "chunk" and len(tokens) >= 10 and not canonical_key.startswith("pattern:"):
-                rejected.append({
-                    "text": text, "kind": kind, "source": item["source"],
-                    "confidence": 0.5, "is_accepted": False, "reject_reason": "too_broad",
-                    "canonical_key": canonical_key, "mission_relevance": 0.0,
-                })
-                continue
-            if len(text) <= 1:
-                rejected.append({
-                    "text": text, "kind": kind, "source": item["source"],
-                    "confidence": 0.3, "is_accepted": False, "reject_reason": "too_short",
-                    "canonical_key": canonical_key, "mission_relevance": 0.0,
-                })
-                continue
-            if text in _STOP_WORDS:
-                rejected.append({
-                    "text": text, "kind": kind, "source": item["source"],
-                    "confidence": 0.35, "is_accepted": False, "reject_reason": "stop_word",
-                    "canonical_key": canonical_key, "mission_relevance": 0.0,
-                })
-                continue
-
-        mission_relevance = 0.0
-        if mission_kw:
-            overlap = len(tokens.intersection(mission_kw))
-            mission_relevance = min(1.0, overlap / max(1, len(mission_kw)))
-        if kind in ("pattern", "sentence"):
-            mission_relevance = max(mission_relevance, 0.7)
-
-        # Strict user-text check: at least half the unit's tokens must appear
-        # in the user's actual spoken text. This prevents AI-generated words
-        # from leaking into the knowledge graph.
-        unit_tokens = set(_tokenize(text))
-        source_tokens = set(_tokenize(source_text))
-        if unit_tokens and source_tokens:
-            overlap = len(unit_tokens & source_tokens)
-            overlap_ratio = overlap / len(unit_tokens)
-        else:
-            overlap_ratio = 0.0
-        if overlap_ratio < 0.5 and kind != "pattern":
-            rejected.append({
-                "text": text, "kind": kind, "source": item["source"],
-                "confidence": 0.4, "is_accepted": False, "reject_reason": "not_in_user_speech",
-                "canonical_key": canonical_key, "mission_relevance": 0.0,
-            })
-            continue
-
-        in_corrected = text in corrected_text or canonical_key.startswith("pattern:")
-        in_source = text in source_text or overlap_ratio >= 0.8
-        if corrected_form and not in_corrected and kind in ("chunk", "word"):
-            rejected.append({
-                "text": text, "kind": kind, "source": item["source"],
-                "confidence": 0.5, "is_accepted": False, "reject_reason": "grammar_invalid",
-                "canonical_key": canonical_key, "mission_relevance": mission_relevance,
-            })
-            continue
-        confidence = 0.9 if (in_source and in_corrected) else (0.75 if (in_source or in_corrected) else 0.55)
-        if kind == "pattern":
-            confidence = max(confidence, 0.82)
-        if kind == "sentence":
-            confidence = max(confidence, 0.85)
-
-        # Borderline confidence needs mission relevance.
-        if confidence < 0.6:
-            rejected.append({
-                "text": text, "kind": kind, "source": item["source"],
-                "confidence": confidence, "is_accepted": False, "reject_reason": "low_confidence",
-                "canonical_key": canonical_key, "mission_relevance": mission_relevance,
-            })
-            continue
-        if confidence < 0.72 and mission_relevance < 0.5:
-            rejected.append({
-                "text": text, "kind": kind, "source": item["source"],
-                "confidence": confidence, "is_accepted": False, "reject_reason": "off_mission",
-                "canonical_key": canonical_key, "mission_relevance": mission_relevance,
-            })
-            continue
-
-        if kind in ("chunk", "word") and any(tokens and tokens.issubset(p) for p in selected_pattern_token_sets):
-            rejected.append({
-                "text": text, "kind": kind, "source": item["source"],
-                "confidence": confidence, "is_accepted": False, "reject_reason": "covered_by_pattern",
-                "canonical_key": canonical_key, "mission_relevance": mission_relevance,
-            })
-            continue
-
-        # Reject words fully covered by accepted sentences/chunks/patterns unless extremely mission-critical.
-        if kind == "word" and any(tokens.issubset(s) for s in selected_token_sets) and mission_relevance < 0.95:
-            rejected.append({
-                "text": text, "kind": kind, "source": item["source"],
-                "confidence": confidence, "is_accepted": False, "reject_reason": "covered_by_chunk",
-                "canonical_key": canonical_key, "mission_relevance": mission_relevance,
-            })
-            continue
-
-        accepted.append({
-            "text": text,
-            "kind": kind,
-            "source": item["source"],
-            "confidence": confidence,
-            "is_accepted": True,
-            "reject_reason": None,
-            "canonical_key": canonical_key,
-            "mission_relevance": mission_relevance,
-        })
-        selected_token_sets.append(tokens)
-        if kind in ("pattern", "sentence"):
-            selected_pattern_token_sets.append(tokens)
-
-    accepted_ratio = (len(accepted) / max(1, len(canonical_items)))
-    correction_penalty = 0.2 if corrected_form and _normalize_text(corrected_form) != source_text else 0.0
-    quality = max(0.0, min(1.0, accepted_ratio * 0.7 + (0.3 if accepted else 0.0) - correction_penalty))
-    return accepted, rejected, quality
-
 
 def _build_mission_hint(turn_number: int, level: str) -> str:
     missions = [
@@ -432,23 +66,65 @@ def _build_mission_hint(turn_number: int, level: str) -> str:
 
 router = APIRouter(tags=["conversation"])
 
-# Shared service instances — single-user demo, instantiated once.
+# Stateless services are shared; tutor/memory services live on each LearnerSession.
 _stt_service = SpeechmaticsService()
-_openai_service = OpenAIService()
-_backboard_service = BackboardService()
 _tts_service = TTSService()
 
 
 @router.websocket("/ws/conversation")
-async def conversation_ws(websocket: WebSocket) -> None:
-    """WebSocket endpoint for real-time conversation with the AI tutor."""
+async def conversation_ws(
+    websocket: WebSocket,
+    session_id: str | None = None,
+    profile_id: str | None = None,
+    tts: str | None = None,
+    llm_cache: str | None = None,
+    llm_schema: str | None = None,
+) -> None:
+    """WebSocket endpoint for real-time conversation with the AI tutor.
+
+    The optional ?tts= query is a comma-separated set of output modes:
+    - segments: reply audio as ordered tts_segment messages (one per
+      sentence, the first while the LLM is still streaming) + tts_done
+    - stream:   audio as binary frames between tts_stream_start/_end
+      markers instead of base64 JSON (per segment when combined)
+    Without it, clients get the single {"type": "tts"} message.
+
+    ?llm_cache=off opts the session out of the shared LLM response cache.
+    ?llm_schema=compact|verbose picks the LLM output schema for the session.
+    """
     await websocket.accept()
-
+    tts_modes = set((tts or "").split(","))
+
+    session = await get_registry().acquire(session_id or profile_id, profile_id=profile_id)
+    session.connections += 1
+    if llm_cache is not None:
+        session.openai_service.cache_responses = llm_cache.lower() not in ("off", "0", "false", "no")
+    if llm_schema is not None:
+        session.openai_service.set_compact_schema(llm_schema.lower() == "compact")
+    # In-flight streamed utterance: frames are fed to STT as they arrive
+    audio_input: StreamingAudioInput | None = None
+    stt_task: asyncio.Task | None = None
+    stream_mission_context: dict | None = None
+    # Late-analysis / Backboard follow-ups of this connection's turns
+    background: set[asyncio.Task] = set()
     try:
         while True:
-            raw = await websocket.receive_text()
+            incoming = await websocket.receive()
+            if incoming["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(incoming.get("code", 1000))
+
+            frame = incoming.get("bytes")
+            if frame is not None:
+                if audio_input is None:
+                    await websocket.send_json(
+                        {"type": "error", "message": "Binary audio frame without audio_start"}
+                    )
+                else:
+                    audio_input.push(frame)
+                continue
+
             try:
-                message = json.loads(raw)
+                message = json.loads(incoming.get("text") or "")
             except json.JSONDecodeError:
                 await websocket.send_json(
                     {"type": "error", "message": "Invalid JSON"}
@@ -459,14 +135,47 @@ async def conversation_ws(websocket: WebSocket) -> None:
             content = message.get("content", "")
             mission_context = message.get("mission_context")
 
-            if msg_type not in ("text", "audio"):
+            if msg_type == "audio_start":
+                if stt_task is not None:
+                    stt_task.cancel()
+                stream_mission_context = mission_context
+                stream_language = (mission_context or {}).get("language", "fr")
+                audio_input = StreamingAudioInput(encoding=message.get("encoding", "webm"))
+                stt_task = asyncio.create_task(
+                    _stt_service.transcribe_stream(audio_input, session.state.turn - 1, language=stream_language)
+                )
+                await websocket.send_json({"type": "status", "step": "listening"})
+                continue
+
+            if msg_type == "audio_cancel":
+                if stt_task is not None:
+                    stt_task.cancel()
+                audio_input, stt_task = None, None
+                continue
+
+            if msg_type == "audio_end":
+                if audio_input is None or stt_task is None:
+                    await websocket.send_json(
+                        {"type": "error", "message": "audio_end without audio_start"}
+                    )
+                    continue
+                audio_input.end()
+                msg_type = "audio_stream"
+                mission_context = mission_context or stream_mission_context
+
+            if msg_type not in ("text", "audio", "audio_stream"):
                 await websocket.send_json(
                     {"type": "error", "message": f"Unknown message type: {msg_type}"}
                 )
                 continue
 
-            state = get_session_state()
-            if state.demo_complete:
+            session.touch()
+            pending_stt = None
+            if msg_type == "audio_stream":
+                pending_stt, stt_task, audio_input = stt_task, None, None
+            if session.state.demo_complete:
+                if pending_stt is not None:
+                    pending_stt.cancel()
                 await websocket.send_json({
                     "type": "demo_complete",
                     "message": "Demo complete! Reset to try again.",
@@ -474,13 +183,17 @@ async def conversation_ws(websocket: WebSocket) -> None:
                 continue
 
             try:
-                result = await _process_turn(
-                    websocket=websocket,
-                    msg_type=msg_type,
-                    content=content,
-                    state=state,
-                    mission_context=mission_context,
-                )
+                async with session.lock:
+                    result = await _process_turn(
+                        websocket=websocket,
+                        msg_type=msg_type,
+                        content=content,
+                        session=session,
+                        mission_context=mission_context,
+                        stt_task=pending_stt,
+                        tts_modes=tts_modes,
+                        background=background,
+                    )
                 # _process_turn sends turn_response directly via websocket.
                 # If it returns a dict (e.g. error), send it.
                 if result is not None:
@@ -492,21 +205,35 @@ async def conversation_ws(websocket: WebSocket) -> None:
                 )
 
     except WebSocketDisconnect:
-        logger.info("WebSocket client disconnected")
+        logger.info("WebSocket client disconnected (session=%s)", session.session_id)
+    finally:
+        if stt_task is not None:
+            stt_task.cancel()
+        for task in background:
+            task.cancel()
+        session.connections -= 1
+        session.touch()
 
 
 async def _process_turn(
     websocket: WebSocket,
     msg_type: str,
     content: str,
-    state: "SessionState",
+    session: LearnerSession,
     mission_context: dict | None = None,
+    stt_task: asyncio.Task | None = None,
+    tts_modes: set[str] | None = None,
+    background: set[asyncio.Task] | None = None,
 ) -> dict:
     """Process a single conversation turn through the full pipeline.
 
     Sends status messages via WebSocket during processing so the
-    frontend can show progress updates to the user.
+    frontend can show progress updates to the user. Follow-up work that
+    outlives the turn is added to `background` (cancelled on disconnect).
     """
+    state = session.state
+    openai_service = session.openai_service
+    backboard_service = session.backboard_service
     turn_index = state.turn - 1
     total_mock_turns = len(MOCK_CONVERSATION)
     t0 = time.perf_counter()
@@ -515,19 +242,27 @@ async def _process_turn(
 
     # ── Language configuration ────────────────────────────────────────
     target_language = (mission_context or {}).get("language", "fr")
+    session.language = target_language
     _stt_service.set_language(target_language)
-    _openai_service.set_language(target_language)
-    _backboard_service.set_language(target_language)
+    openai_service.set_language(target_language)
+    backboard_service.set_language(target_language)
     _tts_service.set_language(target_language)
 
     # ── Step 1: STT ──────────────────────────────────────────────────
-    if msg_type == "audio":
+    if msg_type == "audio_stream":
+        # Audio was already streamed to STT while the learner spoke —
+        # only the tail after end-of-utterance is on the critical path.
+        await websocket.send_json({"type": "status", "step": "transcribing"})
+        stt_start = time.perf_counter()
+        user_text = await stt_task
+        stt_ms = int((time.perf_counter() - stt_start) * 1000)
+    elif msg_type == "audio":
         await websocket.send_json({"type": "status", "step": "transcribing"})
         import base64
 
         audio_bytes = base64.b64decode(content)
         stt_start = time.perf_counter()
-        user_text = await _stt_service.transcribe(audio_bytes, turn_index)
+        user_text = await _stt_service.transcribe(audio_bytes, turn_index, language=target_language)
         stt_ms = int((time.perf_counter() - stt_start) * 1000)
     else:
         if _stt_service.mock_mode:
@@ -578,88 +313,191 @@ async def _process_turn(
             "and gently reuse vocabulary from this domain. Do NOT quiz. Stay conversational.\n"
         )
 
-    # Inject fading vocabulary so the AI naturally reactivates them
-    fading_from_frontend = mission_context.get("fading_targets", []) if mission_context else []
-    if fading_from_frontend:
+    # Inject fading vocabulary so the AI naturally reactivates them — units due
+    # for review come first; older clients may still send their own picks
+    fading_targets = [card.label for card in session.reviews.due(k=SRS_PROMPT_DUE_K)]
+    for label in (mission_context.get("fading_targets") or []) if mission_context else []:
+        if len(fading_targets) >= SRS_PROMPT_DUE_K:
+            break
+        if label not in fading_targets:
+            fading_targets.append(label)
+    if fading_targets:
         mission_prompt_part += (
             f"\nFading vocabulary (naturally weave 1-2 into conversation): "
-            f"{', '.join(fading_from_frontend[:5])}\n"
+            f"{', '.join(fading_targets)}\n"
             "Do NOT quiz or drill these — just use them naturally in YOUR speech "
             "so the learner hears them again.\n"
         )
 
+    # ── Opener messages (category starters) — answered from the opener bank ──
+    is_opener = bool((mission_context or {}).get("is_opener"))
+    opener = None
+    if is_opener and not MOCK_MODE:  # Mock mode keeps its scripted replies
+        opener = get_opener_bank().pick(target_language, category_focus, state.turn)
+
     # ── Step 2: LLM (streaming) + TTS fires on FIRST SENTENCE mid-stream ──
     await websocket.send_json({"type": "status", "step": "thinking"})
     llm_start = time.perf_counter()
 
     early_tts_task = None
     tts_fire_time = [0.0]  # track when TTS was fired
+    tts_modes = tts_modes or set()
+    reply_turn = state.turn
+    send_bytes = websocket.send_bytes if "stream" in tts_modes else None
+    stream_generation = [0]  # Bumped to abort the current binary audio stream
+    aborted_streams: list[asyncio.Task] = []
+    # Sentence-level TTS: segments go out while spoken_response is still streaming
+    speech = (
+        SpeechPipeline(_tts_service, websocket.send_json, turn=reply_turn, send_bytes=send_bytes)
+        if "segments" in tts_modes else None
+    )
 
     async def _on_spoken_ready(text: str):
         nonlocal early_tts_task
         tts_fire_time[0] = time.perf_counter()
         logger.info(">>> TTS FIRED mid-stream (%d chars): '%s'", len(text), text[:60])
+        if speech is not None:
+            speech.finish(text)
+            return
+        if send_bytes is not None:
+            # One audio stream per turn — a replacement text aborts the earlier one
+            await _abort_stream()
+            # Binary frames go out as Edge TTS produces them
+            streamer = AudioStreamSender(websocket.send_json, send_bytes)
+            generation = stream_generation[0]
+            early_tts_task = asyncio.create_task(streamer.send(
+                _tts_service.stream(text), text, reply_turn,
+                keep_going=lambda: generation == stream_generation[0],
+            ))
+            return
         early_tts_task = asyncio.create_task(_tts_service.synthesize(text))
 
-    response_data, early_spoken = await _openai_service.generate_response_streaming(
-        user_text, turn_index, mission_context=mission_prompt_part,
-        on_spoken_ready=_on_spoken_ready,
-    )
+    async def _abort_stream():
+        """Stop the turn's audio stream before its next frame and tell the client to drop it."""
+        nonlocal early_tts_task
+        if early_tts_task is None:
+            return
+        stream_generation[0] += 1
+        # Kept until it sends its "aborted" end marker (the loop holds tasks weakly)
+        aborted_streams.append(early_tts_task)
+        early_tts_task = None
+        await websocket.send_json({"type": "tts_reset", "turn": reply_turn})
+
+    async def _on_spoken_reset():
+        # The provider behind the spoken_response failed; another one answers
+        nonlocal early_tts_task
+        logger.info(">>> TTS reset: spoken_response taken back")
+        if speech is not None:
+            speech.reset()
+        elif send_bytes is not None:
+            await _abort_stream()
+        elif early_tts_task is not None:
+            early_tts_task.cancel()
+            early_tts_task = None
+
+    late_analysis = None
+    try:
+        if opener is not None:
+            # Pre-written reply: no LLM call; its audio is pre-rendered / cached
+            logger.info("Opener answered from the bank (%s/%s)", opener.language, opener.category)
+            response_data = opener.response(state.level)
+            openai_service.inject_turn(user_text, opener.spoken_response)  # Context for the next real turn
+        elif LLM_SPLIT_MODE:
+            # Two-stage turn: TTS waits only on the short spoken call; the
+            # analysis call runs alongside and is merged if it lands in time.
+            response_data, early_spoken, analysis_task = await openai_service.generate_response_split(
+                user_text, turn_index, mission_context=mission_prompt_part,
+                on_spoken_ready=_on_spoken_ready, on_spoken_reset=_on_spoken_reset,
+                on_spoken_delta=speech.feed if speech is not None else None,
+            )
+            try:
+                analysis = await asyncio.wait_for(asyncio.shield(analysis_task), LLM_ANALYSIS_WAIT_S)
+                response_data = merge_analysis(response_data, analysis)
+            except asyncio.TimeoutError:
+                logger.info("Analysis not ready after %.1fs — sending turn, update follows", LLM_ANALYSIS_WAIT_S)
+                late_analysis = analysis_task
+        else:
+            response_data, early_spoken = await openai_service.generate_response_streaming(
+                user_text, turn_index, mission_context=mission_prompt_part,
+                on_spoken_ready=_on_spoken_ready, on_spoken_reset=_on_spoken_reset,
+                on_spoken_delta=speech.feed if speech is not None else None,
+            )
+    except BaseException:
+        if speech is not None:
+            speech.cancel()
+        raise
     llm_ms = int((time.perf_counter() - llm_start) * 1000)
     logger.info(">>> PIPELINE: STT=%dms | LLM=%dms | TTS fired at +%dms from start",
                 stt_ms, llm_ms, int((tts_fire_time[0] - t0) * 1000) if tts_fire_time[0] else -1)
     tutor_response = TutorResponse(**response_data)
 
-    # ── Opener messages (category starters) — skip vocab extraction ──
-    is_opener = bool((mission_context or {}).get("is_opener"))
+    # ── Opener messages skip vocab extraction ──
     if is_opener:
-        tutor_response.user_vocabulary = []
-        tutor_response.corrected_form = ""
         logger.info("Opener message detected — skipping vocabulary extraction")
+    current_hint = state.mission_state.get("current_hint") or _build_mission_hint(state.turn, tutor_response.user_level_assessment)
 
-    # ── Fallback: if AI didn't return user_vocabulary, extract from user_said ──
-    if not is_opener and not tutor_response.user_vocabulary and user_text:
-        tutor_response.user_vocabulary = _extract_user_vocabulary(user_text)
-        logger.info("Fallback user_vocabulary: %s", tutor_response.user_vocabulary)
+    def _apply_pedagogy(tutor_response: TutorResponse) -> dict:
+        """Validate units and score the turn (re-run when a late analysis lands)."""
+        if is_opener:
+            tutor_response.user_vocabulary = []
+            tutor_response.corrected_form = ""
+
+        # ── Fallback: if AI didn't return user_vocabulary, extract from user_said ──
+        if not is_opener and not tutor_response.user_vocabulary and user_text:
+            tutor_response.user_vocabulary = extract_user_vocabulary(user_text)
+            logger.info("Fallback user_vocabulary: %s", tutor_response.user_vocabulary)
+
+        # ── Step 2.5: strict pedagogical validation gate ────────────────
+        accepted_units, rejected_units, quality = validate_units(
+            user_text=user_text if not is_opener else "",
+            corrected_form=tutor_response.corrected_form,
+            raw_units=tutor_response.user_vocabulary,
+            mission_hint=current_hint,
+        )
+        tutor_response.validated_user_units = accepted_units + rejected_units
+        tutor_response.user_vocabulary = [u["text"] for u in accepted_units]
+        tutor_response.quality_score = quality
+        tutor_response.next_mission_hint = _build_mission_hint(reply_turn, tutor_response.user_level_assessment)
+        tutor_response.corrections = tutor_response.corrections or (
+            [{
+                "as_said": user_text,
+                "corrected": tutor_response.corrected_form,
+                "rule": "Use the correct infinitive structure after modal verbs.",
+                "severity": "major",
+            }] if tutor_response.corrected_form and normalize_text(tutor_response.corrected_form) != normalize_text(user_text) else []
+        )
 
-    # ── Step 2.5: strict pedagogical validation gate ────────────────
-    current_hint = state.mission_state.get("current_hint") or _build_mission_hint(state.turn, tutor_response.user_level_assessment)
-    accepted_units, rejected_units, quality = _strict_validate_units(
-        user_text=user_text if not is_opener else "",
-        corrected_form=tutor_response.corrected_form,
-        raw_units=tutor_response.user_vocabulary,
-        mission_hint=current_hint,
-    )
-    tutor_response.validated_user_units = accepted_units + rejected_units
-    tutor_response.user_vocabulary = [u["text"] for u in accepted_units]
-    tutor_response.quality_score = quality
-    tutor_response.next_mission_hint = _build_mission_hint(state.turn, tutor_response.user_level_assessment)
-    tutor_response.corrections = tutor_response.corrections or (
-        [{
-            "as_said": user_text,
-            "corrected": tutor_response.corrected_form,
-            "rule": "Use the correct infinitive structure after modal verbs.",
-            "severity": "major",
-        }] if tutor_response.corrected_form and _normalize_text(tutor_response.corrected_form) != _normalize_text(user_text) else []
-    )
+        # Mission progress (3 deterministic tasks max)
+        mission_tasks = [
+            {"id": "quality", "label": "Reach at least 70% quality", "done": quality >= 0.7},
+            {"id": "units", "label": "Validate at least 2 useful units", "done": len(accepted_units) >= 2},
+            {"id": "turns", "label": "Complete 2 turns in this session", "done": reply_turn >= 2},
+        ]
+        done_count = len([t for t in mission_tasks if t["done"]])
+        mission_progress = {"done": done_count, "total": 3, "percent": int((done_count / 3) * 100)}
+        tutor_response.mission_progress = mission_progress
+        return {
+            "quality_score": tutor_response.quality_score,
+            "accepted_units": accepted_units,
+            "rejected_units": rejected_units,
+            "canonical_units": [u for u in accepted_units if u.get("canonical_key")],
+            "next_mission_hint": tutor_response.next_mission_hint,
+            "mission_progress": mission_progress,
+            "mission_tasks": mission_tasks,
+        }
+
+    pedagogy = _apply_pedagogy(tutor_response)
+    accepted_units, rejected_units = pedagogy["accepted_units"], pedagogy["rejected_units"]
+    mission_tasks, mission_progress = pedagogy["mission_tasks"], pedagogy["mission_progress"]
     total_ms = int((time.perf_counter() - t0) * 1000)
     tutor_response.latency_ms = {"stt": stt_ms, "llm": llm_ms, "total": total_ms}
 
-    # Mission progress (3 deterministic tasks max)
-    mission_tasks = [
-        {"id": "quality", "label": "Reach at least 70% quality", "done": quality >= 0.7},
-        {"id": "units", "label": "Validate at least 2 useful units", "done": len(accepted_units) >= 2},
-        {"id": "turns", "label": "Complete 2 turns in this session", "done": state.turn >= 2},
-    ]
-    done_count = len([t for t in mission_tasks if t["done"]])
-    mission_progress = {"done": done_count, "total": 3, "percent": int((done_count / 3) * 100)}
-    tutor_response.mission_progress = mission_progress
-
     # ── Step 3: Update session state immediately ────────────────────
     turn = ConversationTurn(
         turn_number=state.turn,
         user_said=user_text,
         response=tutor_response,
+        recorded_at=time.time(),
     )
     state.conversation_history.append(turn)
     state.level = tutor_response.user_level_assessment
@@ -679,10 +517,13 @@ async def _process_turn(
         "mission_progress": mission_progress,
     })
     state.diagnostics = state.diagnostics[-20:]
+    session.reviews.review_turn(turn)
+    session.graph.set_language(target_language)
+    graph_update = publish_graph(session)
 
     # Persist to Supabase after each turn
     from backend.routes.session import save_after_turn
-    await save_after_turn()
+    await save_after_turn(session)
 
     if MOCK_MODE and state.turn > total_mock_turns:
         state.demo_complete = True
@@ -691,15 +532,8 @@ async def _process_turn(
     response_payload = {
         "type": "turn_response",
         "turn": turn.model_dump(),
-        "pedagogy": {
-            "quality_score": tutor_response.quality_score,
-            "accepted_units": accepted_units,
-            "rejected_units": rejected_units,
-            "canonical_units": [u for u in accepted_units if u.get("canonical_key")],
-            "next_mission_hint": tutor_response.next_mission_hint,
-            "mission_progress": mission_progress,
-            "mission_tasks": mission_tasks,
-        },
+        "pedagogy": pedagogy,
+        "graph": graph_update,
         "timings": tutor_response.latency_ms,
         "tts": None,
         "session": {
@@ -712,29 +546,92 @@ async def _process_turn(
 
     # ── Step 5: TTS — send BEFORE returning (don't risk WebSocket closing) ──
     try:
-        if early_tts_task:
-            tts_result = await early_tts_task
+        if speech is not None:
+            speech.finish(tutor_response.spoken_response)
+            segments = await speech.wait()
+            total_to_audio = int((time.perf_counter() - t0) * 1000)
+            logger.info(">>> AUDIO DONE: %dms total, %d segments (first at +%sms)",
+                        total_to_audio, segments, speech.first_segment_ms)
+        elif send_bytes is not None:
+            if early_tts_task is None:
+                await _on_spoken_ready(tutor_response.spoken_response)
+            audio_bytes = await early_tts_task
+            await asyncio.gather(*aborted_streams, return_exceptions=True)
+            total_to_audio = int((time.perf_counter() - t0) * 1000)
+            logger.info(">>> AUDIO STREAMED: %dms total, %d bytes", total_to_audio, audio_bytes)
         else:
-            tts_result = await _tts_service.synthesize(tutor_response.spoken_response)
-        total_to_audio = int((time.perf_counter() - t0) * 1000)
-        logger.info(">>> AUDIO READY: %dms total (mode=%s)", total_to_audio, tts_result.get("mode"))
-        await websocket.send_json({"type": "tts", "tts": tts_result})
+            if early_tts_task:
+                tts_result = await early_tts_task
+            elif opener is not None and opener.tts:
+                tts_result = opener.tts
+            else:
+                tts_result = await _tts_service.synthesize(tutor_response.spoken_response)
+                if opener is not None and tts_result.get("mode") == "audio":
+                    opener.tts = tts_result
+            total_to_audio = int((time.perf_counter() - t0) * 1000)
+            logger.info(">>> AUDIO READY: %dms total (mode=%s)", total_to_audio, tts_result.get("mode"))
+            await websocket.send_json({"type": "tts", "tts": tts_result})
     except Exception as exc:
         logger.error("TTS send failed (non-fatal): %s", exc)
 
     # ── Step 6: Backboard update in background (non-critical) ─────
-    async def _background_backboard():
+    async def _background_backboard(tutor_response: TutorResponse):
         try:
-            await _backboard_service.update_mastery(tutor_response.mastery_scores)
-            await _backboard_service.update_profile(
+            await backboard_service.update_mastery(tutor_response.mastery_scores)
+            await backboard_service.update_profile(
                 level=tutor_response.user_level_assessment,
-                turn=state.turn - 1,
+                turn=reply_turn,
                 border_update=tutor_response.border_update,
             )
         except Exception as exc:
             logger.error("Backboard update failed (non-fatal): %s", exc)
 
-    asyncio.create_task(_background_backboard())
+    # ── Step 7: late analysis → merge, re-validate, push turn_update ──
+    async def _apply_late_analysis():
+        try:
+            analysis = await late_analysis
+            if not analysis:
+                await _background_backboard(turn.response)
+                return
+            # Same lock as turns: never interleave with the next turn's pipeline
+            async with session.lock:
+                history = session.state.conversation_history
+                if session.state is not state or not any(t is turn for t in reversed(history)):
+                    # Reset (or reloaded) while the analysis ran — the turn is gone
+                    logger.info("Late analysis for turn %d dropped — session was reset", reply_turn)
+                    return
+                merged = TutorResponse(**merge_analysis(turn.response.model_dump(), analysis))
+                update_pedagogy = _apply_pedagogy(merged)
+                turn.response = merged
+                session.dirty_turns.add(turn.turn_number)
+                if state.turn == reply_turn + 1:
+                    # No newer turn yet — the session-level view follows this turn;
+                    # otherwise the newer turn's mastery and level must not be overwritten
+                    state.mastery_scores.update(merged.mastery_scores)
+                    state.level = merged.user_level_assessment
+                    state.mission_state = {
+                        "current_hint": merged.next_mission_hint,
+                        "tasks": update_pedagogy["mission_tasks"],
+                        **update_pedagogy["mission_progress"],
+                    }
+                session.reviews.review_turn(turn)  # Only units the late analysis added
+                graph_update = publish_graph(session)
+                await save_after_turn(session)
+                update = {
+                    "type": "turn_update", "turn": turn.model_dump(), "pedagogy": update_pedagogy, "graph": graph_update,
+                }
+            await websocket.send_json(update)
+            await _background_backboard(merged)
+        except Exception as exc:
+            logger.error("Late analysis update failed (non-fatal): %s", exc)
+
+    follow_up = asyncio.create_task(
+        _apply_late_analysis() if late_analysis is not None else _background_backboard(tutor_response)
+    )
+    if background is not None:
+        # Strong reference until done — the loop only keeps weak ones
+        background.add(follow_up)
+        follow_up.add_done_callback(background.discard)
 
     # Return None — response already sent via websocket above
     return None
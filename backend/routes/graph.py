@@ -3,371 +3,172 @@ Knowledge Graph routes for Neural-Sync Language Lab.
 
 Provides REST endpoints for retrieving the Knowledge Graph nodes and
 links. In mock mode, uses pre-built graph data filtered by turn.
-In real mode, dynamically generates graph nodes from the USER's spoken
-vocabulary only (not the AI tutor's words).
+In real mode, graph nodes come from the USER's spoken vocabulary only
+(not the AI tutor's words); the session's GraphIndex is updated once per
+turn, so these endpoints only serialize it. /api/graph/delta returns
+what changed since a client's graph version (the same delta is pushed in
+every turn_response), so a turn costs what it changed, not the whole graph.
+/api/graph returns nodes and links together with a strong ETag per graph
+version, and answers a matching If-None-Match with 304.
+/api/graph/layout returns precomputed 3D positions (NumPy force layout,
+warm-started and cached per graph version) for large nebulas.
+/api/graph/due returns the units the spaced-repetition scheduler has due
+for review (the same ones the tutor is asked to reactivate).
 """
 
+import asyncio
+import json
 import logging
+import time
+import uuid
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 
 from backend.config import MOCK_MODE
 from backend.mock_data import MOCK_GRAPH_LINKS, MOCK_GRAPH_NODES
-from backend.models import GraphLink, GraphNode
-from backend.routes.session import get_session_state
+from backend.models import GraphLink, GraphNode, SessionState
+from backend.routes.session import acquire_session
+from backend.services.session_registry import LearnerSession
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/graph", tags=["graph"])
 
-
-def _to_id(word: str) -> str:
-    """Normalize a word/phrase into a stable node id."""
-    return word.strip().lower().replace(" ", "_").replace("'", "").replace("\u2019", "")
-
-
-def _norm_text(value: str) -> str:
-    return " ".join((value or "").strip().lower().replace("\u2019", "'").split())
+# Graph versions restart with the process — the boot id keeps ETags from colliding
+_BOOT_ID = uuid.uuid4().hex[:12]
+
+
+def _mock_nodes(state: SessionState) -> list[dict]:
+    if not state.conversation_history:
+        return []
+    return [
+        GraphNode(**node).model_dump()
+        for node in MOCK_GRAPH_NODES
+        if node["turn_introduced"] <= state.turn
+    ]
+
+
+def _mock_links(state: SessionState) -> list[dict]:
+    if not state.conversation_history:
+        return []
+    return [
+        GraphLink(**link).model_dump()
+        for link in MOCK_GRAPH_LINKS
+        if link["turn_introduced"] <= state.turn
+    ]
+
+
+def _mock_delta(state: SessionState) -> dict:
+    """Mock mode has no index — every delta is a full snapshot versioned by turn."""
+    return {
+        "version": state.turn,
+        "since": None,
+        "full": True,
+        "nodes": {"added": _mock_nodes(state), "updated": [], "removed": []},
+        "links": {"added": _mock_links(state), "updated": [], "removed": []},
+    }
 
 
-def _is_component_of_phrase(token: str, phrase: str) -> bool:
-    token_n = _norm_text(token)
-    phrase_n = _norm_text(phrase)
-    if not token_n or not phrase_n or token_n == phrase_n:
-        return False
-    if " " not in phrase_n:
-        return False
-    return token_n in phrase_n.split(" ")
+def publish_graph(session: LearnerSession) -> dict:
+    """Cut a new graph version after a turn; returns the delta since the previous one."""
+    if MOCK_MODE:
+        return _mock_delta(session.state)
+    session.graph.sync(session.state.conversation_history)
+    return session.graph.publish(session.state)
 
 
-def _pedagogical_items(items: list[str]) -> list[str]:
-    """Keep pedagogically coherent units.
+@router.get("")
+async def graph_snapshot(request: Request, session_id: str | None = None) -> Response:
+    """Return nodes and links in one response, revalidated by ETag."""
+    session = await acquire_session(session_id)
+    state = session.state
+    if MOCK_MODE:
+        # Mock graph only depends on the turn (and whether the conversation started)
+        etag = f'"{_BOOT_ID}-mock-{state.turn}-{int(bool(state.conversation_history))}"'
+    else:
+        publish_graph(session)
+        etag = f'"{_BOOT_ID}-{session.graph.version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}:
+        return Response(status_code=304, headers=headers)
 
-    Rules:
-    - Keep phrase chunks (e.g. "ca va", "je m'appelle") as first-class items.
-    - Drop 1-char noise.
-    - If a phrase exists, drop split single-word components from the same set
-      (avoid "ca va" + "ca" + "va" duplicates).
-    """
-    low_signal_tokens = {
-        "ca", "ça", "va", "je", "tu", "il", "elle", "nous", "vous",
-        "de", "du", "des", "un", "une", "et", "a", "est",
-    }
-    cleaned: list[str] = []
-    seen_norm: set[str] = set()
-    for raw in items:
-        text = (raw or "").strip()
-        if len(text) <= 1:
-            continue
-        n = _norm_text(text)
-        if n in low_signal_tokens:
-            continue
-        tok_count = len(n.split(" "))
-        if tok_count >= 6 and not n.startswith(("je suis +", "j'aime +", "j'ai envie de +")):
-            continue
-        if not n or n in seen_norm:
-            continue
-        seen_norm.add(n)
-        cleaned.append(text)
-
-    phrases = [x for x in cleaned if " " in _norm_text(x)]
-    if not phrases:
-        return cleaned
-
-    result: list[str] = []
-    for item in cleaned:
-        if any(_is_component_of_phrase(item, ph) for ph in phrases):
-            continue
-        result.append(item)
-    return result
+    if MOCK_MODE:
+        body = json.dumps({"version": state.turn, "nodes": _mock_nodes(state), "links": _mock_links(state)}).encode()
+    else:
+        body = session.graph.snapshot_json()
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get("/nodes")
-async def graph_nodes() -> list[dict]:
+async def graph_nodes(session_id: str | None = None) -> list[dict]:
     """Return Knowledge Graph nodes — only words the USER spoke."""
-    state = get_session_state()
+    session = await acquire_session(session_id)
+    state = session.state
 
     if MOCK_MODE:
-        if not state.conversation_history:
-            return []
-        current_turn = state.turn
-        return [
-            GraphNode(**node).model_dump()
-            for node in MOCK_GRAPH_NODES
-            if node["turn_introduced"] <= current_turn
-        ]
-
-    nodes: list[dict] = []
-    seen_ids: set[str] = set()
-
-    def _add_node(word: str, node_type: str, mastery: float, turn: int, usage_count: int = 1):
-        node_id = _to_id(word)
-        if not node_id or node_id in seen_ids:
-            return
-        seen_ids.add(node_id)
-        nodes.append(
-            GraphNode(
-                id=node_id,
-                label=word,
-                type=node_type,
-                mastery=min(1.0, max(0.0, mastery)),
-                level=state.level,
-                turn_introduced=turn,
-                usage_count=usage_count,
-            ).model_dump()
-        )
-
-    # Pass 1: Collect stats across all turns
-    unit_stats: dict[str, dict] = {}
-    for t in state.conversation_history:
-        t_data = t.model_dump()
-        resp = t_data["response"]
-        tn = t_data["turn_number"]
-        units = resp.get("validated_user_units") or []
-        accepted_units = [u for u in units if u.get("is_accepted")]
-        accepted = [u.get("text", "") for u in accepted_units]
-        for word in _pedagogical_items(accepted):
-            if word:
-                matched = [u for u in accepted_units if _norm_text(u.get("text", "")) == _norm_text(word)]
-                unit_kind = next((u.get("kind") for u in matched), "word")
-                canonical = next((u.get("canonical_key", "") for u in matched), "")
-                node_type = "sentence" if unit_kind in ("sentence", "chunk") or " " in word else ("grammar" if unit_kind == "pattern" else "vocab")
-
-                stat = unit_stats.get(word, {"count": 0, "sum_conf": 0.0, "first_turn": tn, "last_turn": tn, "canonical": canonical, "node_type": node_type, "unit_kind": unit_kind})
-                stat["count"] += 1
-                stat["sum_conf"] += float(next((u.get("confidence", 0.75) for u in matched), 0.75))
-                stat["last_turn"] = tn
-                stat["canonical"] = canonical or stat["canonical"]
-                stat["node_type"] = node_type
-                stat["unit_kind"] = unit_kind
-                unit_stats[word] = stat
-
-    # Pass 2: Create nodes with final accumulated stats
-    for word, stat in unit_stats.items():
-        avg_conf = stat["sum_conf"] / max(1, stat["count"])
-        reuse_score = min(1.0, (stat["count"] - 1) / 4)
-        recency_decay = max(0.0, 1.0 - ((state.turn - stat["last_turn"]) * 0.08))
-        learned_mastery = 0.22 + (avg_conf * 0.38) + (reuse_score * 0.30) + (recency_decay * 0.10)
-        if stat["unit_kind"] in ("pattern", "sentence"):
-            learned_mastery += 0.05
-        history_mastery = state.mastery_scores.get(word, learned_mastery)
-        mastery = min(1.0, max(0.15, (learned_mastery * 0.65) + (history_mastery * 0.35)))
-        _add_node(word, stat["node_type"], mastery, stat["first_turn"], stat["count"])
-
-    return nodes
+        return _mock_nodes(state)
+
+    session.graph.sync(state.conversation_history)
+    return session.graph.nodes(state)
 
 
 @router.get("/links")
-async def graph_links() -> list[dict]:
+async def graph_links(session_id: str | None = None) -> list[dict]:
     """Return Knowledge Graph links — clean, meaningful connections only."""
-    state = get_session_state()
+    session = await acquire_session(session_id)
+    state = session.state
+
+    if MOCK_MODE:
+        return _mock_links(state)
+
+    session.graph.sync(state.conversation_history)
+    return session.graph.links()
+
+
+@router.get("/delta")
+async def graph_delta(since: int | None = None, session_id: str | None = None) -> dict:
+    """Return nodes/links added, updated or removed after graph version `since`.
+
+    Without `since`, or for a version this session no longer knows (reset,
+    reload, too old), the response is a full snapshot with "full": true.
+    """
+    session = await acquire_session(session_id)
+    if MOCK_MODE:
+        return _mock_delta(session.state)
+    publish_graph(session)
+    return session.graph.delta(since)
+
 
+@router.get("/layout")
+async def graph_layout(session_id: str | None = None) -> dict:
+    """Return server-computed 3D positions {node id: [x, y, z]} for the current graph."""
+    session = await acquire_session(session_id)
+    state = session.state
     if MOCK_MODE:
-        if not state.conversation_history:
-            return []
-        current_turn = state.turn
-        return [
-            GraphLink(**link).model_dump()
-            for link in MOCK_GRAPH_LINKS
-            if link["turn_introduced"] <= current_turn
-        ]
-
-    # Build node IDs from accepted validated units only (matching graph_nodes)
-    node_ids: set[str] = set()
-    for t in state.conversation_history:
-        t_data = t.model_dump()
-        resp = t_data["response"]
-        units = resp.get("validated_user_units") or []
-        accepted = [u.get("text", "") for u in units if u.get("is_accepted")]
-        for word in _pedagogical_items(accepted):
-            if word:
-                node_ids.add(_to_id(word))
-
-    links: list[dict] = []
-    seen: set[tuple[str, str]] = set()
-
-    def _add_link(src: str, tgt: str, rel: str, turn: int, reason_detail: str, evidence_units: list[str]):
-        """Add a link if both endpoints exist and it's not a duplicate."""
-        src_id = _to_id(src)
-        tgt_id = _to_id(tgt)
-        if not src_id or not tgt_id or src_id == tgt_id:
-            return
-        if src_id not in node_ids or tgt_id not in node_ids:
-            return
-        key = (min(src_id, tgt_id), max(src_id, tgt_id))
-        if key in seen:
-            return
-        seen.add(key)
-        links.append(
-            GraphLink(
-                source=src_id,
-                target=tgt_id,
-                relationship=rel,
-                reason=rel,
-                reason_detail=reason_detail,
-                evidence_units=evidence_units[:2],
-                turn_introduced=turn,
-            ).model_dump()
-        )
-
-    # Strategy 0: Derivation links — sentence structure → contextual extensions (same turn)
-    for t in state.conversation_history:
-        t_data = t.model_dump()
-        resp = t_data["response"]
-        tn = t_data["turn_number"]
-        units = resp.get("validated_user_units") or []
-        accepted_units = [u for u in units if u.get("is_accepted")]
-        sentences = [u for u in accepted_units if u.get("kind") == "sentence"]
-        extensions = [u for u in accepted_units if u.get("kind") in ("chunk", "word")]
-        for sent in sentences:
-            sent_text = _norm_text(sent.get("text", ""))
-            for ext in extensions:
-                ext_text = _norm_text(ext.get("text", ""))
-                if ext_text and ext_text in sent_text:
-                    _add_link(sent["text"], ext["text"], "semantic", tn,
-                             "Contextual extension of sentence structure.",
-                             [sent["text"], ext["text"]])
-
-    # Strategy 1: AI-provided explicit graph links (highest quality)
-    for t in state.conversation_history:
-        t_data = t.model_dump()
-        resp = t_data["response"]
-        tn = t_data["turn_number"]
-        for gl in resp.get("graph_links") or []:
-            rel_map = {"semantic": "semantic", "conjugation": "conjugation",
-                       "prerequisite": "prerequisite", "correction": "reactivation",
-                       "derivation": "semantic"}
-            _add_link(gl.get("source", ""), gl.get("target", ""),
-                      rel_map.get(gl.get("type", ""), "semantic"), tn,
-                      "Explicit pedagogical relationship provided by tutor.",
-                      [gl.get("source", ""), gl.get("target", "")])
-
-    # Strategy 2: Canonical pattern relations (shared canonical key)
-    for t in state.conversation_history:
-        t_data = t.model_dump()
-        resp = t_data["response"]
-        tn = t_data["turn_number"]
-        units = resp.get("validated_user_units") or []
-        accepted_units = [u for u in units if u.get("is_accepted")]
-        by_key: dict[str, list[str]] = {}
-        for u in accepted_units:
-            key = u.get("canonical_key", "")
-            text = u.get("text", "")
-            if not key or not text:
-                continue
-            by_key.setdefault(key, []).append(text)
-        for key, texts in by_key.items():
-            if len(texts) < 2:
-                continue
-            texts = list(dict.fromkeys(texts))
-            for i in range(len(texts) - 1):
-                _add_link(
-                    texts[i],
-                    texts[i + 1],
-                    "conjugation" if key.startswith("pattern:") else "semantic",
-                    tn,
-                    f"Units share canonical key '{key}'.",
-                    [texts[i], texts[i + 1]],
-                )
-
-    # Strategy 3: Mission/reactivation links (agent output drives meaningful reuse)
-    for t in state.conversation_history:
-        t_data = t.model_dump()
-        resp = t_data["response"]
-        tn = t_data["turn_number"]
-        units = resp.get("validated_user_units") or []
-        accepted_units = [u for u in units if u.get("is_accepted")]
-        accepted = _pedagogical_items([u.get("text", "") for u in accepted_units])
-        if not accepted:
-            continue
-
-        mission_units = [
-            u.get("text", "")
-            for u in accepted_units
-            if float(u.get("mission_relevance", 0.0) or 0.0) >= 0.55
-        ]
-        mission_units = _pedagogical_items(mission_units) or accepted[:1]
-
-        reactivated = _pedagogical_items(resp.get("reactivated_elements") or [])
-        if not reactivated:
-            continue
-
-        for old_unit in reactivated[:2]:
-            for new_unit in mission_units[:2]:
-                if _norm_text(old_unit) == _norm_text(new_unit):
-                    continue
-                _add_link(
-                    old_unit,
-                    new_unit,
-                    "mission",
-                    tn,
-                    "Tutor reused fading knowledge inside a new mission objective.",
-                    [old_unit, new_unit],
-                )
-
-    # Strategy 4: Same-turn co-occurrence — phrases said together are related
-    for t in state.conversation_history:
-        t_data = t.model_dump()
-        resp = t_data["response"]
-        tn = t_data["turn_number"]
-        units = resp.get("validated_user_units") or []
-        accepted_units = [u for u in units if u.get("is_accepted")]
-        accepted = _pedagogical_items([u.get("text", "") for u in accepted_units])
-        # Link consecutive pairs from same utterance (natural i+1 progression)
-        for i in range(len(accepted) - 1):
-            _add_link(accepted[i], accepted[i + 1], "semantic", tn,
-                      "Used together in the same utterance.",
-                      [accepted[i], accepted[i + 1]])
-
-    # Strategy 5: Cross-turn shared words — link phrases that share vocabulary
-    # e.g. "j'aime le chocolat" ↔ "j'aime la pizza" (shared "j'aime")
-    all_phrases = []  # (text, tokens_set, turn)
-    for t in state.conversation_history:
-        t_data = t.model_dump()
-        resp = t_data["response"]
-        tn = t_data["turn_number"]
-        units = resp.get("validated_user_units") or []
-        accepted_units = [u for u in units if u.get("is_accepted")]
-        for u in accepted_units:
-            text = u.get("text", "")
-            if not text or " " not in text:
-                continue  # Only multi-word phrases
-            tokens = set(_norm_text(text).split())
-            tokens -= {"je", "tu", "il", "elle", "le", "la", "les", "un", "une",
-                        "de", "du", "des", "et", "a", "est", "en", "au", "aux"}
-            if tokens:
-                all_phrases.append((text, tokens, tn))
-    # Compare each pair of multi-word phrases
-    for i in range(len(all_phrases)):
-        for j in range(i + 1, len(all_phrases)):
-            t1, tok1, tn1 = all_phrases[i]
-            t2, tok2, tn2 = all_phrases[j]
-            if _norm_text(t1) == _norm_text(t2):
-                continue
-            shared = tok1 & tok2
-            # At least 1 meaningful shared word = i+1 progression link
-            if shared:
-                _add_link(t1, t2, "semantic", max(tn1, tn2),
-                          f"Shared vocabulary: {', '.join(sorted(shared)[:3])}.",
-                          [t1, t2])
-
-    # Readability guardrail: cap node degree so graph does not collapse into a spiral
-    priority = {"mission": 5, "reactivation": 4, "prerequisite": 3, "conjugation": 2, "semantic": 1}
-    sorted_links = sorted(
-        links,
-        key=lambda l: (priority.get(l.get("relationship", "semantic"), 0), l.get("turn_introduced", 0)),
-        reverse=True,
-    )
-    degree: dict[str, int] = {}
-    capped_links: list[dict] = []
-    for link in sorted_links:
-        src = link["source"]
-        tgt = link["target"]
-        if degree.get(src, 0) >= 6 or degree.get(tgt, 0) >= 6:
-            continue
-        degree[src] = degree.get(src, 0) + 1
-        degree[tgt] = degree.get(tgt, 0) + 1
-        capped_links.append(link)
-
-    logger.info("Graph links generated: %d links for %d nodes", len(capped_links), len(node_ids))
-    return capped_links
+        version = f"mock-{state.turn}-{int(bool(state.conversation_history))}"
+        node_ids = [node["id"] for node in _mock_nodes(state)]
+        links = [(link["source"], link["target"]) for link in _mock_links(state)]
+    else:
+        publish_graph(session)
+        version = session.graph.version
+        node_ids, links = session.graph.published_graph()
+    # CPU-bound — keep the event loop (and other learners' turns) responsive
+    positions = await asyncio.to_thread(session.layout.compute, version, node_ids, links)
+    return {"version": version, "positions": positions}
+
+
+@router.get("/due")
+async def graph_due(session_id: str | None = None, k: int = 5) -> list[dict]:
+    """Return up to k units due for review, most overdue first."""
+    session = await acquire_session(session_id)
+    now = time.time()
+    return [
+        {
+            "label": card.label,
+            "overdue_s": round(now - card.due, 1),
+            "interval_s": card.interval_s,
+            "reps": card.reps,
+            "lapses": card.lapses,
+        }
+        for card in session.reviews.due(now, max(0, min(k, 50)))
+    ]
@@ -1,32 +1,126 @@
 """
 Session management routes with Supabase persistence and multi-profile support.
+
+Every learner has an isolated LearnerSession in the session registry.
+REST calls select it with the `session_id` query parameter (the frontend
+uses the profile id); calls without one use the shared default session.
+A profile that is not resident (evicted, or not loaded yet) is loaded
+before the call reads or writes its session.
+
+Saves are write-behind: _persist_session() only records a SessionDelta
+(what changed since the last save — see backend.services.session_store)
+in the persistence journal, which flushes it to Supabase in the background.
 """
 
+import asyncio
 import logging
 from fastapi import APIRouter
 
+from backend.config import (
+    PERSIST_FLUSH_DELAY_S,
+    PERSIST_JOURNAL_PATH,
+    SESSION_IDLE_TTL_SECONDS,
+    SESSION_MAX_ACTIVE,
+)
 from backend.models import SessionState, ConversationTurn
+from backend.services.persistence_journal import PersistenceJournal
+from backend.services.session_registry import LearnerSession, SessionRegistry
+from backend.services.session_store import apply_delta, merge_deltas, session_delta
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/session", tags=["session"])
 
-# In-memory session state + current profile tracking
-_session_state = SessionState()
-_current_profile_id: str | None = None
 
+def _write_session(profile_id: str, delta: dict) -> None:
+    """Blocking Supabase write — runs in a journal worker thread."""
+    from backend.services.supabase_service import save_session_delta
+    save_session_delta(profile_id, delta)
+
+
+_journal = PersistenceJournal(
+    PERSIST_JOURNAL_PATH, _write_session, merge=merge_deltas, flush_delay=PERSIST_FLUSH_DELAY_S,
+)
+
+
+def get_journal() -> PersistenceJournal:
+    return _journal
+
+
+def _load_profile_state(profile_id: str) -> SessionState | None:
+    """Load a profile's session from Supabase (None when it has no history)."""
+    try:
+        from backend.services.supabase_service import load_session
+        data = load_session(profile_id)
+    except Exception as e:
+        logger.warning("Failed to load session from Supabase: %s", e)
+        data = None
+    earlier_turns = (data or {}).get("earlier_turns", 0)
+    # A delta still waiting in the journal is newer than the database rows
+    pending = _journal.pending(profile_id)
+    if pending is not None:
+        data = apply_delta(data, pending)
+        if pending.get("reset"):
+            earlier_turns = 0
+    if not data or not data.get("conversation_history"):
+        logger.info("New session for profile %s", profile_id)
+        return None
+    state = SessionState(
+        conversation_history=[ConversationTurn(**t) for t in data["conversation_history"]],
+        earlier_turns=earlier_turns,
+        mastery_scores=data.get("mastery_scores", {}),
+        level=data.get("level", "A1"),
+        turn=data.get("turn", 1),
+    )
+    logger.info(
+        "Loaded session for profile %s: %d turns (%d older not loaded)",
+        profile_id, len(state.conversation_history), earlier_turns,
+    )
+    return state
+
+
+async def _persist_session(session: LearnerSession) -> None:
+    """Queue what changed in a learner session for Supabase (returns immediately)."""
+    if not session.profile_id:
+        return
+    _journal.record(session.profile_id, session_delta(session))
+
+
+_registry = SessionRegistry(
+    max_sessions=SESSION_MAX_ACTIVE,
+    idle_ttl=SESSION_IDLE_TTL_SECONDS,
+    persist=_persist_session,
+    loader=_load_profile_state,
+)
+
+
+def get_registry() -> SessionRegistry:
+    return _registry
 
-def get_session_state() -> SessionState:
-    return _session_state
 
+def get_session(session_id: str | None = None) -> LearnerSession:
+    return _registry.get(session_id)
 
-def reset_session_state() -> None:
-    global _session_state
-    _session_state = SessionState()
 
+async def acquire_session(session_id: str | None = None) -> LearnerSession:
+    """The session a REST call uses — a non-resident profile is loaded first,
+    so reads see its history and writes persist to it, instead of a blank,
+    unbound session taking a registry slot."""
+    if session_id is None or session_id in _registry:
+        return _registry.get(session_id)
+    return await _registry.acquire(session_id, profile_id=session_id)
 
-def get_current_profile_id() -> str | None:
-    return _current_profile_id
+
+def get_session_state(session_id: str | None = None) -> SessionState:
+    return _registry.get(session_id).state
+
+
+def reset_session_state(session_id: str | None = None) -> None:
+    _registry.get(session_id).reset()
+
+
+def get_current_profile_id(session_id: str | None = None) -> str | None:
+    return _registry.get(session_id).profile_id
 
 
 # ── Profile endpoints ──────────────────────────────────────────────────
@@ -58,99 +152,80 @@ async def create_profile(body: dict) -> dict:
 
 @router.post("/switch-profile")
 async def switch_profile(body: dict) -> dict:
-    """Switch to a different profile, loading its session from Supabase."""
-    global _session_state, _current_profile_id
+    """Bind a session to a profile, loading its history from Supabase.
 
+    The session defaults to the profile id itself, so each profile gets
+    its own isolated session. Pass `session_id` to rebind another one.
+    """
     profile_id = body.get("profile_id", "")
     if not profile_id:
         return {"error": "profile_id is required"}
 
-    # Save current session first (if we have one)
-    if _current_profile_id:
-        await _save_current_session()
-
-    # Load session from Supabase
-    _current_profile_id = profile_id
-    try:
-        from backend.services.supabase_service import load_session
-        data = load_session(profile_id)
-        if data and data.get("conversation_history"):
-            _session_state = SessionState(
-                conversation_history=[ConversationTurn(**t) for t in data["conversation_history"]],
-                mastery_scores=data.get("mastery_scores", {}),
-                level=data.get("level", "A1"),
-                turn=data.get("turn", 1),
-            )
-            logger.info("Loaded session for profile %s: %d turns", profile_id, len(_session_state.conversation_history))
-        else:
-            _session_state = SessionState()
-            logger.info("New session for profile %s", profile_id)
-    except Exception as e:
-        logger.warning("Failed to load session from Supabase: %s", e)
-        _session_state = SessionState()
-
-    # Reset OpenAI conversation context to match loaded history
-    from backend.routes.conversation import _openai_service
-    _openai_service.reset()
-    # Replay history into OpenAI context
-    for turn in _session_state.conversation_history:
-        _openai_service.inject_turn(turn.user_said, turn.response.spoken_response)
-
-    return {"status": "ok", "profile_id": profile_id, "turns": len(_session_state.conversation_history)}
-
-
-async def _save_current_session() -> None:
-    """Save current session to Supabase."""
-    if not _current_profile_id:
-        return
-    try:
-        from backend.services.supabase_service import save_session
-        state = _session_state
-        save_session(
-            _current_profile_id,
-            [t.model_dump() for t in state.conversation_history],
-            state.mastery_scores,
-            state.level,
-            state.turn,
-        )
-    except Exception as e:
-        logger.warning("Failed to save session to Supabase: %s", e)
+    session = await _registry.acquire(body.get("session_id") or profile_id, profile_id=profile_id)
+    return {
+        "status": "ok",
+        "profile_id": profile_id,
+        "session_id": session.session_id,
+        "turns": session.state.earlier_turns + len(session.state.conversation_history),
+    }
 
 
-async def save_after_turn() -> None:
-    """Called after each conversation turn to persist to Supabase."""
-    await _save_current_session()
+async def save_after_turn(session: LearnerSession) -> None:
+    """Called after each conversation turn to persist to Supabase (write-behind)."""
+    await _persist_session(session)
 
 
 # ── Existing endpoints ─────────────────────────────────────────────────
 
 @router.get("/state")
-async def session_state() -> dict:
-    state = get_session_state()
-    return state.model_dump()
+async def session_state(session_id: str | None = None) -> dict:
+    session = await acquire_session(session_id)
+    return session.state.model_dump()
+
+
+@router.get("/history")
+async def session_history(session_id: str | None = None, before: int | None = None, limit: int = 50) -> dict:
+    """Turns ending just before turn `before` (newest when omitted), oldest first.
+
+    Loaded turns come from the session; turns older than what was loaded
+    are read from Supabase on demand.
+    """
+    session = await acquire_session(session_id)
+    state = session.state
+    limit = max(1, min(limit, 200))
+    resident = [t for t in state.conversation_history if before is None or t.turn_number < before]
+    turns = [t.model_dump() for t in resident[-limit:]]
+    if len(turns) < limit and state.earlier_turns and session.profile_id:
+        oldest = turns[0]["turn_number"] if turns else before
+        try:
+            from backend.services.supabase_service import load_turns
+            older = await asyncio.to_thread(load_turns, session.profile_id, oldest, limit - len(turns))
+        except Exception as e:
+            logger.warning("Failed to load earlier turns from Supabase: %s", e)
+            older = []
+        turns = older + turns
+    return {"turns": turns}
 
 
 @router.get("/diagnostics")
-async def session_diagnostics() -> dict:
-    state = get_session_state()
-    return {"items": state.diagnostics[-20:]}
+async def session_diagnostics(session_id: str | None = None) -> dict:
+    session = await acquire_session(session_id)
+    return {"items": session.state.diagnostics[-20:]}
 
 
 @router.post("/reset")
-async def session_reset() -> dict:
-    reset_session_state()
-    from backend.routes.conversation import _openai_service
-    _openai_service.reset()
+async def session_reset(session_id: str | None = None) -> dict:
+    session = await acquire_session(session_id)
+    session.reset()
     # Save empty session
-    await _save_current_session()
+    await _persist_session(session)
     return {"status": "reset", "turn": 1}
 
 
 @router.post("/reset-hard")
-async def session_reset_hard() -> dict:
-    reset_session_state()
-    from backend.routes.conversation import _openai_service, _backboard_service
-    _openai_service.reset()
-    await _backboard_service.reset()
-    await _save_current_session()
+async def session_reset_hard(session_id: str | None = None) -> dict:
+    session = await acquire_session(session_id)
+    session.reset()
+    await session.backboard_service.reset()
+    await _persist_session(session)
     return {"status": "reset-hard", "turn": 1}
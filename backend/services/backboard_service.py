@@ -4,12 +4,16 @@ Backboard.io Memory & Mastery Tracking Service.
 Mock mode: Uses in-memory dict for mastery scores and learner profile.
 Real mode: Connects to Backboard SDK for persistent memory, with custom
            backend logic for mastery score tracking and CEFR assessment.
+           Memory writes are skipped (local cache only) while the
+           "backboard_memory" circuit breaker is open.
 """
 
 import logging
 import os
+import time
 
 from backend.config import MOCK_MODE
+from backend.services.provider_health import classify_error, health
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +28,8 @@ class BackboardService:
         "hi": "Hindi", "sv": "Swedish", "pl": "Polish",
     }
 
+    _shared_client = None
+
     def __init__(self):
         self.mock_mode = MOCK_MODE
         self._language_name = "French"
@@ -49,7 +55,10 @@ class BackboardService:
         from backboard import BackboardClient
 
         api_key = os.getenv("BACKBOARD_API_KEY", "")
-        self._client = BackboardClient(api_key=api_key, timeout=15)
+        # One SDK client per process — every learner session reuses it
+        if BackboardService._shared_client is None:
+            BackboardService._shared_client = BackboardClient(api_key=api_key, timeout=15)
+        self._client = BackboardService._shared_client
         self._assistant_id = None
 
     async def update_mastery(self, scores: dict[str, float]) -> None:
@@ -84,20 +93,14 @@ class BackboardService:
         Args:
             scores: Dictionary of mastery scores to persist.
         """
-        if not self._assistant_id:
-            await self._ensure_assistant()
-
         score_text = ", ".join(
             f"{word}: {score:.2f}" for word, score in scores.items()
         )
-        try:
-            await self._client.add_memory(
-                assistant_id=self._assistant_id,
-                content=f"Mastery scores: {score_text}",
-                metadata={"type": "mastery", "scores": scores},
-            )
-        except Exception as exc:
-            logger.warning("Backboard mastery update failed (non-critical): %s", exc)
+        await self._add_memory(
+            "mastery update",
+            content=f"Mastery scores: {score_text}",
+            metadata={"type": "mastery", "scores": scores},
+        )
         for key, value in scores.items():
             self._mastery_scores[key] = max(0.0, min(1.0, float(value)))
 
@@ -169,21 +172,15 @@ class BackboardService:
             turn: Current turn number.
             border_update: Latest border update text.
         """
-        if not self._assistant_id:
-            await self._ensure_assistant()
-
-        try:
-            await self._client.add_memory(
-                assistant_id=self._assistant_id,
-                content=(
-                    f"Learner profile: CEFR level {level}, "
-                    f"completed {turn} turns. "
-                    f"Current ability: {border_update}"
-                ),
-                metadata={"type": "profile", "level": level, "turn": turn},
-            )
-        except Exception as exc:
-            logger.warning("Backboard profile update failed (non-critical): %s", exc)
+        await self._add_memory(
+            "profile update",
+            content=(
+                f"Learner profile: CEFR level {level}, "
+                f"completed {turn} turns. "
+                f"Current ability: {border_update}"
+            ),
+            metadata={"type": "profile", "level": level, "turn": turn},
+        )
         self._learner_profile["level"] = level
         self._learner_profile["total_turns"] = turn
         self._learner_profile["border_update"] = border_update
@@ -227,6 +224,33 @@ class BackboardService:
         }
         # Assistant persists across sessions for memory continuity
 
+    async def _add_memory(self, what: str, content: str, metadata: dict) -> None:
+        """Write one memory through the circuit breaker (non-critical).
+
+        Args:
+            what: Short label for log messages.
+            content: Memory text.
+            metadata: Structured metadata stored with the memory.
+        """
+        breaker = health.get("backboard_memory")
+        if not breaker.allow():
+            logger.info("Backboard %s skipped (circuit open)", what)
+            return
+        t0 = time.perf_counter()
+        try:
+            if not self._assistant_id:
+                await self._ensure_assistant()
+            await self._client.add_memory(
+                assistant_id=self._assistant_id,
+                content=content,
+                metadata=metadata,
+            )
+        except Exception as exc:
+            logger.warning("Backboard %s failed (non-critical): %s", what, exc)
+            breaker.record_failure(classify_error(exc))
+            return
+        breaker.record_success(time.perf_counter() - t0)
+
     async def _ensure_assistant(self) -> None:
         """Ensure a Backboard assistant exists for memory storage.
 
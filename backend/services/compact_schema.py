@@ -0,0 +1,110 @@
+"""
+Compact wire schema for tutor replies.
+
+The verbose reply spells out every key ("vocabulary_breakdown",
+"reactivated_elements"...) and every vocabulary item repeats "word",
+"translation" and "part_of_speech" — output tokens the model generates
+one by one before TTS can finish. The compact schema, opt-in per session
+(LLM_COMPACT_SCHEMA, ?llm_schema=compact), carries the same content:
+
+- one-letter keys, "s" (spoken_response) first as before
+- vocabulary items and graph links as positional arrays whose columns
+  are the fields of VocabularyItem / ResponseGraphLink, in model order
+- everything else (strings, string arrays, mastery dict) unchanged
+
+decode_compact() is strict — unknown keys, wrong types or wrong row
+lengths raise CompactSchemaError (a JSONStreamError, so providers treat
+it like any malformed reply). encode_compact() is its inverse on the
+fields the model produces; validate_compact() maps a compact reply into
+TutorResponse.
+"""
+
+from pydantic import BaseModel, ValidationError
+
+from backend.models import ResponseGraphLink, TutorResponse, VocabularyItem
+from backend.services.json_stream import JSONStreamError
+
+SPOKEN_KEY = "s"
+
+
+class CompactSchemaError(JSONStreamError):
+    """The reply is valid JSON but not a valid compact-schema object."""
+
+
+def _columns(model: type[BaseModel]) -> tuple[str, ...]:
+    return tuple(model.model_fields)
+
+
+# short key → (TutorResponse field, value kind, row columns)
+FIELDS: dict[str, tuple[str, str, tuple[str, ...]]] = {
+    SPOKEN_KEY: ("spoken_response", "str", ()),
+    "t": ("translation_hint", "str", ()),
+    "c": ("corrected_form", "str", ()),
+    "u": ("user_vocabulary", "strs", ()),
+    "v": ("vocabulary_breakdown", "rows", _columns(VocabularyItem)),
+    "g": ("graph_links", "rows", _columns(ResponseGraphLink)),
+    "n": ("new_elements", "strs", ()),
+    "r": ("reactivated_elements", "strs", ()),
+    "m": ("mastery_scores", "scores", ()),
+    "l": ("user_level_assessment", "str", ()),
+    "b": ("border_update", "str", ()),
+}
+LONG_KEYS = {name: short for short, (name, _, _) in FIELDS.items()}
+
+
+def _decode_value(key: str, kind: str, columns: tuple[str, ...], value):
+    if kind == "str":
+        if isinstance(value, str):
+            return value
+    elif kind == "strs":
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            return list(value)
+    elif kind == "rows":
+        if isinstance(value, list) and all(
+            isinstance(row, list) and len(row) == len(columns) and all(isinstance(cell, str) for cell in row)
+            for row in value
+        ):
+            return [dict(zip(columns, row)) for row in value]
+        raise CompactSchemaError(f"'{key}' must be a list of [{', '.join(columns)}] string rows")
+    elif kind == "scores":
+        if isinstance(value, dict) and all(
+            isinstance(score, (int, float)) and not isinstance(score, bool) for score in value.values()
+        ):
+            return {word: float(score) for word, score in value.items()}
+    raise CompactSchemaError(f"'{key}' has the wrong type for {kind}: {type(value).__name__}")
+
+
+def decode_compact(obj: dict) -> dict:
+    """Compact reply → the same content under TutorResponse keys."""
+    if not isinstance(obj, dict):
+        raise CompactSchemaError(f"expected an object, got {type(obj).__name__}")
+    unknown = obj.keys() - FIELDS.keys()
+    if unknown:
+        raise CompactSchemaError(f"unknown compact keys: {', '.join(sorted(unknown))}")
+    decoded = {}
+    for key, value in obj.items():
+        name, kind, columns = FIELDS[key]
+        decoded[name] = _decode_value(key, kind, columns, value)
+    return decoded
+
+
+def encode_compact(response: dict) -> dict:
+    """Inverse of decode_compact() over the fields the model produces."""
+    encoded = {}
+    for name, value in response.items():
+        short = LONG_KEYS.get(name)
+        if short is None:
+            continue
+        columns = FIELDS[short][2]
+        if columns:
+            value = [[str(item.get(column, "")) for column in columns] for item in value]
+        encoded[short] = value
+    return encoded
+
+
+def validate_compact(obj: dict, defaults: dict | None = None) -> TutorResponse:
+    """Strictly decode a compact reply into TutorResponse (defaults fill missing fields)."""
+    try:
+        return TutorResponse.model_validate({**(defaults or {}), **decode_compact(obj)})
+    except ValidationError as exc:
+        raise CompactSchemaError(f"not a valid TutorResponse: {exc.error_count()} error(s)") from exc
@@ -0,0 +1,201 @@
+"""
+Data-driven grammar pattern matcher (per-language pattern packs).
+
+Grammar patterns ("je suis + [noun]", "me gusta + [object]", ...) used to
+be hard-coded three times in the conversation route: a chain of
+uncompiled re.search calls, a prefix dict rebuilt per candidate and an
+"incomplete pattern" set rebuilt per unit. They now live in JSON packs
+(backend/grammar_packs/*.json, plus GRAMMAR_PACKS_DIR) compiled once at
+startup:
+
+- detect(text): every trigger of every pack in one Aho-Corasick automaton,
+  so a turn costs one pass over the text no matter how many languages or
+  patterns are loaded
+- canonical(unit): one combined anchored regex — the first pattern (pack
+  priority, then file order) whose prefix starts the unit, or whose
+  phrase is the whole unit
+- is_incomplete(unit): verb stubs without a complement ("j'aime")
+
+Pack format:
+    {"language": "fr", "priority": 10,
+     "patterns": [
+        {"key": "pattern:...", "text": "je suis + [noun]", "prefix": "je suis", "slot": "word"},
+        {"key": "pattern:...", "text": "ça va", "phrases": ["ça va", "ca va"]}],
+     "incomplete": ["je suis", ...]}
+
+A prefix pattern needs a complement after the prefix: "word" = a word
+character after whitespace, "any" = anything after whitespace. Text is
+expected normalized (lowercase, single spaces, ' apostrophes).
+"""
+
+import json
+import logging
+import re
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+
+from backend.config import GRAMMAR_PACKS_DIR
+
+logger = logging.getLogger(__name__)
+
+_BUILTIN_PACKS = Path(__file__).resolve().parent.parent / "grammar_packs"
+_SLOTS = ("word", "any")
+_is_word_char = re.compile(r"\w").match
+
+
+@dataclass(frozen=True, slots=True)
+class GrammarPattern:
+    key: str
+    text: str
+    language: str
+    prefix: str = ""  # Prefix patterns: trigger before the complement
+    slot: str = ""
+    phrases: tuple[str, ...] = ()  # Fixed-phrase patterns
+
+
+def _norm(value: str) -> str:
+    return " ".join(value.strip().lower().replace("’", "'").split())
+
+
+def load_packs(*dirs: Path | str | None) -> list[dict]:
+    """Read *.json packs from the given directories, ordered by (priority, language)."""
+    packs: list[dict] = []
+    for directory in dirs:
+        if not directory:
+            continue
+        for path in sorted(Path(directory).glob("*.json")):
+            try:
+                pack = json.loads(path.read_text(encoding="utf-8"))
+                if not isinstance(pack, dict):
+                    raise ValueError("pack must be a JSON object")
+            except (OSError, ValueError) as exc:
+                logger.warning("Skipping grammar pack %s: %s", path, exc)
+                continue
+            pack.setdefault("language", path.stem)
+            packs.append(pack)
+    return sorted(packs, key=lambda p: (p.get("priority", 100), p["language"]))
+
+
+class GrammarMatcher:
+    """All pattern packs compiled into one automaton + one regex."""
+
+    def __init__(self, packs: list[dict]):
+        self.patterns: list[GrammarPattern] = []
+        incomplete: set[str] = set()
+        for pack in packs:
+            language = pack["language"]
+            for raw in pack.get("patterns") or []:
+                pattern = self._parse(raw, language)
+                if pattern is not None:
+                    self.patterns.append(pattern)
+            incomplete.update(_norm(text) for text in pack.get("incomplete") or [])
+        self.incomplete = frozenset(incomplete)
+        self._build_automaton()
+        self._build_regex()
+
+    @staticmethod
+    def _parse(raw: dict, language: str) -> GrammarPattern | None:
+        key, text = raw.get("key"), raw.get("text")
+        prefix = _norm(raw.get("prefix") or "")
+        phrases = tuple(_norm(p) for p in raw.get("phrases") or [] if _norm(p))
+        slot = raw.get("slot", "any")
+        if not key or not text or bool(prefix) == bool(phrases) or (prefix and slot not in _SLOTS):
+            logger.warning("Skipping malformed %s grammar pattern: %r", language, raw)
+            return None
+        if prefix:
+            return GrammarPattern(key=key, text=text, language=language, prefix=prefix, slot=slot)
+        return GrammarPattern(key=key, text=text, language=language, phrases=phrases)
+
+    # ── Compilation ──────────────────────────────────────────────────
+
+    def _build_automaton(self) -> None:
+        # Trie: per-state transitions, failure links, outputs (pattern index, trigger length)
+        goto: list[dict[str, int]] = [{}]
+        out: list[list[tuple[int, int]]] = [[]]
+        for index, pattern in enumerate(self.patterns):
+            for trigger in pattern.phrases or (pattern.prefix,):
+                state = 0
+                for ch in trigger:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[state][ch] = nxt
+                        goto.append({})
+                        out.append([])
+                    state = nxt
+                out[state].append((index, len(trigger)))
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def _build_regex(self) -> None:
+        # Prefix alternatives first, then whole-unit phrases — same precedence as before
+        alternatives = [
+            (f"(?P<p{i}>{re.escape(p.prefix)} )", i) for i, p in enumerate(self.patterns) if p.prefix
+        ] + [
+            (f"(?P<p{i}>(?:{'|'.join(map(re.escape, p.phrases))})\\Z)", i) for i, p in enumerate(self.patterns) if p.phrases
+        ]
+        self._regex = re.compile("|".join(alt for alt, _ in alternatives)) if alternatives else None
+
+    # ── Matching ─────────────────────────────────────────────────────
+
+    def detect(self, text: str) -> list[GrammarPattern]:
+        """Patterns occurring anywhere in `text` (at word boundaries), in pack order."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: set[int] = set()
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index, length in out[state]:
+                if index not in found and self._fits(self.patterns[index], text, end - length, end):
+                    found.add(index)
+        return [self.patterns[i] for i in sorted(found)]
+
+    @staticmethod
+    def _fits(pattern: GrammarPattern, text: str, start: int, end: int) -> bool:
+        if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+            return False  # Not at a word boundary
+        if pattern.phrases:
+            return end == len(text) or not (_is_word_char(text[end]) and _is_word_char(text[end - 1]))
+        # Prefix: whitespace, then a complement
+        if end >= len(text) or not text[end].isspace():
+            return False
+        if pattern.slot == "word":
+            rest = end
+            while rest < len(text) and text[rest].isspace():
+                rest += 1
+            return rest < len(text) and _is_word_char(text[rest]) is not None
+        return end + 1 < len(text) and text[end + 1] != "\n"
+
+    def canonical(self, unit: str) -> GrammarPattern | None:
+        """The pattern a (normalized) unit text is an instance of, if any."""
+        match = self._regex.match(unit) if self._regex is not None else None
+        return self.patterns[int(match.lastgroup[1:])] if match else None
+
+    def is_incomplete(self, unit: str) -> bool:
+        return unit in self.incomplete
+
+
+_matcher: GrammarMatcher | None = None
+
+
+def get_matcher() -> GrammarMatcher:
+    """Matcher over the built-in packs and GRAMMAR_PACKS_DIR, compiled on first use."""
+    global _matcher
+    if _matcher is None:
+        _matcher = GrammarMatcher(load_packs(_BUILTIN_PACKS, GRAMMAR_PACKS_DIR))
+        logger.info("Grammar packs loaded: %d patterns", len(_matcher.patterns))
+    return _matcher
@@ -0,0 +1,767 @@
+"""
+Incrementally maintained Knowledge Graph index (one per learner session).
+
+The graph routes used to rebuild every node and link from the whole
+conversation history on each request — model_dump() of every turn up to
+six times, _pedagogical_items() per strategy — so a graph fetch cost
+O(turns × strategies). GraphIndex applies each turn once:
+
+- unit stats per pedagogical item (count, confidence, first/last turn,
+  last-seen time) in a columnar MasteryStore → nodes; mastery and
+  recency/time decay are computed for all nodes at once at serialization
+- link candidates from strategies 0-4 (same-turn) and 5 (cross-turn
+  shared vocabulary); per link key only the candidate added first in
+  strategy/history order is kept
+- strategy 5 uses an inverted token → phrase postings index with
+  per-language stop lists: a new phrase is only compared with phrases
+  sharing a token, weighted by IDF, and linked to its top-k matches —
+  so it scales to tens of thousands of phrases instead of O(P²) pairs
+- adjacency (node id → link keys) for every kept link key
+
+nodes()/links() then only filter, order and cap — O(graph size), no
+matter how long the history is. Applying turns one by one gives the same
+graph as rebuilding from the whole history (see the differential test in
+tests/test_graph_index.py).
+
+A turn can be rewritten after it was applied (late analysis merges into
+turn.response). Every applied turn keeps an undo log of what it changed;
+sync() checks the last `undo_depth` turns by object identity, rolls back
+to the first changed one and re-applies from there; a replaced history
+(reset / reload) rebuilds. Rewriting an older turn needs invalidate().
+"""
+
+import bisect
+import heapq
+import itertools
+import json
+import logging
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+from backend.config import (
+    GRAPH_DECAY_STEP_S,
+    GRAPH_MASTERY_HALF_LIFE_H,
+    GRAPH_PHRASE_LINKS_TOP_K,
+    GRAPH_POSTINGS_SCAN,
+)
+from backend.models import ConversationTurn, GraphLink, SessionState
+from backend.services.mastery_store import MasteryStore
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Graph versions are unique across all indexes in this process, so a version
+# from another (reset / reloaded) index never matches and yields a full snapshot
+_versions = itertools.count(1)
+
+# Link priority for the readability degree cap
+_PRIORITY = {"mission": 5, "reactivation": 4, "prerequisite": 3, "conjugation": 2, "semantic": 1}
+_MAX_DEGREE = 6
+
+_AI_REL_MAP = {
+    "semantic": "semantic", "conjugation": "conjugation",
+    "prerequisite": "prerequisite", "correction": "reactivation",
+    "derivation": "semantic",
+}
+# Function words ignored when matching phrases by shared vocabulary, per
+# target language; other languages rely on IDF weighting alone
+_PHRASE_STOP_TOKENS = {
+    "fr": frozenset({
+        "je", "tu", "il", "elle", "on", "nous", "vous", "ils", "elles",
+        "le", "la", "les", "un", "une", "de", "du", "des", "et", "a", "est",
+        "en", "au", "aux", "à", "ce", "que", "qui", "ne", "pas",
+    }),
+    "es": frozenset({
+        "yo", "tú", "él", "ella", "el", "la", "los", "las", "un", "una",
+        "de", "del", "y", "a", "al", "en", "es", "que", "no", "por", "con",
+    }),
+    "de": frozenset({
+        "ich", "du", "er", "sie", "es", "wir", "ihr", "der", "die", "das",
+        "den", "dem", "des", "ein", "eine", "und", "ist", "bin", "nicht", "zu",
+    }),
+    "it": frozenset({
+        "io", "tu", "lui", "lei", "il", "lo", "la", "i", "gli", "le", "un",
+        "una", "di", "del", "e", "è", "a", "in", "che", "non", "per", "con",
+    }),
+    "pt": frozenset({
+        "eu", "tu", "ele", "ela", "o", "a", "os", "as", "um", "uma",
+        "de", "do", "da", "e", "é", "em", "no", "na", "que", "não", "com",
+    }),
+    "nl": frozenset({
+        "ik", "jij", "je", "hij", "zij", "ze", "wij", "we", "de", "het",
+        "een", "en", "is", "ben", "van", "in", "op", "niet", "dat",
+    }),
+    "en": frozenset({
+        "i", "you", "he", "she", "it", "we", "they", "the", "a", "an",
+        "and", "is", "am", "are", "of", "to", "in", "on", "at", "not",
+    }),
+}
+
+
+def to_id(word: str) -> str:
+    """Normalize a word/phrase into a stable node id."""
+    return word.strip().lower().replace(" ", "_").replace("'", "").replace("’", "")
+
+
+def _link_rank(entry: tuple[tuple, dict]) -> tuple:
+    """Degree-cap order of a links_by_key entry: priority, newer turn, then rebuild order."""
+    order, link = entry
+    return (-_PRIORITY.get(link.get("relationship", "semantic"), 0), -link.get("turn_introduced", 0), order)
+
+
+def norm_text(value: str) -> str:
+    return " ".join((value or "").strip().lower().replace("’", "'").split())
+
+
+def _is_component_of_phrase(token: str, phrase: str) -> bool:
+    token_n = norm_text(token)
+    phrase_n = norm_text(phrase)
+    if not token_n or not phrase_n or token_n == phrase_n:
+        return False
+    if " " not in phrase_n:
+        return False
+    return token_n in phrase_n.split(" ")
+
+
+def pedagogical_items(items: list[str]) -> list[str]:
+    """Keep pedagogically coherent units.
+
+    Rules:
+    - Keep phrase chunks (e.g. "ca va", "je m'appelle") as first-class items.
+    - Drop 1-char noise.
+    - If a phrase exists, drop split single-word components from the same set
+      (avoid "ca va" + "ca" + "va" duplicates).
+    """
+    low_signal_tokens = {
+        "ca", "ça", "va", "je", "tu", "il", "elle", "nous", "vous",
+        "de", "du", "des", "un", "une", "et", "a", "est",
+    }
+    cleaned: list[str] = []
+    seen_norm: set[str] = set()
+    for raw in items:
+        text = (raw or "").strip()
+        if len(text) <= 1:
+            continue
+        n = norm_text(text)
+        if n in low_signal_tokens:
+            continue
+        tok_count = len(n.split(" "))
+        if tok_count >= 6 and not n.startswith(("je suis +", "j'aime +", "j'ai envie de +")):
+            continue
+        if not n or n in seen_norm:
+            continue
+        seen_norm.add(n)
+        cleaned.append(text)
+
+    phrases = [x for x in cleaned if " " in norm_text(x)]
+    if not phrases:
+        return cleaned
+
+    result: list[str] = []
+    for item in cleaned:
+        if any(_is_component_of_phrase(item, ph) for ph in phrases):
+            continue
+        result.append(item)
+    return result
+
+
+class _UndoLog:
+    """Mutations made while applying one turn, replayed backwards to undo it."""
+
+    def __init__(self):
+        self._ops: list[tuple] = []
+
+    def set_item(self, mapping: dict, key, value) -> None:
+        self._ops.append(("item", mapping, key, mapping.get(key, _MISSING)))
+        mapping[key] = value
+
+    def append(self, items: list, value) -> None:
+        self._ops.append(("append", items))
+        items.append(value)
+
+    def add(self, members: set, value) -> None:
+        if value not in members:
+            self._ops.append(("add", members, value))
+            members.add(value)
+
+    def call(self, undo) -> None:
+        """Record a mutation made elsewhere, undone by calling `undo()`."""
+        self._ops.append(("call", undo))
+
+    def undo(self) -> None:
+        for op in reversed(self._ops):
+            if op[0] == "item":
+                _, mapping, key, old = op
+                if old is _MISSING:
+                    del mapping[key]
+                else:
+                    mapping[key] = old
+            elif op[0] == "append":
+                op[1].pop()
+            elif op[0] == "call":
+                op[1]()
+            else:
+                op[1].discard(op[2])
+        self._ops.clear()
+
+
+class GraphIndex:
+    """Per-session graph state, updated once per turn and serialized on request."""
+
+    def __init__(
+        self,
+        language: str = "fr",
+        undo_depth: int = 16,
+        top_k: int = GRAPH_PHRASE_LINKS_TOP_K,
+        postings_scan: int = GRAPH_POSTINGS_SCAN,
+        changelog_size: int = 64,
+        half_life_h: float = GRAPH_MASTERY_HALF_LIFE_H,
+        decay_step_s: float = GRAPH_DECAY_STEP_S,
+    ):
+        self.language = language
+        self.half_life_s = half_life_h * 3600
+        self.decay_step_s = decay_step_s
+        self.undo_depth = undo_depth
+        self.top_k = top_k
+        self.postings_scan = max(1, postings_scan)
+        self.rebuilds = 0
+        self._mutations = 0
+        self._reset()
+        # Published graph — what clients hold at self.version
+        self.version = next(_versions)
+        self._published_nodes: dict[str, dict] = {}
+        self._published_links: dict[tuple[str, str], dict] = {}
+        # node id → keys of its published links
+        self._published_adjacency: dict[str, set[tuple[str, str]]] = {}
+        self._published_level: str | None = None
+        self._published_turn = 0
+        self._published_clock: float | None = None
+        self._published_mutations = -1
+        self._snapshot: tuple[int, bytes] | None = None
+        # (version, previous version, {node id: op}, {link key: op}) per publish
+        self._changelog: deque[tuple[int, int, dict, dict]] = deque(maxlen=changelog_size)
+
+    def _reset(self) -> None:
+        # (turn, response, node words) applied so far — identity detects rewrites
+        self._applied: list[tuple[ConversationTurn, object, list[str]]] = []
+        self._undo: deque[_UndoLog] = deque(maxlen=self.undo_depth)
+        self.store = MasteryStore()
+        # node id → words with that id in insertion order; the first one is the node
+        self.id_words: dict[str, list[str]] = {}
+        # Words whose node may have changed since the last publish (None = all)
+        self._dirty: set[str] | None = None
+        # Bumped by every applied/undone turn — an unchanged count means nothing to publish
+        self._mutations += 1
+        # link key (min id, max id) → (order, GraphLink dict); order = position in rebuild order
+        self.links_by_key: dict[tuple[str, str], tuple[tuple, dict]] = {}
+        self.adjacency: dict[str, set[tuple[str, str]]] = {}
+        # Strategy 5: distinct multi-word phrases in history order + token → phrase positions
+        self.phrases: list[tuple[str, frozenset, int]] = []
+        self.phrase_ids: dict[str, int] = {}
+        self.postings: dict[str, list[int]] = {}
+
+    def set_language(self, language: str) -> None:
+        """Switch the stop list; phrases already indexed are re-tokenized on the next sync."""
+        if language != self.language:
+            self.language = language
+            if self._applied:
+                self.invalidate()
+
+    def invalidate(self) -> None:
+        """Force a rebuild on the next sync (a turn older than the undo window changed)."""
+        self._reset()
+        self.rebuilds += 1
+
+    @property
+    def turns_applied(self) -> int:
+        return len(self._applied)
+
+    # ── Maintenance ──────────────────────────────────────────────────
+
+    def sync(self, history: list[ConversationTurn]) -> None:
+        """Bring the index up to date with history (normally: apply the new turn)."""
+        applied = self._applied
+        # Identity checks on the undo window only — cost does not grow with history
+        first_changed = min(len(applied), len(history))
+        if applied and (not history or history[0] is not applied[0][0]):
+            first_changed = 0  # history replaced (reset / reload)
+        else:
+            for pos in range(max(0, first_changed - self.undo_depth), first_changed):
+                turn, response, _ = applied[pos]
+                if history[pos] is not turn or turn.response is not response:
+                    first_changed = pos
+                    break
+
+        if first_changed < len(applied):
+            if len(applied) - first_changed > len(self._undo):
+                self.invalidate()
+                applied = self._applied
+            else:
+                while len(applied) > first_changed:
+                    self._undo.pop().undo()
+                    self._mark_dirty(applied.pop()[2])
+                    self._mutations += 1
+
+        for pos in range(len(applied), len(history)):
+            self._apply(pos, history[pos])
+
+    def _apply(self, pos: int, turn: ConversationTurn) -> None:
+        log = _UndoLog()
+        data = turn.model_dump()
+        resp = data["response"]
+        tn = data["turn_number"]
+        units = resp.get("validated_user_units") or []
+        accepted_units = [u for u in units if u.get("is_accepted")]
+
+        words = self._apply_unit_stats(log, tn, accepted_units, turn.recorded_at)
+        for order, src, tgt, rel, link_turn, detail, evidence in self._turn_candidates(pos, tn, resp, accepted_units):
+            if self._offer(log, order, src, tgt, rel, link_turn, detail, evidence):
+                words.extend((src, tgt))
+        # Link endpoints are dirty too: publish() re-caps the links around them
+        words.extend(self._apply_phrases(log, tn, accepted_units))
+
+        # Mastery scores from this turn feed the nodes with the same word
+        words.extend(turn.response.mastery_scores)
+        self._applied.append((turn, turn.response, words))
+        self._undo.append(log)
+        self._mark_dirty(words)
+        self._mutations += 1
+
+    def _mark_dirty(self, words) -> None:
+        if self._dirty is not None:
+            self._dirty.update(words)
+
+    def _apply_unit_stats(self, log: _UndoLog, tn: int, accepted_units: list[dict],
+                          seen_at: float | None) -> list[str]:
+        accepted = [u.get("text", "") for u in accepted_units]
+        words: list[str] = []
+        for word in pedagogical_items(accepted):
+            if not word:
+                continue
+            words.append(word)
+            matched = [u for u in accepted_units if norm_text(u.get("text", "")) == norm_text(word)]
+            unit_kind = next((u.get("kind") for u in matched), "word")
+            canonical = next((u.get("canonical_key", "") for u in matched), "")
+            node_type = "sentence" if unit_kind in ("sentence", "chunk") or " " in word else ("grammar" if unit_kind == "pattern" else "vocab")
+
+            confidence = float(next((u.get("confidence", 0.75) for u in matched), 0.75))
+
+            node_id = to_id(word)
+            is_new = word not in self.store
+            ids = self.id_words.get(node_id) if is_new and node_id else None
+            log.call(self.store.observe(word, tn, confidence, seen_at, node_type, unit_kind, canonical,
+                                       is_node=is_new and bool(node_id) and ids is None))
+            if is_new and node_id:
+                if ids is None:
+                    log.set_item(self.id_words, node_id, [word])
+                else:
+                    log.append(ids, word)
+        return words
+
+    def _turn_candidates(self, pos: int, tn: int, resp: dict, accepted_units: list[dict]):
+        """Strategies 0-4 for one turn, each tagged with its rebuild order (strategy, turn, i)."""
+        # Strategy 0: Derivation links — sentence structure → contextual extensions (same turn)
+        i = 0
+        sentences = [u for u in accepted_units if u.get("kind") == "sentence"]
+        extensions = [u for u in accepted_units if u.get("kind") in ("chunk", "word")]
+        for sent in sentences:
+            sent_text = norm_text(sent.get("text", ""))
+            for ext in extensions:
+                ext_text = norm_text(ext.get("text", ""))
+                if ext_text and ext_text in sent_text:
+                    yield ((0, pos, i), sent["text"], ext["text"], "semantic", tn,
+                           "Contextual extension of sentence structure.", [sent["text"], ext["text"]])
+                    i += 1
+
+        # Strategy 1: AI-provided explicit graph links (highest quality)
+        for i, gl in enumerate(resp.get("graph_links") or []):
+            yield ((1, pos, i), gl.get("source", ""), gl.get("target", ""),
+                   _AI_REL_MAP.get(gl.get("type", ""), "semantic"), tn,
+                   "Explicit pedagogical relationship provided by tutor.",
+                   [gl.get("source", ""), gl.get("target", "")])
+
+        # Strategy 2: Canonical pattern relations (shared canonical key)
+        i = 0
+        by_key: dict[str, list[str]] = {}
+        for u in accepted_units:
+            key = u.get("canonical_key", "")
+            text = u.get("text", "")
+            if not key or not text:
+                continue
+            by_key.setdefault(key, []).append(text)
+        for key, texts in by_key.items():
+            if len(texts) < 2:
+                continue
+            texts = list(dict.fromkeys(texts))
+            for j in range(len(texts) - 1):
+                yield ((2, pos, i), texts[j], texts[j + 1],
+                       "conjugation" if key.startswith("pattern:") else "semantic", tn,
+                       f"Units share canonical key '{key}'.", [texts[j], texts[j + 1]])
+                i += 1
+
+        # Strategy 3: Mission/reactivation links (agent output drives meaningful reuse)
+        accepted = pedagogical_items([u.get("text", "") for u in accepted_units])
+        if accepted:
+            mission_units = [
+                u.get("text", "")
+                for u in accepted_units
+                if float(u.get("mission_relevance", 0.0) or 0.0) >= 0.55
+            ]
+            mission_units = pedagogical_items(mission_units) or accepted[:1]
+            reactivated = pedagogical_items(resp.get("reactivated_elements") or [])
+            i = 0
+            for old_unit in reactivated[:2]:
+                for new_unit in mission_units[:2]:
+                    if norm_text(old_unit) == norm_text(new_unit):
+                        continue
+                    yield ((3, pos, i), old_unit, new_unit, "mission", tn,
+                           "Tutor reused fading knowledge inside a new mission objective.", [old_unit, new_unit])
+                    i += 1
+
+        # Strategy 4: Same-turn co-occurrence — phrases said together are related
+        for i in range(len(accepted) - 1):
+            yield ((4, pos, i), accepted[i], accepted[i + 1], "semantic", tn,
+                   "Used together in the same utterance.", [accepted[i], accepted[i + 1]])
+
+    def _apply_phrases(self, log: _UndoLog, tn: int, accepted_units: list[dict]) -> list[str]:
+        """Strategy 5: cross-turn shared words, e.g. "j'aime le chocolat" ↔ "j'aime la pizza".
+
+        Candidates come from the postings of the phrase's tokens (most recent
+        `postings_scan` per token), weighted by the summed IDF of the shared
+        tokens at insertion time; only the `top_k` heaviest are linked.
+        Returns the endpoints of the links it changed.
+        """
+        linked: list[str] = []
+        stop = _PHRASE_STOP_TOKENS.get(self.language, frozenset())
+        for u in accepted_units:
+            text = u.get("text", "")
+            if not text or " " not in text:
+                continue  # Only multi-word phrases
+            norm = norm_text(text)
+            if norm in self.phrase_ids:
+                continue  # Repeated phrase — already linked when first said
+            tokens = frozenset(norm.split()) - stop
+            if not tokens:
+                continue
+            n = len(self.phrases)
+            idf = {t: math.log((n + 1) / (len(self.postings.get(t, ())) + 1)) + 1.0 for t in sorted(tokens)}
+            weights: dict[int, float] = {}
+            for token, token_idf in idf.items():
+                for i in self.postings.get(token, ())[-self.postings_scan:]:
+                    weights[i] = weights.get(i, 0.0) + token_idf
+            # Heaviest shared vocabulary first; ties go to the more recent phrase
+            for i, _ in heapq.nlargest(self.top_k, weights.items(), key=lambda kv: (kv[1], kv[0])):
+                t1, tok1, tn1 = self.phrases[i]
+                shared = sorted(tok1 & tokens, key=lambda t: (-idf[t], t))
+                if self._offer(log, (5, i, n), t1, text, "semantic", max(tn1, tn),
+                               f"Shared vocabulary: {', '.join(shared[:3])}.", [t1, text]):
+                    linked.extend((t1, text))
+            log.append(self.phrases, (text, tokens, tn))
+            log.set_item(self.phrase_ids, norm, n)
+            for token in tokens:
+                postings = self.postings.get(token)
+                if postings is None:
+                    log.set_item(self.postings, token, [n])
+                else:
+                    log.append(postings, n)
+        return linked
+
+    def _offer(self, log: _UndoLog, order: tuple, src: str, tgt: str, rel: str, turn: int,
+               reason_detail: str, evidence_units: list[str]) -> bool:
+        """Keep the candidate if the rebuild would have added it before the current one."""
+        src_id = to_id(src)
+        tgt_id = to_id(tgt)
+        if not src_id or not tgt_id or src_id == tgt_id:
+            return False
+        key = (min(src_id, tgt_id), max(src_id, tgt_id))
+        current = self.links_by_key.get(key)
+        if current is not None and current[0] <= order:
+            return False
+        link = GraphLink(
+            source=src_id,
+            target=tgt_id,
+            relationship=rel,
+            reason=rel,
+            reason_detail=reason_detail,
+            evidence_units=evidence_units[:2],
+            turn_introduced=turn,
+        ).model_dump()
+        log.set_item(self.links_by_key, key, (order, link))
+        if current is None:
+            for node_id in key:
+                members = self.adjacency.get(node_id)
+                if members is None:
+                    log.set_item(self.adjacency, node_id, {key})
+                else:
+                    log.add(members, key)
+        return True
+
+    # ── Serialization ────────────────────────────────────────────────
+
+    def node_ids(self) -> set[str]:
+        return set(self.id_words)
+
+    def _clock(self, now: float | None) -> float | None:
+        """Wall-clock time for decay, on a `decay_step_s` grid (None = no time decay)."""
+        if not self.half_life_s:
+            return None
+        now = time.time() if now is None else now
+        return now - now % self.decay_step_s if self.decay_step_s > 0 else now
+
+    def _node_rows(self, state: SessionState, now: float | None) -> tuple[np.ndarray, np.ndarray]:
+        """Store rows of all nodes (ascending = node order) and their mastery."""
+        rows = self.store.node_rows()
+        mastery = self.store.mastery(rows, state.turn, state.mastery_scores, self._clock(now), self.half_life_s)
+        return rows, mastery
+
+    def _nodes_at(self, rows: np.ndarray, mastery: np.ndarray, level: str) -> list[dict]:
+        store = self.store
+        words, node_types = store.words, store.node_type
+        return [
+            # Same keys and order as GraphNode.model_dump()
+            {
+                "id": to_id(words[row]),
+                "label": words[row],
+                "type": node_types[row],
+                "mastery": m,
+                "level": level,
+                "turn_introduced": first_turn,
+                "usage_count": count,
+            }
+            for row, m, first_turn, count in zip(
+                rows.tolist(),
+                mastery.tolist(),
+                store.column("first_turn")[rows].tolist(),
+                store.column("count")[rows].tolist(),
+            )
+        ]
+
+    def nodes(self, state: SessionState, now: float | None = None) -> list[dict]:
+        """Graph nodes — only words the USER spoke."""
+        rows, mastery = self._node_rows(state, now)
+        return self._nodes_at(rows, mastery, state.level)
+
+    def links(self) -> list[dict]:
+        """Graph links between existing nodes, degree-capped for readability."""
+        node_ids = self.id_words
+        ordered = sorted(
+            (entry for key, entry in self.links_by_key.items() if key[0] in node_ids and key[1] in node_ids),
+            key=_link_rank,
+        )
+        # Readability guardrail: cap node degree so graph does not collapse into a spiral
+        degree: dict[str, int] = {}
+        capped: list[dict] = []
+        for _, link in ordered:
+            src = link["source"]
+            tgt = link["target"]
+            if degree.get(src, 0) >= _MAX_DEGREE or degree.get(tgt, 0) >= _MAX_DEGREE:
+                continue
+            degree[src] = degree.get(src, 0) + 1
+            degree[tgt] = degree.get(tgt, 0) + 1
+            capped.append(link)
+        logger.info("Graph links generated: %d links for %d nodes", len(capped), len(node_ids))
+        return capped
+
+    def _recap(self, seeds: set[str]) -> tuple[set[tuple[str, str]], dict[tuple[str, str], dict]]:
+        """Degree cap of the links around `seeds`, the published links elsewhere being unchanged.
+
+        Returns the link keys that were re-decided and the ones kept among
+        them. The cap is re-run over every link touching the region (first
+        the seeds); a neighbour outside it counts its other published links
+        at their rank. If a neighbour's kept links come out different, its
+        other links may flip too, so it joins the region and the pass repeats.
+        """
+        node_ids = self.id_words
+        published = self._published_adjacency
+        region = set(seeds)
+        while True:
+            keys: set[tuple[str, str]] = set()
+            for node_id in region:
+                keys.update(self.adjacency.get(node_id, ()))
+                keys.update(published.get(node_id, ()))
+            ordered = sorted(
+                (_link_rank(entry), key, entry[1])
+                for key, entry in ((key, self.links_by_key.get(key)) for key in keys)
+                if entry is not None and key[0] in node_ids and key[1] in node_ids
+            )
+            boundary = {node_id for key in keys for node_id in key} - region
+            # Ranks of the neighbours' links outside the region, all kept before
+            outside = {
+                node_id: sorted(_link_rank(self.links_by_key[key]) for key in published.get(node_id, ()) if key not in keys)
+                for node_id in boundary
+            }
+            degree: dict[str, int] = {}
+            kept: dict[tuple[str, str], dict] = {}
+            for rank, key, link in ordered:
+                if any(
+                    degree.get(node_id, 0) + bisect.bisect_left(outside.get(node_id, ()), rank) >= _MAX_DEGREE
+                    for node_id in key
+                ):
+                    continue
+                for node_id in key:
+                    degree[node_id] = degree.get(node_id, 0) + 1
+                kept[key] = link
+            moved = {
+                node_id for node_id in boundary
+                if {key for key in kept if node_id in key} != {key for key in published.get(node_id, ()) if key in keys}
+            }
+            if not moved:
+                return keys, kept
+            region |= moved
+
+    # ── Versioned deltas ─────────────────────────────────────────────
+
+    def publish(self, state: SessionState, now: float | None = None) -> dict:
+        """Diff the graph against the last published version; returns the delta since it.
+
+        Only what the turns since the last publish touched is recomputed:
+        the nodes of their dirty words, plus — when the turn or the decay
+        clock moved — the nodes whose recency is still decaying (last used
+        within the 12.5-turn window); all nodes on a level change or a
+        rebuild. Links are re-capped around the dirty nodes (see _recap()),
+        and the whole graph only after a rebuild.
+        """
+        previous = self.version
+        clock = self._clock(now)
+        if (self._mutations, state.level, state.turn, clock) == (
+            self._published_mutations, self._published_level, self._published_turn, self._published_clock
+        ):
+            return self.delta(previous)  # Nothing happened since the last publish
+        store = self.store
+        rebuild = self._dirty is None
+        dirty_ids = set() if rebuild else {to_id(word) for word in self._dirty}
+        node_ops: dict[str, str] = {}
+
+        if rebuild or state.level != self._published_level:
+            rows = store.node_rows()
+            touched_ids = set(self._published_nodes)
+        else:
+            touched_ids = set(dirty_ids)
+            dirty_rows = [store.rows[ids[0]] for ids in map(self.id_words.get, touched_ids) if ids]
+            if (state.turn, clock) != (self._published_turn, self._published_clock):
+                dirty_rows.extend(store.recent_node_rows(min(state.turn, self._published_turn)).tolist())
+            rows = np.unique(np.array(dirty_rows, dtype=np.int64))
+        mastery = store.mastery(rows, state.turn, state.mastery_scores, clock, self.half_life_s)
+
+        for node in self._nodes_at(rows, mastery, state.level):
+            node_id = node["id"]
+            touched_ids.discard(node_id)
+            current = self._published_nodes.get(node_id)
+            if node != current:
+                self._published_nodes[node_id] = node
+                node_ops[node_id] = "updated" if current is not None else "added"
+        # Touched ids that are not nodes any more
+        for node_id in touched_ids:
+            if node_id not in self.id_words and self._published_nodes.pop(node_id, None) is not None:
+                node_ops[node_id] = "removed"
+
+        link_ops: dict[tuple[str, str], str] = {}
+        if rebuild:
+            links = {(min(l["source"], l["target"]), max(l["source"], l["target"])): l for l in self.links()}
+            for key, link in links.items():
+                current = self._published_links.get(key)
+                if current is None:
+                    link_ops[key] = "added"
+                elif current is not link and current != link:
+                    link_ops[key] = "updated"
+            for key in self._published_links.keys() - links.keys():
+                link_ops[key] = "removed"
+            self._published_links = links
+            self._published_adjacency = {}
+            for key in links:
+                for node_id in key:
+                    self._published_adjacency.setdefault(node_id, set()).add(key)
+        else:
+            keys, kept = self._recap(dirty_ids)
+            published, adjacency = self._published_links, self._published_adjacency
+            for key in keys:
+                link = kept.get(key)
+                current = published.get(key)
+                if link is None:
+                    if current is not None:
+                        del published[key]
+                        for node_id in key:
+                            adjacency[node_id].discard(key)
+                        link_ops[key] = "removed"
+                elif current is None:
+                    published[key] = link
+                    for node_id in key:
+                        adjacency.setdefault(node_id, set()).add(key)
+                    link_ops[key] = "added"
+                elif current is not link and current != link:
+                    published[key] = link
+                    link_ops[key] = "updated"
+
+        self._dirty = set()
+        self._published_level = state.level
+        self._published_turn = state.turn
+        self._published_clock = clock
+        self._published_mutations = self._mutations
+        if node_ops or link_ops:
+            self.version = next(_versions)
+            self._changelog.append((self.version, previous, node_ops, link_ops))
+        return self.delta(previous)
+
+    def published_graph(self) -> tuple[list[str], list[tuple[str, str]]]:
+        """Node ids and link keys of the published version (layout input)."""
+        return list(self._published_nodes), list(self._published_links)
+
+    def snapshot_json(self) -> bytes:
+        """Published graph as JSON {"version", "nodes", "links"}, encoded once per version."""
+        if self._snapshot is None or self._snapshot[0] != self.version:
+            body = {
+                "version": self.version,
+                "nodes": list(self._published_nodes.values()),
+                "links": list(self._published_links.values()),
+            }
+            self._snapshot = (self.version, json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode())
+        return self._snapshot[1]
+
+    def delta(self, since: int | None = None) -> dict:
+        """Published changes after version `since`, or a full snapshot if it is unknown."""
+        entries = list(self._changelog)
+        start = next((i for i, entry in enumerate(entries) if entry[1] == since), None)
+        if since == self.version:
+            entries = []
+        elif start is None:
+            return {
+                "version": self.version,
+                "since": None,
+                "full": True,
+                "nodes": {"added": list(self._published_nodes.values()), "updated": [], "removed": []},
+                "links": {"added": list(self._published_links.values()), "updated": [], "removed": []},
+            }
+        else:
+            entries = entries[start:]
+
+        # First op says whether the client has the item, the published state whether it should
+        first_node_ops: dict[str, str] = {}
+        first_link_ops: dict[tuple[str, str], str] = {}
+        for _, _, node_ops, link_ops in entries:
+            for node_id, op in node_ops.items():
+                first_node_ops.setdefault(node_id, op)
+            for key, op in link_ops.items():
+                first_link_ops.setdefault(key, op)
+        return {
+            "version": self.version,
+            "since": since,
+            "full": False,
+            "nodes": _compose(first_node_ops, self._published_nodes, lambda node_id: node_id),
+            "links": _compose(first_link_ops, self._published_links, list),
+        }
+
+
+def _compose(first_ops: dict, published: dict, removed_ref) -> dict:
+    out: dict[str, list] = {"added": [], "updated": [], "removed": []}
+    for key, op in first_ops.items():
+        had = op != "added"
+        item = published.get(key)
+        if item is not None:
+            out["updated" if had else "added"].append(item)
+        elif had:
+            out["removed"].append(removed_ref(key))
+    return out
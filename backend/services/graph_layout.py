@@ -0,0 +1,182 @@
+"""
+Server-side 3D force-directed layout for large Knowledge Graphs.
+
+The browser lays out the nebula with d3-force-3d, which gets sluggish once
+a learner has thousands of nodes. GraphLayout computes the same kind of
+layout with NumPy:
+
+- Fruchterman-Reingold forces: k²/d repulsion, d²/k spring attraction
+  along links, weak gravity to the origin, cooling step limit
+- repulsion is exact (vectorized in row chunks) up to `exact_max_nodes`;
+  above that it is a one-level Barnes-Hut approximation — exact within a
+  node's cell (quantile grid), cell centroids (mass-weighted) for every
+  other cell
+- warm start: known nodes keep their previous position, new nodes start
+  next to their positioned neighbours, and the run is short and cool —
+  so the nebula stays stable as it grows
+- results are cached per graph version
+
+Positions are returned scaled to an RMS radius of `radius`.
+"""
+
+import logging
+import threading
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class GraphLayout:
+    """Force layout of one session's graph, warm-started from its previous run."""
+
+    def __init__(
+        self,
+        iterations: int = 150,
+        warm_iterations: int = 40,
+        exact_max_nodes: int = 1000,
+        cells_per_axis: int | None = None,
+        radius: float = 2.0,
+    ):
+        self.iterations = iterations
+        self.warm_iterations = warm_iterations
+        self.exact_max_nodes = exact_max_nodes
+        self.cells_per_axis = cells_per_axis
+        self.radius = radius
+        self._positions: dict[str, np.ndarray] = {}
+        self._cached: tuple[object, dict[str, list[float]]] | None = None
+        # compute() runs in worker threads — concurrent requests wait and hit the cache
+        self._lock = threading.Lock()
+        self.runs = 0
+
+    def compute(self, version, node_ids: list[str], links: list[tuple[str, str]]) -> dict[str, list[float]]:
+        """Positions {node id: [x, y, z]} for this graph version (cached per version)."""
+        with self._lock:
+            return self._compute(version, node_ids, links)
+
+    def _compute(self, version, node_ids: list[str], links: list[tuple[str, str]]) -> dict[str, list[float]]:
+        if self._cached is not None and self._cached[0] == version:
+            return self._cached[1]
+
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        edges = np.array(
+            [(index[a], index[b]) for a, b in links if a in index and b in index and a != b],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        pos, known = self._initial_positions(node_ids, edges)
+        warm = len(node_ids) > 0 and known >= 0.5 * len(node_ids)
+        if len(node_ids) > 1:
+            pos = self._run(pos, edges, self.warm_iterations if warm else self.iterations, 0.1 if warm else 1.0)
+        self.runs += 1
+
+        self._positions = {node_id: pos[i].copy() for i, node_id in enumerate(node_ids)}
+        result = self._scaled(node_ids, pos)
+        self._cached = (version, result)
+        return result
+
+    def _initial_positions(self, node_ids: list[str], edges: np.ndarray) -> tuple[np.ndarray, int]:
+        n = len(node_ids)
+        pos = np.zeros((n, 3))
+        placed = np.zeros(n, dtype=bool)
+        for i, node_id in enumerate(node_ids):
+            previous = self._positions.get(node_id)
+            if previous is not None:
+                pos[i] = previous
+                placed[i] = True
+        known = int(placed.sum())
+
+        # New nodes: next to their positioned neighbours, else anywhere near the origin
+        spread = 1.0 if known == 0 else 0.1
+        neighbour_sum = np.zeros((n, 3))
+        neighbour_count = np.zeros(n)
+        if len(edges):
+            for a, b in ((edges[:, 0], edges[:, 1]), (edges[:, 1], edges[:, 0])):
+                mask = placed[b] & ~placed[a]
+                np.add.at(neighbour_sum, a[mask], pos[b[mask]])
+                np.add.at(neighbour_count, a[mask], 1)
+        for i in np.flatnonzero(~placed):
+            # Seeded by the node id so the same graph always lays out the same way
+            jitter = np.random.default_rng(zlib.crc32(node_ids[i].encode())).uniform(-spread, spread, 3)
+            pos[i] = (neighbour_sum[i] / neighbour_count[i] if neighbour_count[i] else 0.0) + jitter
+        return pos, known
+
+    def _run(self, pos: np.ndarray, edges: np.ndarray, iterations: int, temperature: float) -> np.ndarray:
+        k = 1.0  # Ideal edge length (internal units — output is rescaled)
+        cooling = (0.01 / temperature) ** (1.0 / max(1, iterations))
+        for _ in range(iterations):
+            if len(pos) <= self.exact_max_nodes:
+                disp = self._repulsion_exact(pos, k)
+            else:
+                disp = self._repulsion_cells(pos, k)
+            if len(edges):
+                delta = pos[edges[:, 0]] - pos[edges[:, 1]]
+                dist = np.linalg.norm(delta, axis=1, keepdims=True)
+                pull = delta * dist / k
+                for axis in range(3):
+                    disp[:, axis] -= np.bincount(edges[:, 0], pull[:, axis], len(pos))
+                    disp[:, axis] += np.bincount(edges[:, 1], pull[:, axis], len(pos))
+            disp -= 0.05 * pos * np.linalg.norm(pos, axis=1, keepdims=True)
+            length = np.linalg.norm(disp, axis=1, keepdims=True)
+            pos = pos + disp / np.maximum(length, 1e-9) * np.minimum(length, temperature)
+            temperature *= cooling
+        return pos
+
+    @staticmethod
+    def _pairwise(targets: np.ndarray, sources: np.ndarray, k: float, weights=None) -> np.ndarray:
+        """Repulsion on every target from every source, in row chunks to bound memory.
+
+        Σ_j s_ij (t_i - p_j) = t_i Σ_j s_ij - (s @ p)_i, so each chunk is two
+        matrix products instead of an (n, m, 3) difference tensor.
+        """
+        out = np.empty_like(targets)
+        source_sq = np.einsum("ij,ij->i", sources, sources)
+        chunk = max(1, 2_000_000 // max(1, len(sources)))
+        for start in range(0, len(targets), chunk):
+            t = targets[start:start + chunk]
+            d2 = np.einsum("ij,ij->i", t, t)[:, None] + source_sq[None, :] - 2.0 * (t @ sources.T)
+            scale = (k * k) / np.maximum(d2, 1e-4)
+            scale[d2 <= 1e-12] = 0.0  # Self (or exact overlap) — no direction to push
+            if weights is not None:
+                scale *= weights[None, :]
+            out[start:start + chunk] = t * scale.sum(axis=1)[:, None] - scale @ sources
+        return out
+
+    def _repulsion_exact(self, pos: np.ndarray, k: float) -> np.ndarray:
+        return self._pairwise(pos, pos, k)
+
+    def _repulsion_cells(self, pos: np.ndarray, k: float) -> np.ndarray:
+        # Balance far-field cells (n × cells³) against near-field pairs (n²/cells³)
+        cells = self.cells_per_axis or max(3, min(8, round((len(pos) / 150) ** (1 / 3))))
+        # Quantile bins per axis: layouts are dense in the middle, equal-width cells would not be balanced
+        edges = np.quantile(pos, np.linspace(0, 1, cells + 1)[1:-1], axis=0)
+        coords = [np.searchsorted(edges[:, axis], pos[:, axis]) for axis in range(3)]
+        cell = (coords[0] * cells + coords[1]) * cells + coords[2]
+
+        occupied, inverse, mass = np.unique(cell, return_inverse=True, return_counts=True)
+        centroids = np.stack([np.bincount(inverse, pos[:, axis]) for axis in range(3)], axis=1) / mass[:, None]
+
+        # Far field: every cell centroid, minus the node's own cell (handled exactly below)
+        disp = self._pairwise(pos, centroids, k, weights=mass.astype(float))
+        own = centroids[inverse]
+        diff = pos - own
+        d2 = np.einsum("ij,ij->i", diff, diff)
+        own_scale = np.where(d2 > 0, (k * k) / np.maximum(d2, 1e-4), 0.0) * mass[inverse]
+        disp -= own_scale[:, None] * diff
+
+        # Near field: exact within each cell
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(occupied) + 1))
+        for c in range(len(occupied)):
+            members = order[bounds[c]:bounds[c + 1]]
+            if len(members) > 1:
+                disp[members] += self._pairwise(pos[members], pos[members], k)
+        return disp
+
+    def _scaled(self, node_ids: list[str], pos: np.ndarray) -> dict[str, list[float]]:
+        if not len(pos):
+            return {}
+        centred = pos - pos.mean(axis=0)
+        rms = float(np.sqrt((centred ** 2).sum(axis=1).mean())) or 1.0
+        scaled = np.round(centred * (self.radius / rms), 4)
+        return {node_id: scaled[i].tolist() for i, node_id in enumerate(node_ids)}
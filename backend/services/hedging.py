@@ -0,0 +1,271 @@
+"""
+Hedged LLM provider requests for the tutor turn.
+
+Instead of trying providers strictly one after another (a slow Groq
+failure used to add its full timeout before the fallback even started),
+HedgingScheduler races them:
+
+- The primary provider starts immediately.
+- If it has not produced a spoken_response once its latency passes the
+  provider's recent percentile threshold (p90 by default, read from the
+  provider_health latency histograms), the next provider is launched as
+  a hedge. A provider that fails outright is
+  replaced immediately.
+- The first attempt to yield a valid spoken_response wins; every other
+  attempt is cancelled.
+- Hedge launches are charged against a per-provider rolling token budget
+  (and an optional cost estimate), so hedging cannot multiply spend —
+  when the budget is exhausted the scheduler degrades to plain fallback.
+
+Attempts receive a gate with on_spoken_ready/on_spoken_delta callbacks.
+Only the winner's on_spoken_ready reaches the caller; spoken deltas are
+forwarded from the first attempt that streams them (a different winner
+later replaces that text through on_spoken_ready). If the winner fails
+after its spoken_response went out, the race reopens and on_spoken_reset
+tells the caller to take that text back before the next winner's
+on_spoken_ready arrives.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+from backend.services.provider_health import HealthRegistry, health as default_health
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBudget:
+    """Rolling per-provider token budget for hedged (extra) launches."""
+
+    def __init__(self, tokens_per_window: int, window: float = 60.0, cost_per_1k: float = 0.0):
+        self.tokens_per_window = tokens_per_window
+        self.window = window
+        self.cost_per_1k = cost_per_1k
+        self._spent: deque[tuple[float, int]] = deque()
+
+    def _expire(self, now: float) -> None:
+        while self._spent and now - self._spent[0][0] > self.window:
+            self._spent.popleft()
+
+    def used(self, now: float | None = None) -> int:
+        self._expire(time.monotonic() if now is None else now)
+        return sum(tokens for _, tokens in self._spent)
+
+    def try_charge(self, tokens: int, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        if self.used(now) + tokens > self.tokens_per_window:
+            return False
+        self._spent.append((now, tokens))
+        return True
+
+    def cost(self, now: float | None = None) -> float:
+        return self.used(now) / 1000 * self.cost_per_1k
+
+
+AttemptFn = Callable[["AttemptGate"], Awaitable[tuple[dict | None, str]]]
+
+
+class ProviderAttempt:
+    """One provider call: run(gate) returns (parsed_result_or_None, raw_text).
+
+    health_key names the latency histogram that sets the hedge threshold
+    (e.g. "groq:analysis" for long calls); it defaults to the provider name.
+    """
+
+    def __init__(self, name: str, run: AttemptFn, est_tokens: int = 600, health_key: str | None = None):
+        self.name = name
+        self.run = run
+        self.est_tokens = est_tokens
+        self.health_key = health_key or name
+
+
+class HedgeOutcome:
+    def __init__(self, provider: str | None, result: dict | None, raw: str = "", hedged: bool = False):
+        self.provider = provider
+        self.result = result
+        self.raw = raw
+        self.hedged = hedged
+
+
+class AttemptGate:
+    """Callbacks handed to one attempt; the race decides what gets through."""
+
+    def __init__(self, race: "_Race", name: str, health_key: str | None = None):
+        self._race = race
+        self.name = name
+        self.health_key = health_key or name
+        self.started = time.perf_counter()
+        self.spoken_fired = False
+        self.task: asyncio.Task | None = None
+
+    async def on_spoken_ready(self, text: str) -> None:
+        await self._race.claim(self, text)
+
+    def on_spoken_delta(self, text: str) -> None:
+        self._race.delta(self, text)
+
+
+class HedgingScheduler:
+    """Races provider attempts with percentile-triggered hedges and budgets."""
+
+    def __init__(
+        self,
+        percentile: float = 0.9,
+        min_delay: float = 0.25,
+        max_delay: float = 4.0,
+        default_delay: float = 1.5,
+        budgets: dict[str, TokenBudget] | None = None,
+        enabled: bool = True,
+        health: HealthRegistry | None = None,
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.default_delay = default_delay
+        self.budgets = budgets or {}
+        self.enabled = enabled
+        self.health = health or default_health
+        self.stats = {"hedges": 0, "hedge_wins": 0, "budget_skips": 0, "cancelled": 0}
+
+    def threshold(self, provider: str) -> float:
+        """Seconds to wait on a provider before hedging."""
+        value = self.health.get(provider).latency.percentile(self.percentile)
+        if value is None:
+            return self.default_delay
+        return min(self.max_delay, max(self.min_delay, value))
+
+    def allow_hedge(self, attempt: ProviderAttempt) -> bool:
+        budget = self.budgets.get(attempt.name)
+        if budget is None:
+            return True
+        return budget.try_charge(attempt.est_tokens)
+
+    async def run(
+        self,
+        attempts: list[ProviderAttempt],
+        on_spoken_ready: Callable[[str], Awaitable[None]] | None = None,
+        on_spoken_delta: Callable[[str], None] | None = None,
+        on_spoken_reset: Callable[[], Awaitable[None]] | None = None,
+    ) -> HedgeOutcome:
+        """Return the first valid result, or an outcome with result=None."""
+        return await _Race(self, attempts, on_spoken_ready, on_spoken_delta, on_spoken_reset).run()
+
+
+class _Race:
+    """State of one hedged request."""
+
+    def __init__(self, scheduler: HedgingScheduler, attempts, on_spoken_ready, on_spoken_delta, on_spoken_reset=None):
+        self.scheduler = scheduler
+        self.pending: list[ProviderAttempt] = list(attempts)
+        self.running: dict[asyncio.Task, AttemptGate] = {}
+        self.winner: AttemptGate | None = None
+        self.live: AttemptGate | None = None
+        self.hedged = False
+        self._on_spoken_ready = on_spoken_ready
+        self._on_spoken_delta = on_spoken_delta
+        self._on_spoken_reset = on_spoken_reset
+        self._first: AttemptGate | None = None
+        self._last_launch: AttemptGate | None = None
+
+    # ── Gate callbacks ────────────────────────────────────────────────
+
+    async def claim(self, gate: AttemptGate, text: str) -> None:
+        """First attempt with a complete spoken_response wins the race."""
+        if self.winner is None and text:
+            self.winner = gate
+            self._cancel_others(gate)
+        if self.winner is gate and not gate.spoken_fired:
+            gate.spoken_fired = True
+            if self._on_spoken_ready:
+                await self._on_spoken_ready(text)
+
+    def delta(self, gate: AttemptGate, text: str) -> None:
+        if self._on_spoken_delta is None or self.winner not in (None, gate):
+            return
+        if self.live is None:
+            self.live = gate
+        if self.live is gate:
+            self._on_spoken_delta(text)
+
+    # ── Scheduling ────────────────────────────────────────────────────
+
+    def _launch(self, attempt: ProviderAttempt, hedge: bool) -> None:
+        gate = AttemptGate(self, attempt.name, attempt.health_key)
+        gate.task = asyncio.create_task(attempt.run(gate))
+        self.running[gate.task] = gate
+        if hedge:
+            self.hedged = True
+            self.scheduler.stats["hedges"] += 1
+            logger.info("Hedging: %s still pending after %.2fs — launching %s",
+                        self._last_launch.name, time.perf_counter() - self._last_launch.started, attempt.name)
+        if self._first is None:
+            self._first = gate
+        self._last_launch = gate
+
+    def _cancel_others(self, keep: AttemptGate) -> None:
+        for task, gate in list(self.running.items()):
+            if gate is not keep and not task.done():
+                task.cancel()
+                self.scheduler.stats["cancelled"] += 1
+                logger.info("Hedging: cancelled %s (lost to %s)", gate.name, keep.name)
+
+    def _hedge_delay(self) -> float | None:
+        if not self.scheduler.enabled or not self.pending or self.winner is not None:
+            return None
+        gate = self._last_launch
+        deadline = gate.started + self.scheduler.threshold(gate.health_key)
+        return max(0.0, deadline - time.perf_counter())
+
+    async def run(self) -> HedgeOutcome:
+        budget_blocked = False
+        try:
+            while True:
+                if not self.running:
+                    if not self.pending:
+                        return HedgeOutcome(None, None, hedged=self.hedged)
+                    # Nothing in flight: a plain fallback, not a hedge
+                    self._launch(self.pending.pop(0), hedge=False)
+                    budget_blocked = False
+
+                timeout = None if budget_blocked else self._hedge_delay()
+                done, _ = await asyncio.wait(
+                    list(self.running), timeout=timeout, return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    attempt = self.pending[0]
+                    if self.scheduler.allow_hedge(attempt):
+                        self._launch(self.pending.pop(0), hedge=True)
+                    else:
+                        self.scheduler.stats["budget_skips"] += 1
+                        logger.info("Hedging: %s budget exhausted — not hedging", attempt.name)
+                        budget_blocked = True
+                    continue
+
+                for task in done:
+                    gate = self.running.pop(task)
+                    if task.cancelled():
+                        continue
+                    try:
+                        result, raw = task.result()
+                    except Exception as exc:
+                        logger.warning("Hedging: %s raised %s: %s", gate.name, type(exc).__name__, exc)
+                        result, raw = None, ""
+                    if result and result.get("spoken_response") and self.winner in (None, gate):
+                        await self.claim(gate, result["spoken_response"])
+                        if self.hedged and gate is not self._first:
+                            self.scheduler.stats["hedge_wins"] += 1
+                        return HedgeOutcome(gate.name, result, raw, hedged=self.hedged)
+                    if gate is self.winner:
+                        # spoken_response arrived but the reply was unusable — reopen the race
+                        logger.warning("Hedging: %s failed after its spoken_response", gate.name)
+                        self.winner = None
+                        self.live = None
+                        if gate.spoken_fired and self._on_spoken_reset:
+                            # The caller already acted on that text — take it back
+                            await self._on_spoken_reset()
+        finally:
+            for task in list(self.running):
+                task.cancel()
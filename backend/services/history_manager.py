@@ -0,0 +1,185 @@
+"""
+Token-budgeted LLM conversation history with a rolling summary.
+
+The tutor prompt used to carry the last 8 raw messages: user turns
+prefixed with the whole mission context and assistant turns as full JSON
+replies (vocabulary arrays, graph links, mastery scores...). Prompts
+stayed large while anything older than four exchanges was simply lost.
+HistoryManager keeps instead:
+
+- user turns as what the learner said, assistant turns as the
+  spoken_response only
+- token counts per message (tiktoken when installed, otherwise a local
+  estimate) so window() returns the newest messages that fit the budget
+- a rolling summary of everything older: once messages overflow the
+  budget, compact() folds them into the summary in the background (LLM
+  summarizer when given, extractive fallback otherwise) — the prompt
+  respects the budget immediately, the summary catches up off the
+  critical path; the summarizer sees at most two budgets of exchanges
+  per call, anything older is folded extractively first
+- replay() for reloading a stored session: all turns at once, overflow
+  folded extractively — no summarizer call over the whole transcript
+
+The summary goes into the prompt as a system message before the window.
+"""
+
+import asyncio
+import logging
+import math
+import re
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+_PIECE = re.compile(r"[^\W\d_]+|\d+|[^\w\s]")
+_WIDE = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]")
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _encoding = None
+except Exception as exc:  # Encoding files unavailable (offline)
+    logger.warning("tiktoken encoding unavailable — estimating token counts: %s", exc)
+    _encoding = None
+
+Summarizer = Callable[[str, list[dict]], Awaitable[str]]
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens of `text` — exact with tiktoken, else ~1 per 4 letters / symbol / CJK char."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    total = 0
+    for piece in _PIECE.findall(text):
+        wide = len(_WIDE.findall(piece))
+        total += wide + math.ceil((len(piece) - wide) / 4)
+    return total
+
+
+def _message_tokens(message: dict) -> int:
+    return count_tokens(message["content"]) + 4  # Role / separator overhead
+
+
+def extractive_summary(summary: str, messages: list[dict], max_tokens: int) -> str:
+    """Fallback summary: what the learner said, newest kept when over budget."""
+    lines = [line for line in summary.split(" | ") if line] if summary else []
+    lines += [f"Learner: {m['content']}" for m in messages if m["role"] == "user" and m["content"].strip()]
+    # Newest first, so a long replayed transcript costs only the kept lines
+    kept = lines[-1:]
+    for line in reversed(lines[:-1]):
+        if count_tokens(" | ".join([line, *kept])) > max_tokens:
+            break
+        kept.insert(0, line)
+    return " | ".join(kept)
+
+
+class HistoryManager:
+    """Recent messages within a token budget, older ones folded into a summary."""
+
+    def __init__(self, budget_tokens: int = 400, summary_tokens: int = 120, summarize: Summarizer | None = None):
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self.summarize = summarize
+        self.messages: list[dict] = []
+        self.summary = ""
+        self._tokens: list[int] = []
+        self._generation = 0  # Bumped by clear(); stale compactions are dropped
+        self._compacting: asyncio.Task | None = None
+
+    def add(self, user_text: str, spoken: str) -> None:
+        """Record one exchange and fold overflow in the background."""
+        for role, content in (("user", user_text), ("assistant", spoken)):
+            message = {"role": role, "content": content}
+            self.messages.append(message)
+            self._tokens.append(_message_tokens(message))
+        self._schedule_compaction()
+
+    def replay(self, exchanges: list[tuple[str, str]]) -> None:
+        """Load stored exchanges at once; overflow is folded extractively, without the summarizer."""
+        for user_text, spoken in exchanges:
+            for role, content in (("user", user_text), ("assistant", spoken)):
+                message = {"role": role, "content": content}
+                self.messages.append(message)
+                self._tokens.append(_message_tokens(message))
+        if count := self._fitting():
+            self._fold(count, extractive_summary(self.summary, self.messages[:count], self.summary_tokens))
+
+    def clear(self) -> None:
+        self.messages = []
+        self._tokens = []
+        self.summary = ""
+        self._generation += 1
+
+    def tokens(self) -> int:
+        return sum(self._tokens)
+
+    def _fitting(self) -> int:
+        """Index of the oldest message in the budget window (exchange-aligned)."""
+        used, start = 0, len(self.messages)
+        while start > 0 and used + self._tokens[start - 1] <= self.budget_tokens:
+            start -= 1
+            used += self._tokens[start]
+        if start < len(self.messages) and self.messages[start]["role"] != "user":
+            start += 1  # Never open the window on a reply without its question
+        return start
+
+    def window(self, max_messages: int | None = None, with_summary: bool = True) -> list[dict]:
+        """Prompt history: the summary (as a system message) and the newest fitting messages."""
+        start = self._fitting()
+        if max_messages is not None:
+            start = max(start, len(self.messages) - max_messages)
+        recent = self.messages[start:]
+        if with_summary and self.summary:
+            return [{"role": "system", "content": f"Earlier in this conversation: {self.summary}"}, *recent]
+        return recent
+
+    # ── Compaction ───────────────────────────────────────────────────
+
+    def _schedule_compaction(self) -> None:
+        if self._fitting() == 0 or (self._compacting is not None and not self._compacting.done()):
+            return
+        try:
+            self._compacting = asyncio.get_running_loop().create_task(self.compact())
+        except RuntimeError:  # No running loop (sync caller) — fold extractively now
+            count = self._fitting()
+            self._fold(count, extractive_summary(self.summary, self.messages[:count], self.summary_tokens))
+
+    async def compact(self) -> None:
+        """Fold every message outside the budget window into the summary."""
+        while (count := self._fitting()) > 0:
+            generation = self._generation
+            folded = self.messages[:count]
+            previous = self.summary
+            # The summarizer gets at most two budgets of the newest folded messages
+            cut, used = count, 0
+            while cut > 0 and used + self._tokens[cut - 1] <= self.budget_tokens * 2:
+                cut -= 1
+                used += self._tokens[cut]
+            if cut:
+                previous = extractive_summary(previous, folded[:cut], self.summary_tokens)
+                folded = folded[cut:]
+            summary = ""
+            if self.summarize is not None and folded:
+                try:
+                    summary = (await self.summarize(previous, folded)).strip()
+                except Exception as exc:
+                    logger.warning("History summary failed, folding extractively: %s", exc)
+            if generation != self._generation:
+                return  # History was cleared meanwhile
+            if not summary or count_tokens(summary) > self.summary_tokens * 2:
+                summary = extractive_summary(previous, folded, self.summary_tokens)
+            self._fold(count, summary)
+
+    def _fold(self, count: int, summary: str) -> None:
+        del self.messages[:count]
+        del self._tokens[:count]
+        self.summary = summary
+        logger.info("History compacted: %d messages folded, summary %d tokens", count, count_tokens(summary))
+
+    async def settle(self) -> None:
+        """Wait for a running compaction (tests, shutdown)."""
+        if self._compacting is not None:
+            await self._compacting
@@ -0,0 +1,305 @@
+"""
+Incremental JSON event parser for streamed LLM output.
+
+The tutor reply is one JSON object streamed token by token. Instead of
+re-running a regex over the whole accumulated string on every chunk
+(quadratic in response length), IncrementalJSONParser keeps a resumable
+scanner state and emits typed events as soon as they are decidable:
+
+- "string_delta": decoded text of a top-level string value while it is
+  still streaming (only for keys listed in `stream_keys`)
+- "item":         one element of a top-level array, as soon as it closes
+- "field":        a complete top-level field (key + decoded value)
+- "done":         the whole object closed (value = full dict)
+
+Every byte is scanned once and every value is decoded once, so total
+work is O(n). Leading junk before the first "{" (e.g. a ```json fence)
+is skipped. The same parser is used for streaming and non-streaming
+providers (see parse_json_object).
+"""
+
+import json
+import re
+from typing import Any, NamedTuple
+
+
+class JSONStreamError(ValueError):
+    """The stream is not a valid JSON object."""
+
+
+class StreamEvent(NamedTuple):
+    kind: str  # "string_delta" | "item" | "field" | "done"
+    key: str | None = None
+    value: Any = None
+    index: int | None = None
+
+
+# Body of a JSON string: runs of plain chars or complete 2-char escapes.
+# Stops at the closing quote, or before a trailing lone backslash.
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+# Inside a nested value only strings and structural chars matter; group 1
+# is None for a string that has not closed yet.
+_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*(")?|[{}\[\],]', re.DOTALL)
+_SCALAR = re.compile(r'[^,}\]\s]*')
+_WS = re.compile(r"\s*")
+
+_BEFORE, _KEY, _COLON, _VALUE, _STRING, _CONTAINER, _ARRAY, _SCALAR_VALUE, _AFTER, _DONE = range(10)
+
+
+def _safe_string_cut(raw: str) -> int:
+    """Length of the prefix of a raw JSON string body that decodes on its own.
+
+    Holds back an incomplete \\uXXXX escape and a trailing high-surrogate
+    escape whose low half has not arrived yet.
+    """
+    end = len(raw)
+    while True:
+        # Only an escape within the last 6 chars can still be incomplete
+        idx = raw.rfind("\\", max(0, end - 6), end)
+        if idx < 0:
+            return end
+        run = 0
+        while idx - run >= 0 and raw[idx - run] == "\\":
+            run += 1
+        if run % 2 == 0 or raw[idx + 1:idx + 2] != "u":
+            # Last escape is "\\\\" or a 2-char escape — always complete
+            return end
+        if end - idx < 6 or "d800" <= raw[idx + 2:idx + 6].lower() <= "dbff":
+            end = idx
+            continue
+        return end
+
+
+class IncrementalJSONParser:
+    """Resumable event parser for one streamed top-level JSON object."""
+
+    def __init__(self, stream_keys: tuple[str, ...] | frozenset[str] = ()):
+        self.stream_keys = frozenset(stream_keys)
+        self.result: dict = {}
+        self._chunks: list[str] = []
+        self._buf = ""
+        self._pos = 0
+        self._state = _BEFORE
+        self._key: str | None = None
+        self._value_start = 0
+        self._depth = 0
+        self._items: list = []
+        self._item_from = 0
+        self._decoded_upto = 0
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    @property
+    def text(self) -> str:
+        """All raw text fed so far."""
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> list[StreamEvent]:
+        """Consume a chunk and return the events it completed."""
+        if not chunk:
+            return []
+        self._chunks.append(chunk)
+        if self._state == _DONE:
+            return []
+        self._buf += chunk
+        events: list[StreamEvent] = []
+        while self._state != _DONE and self._step(events):
+            pass
+        self._compact()
+        return events
+
+    def close(self) -> dict:
+        """Finish the stream; raises JSONStreamError if the object never closed."""
+        if self._state != _DONE:
+            raise JSONStreamError("JSON stream ended before the top-level object closed")
+        return self.result
+
+    # ── Internals ─────────────────────────────────────────────────────
+
+    def _compact(self) -> None:
+        # Between values nothing before _pos is needed again; inside a
+        # top-level array nothing before the current element is. Keeps the
+        # buffer (and the per-chunk append) bounded by one value/element.
+        if self._state == _ARRAY:
+            drop = self._item_from
+            if drop:
+                self._buf = self._buf[drop:]
+                self._pos -= drop
+                self._item_from = 0
+        elif self._state in (_KEY, _COLON, _VALUE, _AFTER, _BEFORE) and self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+
+    def _loads(self, raw: str) -> Any:
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError as exc:
+            raise JSONStreamError(f"Invalid JSON value for {self._key!r}: {exc}") from exc
+
+    def _skip_ws(self) -> bool:
+        self._pos = _WS.match(self._buf, self._pos).end()
+        return self._pos < len(self._buf)
+
+    def _complete_field(self, value: Any, end: int, events: list[StreamEvent]) -> None:
+        self.result[self._key] = value
+        events.append(StreamEvent("field", self._key, value))
+        self._pos = end
+        self._state = _AFTER
+
+    def _step(self, events: list[StreamEvent]) -> bool:
+        """Advance the scanner; returns False when more input is needed."""
+        buf = self._buf
+        state = self._state
+
+        if state == _BEFORE:
+            idx = buf.find("{", self._pos)
+            if idx < 0:
+                self._pos = len(buf)
+                return False
+            self._pos = idx + 1
+            self._state = _KEY
+            return True
+
+        if state in (_KEY, _AFTER):
+            if not self._skip_ws():
+                return False
+            c = buf[self._pos]
+            if c == "}":
+                self._pos += 1
+                self._state = _DONE
+                events.append(StreamEvent("done", value=self.result))
+                return True
+            if c == ",":
+                if state != _AFTER:
+                    raise JSONStreamError("Unexpected ',' in object")
+                self._pos += 1
+                self._state = _KEY
+                return True
+            if state == _AFTER:
+                raise JSONStreamError(f"Expected ',' or '}}', got {c!r}")
+            if c != '"':
+                raise JSONStreamError(f"Expected object key, got {c!r}")
+            m = _STRING_BODY.match(buf, self._pos + 1)
+            if m.end() >= len(buf):
+                return False
+            self._key = self._loads(buf[self._pos:m.end() + 1])
+            self._pos = m.end() + 1
+            self._state = _COLON
+            return True
+
+        if state == _COLON:
+            if not self._skip_ws():
+                return False
+            if buf[self._pos] != ":":
+                raise JSONStreamError(f"Expected ':' after key {self._key!r}")
+            self._pos += 1
+            self._state = _VALUE
+            return True
+
+        if state == _VALUE:
+            if not self._skip_ws():
+                return False
+            c = buf[self._pos]
+            self._value_start = self._pos
+            if c == '"':
+                self._pos += 1
+                self._decoded_upto = self._pos
+                self._state = _STRING
+            elif c == "[":
+                self._pos += 1
+                self._depth = 1
+                self._items = []
+                self._item_from = self._pos
+                self._state = _ARRAY
+            elif c == "{":
+                self._pos += 1
+                self._depth = 1
+                self._state = _CONTAINER
+            else:
+                self._state = _SCALAR_VALUE
+            return True
+
+        if state == _STRING:
+            m = _STRING_BODY.match(buf, self._pos)
+            end = m.end()
+            closed = end < len(buf) and buf[end] == '"'
+            if self._key in self.stream_keys:
+                raw = buf[self._decoded_upto:end]
+                cut = len(raw) if closed else _safe_string_cut(raw)
+                if cut:
+                    delta = self._loads('"' + raw[:cut] + '"')
+                    self._decoded_upto += cut
+                    if delta:
+                        events.append(StreamEvent("string_delta", self._key, delta))
+            if not closed:
+                self._pos = end
+                return False
+            self._complete_field(self._loads(buf[self._value_start:end + 1]), end + 1, events)
+            return True
+
+        if state == _SCALAR_VALUE:
+            m = _SCALAR.match(buf, self._pos)
+            if m.end() >= len(buf):
+                self._pos = m.end()
+                return False
+            self._complete_field(self._loads(buf[self._value_start:m.end()]), m.end(), events)
+            return True
+
+        if state in (_CONTAINER, _ARRAY):
+            return self._scan_container(events)
+
+        return False
+
+    def _scan_container(self, events: list[StreamEvent]) -> bool:
+        buf = self._buf
+        in_array = self._state == _ARRAY
+        for m in _TOKEN.finditer(buf, self._pos):
+            c = buf[m.start()]
+            if c == '"':
+                if m.group(1) is None:
+                    # Resume at the opening quote once more text arrives
+                    self._pos = m.start()
+                    return False
+                continue
+            if c in "{[":
+                self._depth += 1
+                continue
+            pos = m.start()
+            if c == ",":
+                if in_array and self._depth == 1:
+                    self._end_item(pos, events, closing=False)
+                continue
+            self._depth -= 1
+            if self._depth:
+                if self._depth < 0:
+                    raise JSONStreamError("Unbalanced brackets")
+                continue
+            if in_array:
+                self._end_item(pos, events, closing=True)
+                self._complete_field(self._items, pos + 1, events)
+            else:
+                self._complete_field(self._loads(buf[self._value_start:pos + 1]), pos + 1, events)
+            return True
+        self._pos = len(buf)
+        return False
+
+    def _end_item(self, end: int, events: list[StreamEvent], closing: bool) -> None:
+        raw = self._buf[self._item_from:end].strip()
+        self._item_from = end + 1
+        if not raw:
+            # Only "[]" may have an empty slot
+            if closing and not self._items:
+                return
+            raise JSONStreamError(f"Empty element in array {self._key!r}")
+        item = self._loads(raw)
+        events.append(StreamEvent("item", self._key, item, len(self._items)))
+        self._items.append(item)
+
+
+def parse_json_object(text: str) -> dict:
+    """Parse a complete (possibly fenced) JSON object with the stream parser."""
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.close()
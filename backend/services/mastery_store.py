@@ -0,0 +1,194 @@
+"""
+Columnar per-unit learning stats with batch mastery / decay kernels.
+
+GraphIndex used to keep one stats dict per pedagogical unit and compute
+each node's mastery in a Python loop at serialization. MasteryStore keeps
+the same stats as NumPy columns (one row per unit, rows in insertion
+order), so mastery for every node is a handful of vectorized operations:
+
+- columns: count, sum_conf, first_turn, last_turn, last_seen (Unix time
+  of the last use, NaN when unknown), kind_bonus; node_type / unit_kind /
+  canonical stay in parallel Python lists (display only)
+- `observe()` returns an undo callback, so GraphIndex can roll a turn back;
+  rows created by a turn are always the last ones, so undo pops them
+- `mastery()` is the node formula: confidence, reuse, recency — where
+  recency now also decays with wall-clock time since the unit was last
+  seen (half-life `half_life_s`) — blended with the tutor's mastery_scores
+
+The formula is evaluated in the same operation order as the scalar
+version, so results are bit-identical when no time decay applies.
+"""
+
+import math
+
+import numpy as np
+
+_COLUMNS = {
+    "count": np.int64,
+    "sum_conf": np.float64,
+    "first_turn": np.int64,
+    "last_turn": np.int64,
+    "last_seen": np.float64,
+    "kind_bonus": np.float64,
+}
+
+# Turn recency loses this much per turn since the last use (zero after 12.5 turns)
+_RECENCY_PER_TURN = 0.08
+
+# Pattern / sentence units get a small mastery bonus (they carry structure)
+_BONUS_KINDS = ("pattern", "sentence")
+
+
+class MasteryStore:
+    """Per-session unit stats, one row per unit word, stored column-wise."""
+
+    def __init__(self, capacity: int = 256):
+        self.size = 0
+        self.words: list[str] = []
+        self.rows: dict[str, int] = {}
+        self.node_type: list[str] = []
+        self.unit_kind: list[str] = []
+        self.canonical: list[str] = []
+        # True for the first row of each node id — the row that is the node
+        self._is_node = np.zeros(capacity, dtype=bool)
+        self._cols = {name: np.zeros(capacity, dtype=dtype) for name, dtype in _COLUMNS.items()}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.rows
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of one column over the live rows."""
+        view = self._cols[name][:self.size]
+        view.flags.writeable = False
+        return view
+
+    def get(self, word: str) -> dict | None:
+        """Stats of one unit as a plain dict (None if unknown)."""
+        row = self.rows.get(word)
+        if row is None:
+            return None
+        stat = {name: col[row].item() for name, col in self._cols.items() if name != "kind_bonus"}
+        if math.isnan(stat["last_seen"]):
+            stat["last_seen"] = None
+        stat.update(node_type=self.node_type[row], unit_kind=self.unit_kind[row], canonical=self.canonical[row])
+        return stat
+
+    # ── Updates ──────────────────────────────────────────────────────
+
+    def observe(
+        self,
+        word: str,
+        turn: int,
+        confidence: float,
+        seen_at: float | None,
+        node_type: str,
+        unit_kind: str,
+        canonical: str = "",
+        is_node: bool = False,
+    ):
+        """Record one use of `word`; returns a callback that undoes it.
+
+        `is_node` only matters when the word is new: it marks the row as the
+        one representing its node id.
+        """
+        row = self.rows.get(word)
+        if row is None:
+            row = self._append(word, turn, is_node)  # May reallocate the columns
+            undo = self._pop
+        else:
+            saved = tuple(col[row] for col in self._cols.values())
+            saved_meta = (self.node_type[row], self.unit_kind[row], self.canonical[row])
+
+            def undo(row=row, saved=saved, saved_meta=saved_meta):
+                # Columns may have been reallocated since — look them up at undo time
+                for col, value in zip(self._cols.values(), saved):
+                    col[row] = value
+                self.node_type[row], self.unit_kind[row], self.canonical[row] = saved_meta
+
+        cols = self._cols
+        cols["count"][row] += 1
+        cols["sum_conf"][row] += confidence
+        cols["last_turn"][row] = turn
+        if seen_at is not None:
+            cols["last_seen"][row] = seen_at
+        cols["kind_bonus"][row] = 0.05 if unit_kind in _BONUS_KINDS else 0.0
+        self.node_type[row] = node_type
+        self.unit_kind[row] = unit_kind
+        self.canonical[row] = canonical or self.canonical[row]
+        return undo
+
+    def _append(self, word: str, turn: int, is_node: bool) -> int:
+        row = self.size
+        if row == len(self._is_node):
+            capacity = 2 * row
+            self._is_node = np.resize(self._is_node, capacity)
+            self._cols = {name: np.resize(col, capacity) for name, col in self._cols.items()}
+        for name, col in self._cols.items():
+            col[row] = 0
+        self._cols["first_turn"][row] = turn
+        self._cols["last_seen"][row] = np.nan
+        self._is_node[row] = is_node
+        self.words.append(word)
+        self.rows[word] = row
+        self.node_type.append("")
+        self.unit_kind.append("")
+        self.canonical.append("")
+        self.size += 1
+        return row
+
+    def _pop(self) -> None:
+        self.size -= 1
+        del self.rows[self.words.pop()]
+        self.node_type.pop()
+        self.unit_kind.pop()
+        self.canonical.pop()
+
+    # ── Batch kernels ────────────────────────────────────────────────
+
+    def node_rows(self) -> np.ndarray:
+        """Rows that are graph nodes, in node insertion order."""
+        return np.flatnonzero(self._is_node[:self.size])
+
+    def recent_node_rows(self, turn: int) -> np.ndarray:
+        """Node rows whose turn recency is still above zero at `turn` — the ones
+        whose mastery moves with the turn or the clock."""
+        live = self._cols["last_turn"][:self.size] > turn - 1.0 / _RECENCY_PER_TURN
+        return np.flatnonzero(self._is_node[:self.size] & live)
+
+    def decay(self, rows: np.ndarray, turn: int, now: float | None = None,
+              half_life_s: float | None = None) -> np.ndarray:
+        """Recency of each row in [0, 1]: linear over 12.5 turns × wall-clock half-life."""
+        recency = np.maximum(0.0, 1.0 - ((turn - self._cols["last_turn"][rows]) * _RECENCY_PER_TURN))
+        if now is not None and half_life_s:
+            age = np.maximum(0.0, now - self._cols["last_seen"][rows])
+            # Unknown last use (older sessions) → no time decay
+            recency = recency * np.where(np.isnan(age), 1.0, np.exp2(-np.nan_to_num(age) / half_life_s))
+        return recency
+
+    def mastery(self, rows: np.ndarray, turn: int, scores: dict[str, float] | None = None,
+                now: float | None = None, half_life_s: float | None = None) -> np.ndarray:
+        """Mastery in [0.15, 1] for each row, blended 65/35 with `scores` (tutor's mastery_scores).
+
+        `rows` must be ascending (e.g. node_rows()).
+        """
+        cols = self._cols
+        count = cols["count"][rows]
+        avg_conf = cols["sum_conf"][rows] / np.maximum(1, count)
+        reuse_score = np.minimum(1.0, (count - 1) / 4)
+        recency = self.decay(rows, turn, now, half_life_s)
+        learned = 0.22 + (avg_conf * 0.38) + (reuse_score * 0.30) + (recency * 0.10)
+        learned = learned + cols["kind_bonus"][rows]
+        history = learned
+        hits = [(self.rows[word], score) for word, score in (scores or {}).items() if word in self.rows]
+        if hits:
+            # Scatter the scores onto their positions in `rows` (ascending)
+            hit_rows, hit_scores = np.array(hits, dtype=np.float64).T
+            hit_rows = hit_rows.astype(np.int64)
+            pos = np.minimum(np.searchsorted(rows, hit_rows), max(0, len(rows) - 1))
+            found = (rows[pos] == hit_rows) if len(rows) else np.zeros(len(hits), dtype=bool)
+            history = learned.copy()
+            history[pos[found]] = hit_scores[found]
+        return np.minimum(1.0, np.maximum(0.15, (learned * 0.65) + (history * 0.35)))
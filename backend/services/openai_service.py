@@ -2,9 +2,15 @@
 AI Tutor Service for Echo Neural Language Lab.
 
 Mock mode: Returns pre-scripted TutorResponse from MOCK_CONVERSATION[turn].response.
-Real mode: Uses Backboard.io AI assistants (GPT-4o) as primary LLM.
-           Falls back to OpenAI GPT direct calls if Backboard fails.
+Real mode: Uses Groq as primary LLM, with Backboard.io (GPT-4o) and OpenAI
+           GPT direct calls raced as hedges/fallbacks (see services/hedging.py).
            Falls back to rule-based responses as last resort.
+           Replies to short repeated inputs are served from a process-wide
+           ResponseCache (see services/response_cache.py) when the prompt
+           context matches. Conversation history is token-budgeted, older
+           turns folded into a rolling summary (see services/history_manager.py).
+           Sessions can opt into a compact output schema with one-letter keys
+           (see services/compact_schema.py) to cut output tokens.
 """
 
 import asyncio
@@ -14,8 +20,28 @@ import os
 import random
 import re
 import time
-
-from backend.config import MOCK_MODE
+from typing import NamedTuple
+
+from backend.config import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_CHARS,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_TTL_S,
+    LLM_COMPACT_SCHEMA,
+    LLM_HEDGE_DEFAULT_DELAY_S,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_TOKENS_PER_MIN,
+    LLM_HISTORY_TOKENS,
+    LLM_SUMMARY_TOKENS,
+    MOCK_MODE,
+)
+from backend.services.compact_schema import SPOKEN_KEY, decode_compact, encode_compact
+from backend.services.history_manager import HistoryManager
+from backend.services.hedging import HedgingScheduler, ProviderAttempt, TokenBudget
+from backend.services.json_stream import IncrementalJSONParser, JSONStreamError, parse_json_object
+from backend.services.provider_health import classify_error, health
+from backend.services.response_cache import CacheKeys, ResponseCache
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +93,19 @@ _LANGUAGE_GREETINGS = {
 }
 
 
+def _conversation_rules(lang_name: str, spoken_key: str = "spoken_response") -> str:
+    return (
+        "CRITICAL RULES:\n"
+        "1. NEVER talk about yourself or invent fictional events about your own life — you are an AI.\n"
+        "2. ALWAYS ask questions about THE LEARNER'S life, experiences, and opinions.\n"
+        "3. React warmly to what they said, then ask ONE genuine question about them.\n"
+        "4. If they send a short opener (like 'Let's go!' or 'Allons-y!'), just greet them warmly and ask what they'd like to talk about.\n"
+        "5. NEVER drill or instruct. Keep it natural and conversational.\n"
+        f"6. Speak {lang_name} only in {spoken_key}. End with ONE open question.\n"
+        "7. If a conversation theme is provided, naturally steer toward it — never mention the theme explicitly.\n\n"
+    )
+
+
 def _build_system_prompt(language: str = "fr") -> str:
     """Build language-aware system prompt. spoken_response MUST be FIRST key for fast mid-stream extraction."""
     lang_name = _LANGUAGE_NAMES.get(language, language.title())
@@ -76,14 +115,7 @@ def _build_system_prompt(language: str = "fr") -> str:
 
     return (
         f"You are a warm {lang_name} conversation partner (Krashen i+1). Return ONLY valid JSON.\n"
-        "CRITICAL RULES:\n"
-        "1. NEVER talk about yourself or invent fictional events about your own life — you are an AI.\n"
-        "2. ALWAYS ask questions about THE LEARNER'S life, experiences, and opinions.\n"
-        "3. React warmly to what they said, then ask ONE genuine question about them.\n"
-        "4. If they send a short opener (like 'Let's go!' or 'Allons-y!'), just greet them warmly and ask what they'd like to talk about.\n"
-        "5. NEVER drill or instruct. Keep it natural and conversational.\n"
-        f"6. Speak {lang_name} only in spoken_response. End with ONE open question.\n"
-        "7. If a conversation theme is provided, naturally steer toward it — never mention the theme explicitly.\n\n"
+        + _conversation_rules(lang_name) +
         "JSON keys (spoken_response MUST be FIRST):\n"
         f"- spoken_response: 1-2 {lang_name} sentences + 1 question about the LEARNER (short!)\n"
         "- translation_hint: English translation\n"
@@ -104,6 +136,195 @@ def _build_system_prompt(language: str = "fr") -> str:
     )
 
 
+def _build_spoken_prompt(language: str = "fr") -> str:
+    """Two-stage mode, stage 1: only what TTS and the chat bubble need."""
+    lang_name = _LANGUAGE_NAMES.get(language, language.title())
+    greeting, greeting_en, _ = _LANGUAGE_GREETINGS.get(language, _LANGUAGE_GREETINGS["fr"])
+    return (
+        f"You are a warm {lang_name} conversation partner (Krashen i+1). Return ONLY valid JSON.\n"
+        + _conversation_rules(lang_name) +
+        "JSON keys, in this order:\n"
+        f"- spoken_response: 1-2 {lang_name} sentences + 1 question about the LEARNER (short!)\n"
+        "- translation_hint: English translation\n\n"
+        f'EXAMPLE: {{"spoken_response":"{greeting}","translation_hint":"{greeting_en}"}}'
+    )
+
+
+def _build_analysis_prompt(language: str = "fr") -> str:
+    """Two-stage mode, stage 2: pedagogical analysis of the learner's message."""
+    lang_name = _LANGUAGE_NAMES.get(language, language.title())
+    _, _, greeting_word = _LANGUAGE_GREETINGS.get(language, _LANGUAGE_GREETINGS["fr"])
+    return (
+        f"You analyze what a {lang_name} learner just said. You do NOT reply to them. Return ONLY valid JSON.\n"
+        "Use ONLY the learner's message — never invent words they did not say.\n"
+        "JSON keys:\n"
+        "- corrected_form: corrected version of the learner's sentence, or empty if correct\n"
+        "- user_vocabulary: useful phrases/sentences from the learner's message\n"
+        "- vocabulary_breakdown: [{word, translation, part_of_speech}]\n"
+        "- graph_links: [{source, target, type}] derivation from sentence→extension\n"
+        "- new_elements, reactivated_elements: string arrays\n"
+        "- mastery_scores: dict word → 0..1\n"
+        "- user_level_assessment: A1/A1+/A2\n"
+        "- border_update: what the learner can now do\n\n"
+        f'EXAMPLE: {{"corrected_form":"","user_vocabulary":["{greeting_word.title()}"],'
+        f'"vocabulary_breakdown":[],"graph_links":[],"new_elements":[],"reactivated_elements":["{greeting_word}"],'
+        f'"mastery_scores":{{"{greeting_word}":0.3}},"user_level_assessment":"A1","border_update":"Can greet."}}'
+    )
+
+
+def _build_summary_prompt(language: str = "fr") -> str:
+    """Background call folding old exchanges into the rolling history summary."""
+    lang_name = _LANGUAGE_NAMES.get(language, language.title())
+    return (
+        f"You keep a short running summary of a {lang_name} lesson for the tutor. Return ONLY valid JSON.\n"
+        "Merge the new exchanges into the current summary. Keep what the learner told about themselves "
+        "(name, likes, plans, people, places), topics covered and recurring mistakes. Drop greetings and filler.\n"
+        "At most 60 words, in English, third person.\n\n"
+        'EXAMPLE: {"summary":"Learner is Marie, likes cooking and plans a trip to Lyon. Often forgets articles."}'
+    )
+
+
+def _compact_example(fields: dict) -> str:
+    return json.dumps(encode_compact(fields), ensure_ascii=False, separators=(",", ":"))
+
+
+def _greeting_fields(language: str) -> dict:
+    """The prompt example reply, as TutorResponse fields."""
+    greeting, greeting_en, word = _LANGUAGE_GREETINGS.get(language, _LANGUAGE_GREETINGS["fr"])
+    return {
+        "spoken_response": greeting, "translation_hint": greeting_en, "corrected_form": "",
+        "user_vocabulary": [word.title()], "vocabulary_breakdown": [], "graph_links": [],
+        "new_elements": [], "reactivated_elements": [word], "mastery_scores": {word: 0.3},
+        "user_level_assessment": "A1", "border_update": "Can greet.",
+    }
+
+
+_COMPACT_ANALYSIS_KEYS = (
+    "- c: corrected version of the learner's sentence, or empty if correct\n"
+    "- u: useful phrases/sentences from the learner's message — NEVER your own words\n"
+    "- v: [[word, translation, part_of_speech]] rows\n"
+    "- g: [[source, target, type]] rows, derivation from sentence→extension\n"
+    "- n, r: new / reactivated elements, string arrays\n"
+    "- m: dict word → mastery 0..1\n"
+    "- l: level, A1/A1+/A2\n"
+    "- b: what the learner can now do\n"
+)
+
+
+def _build_compact_system_prompt(language: str = "fr") -> str:
+    """Compact schema: the full reply with one-letter keys and positional rows."""
+    lang_name = _LANGUAGE_NAMES.get(language, language.title())
+    return (
+        f"You are a warm {lang_name} conversation partner (Krashen i+1). Return ONLY valid JSON.\n"
+        + _conversation_rules(lang_name, spoken_key="s") +
+        "Compact JSON keys (s MUST be FIRST), analysis from the user's message only:\n"
+        f"- s: 1-2 {lang_name} sentences + 1 question about the LEARNER (short!)\n"
+        "- t: English translation of s\n"
+        + _COMPACT_ANALYSIS_KEYS +
+        "Use exactly these keys.\n\n"
+        f"EXAMPLE: {_compact_example(_greeting_fields(language))}"
+    )
+
+
+def _build_compact_spoken_prompt(language: str = "fr") -> str:
+    lang_name = _LANGUAGE_NAMES.get(language, language.title())
+    fields = _greeting_fields(language)
+    return (
+        f"You are a warm {lang_name} conversation partner (Krashen i+1). Return ONLY valid JSON.\n"
+        + _conversation_rules(lang_name, spoken_key="s") +
+        "JSON keys, in this order:\n"
+        f"- s: 1-2 {lang_name} sentences + 1 question about the LEARNER (short!)\n"
+        "- t: English translation of s\n\n"
+        f"EXAMPLE: {_compact_example({key: fields[key] for key in SPOKEN_FIELDS})}"
+    )
+
+
+def _build_compact_analysis_prompt(language: str = "fr") -> str:
+    lang_name = _LANGUAGE_NAMES.get(language, language.title())
+    fields = _greeting_fields(language)
+    return (
+        f"You analyze what a {lang_name} learner just said. You do NOT reply to them. Return ONLY valid JSON.\n"
+        "Use ONLY the learner's message — never invent words they did not say.\n"
+        "Compact JSON keys:\n"
+        + _COMPACT_ANALYSIS_KEYS + "\n"
+        f"EXAMPLE: {_compact_example({key: fields[key] for key in ANALYSIS_FIELDS})}"
+    )
+
+
+# Two-stage mode: the spoken call owns these fields, the analysis call the rest
+SPOKEN_FIELDS = ("spoken_response", "translation_hint")
+ANALYSIS_FIELDS = (
+    "corrected_form", "user_vocabulary", "vocabulary_breakdown", "graph_links",
+    "new_elements", "reactivated_elements", "mastery_scores", "user_level_assessment", "border_update",
+)
+
+
+class _Stage(NamedTuple):
+    """One kind of LLM call: prompt, output budget and health bucket."""
+    name: str
+    max_tokens: int
+    timeout: float
+    history: int | None  # trailing history messages (None = summary + token-budget window)
+    health_suffix: str = ""  # separate latency histogram for long calls
+
+
+_REPLY = _Stage("reply", max_tokens=250, timeout=6, history=None)
+_SPOKEN = _Stage("spoken", max_tokens=120, timeout=6, history=None)
+_ANALYSIS = _Stage("analysis", max_tokens=700, timeout=12, history=1, health_suffix=":analysis")
+_SUMMARY = _Stage("summary", max_tokens=160, timeout=12, history=0, health_suffix=":analysis")
+
+
+def merge_analysis(response: dict, analysis: dict) -> dict:
+    """Overlay the analysis fields that the analysis call actually produced."""
+    merged = dict(response)
+    for key in ANALYSIS_FIELDS:
+        if analysis.get(key) not in (None, "", [], {}):
+            merged[key] = analysis[key]
+    return merged
+
+
+def _resolved(value) -> asyncio.Future:
+    """An already-finished future, so callers can treat every analysis alike."""
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(value)
+    return future
+
+
+# SDK clients hold HTTP connection pools — one per process, shared by every
+# per-learner OpenAIService instance in the session registry.
+_SHARED_CLIENTS: dict[str, object] = {}
+
+
+def _shared_client(name: str, factory):
+    client = _SHARED_CLIENTS.get(name)
+    if client is None:
+        client = factory()
+        _SHARED_CLIENTS[name] = client
+    return client
+
+
+# Hedge budgets are per provider, so — like the SDK clients — one scheduler
+# is shared by every learner in this worker (latency comes from provider_health).
+# Rough $/1K tokens, only used to report what hedging spent.
+_HEDGE_COST_PER_1K = {"groq": 0.0007, "backboard": 0.01, "openai": 0.0006}
+_hedger = HedgingScheduler(
+    percentile=LLM_HEDGE_PERCENTILE,
+    default_delay=LLM_HEDGE_DEFAULT_DELAY_S,
+    enabled=LLM_HEDGE_ENABLED,
+    budgets={
+        name: TokenBudget(LLM_HEDGE_TOKENS_PER_MIN, window=60.0, cost_per_1k=cost)
+        for name, cost in _HEDGE_COST_PER_1K.items()
+    },
+)
+
+
+# Replies are shared across learners whose prompts match (same language,
+# stage, mission context and history window) — one cache per worker.
+_response_cache = ResponseCache(
+    max_entries=LLM_CACHE_MAX_ENTRIES, ttl_s=LLM_CACHE_TTL_S, max_chars=LLM_CACHE_MAX_CHARS,
+)
+
+
 # Default prompts (French) — overridden dynamically when language is set
 _SYSTEM_PROMPT_LEAN = _build_system_prompt("fr")
 _SYSTEM_PROMPT_BACKBOARD = _SYSTEM_PROMPT_LEAN
@@ -142,18 +363,6 @@ def _extract_units_heuristic(user_text: str) -> list[str]:
     return list(dict.fromkeys(kept[:5]))
 
 
-def _strip_markdown_fences(text: str) -> str:
-    """Strip markdown code fences (```json ... ```) from LLM output."""
-    text = text.strip()
-    if text.startswith("```"):
-        # Remove opening fence (```json or ```)
-        first_newline = text.index("\n") if "\n" in text else len(text)
-        text = text[first_newline + 1:]
-    if text.endswith("```"):
-        text = text[:-3]
-    return text.strip()
-
-
 def _coerce_float(value, default: float = 0.0) -> float:
     """Coerce a value to float, handling string labels like 'high', 'low', True/False."""
     if isinstance(value, (int, float)):
@@ -230,20 +439,22 @@ def _sanitize_parsed(parsed: dict) -> dict:
 class OpenAIService:
     """AI tutor service using Groq (fastest), Backboard.io, and OpenAI (fallback)."""
 
-    # Keep only last N conversation turns to reduce prompt size
-    MAX_HISTORY_TURNS = 8  # 4 user + 4 assistant
-
     def __init__(self):
         self.mock_mode = MOCK_MODE
+        self.cache_responses = LLM_CACHE_ENABLED  # Per-session opt-out
+        self.compact_schema = LLM_COMPACT_SCHEMA  # Change with set_compact_schema()
+        self.history = HistoryManager(
+            budget_tokens=LLM_HISTORY_TOKENS,
+            summary_tokens=LLM_SUMMARY_TOKENS,
+            summarize=None if self.mock_mode else self._summarize,
+        )
         self._backboard_client = None
         self._backboard_assistant_id = None
         self._backboard_thread_id = None
         self._groq_client = None
         self._language = "fr"
         self._system_prompt = _build_system_prompt("fr")
-        # Rate-limit cooldown: skip providers that returned 429 recently
-        self._groq_cooldown_until = 0.0
-        self._openai_cooldown_until = 0.0
+        self._stage_prompts = self._build_stage_prompts("fr", self.compact_schema)
         if not self.mock_mode:
             self._init_real_client()
             self._init_backboard_client()
@@ -255,25 +466,36 @@ class OpenAIService:
             logger.info("LLM language changed: %s → %s", self._language, language)
             self._language = language
             self._system_prompt = _build_system_prompt(language)
+            self._stage_prompts = self._build_stage_prompts(language, self.compact_schema)
             # Reset backboard thread so it gets the new system prompt
             self._backboard_thread_id = None
             self._backboard_assistant_id = None
             # Clear conversation history — old turns are in the wrong language
-            if hasattr(self, "_conversation_history"):
-                logger.info("Clearing %d history turns (language switch)", len(self._conversation_history))
-                self._conversation_history = []
+            if self.history.messages or self.history.summary:
+                logger.info("Clearing %d history messages (language switch)", len(self.history.messages))
+            self.history.clear()
+
+    def set_compact_schema(self, enabled: bool):
+        """Ask Groq/OpenAI for the compact output schema (Backboard keeps the verbose one)."""
+        if enabled != self.compact_schema:
+            self.compact_schema = enabled
+            self._stage_prompts = self._build_stage_prompts(self._language, enabled)
 
     def reset(self):
         """Clear conversation history for a fresh session."""
         if not self.mock_mode:
-            self._conversation_history = []
+            self.history.clear()
             self._backboard_thread_id = None
 
     def inject_turn(self, user_said: str, ai_response: str):
-        """Replay a historical turn into the conversation context."""
+        """Replay a historical turn (learner text, spoken reply) into the conversation context."""
+        if not self.mock_mode:
+            self.history.add(user_said, ai_response)
+
+    def replay_turns(self, exchanges: list[tuple[str, str]]):
+        """Reload stored turns (learner text, spoken reply) — no summarizer call, however long."""
         if not self.mock_mode:
-            self._conversation_history.append({"role": "user", "content": user_said})
-            self._conversation_history.append({"role": "assistant", "content": ai_response})
+            self.history.replay(exchanges)
 
     def _init_backboard_client(self):
         """Initialize Backboard client for primary LLM calls (GPT-4o)."""
@@ -281,7 +503,9 @@ class OpenAIService:
             from backboard import BackboardClient
             api_key = os.getenv("BACKBOARD_API_KEY", "")
             if api_key:
-                self._backboard_client = BackboardClient(api_key=api_key, timeout=20)
+                self._backboard_client = _shared_client(
+                    "backboard", lambda: BackboardClient(api_key=api_key, timeout=20)
+                )
                 logger.info("Backboard client initialized (primary LLM)")
             else:
                 logger.warning("No BACKBOARD_API_KEY — Backboard LLM disabled")
@@ -296,7 +520,7 @@ class OpenAIService:
             from groq import AsyncGroq
             api_key = os.getenv("GROQ_API_KEY", "")
             if api_key:
-                self._groq_client = AsyncGroq(api_key=api_key)
+                self._groq_client = _shared_client("groq", lambda: AsyncGroq(api_key=api_key))
                 self._groq_model = "llama-3.3-70b-versatile"
                 logger.info("Groq client initialized (fastest LLM — %s)", self._groq_model)
             else:
@@ -312,16 +536,89 @@ class OpenAIService:
 
         api_key = os.getenv("OPENAI_API_KEY", "")
         org_id = os.getenv("OPENAI_ORG_ID", "")
-        self._client = AsyncOpenAI(
+        self._client = _shared_client("openai", lambda: AsyncOpenAI(
             api_key=api_key,
             organization=org_id if org_id else None,
-        )
+        ))
         self._model = "gpt-4o-mini"
-        self._conversation_history: list[dict] = []
 
-    def _trimmed_history(self) -> list[dict]:
-        """Return only the last N messages to keep prompts fast."""
-        return self._conversation_history[-self.MAX_HISTORY_TURNS:]
+    @staticmethod
+    def _build_stage_prompts(language: str, compact: bool = False) -> dict[str, str]:
+        if compact:
+            return {
+                "reply": _build_compact_system_prompt(language),
+                "spoken": _build_compact_spoken_prompt(language),
+                "analysis": _build_compact_analysis_prompt(language),
+                "summary": _build_summary_prompt(language),
+            }
+        return {
+            "spoken": _build_spoken_prompt(language),
+            "analysis": _build_analysis_prompt(language),
+            "summary": _build_summary_prompt(language),
+        }
+
+    def _compact(self, stage: _Stage) -> bool:
+        """Whether this stage's Groq/OpenAI output uses the compact schema."""
+        return self.compact_schema and stage is not _SUMMARY
+
+    def _from_wire(self, parsed: dict, stage: _Stage) -> dict:
+        """Parsed Groq/OpenAI output → sanitized reply under TutorResponse keys."""
+        if self._compact(stage):
+            parsed = decode_compact(parsed)  # Strict: raises CompactSchemaError (a JSONStreamError)
+        return _sanitize_parsed(parsed)
+
+    def _history(self, stage: _Stage) -> list[dict]:
+        """The stage's slice of history: summary + budget window, or the last N messages."""
+        if stage.history == 0:
+            return []
+        return self.history.window(stage.history, with_summary=stage.history is None)
+
+    def _messages(self, user_text: str, stage: _Stage = _REPLY) -> list[dict]:
+        """Chat prompt for one turn; history is only read, never mutated here."""
+        system_prompt = self._stage_prompts.get(stage.name, self._system_prompt)
+        history = self._history(stage)
+        return [
+            {"role": "system", "content": system_prompt},
+            *history,
+            {"role": "user", "content": user_text},
+        ]
+
+    def _cache_keys(self, user_text: str, mission_context: str, stage: _Stage = _REPLY) -> CacheKeys | None:
+        """Response-cache keys for this prompt (None = don't cache); read before committing the turn."""
+        if not self.cache_responses:
+            return None
+        context = [self._language, stage.name, mission_context, *(f"{m['role']}:{m['content']}" for m in self._history(stage))]
+        return _response_cache.keys(context, user_text)
+
+    def _cached_reply(self, keys: CacheKeys | None, user_text: str, on_spoken_ready=None) -> dict | None:
+        """A cached reply, committed to history and handed to TTS like a provider's."""
+        cached = _response_cache.get(keys) if keys else None
+        if cached is None:
+            return None
+        result = cached[0]
+        logger.info("Response from cache")
+        self._commit_exchange(user_text, result)
+        spoken = result.get("spoken_response")
+        if on_spoken_ready and spoken:
+            asyncio.create_task(on_spoken_ready(spoken))
+        return result
+
+    def _commit_exchange(self, user_text: str, result: dict) -> None:
+        """Record the winning provider's exchange — once per turn.
+
+        Only what was said is kept: the learner's text (not the mission
+        context around it) and the tutor's spoken_response (not the JSON).
+        """
+        self.history.add(user_text, str(result.get("spoken_response") or ""))
+
+    async def _summarize(self, summary: str, messages: list[dict]) -> str:
+        """Fold old exchanges into the rolling summary (background, off the turn's path)."""
+        transcript = "\n".join(
+            f"{'Learner' if m['role'] == 'user' else 'Tutor'}: {m['content']}" for m in messages
+        )
+        prompt = f"Current summary: {summary or '(none)'}\nNew exchanges:\n{transcript}"
+        outcome = await _hedger.run(self._provider_attempts(prompt, stage=_SUMMARY))
+        return str((outcome.result or {}).get("summary") or "")
 
     async def generate_response(
         self, user_text: str, turn_number: int, mission_context: str = ""
@@ -333,7 +630,7 @@ class OpenAIService:
 
     async def generate_response_streaming(
         self, user_text: str, turn_number: int, mission_context: str = "",
-        on_spoken_ready=None,
+        on_spoken_ready=None, on_spoken_delta=None, on_spoken_reset=None,
     ) -> tuple[dict, str | None]:
         """Generate response with TRUE parallel TTS via callback.
 
@@ -343,6 +640,12 @@ class OpenAIService:
         Args:
             on_spoken_ready: async callback fired as soon as spoken_response is
                              extracted from the stream. This is where TTS should start.
+            on_spoken_delta: sync callback receiving decoded spoken_response text
+                             while it is still streaming (sentence-level TTS).
+                             Non-streaming providers only fire on_spoken_ready.
+            on_spoken_reset: async callback fired when a spoken_response already
+                             passed to on_spoken_ready is taken back (its provider
+                             failed afterwards); a replacement follows.
 
         Returns (full_response_dict, early_spoken_response_or_None).
         """
@@ -353,7 +656,36 @@ class OpenAIService:
                 asyncio.create_task(on_spoken_ready(spoken))
             return result, spoken
         return await self._real_generate_streaming(
-            user_text, mission_context=mission_context, on_spoken_ready=on_spoken_ready
+            user_text, mission_context=mission_context,
+            on_spoken_ready=on_spoken_ready, on_spoken_delta=on_spoken_delta, on_spoken_reset=on_spoken_reset,
+        )
+
+    async def generate_response_split(
+        self, user_text: str, turn_number: int, mission_context: str = "",
+        on_spoken_ready=None, on_spoken_delta=None, on_spoken_reset=None,
+    ) -> tuple[dict, str | None, asyncio.Future]:
+        """Two-stage generation: a short spoken call and a deferred analysis call.
+
+        The spoken call (spoken_response + translation_hint only) is what TTS
+        waits on; the analysis call (corrections, vocabulary, mastery, graph
+        links) runs concurrently and is returned as a future for the caller to
+        merge with merge_analysis() whenever it lands.
+
+        Returns (spoken_response_dict, early_spoken_response_or_None, analysis_future).
+        The future resolves to the analysis fields, or {} if the analysis failed.
+        """
+        if self.mock_mode:
+            result = self._mock_generate(turn_number)
+            spoken = result.get("spoken_response")
+            if on_spoken_ready and spoken:
+                asyncio.create_task(on_spoken_ready(spoken))
+            reply = {key: value for key, value in result.items() if key not in ANALYSIS_FIELDS}
+            reply = {**_FALLBACK_RESPONSE, **reply}
+            analysis = {key: result[key] for key in ANALYSIS_FIELDS if key in result}
+            return reply, spoken, _resolved(analysis)
+        return await self._real_generate_split(
+            user_text, mission_context=mission_context,
+            on_spoken_ready=on_spoken_ready, on_spoken_delta=on_spoken_delta, on_spoken_reset=on_spoken_reset,
         )
 
     def _mock_generate(self, turn_number: int) -> dict:
@@ -403,11 +735,17 @@ class OpenAIService:
             "mission_progress": {"done": 1 if user_text.strip() else 0, "total": 3, "percent": 33 if user_text.strip() else 0},
         }
 
-    async def _backboard_generate(self, user_text: str) -> dict | None:
-        """Try generating a response via Backboard.io (GPT-4o). Returns None on failure."""
-        if not self._backboard_client:
-            return None
+    async def _backboard_generate(self, user_text: str) -> tuple[dict | None, str]:
+        """Try generating a response via Backboard.io (GPT-4o).
+
+        Returns (parsed_or_None, raw_text). Backboard keeps its own thread;
+        local history is committed by the caller once a provider wins.
+        """
+        if not self._backboard_client or not health.get("backboard").allow():
+            return None, ""
 
+        raw_content = ""
+        t0 = time.perf_counter()
         try:
             # Lazily create assistant + thread
             if not self._backboard_assistant_id:
@@ -436,257 +774,319 @@ class OpenAIService:
             )
 
             raw_content = response.content or ""
+            health.get("backboard").record_success(time.perf_counter() - t0)
             logger.info(
                 "Backboard response: model=%s, tokens=%s, len=%d",
                 response.model_name, response.total_tokens, len(raw_content),
             )
 
-            # Strip markdown fences and parse JSON
-            cleaned = _strip_markdown_fences(raw_content)
-            parsed = json.loads(cleaned)
-            return _sanitize_parsed(parsed)
+            # Parser skips a leading ```json fence and anything after the object
+            parsed = parse_json_object(raw_content)
+            return _sanitize_parsed(parsed), raw_content
 
-        except json.JSONDecodeError as exc:
+        except JSONStreamError as exc:
             logger.warning("Backboard JSON parse failed: %s (raw=%s...)", exc, raw_content[:200])
-            return None
+            return None, raw_content
         except asyncio.TimeoutError:
             logger.warning("Backboard timed out (20s)")
-            return None
+            health.get("backboard").record_failure("timeout", time.perf_counter() - t0)
+            return None, ""
         except Exception as exc:
             logger.warning("Backboard error (%s): %s", type(exc).__name__, exc)
-            return None
+            health.get("backboard").record_failure(classify_error(exc))
+            return None, ""
 
-    async def _openai_generate(self, user_text: str) -> dict | None:
-        """Try generating via OpenAI direct API. Returns None on failure."""
-        if time.perf_counter() < self._openai_cooldown_until:
-            logger.info("OpenAI skipped (rate-limit cooldown)")
-            return None
-        self._conversation_history.append(
-            {"role": "user", "content": user_text}
-        )
-
-        messages = [
-            {"role": "system", "content": self._system_prompt},
-            *self._trimmed_history(),
-        ]
+    async def _openai_generate(self, user_text: str, stage: _Stage = _REPLY) -> tuple[dict | None, str]:
+        """Try generating via OpenAI direct API. Returns (parsed_or_None, raw_text)."""
+        breaker = health.get("openai" + stage.health_suffix)
+        if not breaker.allow():
+            logger.info("OpenAI skipped (circuit open)")
+            return None, ""
 
+        t0 = time.perf_counter()
         try:
             completion = await asyncio.wait_for(
                 self._client.chat.completions.create(
                     model=self._model,
-                    messages=messages,
+                    messages=self._messages(user_text, stage),
                     temperature=0.6,
-                    max_tokens=250,
+                    max_tokens=stage.max_tokens,
                     response_format={"type": "json_object"},
                 ),
-                timeout=6,
+                timeout=stage.timeout,
             )
         except asyncio.TimeoutError:
-            logger.error("OpenAI GPT timed out (6s)")
-            self._conversation_history.pop()
-            return None
+            logger.error("OpenAI GPT timed out (%ss, %s)", stage.timeout, stage.name)
+            breaker.record_failure("timeout", time.perf_counter() - t0)
+            return None, ""
         except Exception as exc:
             logger.error("OpenAI GPT error (%s): %s", type(exc).__name__, exc)
-            if "rate_limit" in type(exc).__name__.lower() or "429" in str(exc):
-                self._openai_cooldown_until = time.perf_counter() + 30  # 30s cooldown
-                logger.info("OpenAI rate-limited → cooldown 30s")
-            self._conversation_history.pop()
-            return None
-
-        response_text = completion.choices[0].message.content
-        self._conversation_history.append(
-            {"role": "assistant", "content": response_text}
-        )
+            breaker.record_failure(classify_error(exc))
+            return None, ""
 
+        breaker.record_success(time.perf_counter() - t0)
+        response_text = completion.choices[0].message.content or ""
         try:
-            parsed = json.loads(response_text)
-            return _sanitize_parsed(parsed)
-        except (json.JSONDecodeError, TypeError) as exc:
+            parsed = parse_json_object(response_text)
+            return self._from_wire(parsed, stage), response_text
+        except JSONStreamError as exc:
             logger.error("Failed to parse OpenAI response: %s", exc)
-            return None
+            return None, response_text
 
-    async def _groq_generate_streaming(self, user_text: str, on_spoken_ready=None) -> tuple[dict | None, str | None]:
+    async def _groq_generate_streaming(
+        self, user_text: str, on_spoken_ready=None, on_spoken_delta=None, stage: _Stage = _REPLY,
+    ) -> tuple[dict | None, str]:
         """Stream via Groq with TRUE parallel TTS.
 
         Extracts spoken_response mid-stream and fires on_spoken_ready() immediately,
         so TTS runs in parallel with the remaining ~50% of LLM token generation.
+        Returns (parsed_or_None, raw_text).
         """
         if not self._groq_client:
-            return None, None
-        if time.perf_counter() < self._groq_cooldown_until:
-            logger.info("Groq skipped (rate-limit cooldown)")
-            return None, None
-
-        messages = [
-            {"role": "system", "content": self._system_prompt},
-            *self._trimmed_history(),
-            {"role": "user", "content": user_text},
-        ]
-
-        accumulated = ""
+            return None, ""
+        breaker = health.get("groq" + stage.health_suffix)
+        if not breaker.allow():
+            logger.info("Groq skipped (circuit open)")
+            return None, ""
+
+        t0 = time.perf_counter()
+        spoken_key = SPOKEN_KEY if self._compact(stage) else "spoken_response"
+        parser = IncrementalJSONParser(stream_keys=(spoken_key,) if on_spoken_delta else ())
         early_spoken: str | None = None
-        callback_fired = False
 
         try:
             stream = await asyncio.wait_for(
                 self._groq_client.chat.completions.create(
                     model=self._groq_model,
-                    messages=messages,
+                    messages=self._messages(user_text, stage),
                     temperature=0.6,
-                    max_tokens=250,
+                    max_tokens=stage.max_tokens,
                     response_format={"type": "json_object"},
                     stream=True,
                 ),
-                timeout=6,
+                timeout=stage.timeout,
             )
 
             async for chunk in stream:
                 delta = chunk.choices[0].delta.content or ""
-                accumulated += delta
-
-                # Extract full spoken_response and fire TTS callback immediately
-                if early_spoken is None and '"spoken_response"' in accumulated:
-                    match = re.search(
-                        r'"spoken_response"\s*:\s*"((?:[^"\\]|\\.)*)(?:"|$)',
-                        accumulated,
-                    )
-                    if match and match.group(0).endswith('"'):
-                        early_spoken = match.group(1).replace('\\"', '"').replace('\\n', '\n')
+                # Each chunk is scanned once; fields are reported as they close
+                for event in parser.feed(delta):
+                    if event.kind == "string_delta":
+                        on_spoken_delta(event.value)
+                    elif event.kind == "field" and event.key == spoken_key and early_spoken is None:
+                        early_spoken = str(event.value)
                         logger.info("spoken_response extracted mid-stream: %s", early_spoken[:80])
-
-                        if on_spoken_ready and not callback_fired:
-                            callback_fired = True
+                        if on_spoken_ready:
                             asyncio.create_task(on_spoken_ready(early_spoken))
                             logger.info("TTS callback fired mid-stream (full text)")
 
+        except JSONStreamError as exc:
+            logger.warning("Groq streaming JSON parse failed: %s", exc)
+            breaker.record_failure("error")
+            return None, parser.text
         except asyncio.TimeoutError:
-            logger.warning("Groq streaming timed out (6s)")
-            return None, early_spoken
+            logger.warning("Groq streaming timed out (%ss, %s)", stage.timeout, stage.name)
+            breaker.record_failure("timeout", time.perf_counter() - t0)
+            return None, parser.text
         except Exception as exc:
             logger.warning("Groq streaming error (%s): %s", type(exc).__name__, exc)
-            if "rate_limit" in type(exc).__name__.lower() or "429" in str(exc):
-                self._groq_cooldown_until = time.perf_counter() + 300  # 5 min cooldown
-                logger.info("Groq rate-limited → cooldown 5min")
-            return None, early_spoken
-
-        if not accumulated.strip():
-            return None, early_spoken
-
-        self._conversation_history.append({"role": "user", "content": user_text})
-        self._conversation_history.append({"role": "assistant", "content": accumulated})
+            breaker.record_failure(classify_error(exc))
+            return None, parser.text
 
+        accumulated = parser.text
         try:
-            parsed = json.loads(accumulated)
-            return _sanitize_parsed(parsed), early_spoken
-        except (json.JSONDecodeError, TypeError) as exc:
+            parsed = self._from_wire(parser.close(), stage)
+        except JSONStreamError as exc:
             logger.warning("Groq streaming JSON parse failed: %s", exc)
-            self._conversation_history = self._conversation_history[:-2]
-            return None, early_spoken
+            breaker.record_failure("error")
+            return None, accumulated
 
-    async def _groq_generate(self, user_text: str) -> dict | None:
-        """Try generating via Groq (LPU — ultra-fast inference). Returns None on failure."""
-        if not self._groq_client:
-            return None
-        if time.perf_counter() < self._groq_cooldown_until:
-            return None
+        breaker.record_success(time.perf_counter() - t0)
+        return parsed, accumulated
 
-        messages = [
-            {"role": "system", "content": self._system_prompt},
-            *self._trimmed_history(),
-            {"role": "user", "content": user_text},
-        ]
+    async def _groq_generate(self, user_text: str, stage: _Stage = _REPLY) -> tuple[dict | None, str]:
+        """Try generating via Groq (LPU — ultra-fast inference). Returns (parsed_or_None, raw_text)."""
+        if not self._groq_client:
+            return None, ""
+        breaker = health.get("groq" + stage.health_suffix)
+        if not breaker.allow():
+            return None, ""
 
+        t0 = time.perf_counter()
         try:
             completion = await asyncio.wait_for(
                 self._groq_client.chat.completions.create(
                     model=self._groq_model,
-                    messages=messages,
+                    messages=self._messages(user_text, stage),
                     temperature=0.6,
-                    max_tokens=250,
+                    max_tokens=stage.max_tokens,
                     response_format={"type": "json_object"},
                 ),
-                timeout=6,
+                timeout=stage.timeout,
             )
         except asyncio.TimeoutError:
-            logger.warning("Groq timed out (6s)")
-            return None
+            logger.warning("Groq timed out (%ss, %s)", stage.timeout, stage.name)
+            breaker.record_failure("timeout", time.perf_counter() - t0)
+            return None, ""
         except Exception as exc:
             logger.warning("Groq error (%s): %s", type(exc).__name__, exc)
-            if "rate_limit" in type(exc).__name__.lower() or "429" in str(exc):
-                self._groq_cooldown_until = time.perf_counter() + 300
-            return None
-
-        response_text = completion.choices[0].message.content
-        self._conversation_history.append({"role": "user", "content": user_text})
-        self._conversation_history.append({"role": "assistant", "content": response_text})
+            breaker.record_failure(classify_error(exc))
+            return None, ""
 
+        breaker.record_success(time.perf_counter() - t0)
+        response_text = completion.choices[0].message.content or ""
         try:
-            parsed = json.loads(response_text)
-            return _sanitize_parsed(parsed)
-        except (json.JSONDecodeError, TypeError) as exc:
+            parsed = parse_json_object(response_text)
+            return self._from_wire(parsed, stage), response_text
+        except JSONStreamError as exc:
             logger.warning("Groq JSON parse failed: %s", exc)
-            # Remove failed exchange from history
-            self._conversation_history = self._conversation_history[:-2]
-            return None
+            return None, response_text
+
+    def _provider_attempts(
+        self, enriched_text: str, streaming: bool = False, on_spoken_delta=None, stage: _Stage = _REPLY,
+    ) -> list[ProviderAttempt]:
+        """Configured, healthy providers ordered by recent p95, as hedgeable attempts."""
+        # Prompt + completion estimate, charged only when an attempt is a hedge
+        est_tokens = sum(len(m["content"]) for m in self._messages(enriched_text, stage)) // 4 + stage.max_tokens
+
+        if streaming:
+            async def groq(gate):
+                return await self._groq_generate_streaming(
+                    enriched_text, on_spoken_ready=gate.on_spoken_ready,
+                    on_spoken_delta=gate.on_spoken_delta if on_spoken_delta else None, stage=stage,
+                )
+        else:
+            async def groq(gate):
+                return await self._groq_generate(enriched_text, stage)
+
+        runners = {}
+        if self._groq_client:
+            runners["groq"] = groq
+        # Backboard's assistant has its own fixed prompt — it can only stand in
+        # for a full reply, never for the analysis call.
+        if self._backboard_client and stage in (_REPLY, _SPOKEN):
+            runners["backboard"] = lambda gate: self._backboard_generate(enriched_text)
+        if getattr(self, "_client", None) is not None:
+            runners["openai"] = lambda gate: self._openai_generate(enriched_text, stage)
+        # Fastest recent p95 first; open breakers are skipped entirely
+        ranked = health.rank([name + stage.health_suffix for name in runners])
+        attempts = []
+        for key in ranked:
+            name = key.removesuffix(stage.health_suffix)
+            # Hedge thresholds come from the same per-stage histogram as the ranking
+            attempts.append(ProviderAttempt(name, runners[name], est_tokens, health_key=key))
+        return attempts
+
+    async def _real_generate_streaming(
+        self, user_text: str, mission_context: str = "", on_spoken_ready=None, on_spoken_delta=None,
+        on_spoken_reset=None,
+    ) -> tuple[dict, str | None]:
+        """Generate with streaming + true parallel TTS via callback.
 
-    async def _real_generate_streaming(self, user_text: str, mission_context: str = "", on_spoken_ready=None) -> tuple[dict, str | None]:
-        """Generate with streaming + true parallel TTS via callback."""
+        Providers are raced by the hedging scheduler: Groq streams first,
+        Backboard/OpenAI are launched as hedges if it runs slow, and only the
+        winner's spoken_response reaches on_spoken_ready.
+        """
         enriched_text = f"{mission_context}\nUser said: {user_text}" if mission_context else user_text
+        keys = self._cache_keys(user_text, mission_context)
+        cached = self._cached_reply(keys, user_text, on_spoken_ready)
+        if cached is not None:
+            return cached, cached.get("spoken_response")
+
+        outcome = await _hedger.run(
+            self._provider_attempts(enriched_text, streaming=True, on_spoken_delta=on_spoken_delta),
+            on_spoken_ready=on_spoken_ready, on_spoken_delta=on_spoken_delta, on_spoken_reset=on_spoken_reset,
+        )
+        if outcome.result:
+            logger.info("Response from %s%s", outcome.provider, " (hedged)" if outcome.hedged else "")
+            self._commit_exchange(user_text, outcome.result)
+            if keys:
+                _response_cache.put(keys, outcome.result, outcome.raw)
+            return outcome.result, outcome.result.get("spoken_response")
 
-        # Strategy 1: Groq streaming (ultra-fast + parallel TTS callback)
-        result, early_spoken = await self._groq_generate_streaming(enriched_text, on_spoken_ready=on_spoken_ready)
-        if result:
-            logger.info("Response from Groq streaming (early_spoken=%s)", early_spoken is not None)
-            return result, early_spoken
+        logger.warning("All LLMs failed, using rule-based fallback")
+        result = self._rule_based_fallback(user_text, mission_context=mission_context)
+        spoken = result.get("spoken_response")
+        if on_spoken_ready and spoken:
+            asyncio.create_task(on_spoken_ready(spoken))
+        return result, spoken
 
-        # Fall back to non-streaming strategies — fire callback immediately with full spoken_response
-        result = await self._backboard_generate(enriched_text)
-        if result:
-            logger.info("Response from Backboard (GPT-4o)")
-            spoken = result.get("spoken_response")
-            if on_spoken_ready and spoken:
-                asyncio.create_task(on_spoken_ready(spoken))
-            return result, spoken
+    async def _real_analyze(self, enriched_text: str, keys: CacheKeys | None = None) -> dict:
+        """Analysis stage: only the ANALYSIS_FIELDS the model actually returned ({} on failure)."""
+        cached = _response_cache.get(keys) if keys else None
+        if cached is not None:
+            logger.info("Analysis from cache")
+            return cached[0]
+        outcome = await _hedger.run(self._provider_attempts(enriched_text, stage=_ANALYSIS))
+        if not outcome.result:
+            logger.warning("Analysis call failed — turn keeps its heuristic analysis")
+            return {}
+        # Sanitizing filled defaults for missing keys; keep only what was returned
+        try:
+            returned = parse_json_object(outcome.raw)
+            if self._compact(_ANALYSIS):
+                returned = decode_compact(returned)
+        except JSONStreamError:
+            returned = outcome.result
+        logger.info("Analysis from %s%s", outcome.provider, " (hedged)" if outcome.hedged else "")
+        analysis = {key: outcome.result[key] for key in ANALYSIS_FIELDS if key in returned}
+        if keys and analysis:
+            _response_cache.put(keys, analysis, outcome.raw)
+        return analysis
+
+    async def _real_generate_split(
+        self, user_text: str, mission_context: str = "", on_spoken_ready=None, on_spoken_delta=None,
+        on_spoken_reset=None,
+    ) -> tuple[dict, str | None, asyncio.Future]:
+        """Spoken and analysis calls in parallel; only the spoken one gates the reply."""
+        enriched_text = f"{mission_context}\nUser said: {user_text}" if mission_context else user_text
+        spoken_keys = self._cache_keys(user_text, mission_context, _SPOKEN)
+        # Started first so it overlaps the whole spoken call (and the TTS after it)
+        analysis = asyncio.create_task(
+            self._real_analyze(enriched_text, self._cache_keys(user_text, mission_context, _ANALYSIS))
+        )
+        cached = self._cached_reply(spoken_keys, user_text, on_spoken_ready)
+        if cached is not None:
+            return cached, cached.get("spoken_response"), analysis
 
-        result = await self._openai_generate(enriched_text)
-        if result:
-            logger.info("Response from OpenAI direct")
-            spoken = result.get("spoken_response")
-            if on_spoken_ready and spoken:
-                asyncio.create_task(on_spoken_ready(spoken))
-            return result, spoken
+        outcome = await _hedger.run(
+            self._provider_attempts(enriched_text, streaming=True, on_spoken_delta=on_spoken_delta, stage=_SPOKEN),
+            on_spoken_ready=on_spoken_ready, on_spoken_delta=on_spoken_delta, on_spoken_reset=on_spoken_reset,
+        )
+        if outcome.result:
+            logger.info("Spoken response from %s%s", outcome.provider, " (hedged)" if outcome.hedged else "")
+            # Only the short spoken exchange goes into history — the analysis
+            # JSON would crowd out conversation context.
+            self._commit_exchange(user_text, outcome.result)
+            if spoken_keys:
+                _response_cache.put(spoken_keys, outcome.result, outcome.raw)
+            return outcome.result, outcome.result.get("spoken_response"), analysis
 
         logger.warning("All LLMs failed, using rule-based fallback")
+        analysis.cancel()
         result = self._rule_based_fallback(user_text, mission_context=mission_context)
         spoken = result.get("spoken_response")
         if on_spoken_ready and spoken:
             asyncio.create_task(on_spoken_ready(spoken))
-        return result, spoken
+        return result, spoken, _resolved({})
 
     async def _real_generate(self, user_text: str, mission_context: str = "") -> dict:
         """Generate using Groq (fastest), Backboard, OpenAI (fallback), rule-based (last resort)."""
         # Prepend mission context to user text for AI awareness
         enriched_text = f"{mission_context}\nUser said: {user_text}" if mission_context else user_text
-
-        # Strategy 1: Groq (ultra-fast LPU inference, ~0.3-0.8s)
-        result = await self._groq_generate(enriched_text)
-        if result:
-            logger.info("Response from Groq (LPU — fastest)")
-            return result
-
-        # Strategy 2: Backboard.io (GPT-4o, no rate limit issues)
-        result = await self._backboard_generate(enriched_text)
-        if result:
-            logger.info("Response from Backboard (GPT-4o)")
-            return result
-
-        # Strategy 3: OpenAI direct (gpt-4o-mini, may hit rate limits)
-        logger.info("Backboard failed, trying OpenAI direct...")
-        result = await self._openai_generate(enriched_text)
-        if result:
-            logger.info("Response from OpenAI direct")
-            return result
-
-        # Strategy 4: Rule-based fallback (always works)
+        keys = self._cache_keys(user_text, mission_context)
+        cached = self._cached_reply(keys, user_text)
+        if cached is not None:
+            return cached
+
+        outcome = await _hedger.run(self._provider_attempts(enriched_text))
+        if outcome.result:
+            logger.info("Response from %s%s", outcome.provider, " (hedged)" if outcome.hedged else "")
+            self._commit_exchange(user_text, outcome.result)
+            if keys:
+                _response_cache.put(keys, outcome.result, outcome.raw)
+            return outcome.result
+
+        # Rule-based fallback (always works)
         logger.warning("All LLMs failed, using rule-based fallback")
         return self._rule_based_fallback(user_text, mission_context=mission_context)
@@ -0,0 +1,177 @@
+"""
+Pre-written opener replies (zero LLM calls).
+
+When the learner picks a category, the frontend sends a fixed opener
+("Allons-y !") with mission_context.is_opener set. That turn used to cost
+a full LLM round trip whose vocabulary work was then thrown away. The
+reply is now picked from a bank of per-language, per-category openers
+(backend/opener_bank/*.json, plus OPENER_BANK_DIR):
+
+- pick(language, category, turn): the category's variants (or the
+  language's "default" ones), rotated by turn; None when the language has
+  no pack — the caller then falls back to the LLM
+- prerender(tts, languages): synthesizes every entry at startup (whole
+  reply + each sentence, so segmented TTS hits the audio cache too) and
+  keeps the whole-reply payload on the entry
+- get_opener_bank() re-reads the packs when a file is added, removed or
+  modified (pack files are stat-ed at most every OPENER_BANK_RECHECK_S
+  seconds); entries whose text did not change keep their audio
+
+Pack format:
+    {"language": "fr",
+     "openers": {"default": [{"spoken_response": "...", "translation_hint": "..."}, ...],
+                 "travel": [...], ...}}
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from backend.config import OPENER_BANK_DIR, OPENER_BANK_RECHECK_S
+from backend.services.tts_pipeline import SentenceSplitter
+
+logger = logging.getLogger(__name__)
+
+_BUILTIN_BANK = Path(__file__).resolve().parent.parent / "opener_bank"
+_DEFAULT = "default"
+
+
+@dataclass(slots=True)
+class OpenerEntry:
+    language: str
+    category: str
+    spoken_response: str
+    translation_hint: str = ""
+    tts: dict | None = None  # Pre-rendered synthesize() payload
+
+    def response(self, level: str) -> dict:
+        """TutorResponse fields for this opener."""
+        return {
+            "spoken_response": self.spoken_response,
+            "translation_hint": self.translation_hint,
+            "user_level_assessment": level,
+            "border_update": "",
+        }
+
+
+def _pack_files(dirs: tuple) -> list[Path]:
+    return [path for directory in dirs if directory for path in sorted(Path(directory).glob("*.json"))]
+
+
+def _signature(files: list[Path]) -> tuple:
+    signature = []
+    for path in files:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class OpenerBank:
+    """Opener replies indexed by (language, category)."""
+
+    def __init__(self, packs: list[dict]):
+        # Later packs override earlier ones per (language, category)
+        self._entries: dict[tuple[str, str], list[OpenerEntry]] = {}
+        for pack in packs:
+            language = pack["language"]
+            for category, raw_entries in (pack.get("openers") or {}).items():
+                entries = [
+                    OpenerEntry(
+                        language=language,
+                        category=category.lower(),
+                        spoken_response=raw["spoken_response"].strip(),
+                        translation_hint=raw.get("translation_hint", ""),
+                    )
+                    for raw in raw_entries or []
+                    if isinstance(raw, dict) and (raw.get("spoken_response") or "").strip()
+                ]
+                if entries:
+                    self._entries[(language, category.lower())] = entries
+
+    @classmethod
+    def load(cls, *dirs: Path | str | None) -> "OpenerBank":
+        packs = []
+        for path in _pack_files(dirs):
+            try:
+                pack = json.loads(path.read_text(encoding="utf-8"))
+                if not isinstance(pack, dict):
+                    raise ValueError("pack must be a JSON object")
+            except (OSError, ValueError) as exc:
+                logger.warning("Skipping opener pack %s: %s", path, exc)
+                continue
+            pack.setdefault("language", path.stem)
+            packs.append(pack)
+        return cls(packs)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def entries(self) -> list[OpenerEntry]:
+        return [entry for entries in self._entries.values() for entry in entries]
+
+    def languages(self) -> set[str]:
+        return {language for language, _ in self._entries}
+
+    def pick(self, language: str, category: str | None, turn: int = 0) -> OpenerEntry | None:
+        """An opener for the category (else the language default), rotated by turn."""
+        entries = self._entries.get((language, (category or _DEFAULT).lower())) or self._entries.get((language, _DEFAULT))
+        if not entries:
+            return None
+        return entries[turn % len(entries)]
+
+    def adopt_audio(self, previous: "OpenerBank") -> None:
+        """Keep pre-rendered audio for entries whose text did not change."""
+        rendered = {(e.language, e.spoken_response): e.tts for e in previous.entries() if e.tts}
+        for entry in self.entries():
+            entry.tts = rendered.get((entry.language, entry.spoken_response))
+
+    async def prerender(self, tts, languages: set[str] | None = None, concurrency: int = 4) -> int:
+        """Synthesize the entries of `languages` (None = all); returns how many have audio."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def render(entry: OpenerEntry) -> None:
+            splitter = SentenceSplitter()
+            sentences = splitter.feed(entry.spoken_response) + splitter.flush()
+            async with semaphore:
+                payload = await tts.synthesize(entry.spoken_response)
+                for sentence in sentences if len(sentences) > 1 else []:
+                    await tts.synthesize(sentence)
+            if payload.get("mode") == "audio":
+                entry.tts = payload
+
+        todo = [e for e in self.entries() if e.tts is None and (languages is None or e.language in languages)]
+        await asyncio.gather(*(render(entry) for entry in todo))
+        rendered = sum(1 for entry in todo if entry.tts)
+        logger.info("Opener bank: pre-rendered %d/%d openers", rendered, len(todo))
+        return rendered
+
+
+_bank: OpenerBank | None = None
+_bank_signature: tuple = ()
+_bank_dirs: tuple = ()
+_bank_checked = 0.0
+
+
+def get_opener_bank() -> OpenerBank:
+    """Bank over the built-in packs and OPENER_BANK_DIR, reloaded when a pack file changes."""
+    global _bank, _bank_signature, _bank_dirs, _bank_checked
+    dirs = (_BUILTIN_BANK, OPENER_BANK_DIR)
+    now = time.monotonic()
+    # Opener turns are frequent — only stat the pack files every few seconds
+    if _bank is not None and dirs == _bank_dirs and now - _bank_checked < OPENER_BANK_RECHECK_S:
+        return _bank
+    _bank_checked = now
+    signature = _signature(_pack_files(dirs))
+    if _bank is None or dirs != _bank_dirs or signature != _bank_signature:
+        bank = OpenerBank.load(*dirs)
+        if _bank is not None:
+            bank.adopt_audio(_bank)
+            logger.info("Opener bank reloaded: %d openers", len(bank))
+        _bank, _bank_signature, _bank_dirs = bank, signature, dirs
+    return _bank
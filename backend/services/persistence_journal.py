@@ -0,0 +1,236 @@
+"""
+Write-behind persistence journal for learner sessions.
+
+Saving a session used to run on the turn path: a synchronous Supabase
+SELECT + full-row UPDATE inside the event loop, stalling every socket in
+the worker. Now record() only queues the snapshot; a background flusher
+does the I/O:
+
+- Every record is appended to a local JSONL journal (one line per
+  snapshot, fsync'd) before the backend write is attempted
+- Backend writes are coalesced per profile: a burst of turns becomes
+  one write carrying the latest snapshot (or, with a merge function,
+  the merge of every queued delta)
+- Blocking I/O (journal append, backend write) runs in worker threads
+  via asyncio.to_thread, never on the event loop
+- A successful backend write appends a commit marker; failed writes stay
+  pending and are retried with exponential backoff
+- On startup replay() re-queues every snapshot without a later commit
+  marker, so a crash between a turn and its backend write loses nothing
+  that reached the journal (at most the last flush_delay of records)
+- Once nothing is pending and the journal exceeds compact_bytes it is
+  truncated
+
+Journal lines:
+    {"seq": 7, "profile_id": "...", "snapshot": {...}}
+    {"commit": "<profile_id>", "seq": 7}
+"""
+
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Blocking backend write: (profile_id, snapshot) → None, raises on failure
+WriterFn = Callable[[str, dict], None]
+# Coalesces two queued records for one profile: (older, newer) → combined
+MergeFn = Callable[[dict, dict], dict]
+
+
+def _replace(older: dict, newer: dict) -> dict:
+    return newer
+
+
+class PersistenceJournal:
+    """Durable, coalescing write-behind queue in front of a blocking writer."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        writer: WriterFn,
+        merge: MergeFn = _replace,
+        flush_delay: float = 0.05,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 30.0,
+        compact_bytes: int = 1 << 20,
+    ):
+        self.path = Path(path)
+        self._writer = writer
+        self._merge = merge
+        self.flush_delay = flush_delay
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.compact_bytes = compact_bytes
+        self._pending: dict[str, tuple[int, dict]] = {}  # profile → (seq, snapshot) not yet written
+        self._unjournaled: list[dict] = []
+        self._seq = 0
+        self._task: asyncio.Task | None = None
+        self._wake: asyncio.Event | None = None
+        self._lock: asyncio.Lock | None = None
+        self.stats = {"recorded": 0, "coalesced": 0, "flushed": 0, "failures": 0, "replayed": 0}
+
+    # ── Producer side (event loop, never blocks) ─────────────────────
+
+    def record(self, profile_id: str, snapshot: dict) -> None:
+        """Queue a snapshot for profile_id; returns immediately."""
+        self._seq += 1
+        queued = self._pending.get(profile_id)
+        if queued is not None:
+            self.stats["coalesced"] += 1
+            snapshot = self._merge(queued[1], snapshot)
+        self._pending[profile_id] = (self._seq, snapshot)
+        self._unjournaled.append({"seq": self._seq, "profile_id": profile_id, "snapshot": self._pending[profile_id][1]})
+        self.stats["recorded"] += 1
+        self._kick()
+
+    def pending(self, profile_id: str) -> dict | None:
+        """Latest snapshot not yet written to the backend (read-your-writes)."""
+        entry = self._pending.get(profile_id)
+        return entry[1] if entry else None
+
+    @property
+    def backlog(self) -> int:
+        return len(self._pending)
+
+    # ── Flusher ──────────────────────────────────────────────────────
+
+    def _kick(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop yet — replay()/drain() will pick it up
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wake = asyncio.Event()
+            self._lock = asyncio.Lock()
+            self._task = loop.create_task(self._run())
+        self._wake.set()
+
+    async def _run(self) -> None:
+        delay = self.retry_delay
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            # Let a burst of records collapse into one write per profile
+            await asyncio.sleep(self.flush_delay)
+            if await self.flush():
+                delay = self.retry_delay
+                continue
+            await asyncio.sleep(delay)
+            delay = min(self.max_retry_delay, delay * 2)
+            self._wake.set()
+
+    async def flush(self) -> bool:
+        """Journal queued records, then write every pending profile. True if all succeeded."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            lines, self._unjournaled = self._unjournaled, []
+            if lines:
+                await self._append(lines)
+
+            ok = True
+            commits = []
+            for profile_id, (seq, snapshot) in list(self._pending.items()):
+                try:
+                    await asyncio.to_thread(self._writer, profile_id, snapshot)
+                except Exception as exc:
+                    logger.warning("Deferred save for profile %s failed (will retry): %s", profile_id, exc)
+                    self.stats["failures"] += 1
+                    ok = False
+                    continue
+                self.stats["flushed"] += 1
+                commits.append({"commit": profile_id, "seq": seq})
+                # A newer record may have arrived while the write was in flight
+                if self._pending.get(profile_id, (None,))[0] == seq:
+                    del self._pending[profile_id]
+            if commits:
+                await self._append(commits)
+            if not self._pending:
+                await asyncio.to_thread(self._maybe_compact)
+            return ok
+
+    async def drain(self) -> bool:
+        """Flush until nothing is pending or a write fails (shutdown / tests)."""
+        while self._pending or self._unjournaled:
+            if not await self.flush():
+                return False
+        return True
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # ── Journal file (worker threads) ────────────────────────────────
+
+    async def _append(self, entries: list[dict]) -> None:
+        try:
+            await asyncio.to_thread(self._append_sync, entries)
+        except OSError as exc:
+            # The backend write is still attempted; only crash-safety is lost
+            logger.error("Persistence journal append failed: %s", exc)
+
+    def _append_sync(self, entries: list[dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = "".join(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n" for e in entries)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _maybe_compact(self) -> None:
+        try:
+            if self.path.stat().st_size > self.compact_bytes:
+                with open(self.path, "w", encoding="utf-8"):
+                    pass
+                logger.info("Persistence journal compacted")
+        except FileNotFoundError:
+            pass
+
+    def _read(self) -> list[dict]:
+        try:
+            text = self.path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return []
+        if text and not text.endswith("\n"):
+            # Torn last line from a crash mid-append — cut it so new appends start clean
+            text = text[:text.rfind("\n") + 1]
+            with open(self.path, "r+", encoding="utf-8") as f:
+                f.truncate(len(text.encode("utf-8")))
+            logger.warning("Dropped torn last line of the persistence journal")
+        entries = []
+        for line in text.splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping corrupt persistence journal line")
+        return entries
+
+    async def replay(self) -> int:
+        """Re-queue snapshots that never got a commit marker. Returns how many."""
+        entries = await asyncio.to_thread(self._read)
+        latest: dict[str, tuple[int, dict]] = {}
+        committed: dict[str, int] = {}
+        for entry in entries:
+            seq = entry.get("seq", 0)
+            self._seq = max(self._seq, seq)
+            if "commit" in entry:
+                committed[entry["commit"]] = max(seq, committed.get(entry["commit"], 0))
+            elif entry.get("profile_id") and seq >= latest.get(entry["profile_id"], (0, None))[0]:
+                latest[entry["profile_id"]] = (seq, entry.get("snapshot") or {})
+
+        replayed = 0
+        for profile_id, (seq, snapshot) in latest.items():
+            if seq > committed.get(profile_id, 0) and profile_id not in self._pending:
+                self._pending[profile_id] = (seq, snapshot)
+                replayed += 1
+        self.stats["replayed"] += replayed
+        if replayed:
+            logger.info("Replaying %d unsaved session snapshot(s) from the journal", replayed)
+            self._kick()
+        return replayed
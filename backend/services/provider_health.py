@@ -0,0 +1,302 @@
+"""
+Per-provider circuit breakers and latency tracking.
+
+Every external provider (LLMs, TTS, STT, Backboard memory) reports each
+call to its ProviderHealth:
+
+- record_success(latency) / record_failure(kind, latency) feed a rolling
+  latency histogram and a rolling outcome window (error rate)
+- the breaker opens after consecutive failures, a high error rate, or a
+  rate limit (429); while open, allow() fails fast instead of waiting on
+  a provider that is down
+- after the open period one half-open probe is let through; success
+  closes the breaker, failure re-opens it with a doubled open period
+
+HealthRegistry.rank() orders the currently available providers by their
+recent p95 so callers route to whichever has been fastest, keeping the
+configured order for providers without enough samples yet.
+"""
+
+import bisect
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Log-spaced latency buckets (seconds): 10ms … ~40s
+_BUCKETS = tuple(round(0.01 * 1.25 ** i, 4) for i in range(38))
+
+
+class RollingHistogram:
+    """Latency histogram over the last `window` seconds, kept in time slices."""
+
+    def __init__(self, window: float = 300.0, slices: int = 10):
+        self._slice_s = window / slices
+        self._slices: deque[tuple[int, list[int]]] = deque(maxlen=slices)
+
+    def _current(self, now: float) -> list[int]:
+        key = int(now // self._slice_s)
+        if not self._slices or self._slices[-1][0] != key:
+            self._slices.append((key, [0] * (len(_BUCKETS) + 1)))
+        return self._slices[-1][1]
+
+    def _live(self, now: float):
+        oldest = int(now // self._slice_s) - self._slices.maxlen + 1
+        return (counts for key, counts in self._slices if key >= oldest)
+
+    def record(self, seconds: float, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self._current(now)[bisect.bisect_left(_BUCKETS, seconds)] += 1
+
+    def count(self, now: float | None = None) -> int:
+        now = time.monotonic() if now is None else now
+        return sum(sum(counts) for counts in self._live(now))
+
+    def percentile(self, q: float, now: float | None = None) -> float | None:
+        """Upper bound of the bucket holding the q-quantile, or None if empty."""
+        now = time.monotonic() if now is None else now
+        merged = [0] * (len(_BUCKETS) + 1)
+        for counts in self._live(now):
+            for i, c in enumerate(counts):
+                merged[i] += c
+        total = sum(merged)
+        if not total:
+            return None
+        rank = q * total
+        running = 0
+        for i, c in enumerate(merged):
+            running += c
+            if running >= rank and c:
+                return _BUCKETS[i] if i < len(_BUCKETS) else _BUCKETS[-1]
+        return _BUCKETS[-1]
+
+
+# ProviderHealth settings (constructor keywords besides the name)
+_SETTINGS = (
+    "failure_threshold", "error_rate_threshold", "min_calls", "open_s", "rate_limit_open_s",
+    "max_open_s", "probe_timeout_s", "outcome_window_s",
+)
+
+
+class ProviderHealth:
+    """Circuit breaker + latency/error tracking for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        error_rate_threshold: float = 0.5,
+        min_calls: int = 10,
+        open_s: float = 15.0,
+        rate_limit_open_s: float = 60.0,
+        max_open_s: float = 600.0,
+        probe_timeout_s: float = 30.0,
+        outcome_window_s: float = 120.0,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_calls = min_calls
+        self.open_s = open_s
+        self.rate_limit_open_s = rate_limit_open_s
+        self.max_open_s = max_open_s
+        self.probe_timeout_s = probe_timeout_s
+        self.outcome_window_s = outcome_window_s
+        self.reset()
+
+    def settings(self) -> dict:
+        return {key: getattr(self, key) for key in _SETTINGS}
+
+    def reset(self) -> None:
+        """Forget all samples and close the breaker (settings are kept)."""
+        self.latency = RollingHistogram()
+        self.state = CLOSED
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._last_open_s = 0.0
+        self._probe_started: float | None = None
+        self.last_error: str | None = None
+
+    # ── Gate ──────────────────────────────────────────────────────────
+
+    def available(self, now: float | None = None) -> bool:
+        """Would allow() let a call through? (Does not claim the probe.)"""
+        now = time.monotonic() if now is None else now
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return now >= self._open_until
+        return self._probe_started is None or now - self._probe_started > self.probe_timeout_s
+
+    def allow(self, now: float | None = None) -> bool:
+        """Claim permission for one call; an open breaker fails fast."""
+        now = time.monotonic() if now is None else now
+        if not self.available(now):
+            return False
+        if self.state != CLOSED:
+            # One probe at a time; an abandoned (cancelled) probe expires
+            self.state = HALF_OPEN
+            self._probe_started = now
+            logger.info("Provider %s half-open — probing", self.name)
+        return True
+
+    # ── Outcomes ──────────────────────────────────────────────────────
+
+    def record_success(self, latency: float, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self.latency.record(latency, now)
+        self._push(now, True)
+        self._consecutive_failures = 0
+        if self.state != CLOSED:
+            logger.info("Provider %s recovered — breaker closed", self.name)
+        self.state = CLOSED
+        self._probe_started = None
+        self._last_open_s = 0.0
+
+    def record_failure(self, kind: str = "error", latency: float | None = None, now: float | None = None) -> None:
+        """kind: "error", "timeout" or "rate_limit"."""
+        now = time.monotonic() if now is None else now
+        if latency is not None and kind == "timeout":
+            # A timeout is a latency observation too — keeps p95 honest
+            self.latency.record(latency, now)
+        self._push(now, False)
+        self._consecutive_failures += 1
+        self.last_error = kind
+        if kind == "rate_limit":
+            self._trip(now, max(self.rate_limit_open_s, self._last_open_s * 2))
+        elif self.state == HALF_OPEN:
+            self._trip(now, min(self.max_open_s, max(self.open_s, self._last_open_s * 2)))
+        elif self._consecutive_failures >= self.failure_threshold or self._error_rate_tripped(now):
+            self._trip(now, self.open_s)
+
+    def _push(self, now: float, ok: bool) -> None:
+        self._outcomes.append((now, ok))
+        while self._outcomes and now - self._outcomes[0][0] > self.outcome_window_s:
+            self._outcomes.popleft()
+
+    def _error_rate_tripped(self, now: float) -> bool:
+        return len(self._outcomes) >= self.min_calls and self.error_rate(now) >= self.error_rate_threshold
+
+    def _trip(self, now: float, open_s: float) -> None:
+        open_s = min(self.max_open_s, open_s)
+        self.state = OPEN
+        self._open_until = now + open_s
+        self._last_open_s = open_s
+        self._probe_started = None
+        logger.warning("Provider %s breaker open for %.0fs (%s)", self.name, open_s, self.last_error)
+
+    # ── Stats ─────────────────────────────────────────────────────────
+
+    def error_rate(self, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        recent = [ok for t, ok in self._outcomes if now - t <= self.outcome_window_s]
+        if not recent:
+            return 0.0
+        return recent.count(False) / len(recent)
+
+    def p95(self, now: float | None = None) -> float | None:
+        return self.latency.percentile(0.95, now)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        p50 = self.latency.percentile(0.5, now)
+        p95 = self.latency.percentile(0.95, now)
+        return {
+            "state": self.state,
+            "available": self.available(now),
+            "p50_ms": None if p50 is None else int(p50 * 1000),
+            "p95_ms": None if p95 is None else int(p95 * 1000),
+            "samples": self.latency.count(now),
+            "error_rate": round(self.error_rate(now), 3),
+            "open_for_s": round(max(0.0, self._open_until - now), 1) if self.state == OPEN else 0.0,
+            "last_error": self.last_error,
+        }
+
+
+class HealthRegistry:
+    """ProviderHealth per provider name, shared by every service in the process."""
+
+    def __init__(self, min_samples: int = 5):
+        self.min_samples = min_samples
+        self._providers: dict[str, ProviderHealth] = {}
+
+    def configure(self, name: str, **kwargs) -> ProviderHealth:
+        """Create (or replace settings of) a provider's breaker.
+
+        Stage breakers of the provider ("groq:analysis") get the same settings.
+        """
+        health = self._providers.get(name)
+        if health is None:
+            health = self._providers[name] = ProviderHealth(name, **kwargs)
+        else:
+            for key, value in kwargs.items():
+                setattr(health, key, value)
+        for stage_name, stage in self._providers.items():
+            if stage_name.startswith(name + ":"):
+                for key, value in kwargs.items():
+                    setattr(stage, key, value)
+        return health
+
+    def get(self, name: str) -> ProviderHealth:
+        """Breaker for `name`; "provider:stage" keys start from the provider's settings."""
+        health = self._providers.get(name)
+        if health is None:
+            base = self._providers.get(name.partition(":")[0]) if ":" in name else None
+            settings = base.settings() if base is not None else {}
+            health = self._providers[name] = ProviderHealth(name, **settings)
+        return health
+
+    def rank(self, names: list[str]) -> list[str]:
+        """Available providers, fastest recent p95 first.
+
+        Providers with fewer than min_samples keep their configured order,
+        after the measured ones, so a cold provider is explored as a
+        fallback/hedge instead of taking over the primary slot.
+        """
+        now = time.monotonic()
+        measured, cold = [], []
+        for name in names:
+            health = self.get(name)
+            if not health.available(now):
+                continue
+            p95 = health.p95(now)
+            if p95 is not None and health.latency.count(now) >= self.min_samples:
+                measured.append((p95, len(measured), name))
+            else:
+                cold.append(name)
+        return [name for _, _, name in sorted(measured)] + cold
+
+    def reset(self) -> None:
+        for provider in self._providers.values():
+            provider.reset()
+
+    def snapshot(self) -> dict[str, dict]:
+        return {name: provider.snapshot() for name, provider in sorted(self._providers.items())}
+
+
+def classify_error(exc: BaseException) -> str:
+    """Map a provider exception to a failure kind for record_failure()."""
+    text = f"{type(exc).__name__} {exc}".lower()
+    if "429" in text or "rate_limit" in text or "ratelimit" in text:
+        return "rate_limit"
+    if isinstance(exc, TimeoutError) or "timeout" in text:
+        return "timeout"
+    return "error"
+
+
+# One registry per worker process; provider defaults mirror the cooldowns
+# the services used before (Groq 5 min, OpenAI 30 s, OpenAI TTS 2 min on 429).
+health = HealthRegistry()
+health.configure("groq", rate_limit_open_s=300.0)
+health.configure("backboard")
+health.configure("openai", rate_limit_open_s=30.0)
+health.configure("edge_tts")
+health.configure("openai_tts", rate_limit_open_s=120.0)
+health.configure("speechmatics", open_s=10.0)
+health.configure("backboard_memory", open_s=30.0)
@@ -0,0 +1,136 @@
+"""
+LLM response cache for short, frequently repeated learner inputs.
+
+A0-A1 learners say the same few things ("Bonjour", "Ça va ?", "Je ne sais
+pas") and each one used to cost a full provider call. ResponseCache keeps
+provider replies keyed by everything the prompt depends on:
+
+- context: language, stage (reply / spoken / analysis), mission context
+  and the history window (and summary) the stage actually sends — a hit is a
+  reply to the same prompt, not just to the same words
+- exact tier: the user text case-folded, whitespace-collapsed, without
+  surrounding punctuation ("Bonjour !" == "bonjour")
+- near-duplicate tier: the accent-folded token set ("ca va" == "Ça va ?",
+  "va ça" too), consulted after the exact tier misses
+
+Entries expire after `ttl_s`, the store is an LRU of `max_entries`, and
+inputs longer than `max_chars` are never cached. Only provider replies
+are stored — rule-based fallbacks are not.
+"""
+
+import copy
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Iterable, NamedTuple
+
+_EDGE_PUNCT = " .,;:!?¿¡…\"'«»()-"
+_TOKEN = re.compile(r"\w+")
+
+
+class CacheKeys(NamedTuple):
+    exact: str
+    near: str | None
+
+
+class _Entry(NamedTuple):
+    expires: float
+    result: dict
+    raw: str
+    near: str | None
+
+
+def exact_text(text: str) -> str:
+    text = unicodedata.normalize("NFC", text).casefold().replace("’", "'")
+    return " ".join(text.split()).strip(_EDGE_PUNCT)
+
+
+def token_set(text: str) -> tuple[str, ...]:
+    """Sorted distinct tokens, case- and accent-folded."""
+    folded = unicodedata.normalize("NFKD", text.casefold())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return tuple(sorted(set(_TOKEN.findall(folded))))
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Exact + near-duplicate LRU of LLM replies with a TTL."""
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_s: float = 3600.0,
+        max_chars: int = 80,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.max_chars = max_chars
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._near: dict[str, str] = {}  # near key → exact key
+        self.stats = {"exact_hits": 0, "near_hits": 0, "misses": 0, "stores": 0, "expired": 0}
+
+    def keys(self, context: Iterable[str], user_text: str) -> CacheKeys | None:
+        """Cache keys for a prompt, or None when the input is not cacheable."""
+        text = exact_text(user_text or "")
+        if not text or len(text) > self.max_chars:
+            return None
+        ctx = _digest(*context)
+        tokens = token_set(text)
+        return CacheKeys(
+            exact=_digest(ctx, "exact", text),
+            near=_digest(ctx, "near", *tokens) if tokens else None,
+        )
+
+    def get(self, keys: CacheKeys) -> tuple[dict, str] | None:
+        """(result, raw) for a fresh entry under either key; copies, safe to mutate."""
+        for tier, key in (("exact_hits", keys.exact), ("near_hits", self._near.get(keys.near or ""))):
+            entry = self._entries.get(key) if key else None
+            if entry is None:
+                continue
+            if entry.expires <= self._clock():
+                self.stats["expired"] += 1
+                self._drop(key)
+                continue
+            self._entries.move_to_end(key)
+            self.stats[tier] += 1
+            return copy.deepcopy(entry.result), entry.raw
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, keys: CacheKeys, result: dict, raw: str) -> None:
+        if keys.exact in self._entries:
+            self._drop(keys.exact)
+        self._entries[keys.exact] = _Entry(self._clock() + self.ttl_s, copy.deepcopy(result), raw, keys.near)
+        if keys.near:
+            self._near[keys.near] = keys.exact
+        self.stats["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        if entry.near and self._near.get(entry.near) == key:
+            del self._near[entry.near]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._near.clear()
+        for name in self.stats:
+            self.stats[name] = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> dict:
+        stats = dict(self.stats)
+        lookups = stats["exact_hits"] + stats["near_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["exact_hits"] + stats["near_hits"]) / lookups, 4) if lookups else 0.0
+        stats["entries"] = len(self._entries)
+        return stats
@@ -0,0 +1,153 @@
+"""
+Spaced-repetition scheduler for the units a learner has produced.
+
+The frontend used to pick "fading" vocabulary by scanning every neuron of
+its graph and shipped the labels back in mission_context.fading_targets.
+ReviewScheduler keeps that decision on the server (one per session):
+
+- SM-2 style cards per pedagogical unit (ease, interval, repetitions,
+  lapses), graded from the unit's validation confidence each time the
+  learner uses it: a confident use pushes the next review out (learning
+  step → graduating interval → interval × ease), a shaky one resets it
+- a min-heap of (due time, sequence, unit) with lazy deletion — a review
+  pushes a fresh entry and the card's sequence marks older ones stale
+- due(now, k) pops the k earliest-due live entries and pushes them back:
+  O(k log n), no scan of the whole deck
+
+A unit is reviewed at most once per turn, so re-feeding a turn after the
+late analysis merged more units only grades the new ones.
+"""
+
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+
+from backend.config import SRS_GRADUATING_INTERVAL_H, SRS_LEARNING_STEP_MIN
+from backend.models import ConversationTurn
+from backend.services.graph_index import norm_text, pedagogical_items
+
+_MIN_EASE = 1.3
+
+
+@dataclass
+class ReviewCard:
+    """Scheduling state of one unit."""
+
+    label: str
+    due: float
+    ease: float = 2.5
+    interval_s: float = 0.0
+    reps: int = 0
+    lapses: int = 0
+    seq: int = 0  # Sequence of the card's live heap entry
+
+
+def grade(confidence: float) -> int:
+    """SM-2 quality (0-5) of one use of a unit; below 3 counts as a failed recall."""
+    if confidence >= 0.9:
+        return 5
+    if confidence >= 0.75:
+        return 4
+    if confidence >= 0.6:
+        return 3
+    return 2
+
+
+class ReviewScheduler:
+    """Per-session review deck with an O(log n) due-queue."""
+
+    def __init__(
+        self,
+        learning_step_s: float = SRS_LEARNING_STEP_MIN * 60,
+        graduating_interval_s: float = SRS_GRADUATING_INTERVAL_H * 3600,
+    ):
+        self.learning_step_s = learning_step_s
+        self.graduating_interval_s = graduating_interval_s
+        self.cards: dict[str, ReviewCard] = {}
+        self._heap: list[tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        # turn number → units already graded for it (recent turns only)
+        self._reviewed: dict[int, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    # ── Updates ──────────────────────────────────────────────────────
+
+    def review(self, text: str, quality: int, now: float) -> ReviewCard:
+        """Grade one use of `text` and reschedule it."""
+        key = norm_text(text)
+        card = self.cards.get(key)
+        if card is None:
+            card = self.cards[key] = ReviewCard(label=text.strip(), due=now)
+        if quality >= 3:
+            if card.reps == 0:
+                card.interval_s = self.learning_step_s
+            elif card.reps == 1:
+                card.interval_s = self.graduating_interval_s
+            else:
+                card.interval_s *= card.ease
+            card.reps += 1
+        else:
+            if card.reps:
+                card.lapses += 1
+            card.reps = 0
+            card.interval_s = self.learning_step_s
+        card.ease = max(_MIN_EASE, card.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        card.due = now + card.interval_s
+        card.seq = next(self._seq)
+        heapq.heappush(self._heap, (card.due, card.seq, key))
+        if len(self._heap) > 2 * len(self.cards) + 64:
+            self._compact()
+        return card
+
+    def review_turn(self, turn: ConversationTurn, now: float | None = None) -> int:
+        """Grade the accepted units of a turn not yet graded for it; returns how many."""
+        if now is None:
+            now = turn.recorded_at or time.time()
+        # Units may be models or (after pedagogy filtering) plain dicts
+        units = [u if isinstance(u, dict) else u.model_dump() for u in turn.response.validated_user_units]
+        units = [u for u in units if u.get("is_accepted")]
+        done = self._reviewed.setdefault(turn.turn_number, set())
+        count = 0
+        for text in pedagogical_items([u.get("text", "") for u in units]):
+            key = norm_text(text)
+            if key in done:
+                continue
+            done.add(key)
+            confidence = float(next((u.get("confidence", 0.75) for u in units if norm_text(u.get("text", "")) == key), 0.75))
+            self.review(text, grade(confidence), now)
+            count += 1
+        # Late analysis only ever rewrites the latest turns
+        while len(self._reviewed) > 8:
+            del self._reviewed[next(iter(self._reviewed))]
+        return count
+
+    def replay(self, history: list[ConversationTurn]) -> None:
+        """Rebuild the deck from a loaded history."""
+        for turn in history:
+            self.review_turn(turn)
+
+    def _compact(self) -> None:
+        self._heap = [entry for entry in self._heap if self._live(entry)]
+        heapq.heapify(self._heap)
+
+    def _live(self, entry: tuple[float, int, str]) -> bool:
+        card = self.cards.get(entry[2])
+        return card is not None and card.seq == entry[1]
+
+    # ── Queries ──────────────────────────────────────────────────────
+
+    def due(self, now: float | None = None, k: int = 5) -> list[ReviewCard]:
+        """Up to k cards due at `now`, most overdue first."""
+        now = time.time() if now is None else now
+        heap = self._heap
+        picked: list[tuple[float, int, str]] = []
+        while heap and len(picked) < k and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            if self._live(entry):
+                picked.append(entry)
+        for entry in picked:
+            heapq.heappush(heap, entry)
+        return [self.cards[key] for _, _, key in picked]
@@ -0,0 +1,247 @@
+"""
+Per-learner session registry for Echo Neural Language Lab.
+
+One uvicorn worker serves many learners at once, so every learner gets
+its own LearnerSession: a SessionState plus the stateful services that
+carry conversation context (OpenAIService history, BackboardService
+mastery cache). Sessions are keyed by profile id (or by an explicit
+connection/session id) and kept in an LRU map:
+
+- Idle sessions older than the TTL are evicted on the next access.
+- The number of resident sessions is capped; the least recently used
+  unpinned session is evicted first when the cap is exceeded.
+- Evicted sessions are handed to the persist callback (Supabase) before
+  they are dropped, and reloaded through the loader on next access.
+
+Stateless services (STT, TTS) stay shared at module level in the routes.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from backend.models import SessionState
+from backend.services.backboard_service import BackboardService
+from backend.services.graph_index import GraphIndex
+from backend.services.graph_layout import GraphLayout
+from backend.services.openai_service import OpenAIService
+from backend.services.review_scheduler import ReviewScheduler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_ID = "default"
+
+
+class LearnerSession:
+    """All per-learner state: session model + services holding learner context."""
+
+    def __init__(self, session_id: str, profile_id: str | None = None):
+        self.session_id = session_id
+        self.profile_id = profile_id
+        self.state = SessionState()
+        self.openai_service = OpenAIService()
+        self.backboard_service = BackboardService()
+        self.language = "fr"
+        self.last_active = time.monotonic()
+        # Serializes turns for the same learner (two tabs on one profile)
+        self.lock = asyncio.Lock()
+        # Number of open WebSockets using this session — pinned sessions are never evicted
+        self.connections = 0
+        # What the last save already covered — saves only send what changed since
+        self.persisted_turns = 0
+        self.persisted_mastery: dict[str, float] = {}
+        # Already-saved turns rewritten since (late analysis) — re-sent on the next save
+        self.dirty_turns: set[int] = set()
+        # Knowledge Graph built turn by turn — the graph routes only serialize it
+        self.graph = GraphIndex(self.language)
+        self.layout = GraphLayout()
+        # Spaced-repetition deck — picks the units the tutor should reactivate
+        self.reviews = ReviewScheduler()
+
+    def touch(self) -> None:
+        self.last_active = time.monotonic()
+
+    @property
+    def pinned(self) -> bool:
+        return self.connections > 0 or self.lock.locked()
+
+    def load_state(self, state: SessionState) -> None:
+        """Replace the session state and replay its history into the tutor context."""
+        self.state = state
+        self.persisted_turns = len(state.conversation_history)
+        self.persisted_mastery = dict(state.mastery_scores)
+        self.dirty_turns = set()
+        self.graph = GraphIndex(self.language)
+        self.layout = GraphLayout()
+        self.reviews = ReviewScheduler()
+        self.reviews.replay(state.conversation_history)
+        self.openai_service.reset()
+        self.openai_service.replay_turns(
+            [(turn.user_said, turn.response.spoken_response) for turn in state.conversation_history]
+        )
+
+    def reset(self) -> None:
+        """Start a fresh conversation (keeps profile binding)."""
+        self.state = SessionState()
+        self.dirty_turns = set()
+        self.graph = GraphIndex(self.language)
+        self.layout = GraphLayout()
+        self.reviews = ReviewScheduler()
+        self.openai_service.reset()
+
+
+PersistFn = Callable[[LearnerSession], Awaitable[None]]
+LoadFn = Callable[[str], Optional[SessionState]]
+
+
+class SessionRegistry:
+    """LRU + idle-TTL registry of LearnerSession objects with a resident cap."""
+
+    def __init__(
+        self,
+        max_sessions: int = 500,
+        idle_ttl: float = 1800.0,
+        persist: PersistFn | None = None,
+        loader: LoadFn | None = None,
+    ):
+        self.max_sessions = max(1, max_sessions)
+        self.idle_ttl = idle_ttl
+        self._persist = persist
+        self._loader = loader
+        self._sessions: "OrderedDict[str, LearnerSession]" = OrderedDict()
+        # Sessions being persisted after eviction — reloads wait for these
+        self._evicting: dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def sessions(self) -> list[LearnerSession]:
+        return list(self._sessions.values())
+
+    def get(self, session_id: str | None = None) -> LearnerSession:
+        """Return a resident session, creating an empty one if needed.
+
+        Synchronous accessor for REST handlers — never loads from the
+        persistence backend. Use acquire() to load a profile's history.
+        """
+        sid = session_id or DEFAULT_SESSION_ID
+        session = self._sessions.get(sid)
+        if session is None:
+            session = LearnerSession(sid)
+            self._sessions[sid] = session
+            self._enforce_cap(keep=sid)
+        self._sessions.move_to_end(sid)
+        session.touch()
+        return session
+
+    def _resident(self, sid: str, profile_id: str | None) -> LearnerSession | None:
+        session = self._sessions.get(sid)
+        if session is not None and (not profile_id or session.profile_id == profile_id):
+            self._sessions.move_to_end(sid)
+            session.touch()
+            return session
+        return None
+
+    async def acquire(self, session_id: str | None = None, profile_id: str | None = None) -> LearnerSession:
+        """Return the session for session_id, loading profile history on a miss."""
+        sid = session_id or profile_id or DEFAULT_SESSION_ID
+        self.evict_idle()
+
+        session = self._resident(sid, profile_id)
+        if session is not None:
+            return session
+
+        pending = self._evicting.get(sid)
+        if pending is not None:
+            await asyncio.shield(pending)
+            # A concurrent acquire may have reloaded it while we waited
+            session = self._resident(sid, profile_id)
+            if session is not None:
+                return session
+
+        session = self._sessions.get(sid)
+        if session is None:
+            session = LearnerSession(sid, profile_id)
+            self._sessions[sid] = session
+        elif session.profile_id and self._persist:
+            # Same connection switching to a different profile — save the old one
+            await self._persist(session)
+        session.profile_id = profile_id
+
+        if profile_id and self._loader:
+            # Held while loading: concurrent acquires get this session at once
+            # and their turns wait for the history; a locked session is pinned
+            async with session.lock:
+                try:
+                    # Blocking backend read — keep it off the event loop
+                    loaded = await asyncio.to_thread(self._loader, profile_id)
+                except Exception as exc:
+                    logger.warning("Failed to load session for profile %s: %s", profile_id, exc)
+                    loaded = None
+                session.load_state(loaded or SessionState())
+
+        self._sessions.move_to_end(sid)
+        session.touch()
+        self._enforce_cap(keep=sid)
+        return session
+
+    def discard(self, session_id: str) -> None:
+        """Drop a session without persisting it."""
+        self._sessions.pop(session_id, None)
+
+    def evict_idle(self, now: float | None = None) -> int:
+        """Evict every unpinned session idle for longer than the TTL."""
+        now = time.monotonic() if now is None else now
+        expired = [
+            s for s in self._sessions.values()
+            if not s.pinned and now - s.last_active > self.idle_ttl
+        ]
+        for session in expired:
+            self._evict(session)
+        return len(expired)
+
+    def _enforce_cap(self, keep: str) -> None:
+        if len(self._sessions) <= self.max_sessions:
+            return
+        # OrderedDict iterates LRU → MRU
+        for session in list(self._sessions.values()):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            if session.pinned or session.session_id == keep:
+                continue
+            self._evict(session)
+        if len(self._sessions) > self.max_sessions:
+            logger.warning(
+                "Session cap exceeded (%d resident, cap %d) — all sessions pinned",
+                len(self._sessions), self.max_sessions,
+            )
+
+    def _evict(self, session: LearnerSession) -> None:
+        self._sessions.pop(session.session_id, None)
+        logger.info("Evicting session %s (profile=%s)", session.session_id, session.profile_id)
+        if not (self._persist and session.profile_id):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning("No running event loop — evicted session %s not persisted", session.session_id)
+            return
+        self._evicting[session.session_id] = loop.create_task(self._persist_evicted(session))
+
+    async def _persist_evicted(self, session: LearnerSession) -> None:
+        try:
+            await self._persist(session)
+        except Exception as exc:
+            logger.warning("Failed to persist evicted session %s: %s", session.session_id, exc)
+        finally:
+            self._evicting.pop(session.session_id, None)
+
+    async def drain(self) -> None:
+        """Wait for in-flight eviction writes (tests / shutdown)."""
+        while self._evicting:
+            await asyncio.gather(*list(self._evicting.values()), return_exceptions=True)
@@ -0,0 +1,121 @@
+"""
+Normalized, append-only session storage format.
+
+The original format kept a learner's whole session in one `sessions` row
+and rewrote the full conversation_history JSON on every turn, so each
+save cost O(turns) and a session's total write volume grew O(turns²).
+The normalized format (supabase_migration_002_session_turns.sql) splits
+it into:
+
+- sessions         — header only: level, turn, turn_count, format_version
+- session_turns    — one row per ConversationTurn, keyed (profile_id, turn_number)
+- session_mastery  — one row per mastery key, keyed (profile_id, key)
+
+A load reads the header, the mastery rows and only the newest
+SESSION_LOAD_TURNS turns; SessionState.earlier_turns counts the stored
+turns left out, which /api/session/history pages in on demand.
+
+A save is a SessionDelta: the header, the turns added since the last
+save (plus saved turns marked dirty, e.g. rewritten by a late analysis)
+and only the mastery scores that changed. Deltas for one profile merge
+(merge_deltas) so the write-behind journal can coalesce them, and
+apply_delta() overlays a not-yet-flushed delta on a loaded session.
+
+Delta shape (JSON-safe, journaled as-is):
+    {"header": {"level": "A1", "turn": 5, "turn_count": 4},
+     "turns": {"4": {...ConversationTurn...}},
+     "mastery": {"bonjour": 0.8},
+     "reset": false}
+"""
+
+from backend.services.session_registry import LearnerSession
+
+
+def session_delta(session: LearnerSession) -> dict:
+    """Delta since the last save of this session; updates its persisted marks."""
+    state = session.state
+    history = state.conversation_history
+    # A shorter history than already saved means the session was reset
+    reset = len(history) < session.persisted_turns
+    start = 0 if reset else session.persisted_turns
+    turns = {str(t.turn_number): t.model_dump() for t in history[start:]}
+    if reset:
+        mastery = dict(state.mastery_scores)
+    else:
+        saved = session.persisted_mastery
+        mastery = {k: v for k, v in state.mastery_scores.items() if saved.get(k) != v}
+        dirty = session.dirty_turns - {int(n) for n in turns}
+        # Rewritten turns are recent — walk back only until all are found
+        for turn in reversed(history[:start]):
+            if not dirty:
+                break
+            if turn.turn_number in dirty:
+                dirty.discard(turn.turn_number)
+                turns[str(turn.turn_number)] = turn.model_dump()
+
+    session.persisted_turns = len(history)
+    session.persisted_mastery = dict(state.mastery_scores)
+    session.dirty_turns = set()
+    return {
+        "header": {"level": state.level, "turn": state.turn, "turn_count": state.earlier_turns + len(history)},
+        "turns": turns,
+        "mastery": mastery,
+        "reset": reset,
+    }
+
+
+def merge_deltas(older: dict, newer: dict) -> dict:
+    """Combine two deltas for one profile into a single equivalent write."""
+    if newer.get("reset"):
+        return newer
+    return {
+        "header": newer.get("header") or older.get("header") or {},
+        "turns": {**older.get("turns", {}), **newer.get("turns", {})},
+        "mastery": {**older.get("mastery", {}), **newer.get("mastery", {})},
+        "reset": bool(older.get("reset")),
+    }
+
+
+def apply_delta(data: dict | None, delta: dict) -> dict:
+    """Overlay a delta on loaded session data ({level, turn, mastery_scores, conversation_history})."""
+    data = data or {}
+    if delta.get("reset"):
+        history, mastery = {}, {}
+    else:
+        history = {t["turn_number"]: t for t in data.get("conversation_history") or []}
+        mastery = dict(data.get("mastery_scores") or {})
+    for turn in delta.get("turns", {}).values():
+        history[turn["turn_number"]] = turn
+    mastery.update(delta.get("mastery", {}))
+    header = delta.get("header") or {}
+    return {
+        "level": header.get("level", data.get("level", "A1")),
+        "turn": header.get("turn", data.get("turn", 1)),
+        "mastery_scores": mastery,
+        "conversation_history": [history[n] for n in sorted(history)],
+    }
+
+
+def turn_rows(profile_id: str, delta: dict) -> list[dict]:
+    return [
+        {"profile_id": profile_id, "turn_number": turn["turn_number"], "payload": turn}
+        for turn in delta.get("turns", {}).values()
+    ]
+
+
+def mastery_rows(profile_id: str, delta: dict) -> list[dict]:
+    return [
+        {"profile_id": profile_id, "key": key, "score": score}
+        for key, score in delta.get("mastery", {}).items()
+    ]
+
+
+def legacy_delta(row: dict) -> dict:
+    """Delta that rewrites a single-row (format 1) session in the normalized format."""
+    history = row.get("conversation_history") or []
+    return {
+        "header": {"level": row.get("level", "A1"), "turn": row.get("turn", 1), "turn_count": len(history)},
+        "turns": {str(t["turn_number"]): t for t in history},
+        "mastery": dict(row.get("mastery_scores") or {}),
+        "reset": False,
+    }
@@ -0,0 +1,313 @@
+"""
+Async-native Speechmatics real-time client with a warm session pool.
+
+The Speechmatics RT protocol is one recognition per WebSocket session:
+StartRecognition → binary audio → EndOfStream → EndOfTranscript. What
+costs latency per utterance is the TLS + WebSocket handshake and the
+StartRecognition round trip, so the pool does both ahead of time:
+
+- Per language it keeps `min_idle` sessions connected and already in the
+  RecognitionStarted state, ready to accept audio immediately.
+- A session is handed out for exactly one utterance; the pool replenishes
+  in the background while the turn is still being processed.
+- Idle sessions are health-checked (WebSocket ping) and recycled before
+  the server's idle timeout; failed connects retry with exponential
+  backoff + jitter.
+
+All I/O runs on the event loop — no executor thread per turn.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from typing import AsyncIterator, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class RealtimeError(Exception):
+    """Speechmatics RT session failed (connect, protocol error, or closed)."""
+
+
+def build_start_recognition(language: str, operating_point: str = "enhanced", max_delay: float = 0.7) -> dict:
+    """StartRecognition message for 16 kHz mono PCM."""
+    return {
+        "message": "StartRecognition",
+        "audio_format": {"type": "raw", "encoding": "pcm_s16le", "sample_rate": 16000},
+        "transcription_config": {
+            "language": language,
+            "operating_point": operating_point,
+            "max_delay": max_delay,
+            "enable_partials": False,
+        },
+    }
+
+
+class RealtimeSession:
+    """One warm Speechmatics RT session (connected + RecognitionStarted)."""
+
+    def __init__(self, ws, language: str, session_id: str = ""):
+        self.ws = ws
+        self.language = language
+        self.session_id = session_id
+        self.created_at = time.monotonic()
+        self.used = False
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+    @property
+    def closed(self) -> bool:
+        return self.ws.close_code is not None
+
+    async def ping(self, timeout: float = 2.0) -> bool:
+        try:
+            pong = await self.ws.ping()
+            await asyncio.wait_for(pong, timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    async def close(self) -> None:
+        try:
+            await self.ws.close()
+        except Exception:
+            pass
+
+    async def transcribe(self, pcm_chunks: AsyncIterator[bytes]) -> str:
+        """Send PCM as it arrives and return the final transcript."""
+        if self.used:
+            raise RealtimeError("RT session already used")
+        self.used = True
+        parts: list[str] = []
+
+        async def _send_audio() -> None:
+            seq_no = 0
+            async for chunk in pcm_chunks:
+                if chunk:
+                    await self.ws.send(chunk)
+                    seq_no += 1
+            await self.ws.send(json.dumps({"message": "EndOfStream", "last_seq_no": seq_no}))
+
+        async def _receive() -> None:
+            async for raw in self.ws:
+                if isinstance(raw, bytes):
+                    continue
+                msg = json.loads(raw)
+                kind = msg.get("message")
+                if kind == "AddTranscript":
+                    text = msg.get("metadata", {}).get("transcript", "") or msg.get("transcript", "")
+                    if text:
+                        parts.append(text)
+                elif kind == "EndOfTranscript":
+                    return
+                elif kind == "Error":
+                    raise RealtimeError(f"{msg.get('type', 'error')}: {msg.get('reason', '')}")
+            raise RealtimeError("RT session closed before EndOfTranscript")
+
+        sender = asyncio.create_task(_send_audio())
+        receiver = asyncio.create_task(_receive())
+        try:
+            # A failing sender (decoder error, send failure) ends the wait at
+            # once instead of leaving the receiver blocked until the caller times out
+            await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_EXCEPTION)
+            for task in (sender, receiver):
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in (sender, receiver):
+                if not task.done():
+                    task.cancel()
+            # Let the sender unwind so the PCM source is no longer being iterated
+            await asyncio.gather(sender, receiver, return_exceptions=True)
+            await self.close()
+        return " ".join(p.strip() for p in parts if p.strip()).strip()
+
+
+class RealtimeSessionPool:
+    """Language-keyed pool of warm Speechmatics RT sessions."""
+
+    def __init__(
+        self,
+        url: str,
+        api_key: str = "",
+        min_idle: int = 1,
+        max_idle_age: float = 45.0,
+        health_interval: float = 10.0,
+        connect_timeout: float = 5.0,
+        backoff_base: float = 0.25,
+        backoff_max: float = 8.0,
+        start_message: Callable[[str], dict] = build_start_recognition,
+        connect=None,
+    ):
+        self.url = url
+        self.api_key = api_key
+        self.min_idle = max(0, min_idle)
+        self.max_idle_age = max_idle_age
+        self.health_interval = health_interval
+        self.connect_timeout = connect_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._start_message = start_message
+        self._connect = connect
+        self._idle: dict[str, deque[RealtimeSession]] = {}
+        self._filling: dict[str, asyncio.Task] = {}
+        self._failures: dict[str, int] = {}
+        self._health_task: asyncio.Task | None = None
+        self._closed = False
+        self.stats = {
+            "warm_hits": 0,
+            "cold_starts": 0,
+            "handshakes": 0,
+            "handshake_ms_total": 0,
+            "reconnects": 0,
+            "recycled": 0,
+            "connect_failures": 0,
+        }
+
+    # ── Connecting ────────────────────────────────────────────────────
+
+    async def _open_session(self, language: str) -> RealtimeSession:
+        """Connect + StartRecognition. Raises RealtimeError on failure."""
+        if self._connect is None:
+            from websockets.asyncio.client import connect
+            self._connect = connect
+        t0 = time.perf_counter()
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else None
+        try:
+            ws = await asyncio.wait_for(
+                self._connect(self.url, additional_headers=headers, open_timeout=self.connect_timeout),
+                timeout=self.connect_timeout,
+            )
+            await ws.send(json.dumps(self._start_message(language)))
+            while True:
+                raw = await asyncio.wait_for(ws.recv(), timeout=self.connect_timeout)
+                if isinstance(raw, bytes):
+                    continue
+                msg = json.loads(raw)
+                if msg.get("message") == "RecognitionStarted":
+                    break
+                if msg.get("message") == "Error":
+                    await ws.close()
+                    raise RealtimeError(f"{msg.get('type', 'error')}: {msg.get('reason', '')}")
+        except RealtimeError:
+            self.stats["connect_failures"] += 1
+            raise
+        except Exception as exc:
+            self.stats["connect_failures"] += 1
+            raise RealtimeError(f"RT connect failed: {exc}") from exc
+        handshake_ms = int((time.perf_counter() - t0) * 1000)
+        self.stats["handshakes"] += 1
+        self.stats["handshake_ms_total"] += handshake_ms
+        logger.debug("Speechmatics RT session ready (%s, %dms)", language, handshake_ms)
+        return RealtimeSession(ws, language, session_id=str(msg.get("id", "")))
+
+    def _backoff_delay(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    async def _open_with_backoff(self, language: str, max_attempts: int = 6) -> RealtimeSession | None:
+        for attempt in range(max_attempts):
+            if self._closed:
+                return None
+            try:
+                session = await self._open_session(language)
+                self._failures[language] = 0
+                return session
+            except RealtimeError as exc:
+                self._failures[language] = self._failures.get(language, 0) + 1
+                delay = self._backoff_delay(attempt)
+                logger.warning("Speechmatics RT warm-up failed (%s), retry in %.2fs: %s", language, delay, exc)
+                self.stats["reconnects"] += 1
+                await asyncio.sleep(delay)
+        return None
+
+    # ── Pool maintenance ──────────────────────────────────────────────
+
+    def _ensure_health_loop(self) -> None:
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    def prewarm(self, language: str) -> None:
+        """Start filling the pool for a language in the background."""
+        if self._closed or self.min_idle == 0:
+            return
+        self._idle.setdefault(language, deque())
+        self._ensure_health_loop()
+        task = self._filling.get(language)
+        if task is None or task.done():
+            self._filling[language] = asyncio.create_task(self._fill(language))
+
+    async def _fill(self, language: str) -> None:
+        idle = self._idle.setdefault(language, deque())
+        while not self._closed and len(idle) < self.min_idle:
+            session = await self._open_with_backoff(language)
+            if session is None:
+                return
+            idle.append(session)
+
+    async def _health_loop(self) -> None:
+        while not self._closed:
+            await asyncio.sleep(self.health_interval)
+            await self.check_health()
+
+    async def check_health(self) -> None:
+        """Recycle idle sessions that are stale, closed, or fail a ping."""
+        for language, idle in list(self._idle.items()):
+            healthy: deque[RealtimeSession] = deque()
+            while idle:
+                session = idle.popleft()
+                if session.closed or session.age > self.max_idle_age or not await session.ping():
+                    self.stats["recycled"] += 1
+                    await session.close()
+                    continue
+                healthy.append(session)
+            # Sessions acquired during the pings were removed from `idle` already
+            idle.extend(healthy)
+            self.prewarm(language)
+
+    # ── Public API ────────────────────────────────────────────────────
+
+    async def acquire(self, language: str) -> RealtimeSession:
+        """Return a warm session for the language (or open one now on a miss)."""
+        if self._closed:
+            raise RealtimeError("RT pool closed")
+        idle = self._idle.setdefault(language, deque())
+        session = None
+        while idle:
+            candidate = idle.popleft()
+            if candidate.closed or candidate.age > self.max_idle_age:
+                self.stats["recycled"] += 1
+                await candidate.close()
+                continue
+            session = candidate
+            break
+        if session is not None:
+            self.stats["warm_hits"] += 1
+        else:
+            self.stats["cold_starts"] += 1
+            session = await self._open_session(language)
+        # Replace what we just took while this utterance is being transcribed
+        self.prewarm(language)
+        return session
+
+    async def transcribe(self, language: str, pcm_chunks: AsyncIterator[bytes]) -> str:
+        session = await self.acquire(language)
+        return await session.transcribe(pcm_chunks)
+
+    def idle_count(self, language: str) -> int:
+        return len(self._idle.get(language, ()))
+
+    async def close(self) -> None:
+        self._closed = True
+        for task in list(self._filling.values()):
+            task.cancel()
+        if self._health_task is not None:
+            self._health_task.cancel()
+        for idle in self._idle.values():
+            while idle:
+                await idle.popleft().close()
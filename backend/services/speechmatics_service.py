@@ -2,19 +2,28 @@
 Speechmatics STT (Speech-to-Text) Service — optimized for minimum latency.
 
 Key optimizations:
-- Persistent WebSocket connection (reused across calls, no handshake per turn)
+- Warm session pool (speechmatics_rt): TLS + WebSocket handshake and
+  StartRecognition happen ahead of time, per language, off the turn path
+- Async-native RT protocol client — no executor thread per turn
 - max_delay=0.7 (minimum allowed, fastest final transcript)
-- enable_partials=True (get partial results while still speaking)
-- operating_point="standard" (faster than "enhanced")
+- operating_point="enhanced"
 - PCM conversion runs in thread pool (non-blocking)
+- Streaming ingestion: binary frames are decoded and fed to STT while the
+  learner is still speaking (see StreamingAudioInput / transcribe_stream)
+- Circuit breaker (provider_health "speechmatics"): while the RT API is
+  failing, turns fail fast instead of waiting out the 10s timeout
 """
 
 import io
 import logging
 import os
 import asyncio
+import queue
 import time
+from typing import AsyncIterator
+
 from backend.config import MOCK_MODE
+from backend.services.provider_health import classify_error, health
 
 logger = logging.getLogger(__name__)
 
@@ -36,39 +45,206 @@ def _convert_webm_to_pcm(webm_data: bytes) -> bytes:
     return b"".join(pcm_chunks)
 
 
+class StreamingAudioInput:
+    """Audio frames received over the WebSocket while the learner speaks.
+
+    The route pushes each binary frame as it arrives and calls end() on the
+    end-of-utterance control message; STT consumes it as an async iterator.
+    `encoding` is "webm" (MediaRecorder webm/opus) or "pcm_s16le" (16 kHz mono).
+    """
+
+    def __init__(self, encoding: str = "webm"):
+        self.encoding = encoding
+        self.bytes_received = 0
+        self.frames_received = 0
+        self.ended_at: float | None = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._ended = asyncio.Event()
+
+    @property
+    def ended(self) -> bool:
+        return self.ended_at is not None
+
+    def push(self, data: bytes) -> None:
+        if self.ended or not data:
+            return
+        self.bytes_received += len(data)
+        self.frames_received += 1
+        self._queue.put_nowait(data)
+
+    def end(self) -> None:
+        if self.ended:
+            return
+        self.ended_at = time.perf_counter()
+        self._queue.put_nowait(None)
+        self._ended.set()
+
+    async def wait_ended(self) -> None:
+        await self._ended.wait()
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while True:
+            chunk = await self._queue.get()
+            if chunk is None:
+                return
+            yield chunk
+
+
+class _BlockingPipe:
+    """File-like object PyAV reads on a worker thread while frames keep arriving."""
+
+    def __init__(self):
+        self._chunks: queue.Queue = queue.Queue()
+        self._buffer = bytearray()
+        self._eof = False
+
+    def write(self, data: bytes) -> None:
+        self._chunks.put(data)
+
+    def close_input(self) -> None:
+        self._chunks.put(None)
+
+    def read(self, size: int = -1) -> bytes:
+        # Block only until *some* data is available — never for a full buffer,
+        # so the demuxer sees each frame as soon as the browser sends it.
+        if not self._buffer and not self._eof:
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer.extend(chunk)
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+def _decode_webm_stream(pipe: _BlockingPipe, emit) -> None:
+    """Incrementally decode webm/opus from a pipe, emitting PCM s16le 16kHz mono chunks."""
+    import av
+
+    container = av.open(pipe, mode="r")
+    audio_stream = next(s for s in container.streams if s.type == "audio")
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=16000)
+    for frame in container.decode(audio_stream):
+        for resampled_frame in resampler.resample(frame):
+            emit(bytes(resampled_frame.planes[0]))
+    for resampled_frame in resampler.resample(None):
+        emit(bytes(resampled_frame.planes[0]))
+    container.close()
+
+
+async def _stream_pcm(audio: StreamingAudioInput) -> AsyncIterator[bytes]:
+    """Yield PCM s16le 16kHz mono chunks as the incoming frames are decoded."""
+    if audio.encoding == "pcm_s16le":
+        async for chunk in audio:
+            yield chunk
+        return
+
+    loop = asyncio.get_running_loop()
+    pipe = _BlockingPipe()
+    decoded: asyncio.Queue = asyncio.Queue()
+
+    def _emit(pcm: bytes) -> None:
+        loop.call_soon_threadsafe(decoded.put_nowait, pcm)
+
+    def _run_decoder() -> None:
+        try:
+            _decode_webm_stream(pipe, _emit)
+        except Exception as exc:
+            logger.error("Streaming audio decode failed: %s", exc)
+        finally:
+            loop.call_soon_threadsafe(decoded.put_nowait, None)
+
+    async def _pump() -> None:
+        async for chunk in audio:
+            pipe.write(chunk)
+        pipe.close_input()
+
+    decoder = loop.run_in_executor(None, _run_decoder)
+    pump = asyncio.create_task(_pump())
+    try:
+        while True:
+            pcm = await decoded.get()
+            if pcm is None:
+                break
+            yield pcm
+    finally:
+        pump.cancel()
+        pipe.close_input()  # unblock the decoder thread if we stopped early
+        await asyncio.gather(decoder, return_exceptions=True)
+
+
+async def _iter_pcm(pcm_data: bytes, chunk_size: int = 8192) -> AsyncIterator[bytes]:
+    for i in range(0, len(pcm_data), chunk_size):
+        yield pcm_data[i:i + chunk_size]
+
+
+class _CountingStream:
+    """Pass-through async iterator that counts the PCM bytes sent to STT."""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+        self.bytes_read = 0
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._chunks:
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        """Stop the source (releases the webm decoder thread)."""
+        await self._chunks.aclose()
+
+
 class SpeechmaticsService:
     """Speech-to-text service — Speechmatics real-time API, optimized for speed."""
 
+    # Longest utterance we keep listening for before forcing finalization
+    MAX_UTTERANCE_SECONDS = 60
+
     def __init__(self):
         self.mock_mode = MOCK_MODE
+        self._language = "fr"
         if not self.mock_mode:
             self._init_real_client()
 
     def set_language(self, language: str):
-        """Switch STT language — FR only for demo."""
-        pass
+        """Set the default STT language and warm RT sessions for it."""
+        self._language = language or "fr"
+        if not self.mock_mode:
+            try:
+                self._pool.prewarm(self._language)
+            except RuntimeError:
+                pass  # no running loop yet — the first acquire warms it
 
     def _init_real_client(self):
-        """Initialize Speechmatics connection settings for real-time STT."""
-        from speechmatics.models import ConnectionSettings, TranscriptionConfig
+        """Create the warm Speechmatics RT session pool."""
+        from backend.services.speechmatics_rt import RealtimeSessionPool
 
         api_key = os.getenv("SPEECHMATICS_API_KEY", "")
-        self._connection_settings = ConnectionSettings(
-            url="wss://eu2.rt.speechmatics.com/v2",
-            auth_token=api_key,
-        )
-        self._transcription_config = TranscriptionConfig(
-            language="fr",
-            enable_partials=False,
-            max_delay=0.7,
-            operating_point="enhanced",
+        self._pool = RealtimeSessionPool(
+            url=os.getenv("SPEECHMATICS_RT_URL", "wss://eu2.rt.speechmatics.com/v2"),
+            api_key=api_key,
+            min_idle=int(os.getenv("SPEECHMATICS_POOL_SIZE", "1")),
         )
 
-    async def transcribe(self, audio_data: bytes, turn_number: int) -> str:
+    async def transcribe(self, audio_data: bytes, turn_number: int, language: str | None = None) -> str:
         """Transcribe audio data to text."""
         if self.mock_mode:
             return self._mock_transcribe(turn_number)
-        return await self._real_transcribe(audio_data)
+        return await self._real_transcribe(audio_data, language or self._language)
+
+    async def transcribe_stream(
+        self, audio: StreamingAudioInput, turn_number: int, language: str | None = None,
+    ) -> str:
+        """Transcribe audio frames as they arrive, returning once the utterance ends."""
+        if self.mock_mode:
+            async for _ in audio:
+                pass
+            return self._mock_transcribe(turn_number)
+        return await self._real_transcribe_stream(audio, language or self._language)
 
     def _mock_transcribe(self, turn_number: int) -> str:
         """Return pre-scripted transcription for the given turn."""
@@ -78,15 +254,12 @@ class SpeechmaticsService:
             return ""
         return MOCK_CONVERSATION[turn_number]["user_said"]
 
-    async def _real_transcribe(self, audio_data: bytes) -> str:
-        """Transcribe audio using Speechmatics real-time WebSocket API."""
-        from speechmatics.models import ServerMessageType, AudioSettings
-        from speechmatics.client import WebsocketClient
-
+    async def _real_transcribe(self, audio_data: bytes, language: str) -> str:
+        """Transcribe a complete utterance using a warm RT session."""
         t0 = time.perf_counter()
 
         # Convert webm/opus to PCM s16le 16kHz mono
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         try:
             pcm_data = await loop.run_in_executor(
                 None, _convert_webm_to_pcm, audio_data
@@ -101,49 +274,82 @@ class SpeechmaticsService:
             logger.warning("Audio too short (%d bytes PCM), skipping", len(pcm_data))
             return ""
 
-        transcript_parts: list[str] = []
-
-        def on_final_transcript(msg):
-            transcript = msg.get("metadata", {}).get("transcript", "")
-            if not transcript:
-                transcript = msg.get("transcript", "")
-            if transcript:
-                transcript_parts.append(transcript)
-
-        client = WebsocketClient(self._connection_settings)
-        client.add_event_handler(
-            event_name=ServerMessageType.AddTranscript,
-            event_handler=on_final_transcript,
-        )
-
-        audio_stream = io.BytesIO(pcm_data)
-        audio_settings = AudioSettings(
-            encoding="pcm_s16le",
-            sample_rate=16000,
-        )
-
+        stt = health.get("speechmatics")
+        if not stt.allow():
+            logger.error("Speechmatics skipped (circuit open)")
+            return ""
         stt_start = time.perf_counter()
         try:
-            await asyncio.wait_for(
-                loop.run_in_executor(
-                    None,
-                    lambda: client.run_synchronously(
-                        audio_stream,
-                        self._transcription_config,
-                        audio_settings,
-                    ),
-                ),
+            result = await asyncio.wait_for(
+                self._pool.transcribe(language, _iter_pcm(pcm_data)),
                 timeout=10,
             )
         except asyncio.TimeoutError:
             logger.error("Speechmatics timed out (10s)")
+            stt.record_failure("timeout", time.perf_counter() - stt_start)
             return ""
         except Exception as exc:
             logger.error("Speechmatics failed: %s", exc)
+            stt.record_failure(classify_error(exc))
             return ""
 
+        stt.record_success(time.perf_counter() - stt_start)
         stt_ms = int((time.perf_counter() - stt_start) * 1000)
         total_ms = int((time.perf_counter() - t0) * 1000)
-        result = " ".join(transcript_parts).strip()
         logger.info("STT: %dms (conv=%dms, stt=%dms) → '%s'", total_ms, conv_ms, stt_ms, result)
         return result
+
+    async def _real_transcribe_stream(self, audio: StreamingAudioInput, language: str) -> str:
+        """Stream PCM to a warm RT session while the learner is still speaking."""
+        stt = health.get("speechmatics")
+        if not stt.allow():
+            logger.error("Speechmatics skipped (circuit open)")
+            async for _ in audio:
+                pass
+            return ""
+        pcm = _CountingStream(_stream_pcm(audio))
+        run_task = asyncio.create_task(self._pool.transcribe(language, pcm))
+        ended = asyncio.create_task(audio.wait_ended())
+        try:
+            await asyncio.wait(
+                {run_task, ended},
+                timeout=self.MAX_UTTERANCE_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            ended.cancel()
+
+            # The timeout only starts at end-of-utterance: audio was already streamed
+            tail_start = audio.ended_at or time.perf_counter()
+            try:
+                result = await asyncio.wait_for(run_task, timeout=10)
+            except asyncio.TimeoutError:
+                logger.error("Speechmatics streaming timed out (10s after end of utterance)")
+                stt.record_failure("timeout", time.perf_counter() - tail_start)
+                return ""
+            except Exception as exc:
+                logger.error("Speechmatics streaming failed: %s", exc)
+                stt.record_failure(classify_error(exc))
+                return ""
+        finally:
+            # Cancelled turn (audio_cancel, new audio_start, disconnect): don't
+            # leave the RT session open or the decoder thread waiting for input
+            for task in (run_task, ended):
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(run_task, ended, return_exceptions=True)
+            await pcm.aclose()
+
+        # Latency that matters for a streamed turn: end of speech → transcript
+        stt.record_success(time.perf_counter() - tail_start)
+        tail_ms = int((time.perf_counter() - (audio.ended_at or time.perf_counter())) * 1000)
+        logger.info(
+            "STT stream: %dms after end of utterance (%d frames, %d bytes in, %d bytes PCM) → '%s'",
+            tail_ms, audio.frames_received, audio.bytes_received, pcm.bytes_read, result,
+        )
+        return result
+
+    def pool_stats(self) -> dict:
+        """Warm-pool counters (empty in mock mode)."""
+        if self.mock_mode:
+            return {}
+        return dict(self._pool.stats)
@@ -2,7 +2,9 @@
 Supabase persistence layer for multi-profile session storage.
 
 Stores conversation history and mastery scores per profile so data
-persists across backend restarts and page refreshes.
+persists across backend restarts and page refreshes. Sessions use the
+normalized format described in backend.services.session_store: a header
+row, one row per turn and one row per mastery key.
 """
 
 import logging
@@ -11,6 +13,14 @@ from typing import Optional
 
 from supabase import create_client, Client
 
+from backend.config import SESSION_LOAD_TURNS
+from backend.services.session_store import (
+    apply_delta,
+    legacy_delta,
+    mastery_rows,
+    turn_rows,
+)
+
 logger = logging.getLogger(__name__)
 
 _client: Optional[Client] = None
@@ -39,8 +49,14 @@ def create_profile(name: str) -> dict:
     return res.data[0] if res.data else {}
 
 
-def load_session(profile_id: str) -> Optional[dict]:
-    """Load session state for a profile. Returns None if no session exists."""
+def load_session(profile_id: str, tail_turns: int = SESSION_LOAD_TURNS) -> Optional[dict]:
+    """Load session state for a profile. Returns None if no session exists.
+
+    Reads the sessions header, the mastery rows and only the newest
+    tail_turns turns; older turns stay in session_turns and are read on
+    demand with load_turns(), so a load does not grow with session length.
+    A legacy single-row session (format 1) is migrated on first load.
+    """
     res = (
         _get_client()
         .table("sessions")
@@ -48,29 +64,71 @@ def load_session(profile_id: str) -> Optional[dict]:
         .eq("profile_id", profile_id)
         .execute()
     )
-    if res.data:
-        return res.data[0]
-    return None
-
+    if not res.data:
+        return None
+    header = res.data[0]
+    if (header.get("format_version") or 1) < 2:
+        return _migrate_legacy_session(profile_id, header)
+
+    mastery = (
+        _get_client().table("session_mastery").select("key,score").eq("profile_id", profile_id).execute()
+    ).data
+    history = load_turns(profile_id, limit=tail_turns)
+    return {
+        "level": header.get("level", "A1"),
+        "turn": header.get("turn", 1),
+        "mastery_scores": {row["key"]: row["score"] for row in mastery},
+        "conversation_history": history,
+        "earlier_turns": max(0, (header.get("turn_count") or 0) - len(history)),
+    }
 
-def save_session(profile_id: str, conversation_history: list, mastery_scores: dict, level: str, turn: int) -> None:
-    """Upsert session state for a profile."""
-    import json
 
-    payload = {
+def load_turns(profile_id: str, before: int | None = None, limit: int = 50) -> list[dict]:
+    """One page of turns ending just before `before` (newest page when None), oldest first."""
+    query = _get_client().table("session_turns").select("payload").eq("profile_id", profile_id)
+    if before is not None:
+        query = query.lt("turn_number", before)
+    rows = query.order("turn_number", desc=True).limit(limit).execute().data
+    return [row["payload"] for row in reversed(rows)]
+
+
+def save_session_delta(profile_id: str, delta: dict) -> None:
+    """Apply a SessionDelta: new/changed turn rows, changed mastery rows, header.
+
+    Cost is proportional to what changed in the turn, not to session length.
+    """
+    client = _get_client()
+    if delta.get("reset"):
+        client.table("session_turns").delete().eq("profile_id", profile_id).execute()
+        client.table("session_mastery").delete().eq("profile_id", profile_id).execute()
+    turns = turn_rows(profile_id, delta)
+    if turns:
+        client.table("session_turns").upsert(turns, on_conflict="profile_id,turn_number").execute()
+    mastery = mastery_rows(profile_id, delta)
+    if mastery:
+        client.table("session_mastery").upsert(mastery, on_conflict="profile_id,key").execute()
+    header = delta.get("header") or {}
+    client.table("sessions").upsert({
         "profile_id": profile_id,
-        "conversation_history": conversation_history,
-        "mastery_scores": mastery_scores,
-        "level": level,
-        "turn": turn,
+        "level": header.get("level", "A1"),
+        "turn": header.get("turn", 1),
+        "turn_count": header.get("turn_count", 0),
+        "format_version": 2,
         "updated_at": "now()",
-    }
+    }, on_conflict="profile_id").execute()
+
+    logger.info(
+        "Saved session delta for profile %s (turn %s, %d turn rows, %d mastery rows)",
+        profile_id, header.get("turn"), len(turns), len(mastery),
+    )
 
-    # Try update first, then insert
-    existing = load_session(profile_id)
-    if existing:
-        _get_client().table("sessions").update(payload).eq("profile_id", profile_id).execute()
-    else:
-        _get_client().table("sessions").insert(payload).execute()
 
-    logger.info("Saved session for profile %s (turn %d, %d history entries)", profile_id, turn, len(conversation_history))
+def _migrate_legacy_session(profile_id: str, row: dict) -> dict:
+    """Move a format-1 row's history and mastery into the normalized tables."""
+    delta = legacy_delta(row)
+    save_session_delta(profile_id, delta)
+    _get_client().table("sessions").update(
+        {"conversation_history": [], "mastery_scores": {}}
+    ).eq("profile_id", profile_id).execute()
+    logger.info("Migrated legacy session for profile %s (%d turns)", profile_id, len(delta["turns"]))
+    return apply_delta(None, delta)
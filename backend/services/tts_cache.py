@@ -0,0 +1,249 @@
+"""
+Content-addressed cache of synthesized speech (MP3 bytes).
+
+Many tutor lines recur verbatim — language greetings, the fallback reply,
+rule-based fallback lines, short sentence segments — and each one used to
+cost a fresh Edge / OpenAI round trip. TTSCache keys audio by
+sha256(provider, voice, rate, normalized text):
+
+- memory tier: LRU bounded by total bytes (raw MP3, not base64)
+- disk tier (optional, TTS_CACHE_DIR): one <key>.<synth ms>.mp3 file per
+  entry, written atomically, LRU-bounded by total bytes (evicted before
+  the write, under one lock for all puts); the directory is
+  indexed once at startup so lookups never touch the filesystem on a miss
+- single flight: concurrent requests for the same text share one
+  synthesis; followers read the leader's chunks as they arrive
+- stats: hits per tier, misses, coalesced requests and the synthesis time
+  they saved (the original synthesis duration, once per hit or follower)
+
+Texts longer than `max_chars` are not cached (unique long replies would
+only churn the LRU).
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_tts_text(text: str) -> str:
+    """Whitespace/Unicode-normalized text — case and punctuation change the speech, so they stay."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class _Flight:
+    """One in-progress synthesis; followers replay its chunks as they arrive."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.done = False
+        self.ok = False
+        self.provider: str | None = None
+        self.followers = 0
+        self._changed = asyncio.Event()
+
+    def push(self, chunk: bytes) -> None:
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, ok: bool, provider: str | None = None) -> None:
+        self.done, self.ok, self.provider = True, ok, provider
+        self._notify()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def follow(self):
+        """Chunks so far, then each new one until the leader finishes."""
+        seen = 0
+        while True:
+            while seen < len(self.chunks):
+                seen += 1
+                yield self.chunks[seen - 1]
+            if self.done:
+                return
+            await self._changed.wait()
+
+
+class TTSCache:
+    """Two-tier (memory LRU + disk) MP3 cache with single-flight synthesis."""
+
+    def __init__(
+        self,
+        memory_bytes: int = 32 * 1024 * 1024,
+        disk_dir: str | Path | None = None,
+        disk_bytes: int = 512 * 1024 * 1024,
+        max_chars: int = 400,
+    ):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.max_chars = max_chars
+        # key → (audio, synth ms), LRU order
+        self._memory: OrderedDict[str, tuple[bytes, int]] = OrderedDict()
+        self._memory_used = 0
+        # key → (size, synth ms), LRU order
+        self._disk: OrderedDict[str, tuple[int, int]] = OrderedDict()
+        self._disk_used = 0
+        self._disk_lock = asyncio.Lock()
+        self._dir = Path(disk_dir) if disk_dir else None
+        self._flights: dict[str, _Flight] = {}
+        self.stats = {"requests": 0, "memory_hits": 0, "disk_hits": 0, "coalesced": 0, "misses": 0, "saved_ms": 0}
+        if self._dir is not None:
+            self._index_disk()
+
+    def key(self, provider: str, voice: str, rate: str, text: str) -> str | None:
+        """Cache key, or None when the text is not worth caching."""
+        norm = normalize_tts_text(text)
+        if not norm or len(norm) > self.max_chars:
+            return None
+        return hashlib.sha256(f"{provider}\0{voice}\0{rate}\0{norm}".encode()).hexdigest()
+
+    # ── Lookup / store ───────────────────────────────────────────────
+
+    async def lookup(self, keys: list[str]) -> tuple[str, bytes] | None:
+        """First cached entry among `keys` (preference order); counts one request."""
+        self.stats["requests"] += 1
+        for key in keys:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._hit("memory_hits", entry[1])
+                return key, entry[0]
+        for key in keys:
+            meta = self._disk.get(key)
+            if meta is None:
+                continue
+            try:
+                audio = await asyncio.to_thread(self._path(key, meta[1]).read_bytes)
+            except OSError as exc:
+                logger.warning("TTS cache file unreadable, dropping %s: %s", key[:12], exc)
+                self._drop_disk(key)
+                continue
+            self._disk.move_to_end(key)
+            self._remember(key, audio, meta[1])
+            self._hit("disk_hits", meta[1])
+            return key, audio
+        return None
+
+    def _hit(self, tier: str, synth_ms: int) -> None:
+        self.stats[tier] += 1
+        self.stats["saved_ms"] += synth_ms
+
+    def miss(self) -> None:
+        self.stats["misses"] += 1
+
+    async def put(self, key: str, audio: bytes, synth_ms: int) -> None:
+        if not audio:
+            return
+        self._remember(key, audio, synth_ms)
+        if self._dir is None or len(audio) > self.disk_bytes:
+            return
+        # Check, evict, write and count as one step: concurrent puts would
+        # otherwise all pass the check and overrun the budget (or count a key twice)
+        async with self._disk_lock:
+            if key in self._disk:
+                return
+            while self._disk and self._disk_used + len(audio) > self.disk_bytes:
+                self._drop_disk(next(iter(self._disk)))
+            try:
+                await asyncio.to_thread(self._write, key, audio, synth_ms)
+            except OSError as exc:
+                logger.warning("TTS cache write failed: %s", exc)
+                return
+            self._disk[key] = (len(audio), synth_ms)
+            self._disk_used += len(audio)
+
+    def _remember(self, key: str, audio: bytes, synth_ms: int) -> None:
+        if len(audio) > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_used -= len(old[0])
+        self._memory[key] = (audio, synth_ms)
+        self._memory_used += len(audio)
+        while self._memory_used > self.memory_bytes:
+            _, (evicted, _) = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    # ── Disk tier ────────────────────────────────────────────────────
+
+    def _path(self, key: str, synth_ms: int) -> Path:
+        return self._dir / key[:2] / f"{key}.{synth_ms}.mp3"
+
+    def _write(self, key: str, audio: bytes, synth_ms: int) -> None:
+        path = self._path(key, synth_ms)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _drop_disk(self, key: str) -> None:
+        size, synth_ms = self._disk.pop(key)
+        self._disk_used -= size
+        try:
+            self._path(key, synth_ms).unlink(missing_ok=True)
+        except OSError as exc:
+            logger.warning("TTS cache eviction failed: %s", exc)
+
+    def _index_disk(self) -> None:
+        """Index existing files, least recently modified first."""
+        files = []
+        for path in self._dir.glob("*/*.mp3"):
+            key, _, ms = path.name[:-len(".mp3")].partition(".")
+            try:
+                stat = path.stat()
+                files.append((stat.st_mtime, key, stat.st_size, int(ms)))
+            except (OSError, ValueError):
+                continue
+        for _, key, size, synth_ms in sorted(files):
+            self._disk[key] = (size, synth_ms)
+            self._disk_used += size
+        while self._disk_used > self.disk_bytes:
+            self._drop_disk(next(iter(self._disk)))
+        if files:
+            logger.info("TTS cache: %d files (%d KB) on disk", len(self._disk), self._disk_used // 1024)
+
+    # ── Single flight ────────────────────────────────────────────────
+
+    def join(self, flight_key: str) -> tuple[_Flight, bool]:
+        """The flight for this text and whether the caller leads it."""
+        flight = self._flights.get(flight_key)
+        if flight is not None:
+            flight.followers += 1
+            self.stats["coalesced"] += 1
+            return flight, False
+        flight = self._flights[flight_key] = _Flight()
+        return flight, True
+
+    def land(self, flight_key: str, flight: _Flight, ok: bool, provider: str | None = None, synth_ms: int = 0) -> None:
+        """End a flight; each follower of a successful one saved a synthesis."""
+        if ok:
+            self.stats["saved_ms"] += synth_ms * flight.followers
+        flight.finish(ok, provider)
+        if self._flights.get(flight_key) is flight:
+            del self._flights[flight_key]
+
+    def snapshot(self) -> dict:
+        stats = dict(self.stats)
+        served = stats["memory_hits"] + stats["disk_hits"] + stats["coalesced"]
+        stats["hit_rate"] = round(served / stats["requests"], 4) if stats["requests"] else 0.0
+        stats.update(
+            memory_entries=len(self._memory),
+            memory_bytes=self._memory_used,
+            disk_entries=len(self._disk),
+            disk_bytes=self._disk_used,
+            in_flight=len(self._flights),
+        )
+        return stats
@@ -0,0 +1,320 @@
+"""
+Sentence-level TTS pipelining for streamed tutor replies.
+
+While spoken_response is still streaming, SentenceSplitter cuts the text
+at each confirmed sentence terminator and SpeechPipeline starts TTS for
+that sentence right away. Later sentences are synthesized behind it
+(bounded parallelism) and every segment is sent to the client in order:
+
+    {"type": "tts_segment", "turn": n, "seq": i, "tts": {...}}
+    ...
+    {"type": "tts_done", "turn": n, "segments": k}
+
+Perceived latency becomes first-sentence synthesis time instead of
+full-reply time. If the provider falls back mid-turn and the final text
+does not continue what was already streamed, or a hedged provider's
+spoken_response is taken back (reset()), unsent segments are dropped and
+{"type": "tts_reset", "turn": n} tells the client to discard queued
+audio before the replacement segments arrive.
+
+Streamed audio (clients with tts=stream) skips the base64 payload: the
+MP3 chunks of one text are sent as binary frames as the provider yields
+them, between two JSON markers:
+
+    {"type": "tts_stream_start", "stream_id": s, "turn": n, "content_type": ..., "text": ...}
+    <binary: 4-byte stream id | 4-byte chunk seq (big-endian) | MP3 bytes>
+    {"type": "tts_stream_end", "stream_id": s, "chunks": k, "bytes": b}
+
+The end marker carries "fallback" (browser payload) when no audio was
+produced, and "aborted" when a reset cut the stream short.
+"""
+
+import asyncio
+import itertools
+import logging
+import re
+import struct
+import time
+from typing import AsyncIterator, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# Terminator run, optional closing quotes/brackets, then whitespace that
+# confirms the sentence really ended (a bare "." may still be "3.5").
+_BOUNDARY = re.compile(r"[.!?…]+[\"»”'’)\]]*\s+|\n+")
+_ABBREVIATIONS = frozenset({
+    "m", "mm", "mme", "mmes", "mlle", "dr", "sr", "sra", "srta", "hr", "fr", "nr", "st", "ste",
+    "mr", "mrs", "ms", "etc", "z.b", "p.ex", "ex",
+})
+_LAST_WORD = re.compile(r"([\w.]+)[.]+$")
+
+
+class SentenceSplitter:
+    """Cuts streamed text into sentences as soon as each boundary is confirmed."""
+
+    def __init__(self, min_chars: int = 12):
+        self.min_chars = min_chars
+        self._buf = ""
+
+    def feed(self, delta: str) -> list[str]:
+        """Add text; return the sentences it completed."""
+        self._buf += delta
+        sentences: list[str] = []
+        start = 0
+        for m in _BOUNDARY.finditer(self._buf):
+            candidate = self._buf[start:m.end()].strip()
+            if len(candidate) < self.min_chars or self._is_abbreviation(self._buf[start:m.start() + 1]):
+                continue
+            sentences.append(candidate)
+            start = m.end()
+        self._buf = self._buf[start:]
+        return sentences
+
+    def flush(self) -> list[str]:
+        """Return whatever is left as a final sentence."""
+        rest, self._buf = self._buf.strip(), ""
+        return [rest] if rest else []
+
+    @staticmethod
+    def _is_abbreviation(text: str) -> bool:
+        if not text.endswith("."):
+            return False
+        m = _LAST_WORD.search(text)
+        if not m:
+            return False
+        word = m.group(1).lower()
+        # "M." / "J." initials, or a known title/abbreviation
+        return word in _ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+
+SendFn = Callable[[dict], Awaitable[None]]
+SendBytesFn = Callable[[bytes], Awaitable[None]]
+
+_FRAME_HEADER = struct.Struct(">II")
+_stream_ids = itertools.count(1)
+
+
+def encode_audio_frame(stream_id: int, seq: int, payload: bytes) -> bytes:
+    """Binary TTS frame: stream id + chunk seq header, then the MP3 bytes."""
+    return _FRAME_HEADER.pack(stream_id, seq) + payload
+
+
+def decode_audio_frame(frame: bytes) -> tuple[int, int, bytes]:
+    stream_id, seq = _FRAME_HEADER.unpack_from(frame)
+    return stream_id, seq, frame[_FRAME_HEADER.size:]
+
+
+class AudioStreamSender:
+    """Forwards the MP3 chunks of one text as binary frames between JSON markers."""
+
+    def __init__(self, send: SendFn, send_bytes: SendBytesFn):
+        self._send = send
+        self._send_bytes = send_bytes
+
+    async def send(
+        self,
+        chunks: AsyncIterator[bytes],
+        text: str,
+        turn: int,
+        segment: int | None = None,
+        keep_going: Callable[[], bool] = lambda: True,
+    ) -> int:
+        """Stream one text; returns the number of audio bytes sent."""
+        stream_id = next(_stream_ids) & 0xFFFFFFFF
+        start = {"type": "tts_stream_start", "stream_id": stream_id, "turn": turn,
+                 "content_type": "audio/mpeg", "text": text}
+        if segment is not None:
+            start["seq"] = segment
+        await self._send(start)
+        count = total = 0
+        aborted = False
+        async for chunk in chunks:
+            if not keep_going():
+                aborted = True
+                break
+            await self._send_bytes(encode_audio_frame(stream_id, count, chunk))
+            count += 1
+            total += len(chunk)
+        end = {"type": "tts_stream_end", "stream_id": stream_id, "turn": turn, "chunks": count, "bytes": total}
+        if aborted:
+            end["aborted"] = True
+        elif not count:
+            end["fallback"] = {"mode": "browser", "text": text}
+        await self._send(end)
+        return total
+
+
+async def _drain(queue: asyncio.Queue) -> AsyncIterator[bytes]:
+    while (chunk := await queue.get()) is not None:
+        yield chunk
+
+
+class SpeechPipeline:
+    """Synthesizes reply sentences ahead of time and sends them in order.
+
+    With send_bytes, each segment is streamed as binary frames (see
+    AudioStreamSender) instead of one tts_segment payload.
+    """
+
+    def __init__(
+        self,
+        tts_service,
+        send: SendFn,
+        turn: int,
+        max_parallel: int = 2,
+        min_chars: int = 12,
+        send_bytes: SendBytesFn | None = None,
+    ):
+        self._tts = tts_service
+        self._send = send
+        self._streamer = AudioStreamSender(send, send_bytes) if send_bytes else None
+        self.turn = turn
+        self._splitter = SentenceSplitter(min_chars=min_chars)
+        self._slots = asyncio.Semaphore(max(1, max_parallel))
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pending: list[asyncio.Task] = []
+        self._streamed = ""
+        self._finished = False
+        self._seq = 0
+        # Bumped on reset; queued segments from an older generation are skipped
+        self._generation = 0
+        self.sent = 0
+        self.first_segment_ms: int | None = None
+        self._t0 = time.perf_counter()
+        self._pump = asyncio.create_task(self._run())
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def feed(self, delta: str) -> None:
+        """Streamed spoken_response text; queues TTS for each completed sentence."""
+        if self._finished or not delta:
+            return
+        self._streamed += delta
+        for sentence in self._splitter.feed(delta):
+            self._enqueue(sentence)
+
+    def finish(self, full_text: str) -> None:
+        """Final spoken_response — queue the remainder and close the pipeline."""
+        if self._finished:
+            return
+        self._finished = True
+        full_text = full_text or ""
+        if full_text.startswith(self._streamed):
+            for sentence in self._splitter.feed(full_text[len(self._streamed):]):
+                self._enqueue(sentence)
+        else:
+            # Provider fell back mid-turn: what was streamed is not the reply
+            logger.info("Spoken text changed after streaming — restarting TTS segments")
+            self._restart()
+            for sentence in self._splitter.feed(full_text):
+                self._enqueue(sentence)
+        for sentence in self._splitter.flush():
+            self._enqueue(sentence)
+        self._queue.put_nowait(("done", None, None, self._generation))
+
+    def reset(self) -> None:
+        """The spoken_response passed to finish()/feed() was taken back — drop
+        its audio and reopen the pipeline for the replacement text."""
+        logger.info("Spoken text retracted — restarting TTS segments")
+        self._restart()
+        self._finished = False
+        if self._pump.done():
+            # tts_done already went out for the retracted text
+            self._pump = asyncio.create_task(self._run())
+
+    async def wait(self) -> int:
+        """Wait until every segment (and tts_done) was sent; returns the count."""
+        await self._pump
+        return self.sent
+
+    def cancel(self) -> None:
+        self._cancel_pending()
+        self._pump.cancel()
+
+    # ── Internals ─────────────────────────────────────────────────────
+
+    def _restart(self) -> None:
+        self._cancel_pending()
+        self._generation += 1
+        self._queue.put_nowait(("reset", None, None, self._generation))
+        self._splitter = SentenceSplitter(min_chars=self._splitter.min_chars)
+        self._streamed = ""
+
+    def _cancel_pending(self) -> None:
+        for task, chunks in self._pending:
+            task.cancel()
+            if chunks is not None:
+                # A task cancelled before it started never reaches its finally
+                chunks.put_nowait(None)
+        self._pending = []
+
+    def _enqueue(self, sentence: str) -> None:
+        if self._streamer is not None:
+            chunks: asyncio.Queue | None = asyncio.Queue()
+            task = asyncio.create_task(self._produce(sentence, chunks))
+        else:
+            chunks = None
+            task = asyncio.create_task(self._synthesize(sentence))
+        self._pending.append((task, chunks))
+        self._queue.put_nowait(("segment", self._seq, (task, chunks, sentence), self._generation))
+        self._seq += 1
+
+    async def _produce(self, sentence: str, chunks: asyncio.Queue) -> None:
+        try:
+            async with self._slots:
+                async for chunk in self._tts.stream(sentence):
+                    chunks.put_nowait(chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Segment TTS stream failed: %s", exc)
+        finally:
+            chunks.put_nowait(None)
+
+    async def _synthesize(self, sentence: str) -> dict:
+        async with self._slots:
+            try:
+                return await self._tts.synthesize(sentence)
+            except Exception as exc:
+                logger.warning("Segment TTS failed, browser fallback: %s", exc)
+                return {"mode": "browser", "text": sentence}
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                kind, seq, item, generation = await self._queue.get()
+                if kind == "done":
+                    if generation != self._generation:
+                        continue  # Closed a retracted text — the replacement follows
+                    await self._send({"type": "tts_done", "turn": self.turn, "segments": self.sent})
+                    return
+                if kind == "reset":
+                    if self.sent:
+                        await self._send({"type": "tts_reset", "turn": self.turn})
+                    continue
+                if generation != self._generation:
+                    continue
+                task, chunks, sentence = item
+                if chunks is not None:
+                    if self.first_segment_ms is None:
+                        self.first_segment_ms = int((time.perf_counter() - self._t0) * 1000)
+                    await self._streamer.send(
+                        _drain(chunks), sentence, self.turn, segment=seq,
+                        keep_going=lambda g=generation: g == self._generation,
+                    )
+                    self.sent += 1
+                    continue
+                # wait() neither raises for nor propagates cancellation of the segment
+                await asyncio.wait([task])
+                if task.cancelled() or generation != self._generation:
+                    continue
+                result = task.result()
+                if self.first_segment_ms is None:
+                    self.first_segment_ms = int((time.perf_counter() - self._t0) * 1000)
+                await self._send({"type": "tts_segment", "turn": self.turn, "seq": seq, "tts": result})
+                self.sent += 1
+        except Exception as exc:
+            logger.error("TTS segment send failed (non-fatal): %s", exc)
+            self._cancel_pending()
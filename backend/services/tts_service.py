@@ -1,10 +1,21 @@
 """
 Text-to-Speech Service — Edge TTS first (fast, free, neural), OpenAI fallback.
 
-Priority:
+Providers:
 1. Edge TTS (Microsoft) — free, all languages, neural quality, ~150ms
 2. OpenAI TTS (nova) — rate-limited but high quality
 3. Browser SpeechSynthesis — last resort
+
+Edge and OpenAI are tried in order of recent p95 latency; a provider whose
+circuit breaker is open (see provider_health) is skipped.
+
+synthesize() returns one JSON-ready payload (base64 MP3) for legacy
+clients; stream() yields raw MP3 chunks as the provider produces them so
+the WebSocket can forward them as binary frames without base64.
+
+Both go through a TTSCache (see tts_cache): recurring lines — greetings,
+the fallback reply — are served from memory or disk without a provider
+round trip, and identical concurrent requests share one synthesis.
 """
 
 import asyncio
@@ -12,21 +23,36 @@ import base64
 import logging
 import os
 import time
+from typing import AsyncIterator
 
-from backend.config import MOCK_MODE
+from backend.config import MOCK_MODE, TTS_CACHE_DIR, TTS_CACHE_DISK_MB, TTS_CACHE_MAX_CHARS, TTS_CACHE_MEMORY_MB
+from backend.services.provider_health import classify_error, health
+from backend.services.tts_cache import TTSCache, normalize_tts_text
 
 logger = logging.getLogger(__name__)
 
 # Edge TTS neural voice for French
 _EDGE_VOICE = "fr-FR-DeniseNeural"
 
+# (voice, rate) per provider — part of the audio cache key
+_VOICES = {"edge_tts": (_EDGE_VOICE, "+15%"), "openai_tts": ("nova", "1.15")}
+_CONTENT_TYPES = {"edge_tts": "audio/mpeg", "openai_tts": "audio/mp3"}
+
+# Default preference order, used until both providers have latency samples
+_PROVIDERS = ["edge_tts", "openai_tts"]
+
 
 class TTSService:
     """TTS: Edge TTS → OpenAI → browser."""
 
-    def __init__(self):
+    def __init__(self, cache: TTSCache | None = None):
         self.mock_mode = MOCK_MODE
-        self._openai_cooldown_until = 0.0
+        self.cache = cache or TTSCache(
+            memory_bytes=int(TTS_CACHE_MEMORY_MB * 1024 * 1024),
+            disk_dir=TTS_CACHE_DIR or None,
+            disk_bytes=int(TTS_CACHE_DISK_MB * 1024 * 1024),
+            max_chars=TTS_CACHE_MAX_CHARS,
+        )
         if not self.mock_mode:
             self._init_openai_client()
 
@@ -48,76 +74,219 @@ class TTSService:
         return await self._real_synthesize(text)
 
     async def _real_synthesize(self, text: str) -> dict:
-        # ── 1. Edge TTS (fast, free, neural French) ──────────────────
-        result = await self._edge_synthesize(text)
+        # ── Cache, then Edge / OpenAI, fastest healthy provider first ─
+        providers, keys = self._cache_keys(text)
+        hit = await self.cache.lookup(list(keys.values())) if keys else None
+        if hit:
+            provider = next(p for p, key in keys.items() if key == hit[0])
+            return self._payload(provider, hit[1], text)
+        result = await self._synthesize_shared(text, providers, keys)
         if result:
-            return result
-
-        # ── 2. OpenAI TTS (fallback) ─────────────────────────────────
-        if time.perf_counter() >= self._openai_cooldown_until:
-            result = await self._openai_synthesize(text)
-            if result:
-                return result
+            return self._payload(*result, text)
 
-        # ── 3. Browser fallback ──────────────────────────────────────
+        # ── Browser fallback ─────────────────────────────────────────
         logger.warning("All TTS providers failed → browser fallback")
         return {"mode": "browser", "text": text}
 
-    async def _edge_synthesize(self, text: str) -> dict | None:
-        """Microsoft Edge TTS — free, neural, ~150ms."""
+    async def _synthesize_shared(self, text: str, providers: list[str], keys: dict[str, str]) -> tuple[str, bytes] | None:
+        """Complete audio, joining an identical in-flight synthesis if there is one."""
+        if not keys:
+            return await self._synthesize_providers(text, providers)
+        flight_key = normalize_tts_text(text)
+        flight, leader = self.cache.join(flight_key)
+        if not leader:
+            audio = b"".join([chunk async for chunk in flight.follow()])
+            if flight.ok:
+                return flight.provider, audio
+            return await self._synthesize_providers(text, providers)
+        self.cache.miss()
+        t0 = time.perf_counter()
+        result = None
+        try:
+            result = await self._synthesize_providers(text, providers)
+            if result:
+                flight.push(result[1])
+        finally:
+            synth_ms = int((time.perf_counter() - t0) * 1000)
+            self.cache.land(flight_key, flight, result is not None, result[0] if result else None, synth_ms)
+        if result:
+            await self.cache.put(keys[result[0]], result[1], synth_ms)
+        return result
+
+    async def _synthesize_providers(self, text: str, providers: list[str]) -> tuple[str, bytes] | None:
+        for provider in providers:
+            if provider == "edge_tts":
+                audio_bytes = await self._edge_synthesize(text)
+            else:
+                audio_bytes = await self._openai_audio(text)
+            if audio_bytes:
+                return provider, audio_bytes
+        return None
+
+    async def stream(self, text: str) -> AsyncIterator[bytes]:
+        """Yield MP3 chunks as they are synthesized.
+
+        Moves on to the next provider only if one fails before its first
+        chunk. Yields nothing in mock mode or when every provider fails —
+        the caller then sends the browser fallback payload. Cached audio
+        comes back as a single chunk; only complete audio is cached.
+        """
+        if self.mock_mode or not text:
+            return
+        providers, keys = self._cache_keys(text)
+        if not keys:
+            async for chunk in self._stream_providers(text, providers, {}):
+                yield chunk
+            return
+        hit = await self.cache.lookup(list(keys.values()))
+        if hit:
+            yield hit[1]
+            return
+
+        flight_key = normalize_tts_text(text)
+        flight, leader = self.cache.join(flight_key)
+        if not leader:
+            relayed = False
+            async for chunk in flight.follow():
+                relayed = True
+                yield chunk
+            if not relayed:  # Leader gave up before any audio: try on our own
+                async for chunk in self._stream_providers(text, providers, {}):
+                    yield chunk
+            return
+
+        self.cache.miss()
+        t0 = time.perf_counter()
+        outcome: dict = {}
+        try:
+            async for chunk in self._stream_providers(text, providers, outcome):
+                flight.push(chunk)
+                yield chunk
+        finally:
+            synth_ms = int((time.perf_counter() - t0) * 1000)
+            self.cache.land(flight_key, flight, "provider" in outcome, outcome.get("provider"), synth_ms)
+        if "provider" in outcome:
+            await self.cache.put(keys[outcome["provider"]], b"".join(flight.chunks), synth_ms)
+
+    async def _stream_providers(self, text: str, providers: list[str], outcome: dict) -> AsyncIterator[bytes]:
+        """Provider chunks; sets outcome["provider"] once a provider delivered complete audio."""
+        for provider in providers:
+            if provider == "openai_tts":
+                audio_bytes = await self._openai_audio(text)
+                if audio_bytes:
+                    outcome["provider"] = provider
+                    yield audio_bytes
+                    return
+                continue
+            total = 0
+            async for chunk in self._edge_stream_tracked(text, outcome):
+                total += len(chunk)
+                yield chunk
+            if total:
+                return
+
+    def _cache_keys(self, text: str) -> tuple[list[str], dict[str, str]]:
+        """Providers in preference order and their cache keys ({} = not cacheable)."""
+        providers = health.rank(_PROVIDERS)
+        keys = {provider: self.cache.key(provider, *_VOICES[provider], text) for provider in providers}
+        if None in keys.values():
+            return providers, {}
+        return providers, keys
+
+    @staticmethod
+    def _payload(provider: str, audio_bytes: bytes, text: str) -> dict:
+        return {
+            "mode": "audio",
+            "audio_base64": base64.b64encode(audio_bytes).decode("utf-8"),
+            "content_type": _CONTENT_TYPES[provider],
+            "text": text,
+        }
+
+    async def _edge_stream_tracked(self, text: str, outcome: dict | None = None) -> AsyncIterator[bytes]:
+        """Edge chunks with breaker bookkeeping; stops quietly on failure."""
+        edge = health.get("edge_tts")
+        if not edge.allow():
+            return
         t0 = time.perf_counter()
+        first_chunk_ms = None
+        total = 0
         try:
-            import edge_tts
-            communicate = edge_tts.Communicate(text, _EDGE_VOICE, rate="+15%")
-            audio_chunks: list[bytes] = []
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    audio_chunks.append(chunk["data"])
+            async for chunk in self._edge_stream(text):
+                if first_chunk_ms is None:
+                    first_chunk_ms = int((time.perf_counter() - t0) * 1000)
+                total += len(chunk)
+                yield chunk
+        except Exception as exc:
+            edge.record_failure(classify_error(exc))
+            if total:
+                logger.warning("Edge TTS stream broke after %d bytes: %s", total, exc)
+            else:
+                logger.warning("Edge TTS stream failed: %s", exc)
+            return
+        if not total:
+            edge.record_failure("error")
+            return
+        edge.record_success(time.perf_counter() - t0)
+        if outcome is not None:
+            outcome["provider"] = "edge_tts"
+        logger.info("Edge TTS stream: first chunk %dms, %d chars → %d bytes", first_chunk_ms, len(text), total)
+
+    async def _edge_stream(self, text: str) -> AsyncIterator[bytes]:
+        import edge_tts
+        voice, rate = _VOICES["edge_tts"]
+        communicate = edge_tts.Communicate(text, voice, rate=rate)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio" and chunk["data"]:
+                yield chunk["data"]
+
+    async def _edge_synthesize(self, text: str) -> bytes | None:
+        """Microsoft Edge TTS — free, neural, ~150ms. Raw MP3 bytes, or None on failure."""
+        edge = health.get("edge_tts")
+        if not edge.allow():
+            return None
+        t0 = time.perf_counter()
+        try:
+            audio_chunks = [chunk async for chunk in self._edge_stream(text)]
             audio_bytes = b"".join(audio_chunks)
             if not audio_bytes:
+                edge.record_failure("error")
                 return None
-            audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
+            edge.record_success(time.perf_counter() - t0)
             tts_ms = int((time.perf_counter() - t0) * 1000)
             logger.info("Edge TTS: %dms, %d chars → %d bytes", tts_ms, len(text), len(audio_bytes))
-            return {
-                "mode": "audio",
-                "audio_base64": audio_base64,
-                "content_type": "audio/mpeg",
-                "text": text,
-            }
+            return audio_bytes
         except Exception as exc:
             logger.warning("Edge TTS failed: %s", exc)
+            edge.record_failure(classify_error(exc))
             return None
 
-    async def _openai_synthesize(self, text: str) -> dict | None:
-        """OpenAI TTS (nova) — fallback."""
+    async def _openai_audio(self, text: str) -> bytes | None:
+        """OpenAI TTS (nova) raw MP3 bytes, or None on failure."""
+        openai_tts = health.get("openai_tts")
+        if not openai_tts.allow():
+            return None
         t0 = time.perf_counter()
         try:
             response = await asyncio.wait_for(
                 self._client.audio.speech.create(
                     model="tts-1",
-                    voice="nova",
+                    voice=_VOICES["openai_tts"][0],
                     input=text,
                     response_format="mp3",
-                    speed=1.15,
+                    speed=float(_VOICES["openai_tts"][1]),
                 ),
                 timeout=6,
             )
             audio_bytes = response.content
-            audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
+            openai_tts.record_success(time.perf_counter() - t0)
             tts_ms = int((time.perf_counter() - t0) * 1000)
             logger.info("OpenAI TTS: %dms, %d chars → %d bytes", tts_ms, len(text), len(audio_bytes))
-            return {
-                "mode": "audio",
-                "audio_base64": audio_base64,
-                "content_type": "audio/mp3",
-                "text": text,
-            }
+            return audio_bytes
         except asyncio.TimeoutError:
             logger.warning("OpenAI TTS timed out (6s)")
+            openai_tts.record_failure("timeout", time.perf_counter() - t0)
             return None
         except Exception as exc:
             logger.warning("OpenAI TTS failed: %s", exc)
-            if "429" in str(exc) or "rate_limit" in str(exc).lower():
-                self._openai_cooldown_until = time.perf_counter() + 120
+            openai_tts.record_failure(classify_error(exc))
             return None
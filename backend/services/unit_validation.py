@@ -0,0 +1,367 @@
+"""
+Pedagogical validation of the units a learner produced in one turn.
+
+Decides which candidate units (the tutor's user_vocabulary, grammar
+patterns found in the corrected text) enter the Knowledge Graph, with a
+confidence, a mission relevance and — for the others — a reject reason.
+The checks used to re-tokenize the same strings many times per unit and
+scan every selected unit for coverage; this engine does it in one pass:
+
+- every string (unit, source, corrected text, mission hint) is tokenized
+  once per call; tokens are interned to small ints and compared as
+  frozensets
+- "covered by an accepted unit" checks AND per-token bitmasks of the
+  selected units — O(tokens) instead of a scan of every selected set
+- candidates and results are __slots__ UnitRecords, rejected in place
+  instead of copied into new dicts
+
+validate_units() keeps the dict output the conversation route stores in
+TutorResponse.validated_user_units.
+"""
+
+import re
+from functools import lru_cache
+
+from backend.services.grammar_patterns import get_matcher
+
+_WORD_RE = re.compile(r"\w+")
+_KIND_RANK = {"pattern": 4, "sentence": 3, "chunk": 2, "word": 1}
+
+# Common stop words across supported languages — used to filter out
+# function words from fallback vocabulary extraction. This is a best-effort
+# set covering the most frequent function words; the AI's user_vocabulary
+# field is the primary source of vocabulary units.
+STOP_WORDS = frozenset({
+    # Filler / interjections (universal)
+    "euh", "um", "uh", "ah", "oh", "hm", "hmm", "ben", "bah", "hein",
+    # English (interface language)
+    "i", "me", "my", "you", "your", "he", "she", "it", "we", "they",
+    "the", "a", "an", "is", "am", "are", "was", "were", "be", "been",
+    "do", "does", "did", "have", "has", "had", "and", "or", "but", "not",
+    "yes", "no", "so", "if", "in", "on", "at", "to", "of", "for",
+    # French
+    "je", "tu", "il", "elle", "on", "nous", "vous", "ils", "elles",
+    "le", "la", "les", "un", "une", "des", "du", "de", "d",
+    "à", "au", "aux", "en", "et", "ou", "mais", "donc", "car",
+    "que", "qui", "ne", "pas", "est", "ont", "sont", "c",
+    "ce", "se", "y", "l", "s", "n", "oui", "non", "très",
+    "suis", "es", "sommes", "avons", "avez", "fait", "ca", "ça",
+    # Spanish
+    "yo", "tú", "él", "ella", "usted", "nosotros", "ellos", "ellas",
+    "el", "lo", "las", "los", "es", "son", "sí",
+    "que", "de", "en", "y", "no", "por", "con", "para",
+    # German
+    "ich", "du", "er", "sie", "wir", "ihr", "das", "der", "die",
+    "ist", "bin", "sind", "und", "oder", "aber", "nicht", "ja", "nein",
+    "ein", "eine", "den", "dem", "des",
+    # Italian
+    "io", "lui", "lei", "noi", "voi", "loro",
+    "è", "sono", "di", "che", "con", "per", "sì",
+    # Portuguese
+    "eu", "ele", "ela", "nós", "eles", "elas",
+    "é", "são", "sim", "não", "com", "para",
+    # Chinese / Japanese / Korean — single-char particles
+    "的", "了", "是", "在", "我", "你", "他", "她",
+    "は", "が", "を", "に", "で", "の", "と",
+    "은", "는", "이", "가", "을", "를",
+})
+
+
+def extract_user_vocabulary(user_text: str) -> list[str]:
+    """Extract meaningful words/phrases from user's spoken text (any language).
+
+    Used as a fallback when OpenAI doesn't return user_vocabulary.
+    Works with Latin scripts (incl. contractions), CJK, Cyrillic, Arabic, Devanagari.
+    """
+    text = user_text.strip()
+    if not text:
+        return []
+
+    # Match word tokens: Latin (with accents + contractions), CJK characters,
+    # Cyrillic, Arabic, Devanagari, Hangul
+    tokens = re.findall(
+        r"[a-zA-ZàâäéèêëïîôùûüÿçœæÀÂÄÉÈÊËÏÎÔÙÛÜŸÇŒÆáíóúñÁÍÓÚÑößÖÜÄ]+"
+        r"(?:'[a-zA-ZàâäéèêëïîôùûüÿçœæÀÂÄÉÈÊËÏÎÔÙÛÜŸÇŒÆáíóúñÁÍÓÚÑößÖÜÄ]+)?"
+        r"|[\u4e00-\u9fff\u3400-\u4dbf]+"   # CJK
+        r"|[\u3040-\u309f\u30a0-\u30ff]+"    # Hiragana + Katakana
+        r"|[\uac00-\ud7af\u1100-\u11ff]+"    # Hangul
+        r"|[\u0400-\u04ff]+"                 # Cyrillic
+        r"|[\u0600-\u06ff\u0750-\u077f]+"    # Arabic
+        r"|[\u0900-\u097f]+"                 # Devanagari
+        , text
+    )
+
+    result = []
+    for token in tokens:
+        lower = token.lower()
+        if lower in STOP_WORDS or len(lower) < 2:
+            continue
+        result.append(token)
+
+    # If everything was filtered out, keep the original text as-is
+    if not result and text:
+        result = [text]
+
+    return result
+
+
+def normalize_text(value: str) -> str:
+    return " ".join((value or "").strip().lower().replace("\u2019", "'").split())
+
+
+def tokenize(value: str) -> list[str]:
+    return _WORD_RE.findall(normalize_text(value))
+
+
+@lru_cache(maxsize=256)
+def _mission_keywords(mission_hint: str) -> frozenset[str]:
+    return frozenset(w for w in tokenize(mission_hint) if len(w) >= 4 and w not in STOP_WORDS)
+
+
+class UnitRecord:
+    """One candidate unit and, once validated, its verdict."""
+
+    __slots__ = ("text", "kind", "source", "canonical_key", "confidence", "mission_relevance", "reject_reason")
+
+    def __init__(self, text: str, kind: str, source: str, canonical_key: str):
+        self.text = text
+        self.kind = kind
+        self.source = source
+        self.canonical_key = canonical_key
+        self.confidence = 0.0
+        self.mission_relevance = 0.0
+        self.reject_reason: str | None = None
+
+    @property
+    def is_accepted(self) -> bool:
+        return self.reject_reason is None
+
+    def reject(self, reason: str, confidence: float, mission_relevance: float = 0.0) -> "UnitRecord":
+        self.reject_reason = reason
+        self.confidence = confidence
+        self.mission_relevance = mission_relevance
+        return self
+
+    def as_dict(self) -> dict:
+        return {
+            "text": self.text,
+            "kind": self.kind,
+            "source": self.source,
+            "confidence": self.confidence,
+            "is_accepted": self.reject_reason is None,
+            "reject_reason": self.reject_reason,
+            "canonical_key": self.canonical_key,
+            "mission_relevance": self.mission_relevance,
+        }
+
+    def __repr__(self) -> str:
+        return f"UnitRecord({self.canonical_key!r}, reject_reason={self.reject_reason!r})"
+
+
+class _Tokens:
+    """Per-call tokenizer: each string tokenized once, tokens interned to ints."""
+
+    __slots__ = ("_ids", "_cache")
+
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._cache: dict[str, frozenset[int]] = {}
+
+    def ids(self, normalized: str) -> frozenset[int]:
+        cached = self._cache.get(normalized)
+        if cached is None:
+            ids = self._ids
+            cached = self._cache[normalized] = frozenset(
+                ids.setdefault(token, len(ids)) for token in _WORD_RE.findall(normalized)
+            )
+        return cached
+
+    def ids_of(self, tokens) -> frozenset[int]:
+        ids = self._ids
+        return frozenset(ids.setdefault(token, len(ids)) for token in tokens)
+
+
+class _Coverage:
+    """Token sets of selected units; subset-of-any via per-token bitmasks."""
+
+    __slots__ = ("_masks", "_count")
+
+    def __init__(self):
+        self._masks: dict[int, int] = {}
+        self._count = 0
+
+    def add(self, tokens: frozenset[int]) -> None:
+        bit = 1 << self._count
+        self._count += 1
+        masks = self._masks
+        for token in tokens:
+            masks[token] = masks.get(token, 0) | bit
+
+    def covers(self, tokens: frozenset[int]) -> bool:
+        """True if some selected set contains every token (any set covers no tokens)."""
+        if not self._count:
+            return False
+        mask = -1
+        masks = self._masks
+        for token in tokens:
+            mask &= masks.get(token, 0)
+            if not mask:
+                return False
+        return True
+
+
+def extract_pattern_candidates(corrected_text: str) -> list[UnitRecord]:
+    """Grammar pattern candidates found in the (normalized) corrected text."""
+    return [
+        UnitRecord(pattern.text, "pattern", "corrected", pattern.key)
+        for pattern in get_matcher().detect(corrected_text)
+    ]
+
+
+def canonicalize_candidates(raw_units: list[str], corrected_text: str, source_text: str) -> list[UnitRecord]:
+    """Canonicalize candidates with precedence pattern > sentence > chunk > word."""
+    items = extract_pattern_candidates(corrected_text)
+    matcher = get_matcher()
+    seen_norm: set[str] = set()
+
+    for raw in raw_units:
+        text = normalize_text(raw)
+        if not text or text in seen_norm:
+            continue
+        seen_norm.add(text)
+        # Sentence = multi-word phrase with 3+ tokens (typically the first item from the LLM)
+        if " " not in text:
+            kind = "word"
+        elif len(_WORD_RE.findall(text)) >= 3:
+            kind = "sentence"
+        else:
+            kind = "chunk"
+        canonical_key = f"{kind}:{text}"
+        # Detect common patterns across languages and promote to pattern kind
+        pattern = matcher.canonical(text)
+        if pattern is not None:
+            canonical_key, kind, text = pattern.key, "pattern", pattern.text
+        items.append(UnitRecord(text, kind, "as_said" if text in source_text else "corrected", canonical_key))
+
+    # Only add individual word fallbacks if we have zero sentence/chunk/pattern candidates
+    if not any(item.kind != "word" for item in items):
+        keys = {item.canonical_key for item in items}
+        for tok in _WORD_RE.findall(corrected_text):
+            key = f"word:{tok}"
+            if tok in STOP_WORDS or len(tok) <= 1 or key in keys:
+                continue
+            keys.add(key)
+            items.append(UnitRecord(tok, "word", "corrected", key))
+
+    # Group by canonical key and keep best by precedence.
+    grouped: dict[str, UnitRecord] = {}
+    for item in items:
+        current = grouped.get(item.canonical_key)
+        if current is None or _KIND_RANK.get(item.kind, 0) > _KIND_RANK.get(current.kind, 0):
+            grouped[item.canonical_key] = item
+    return list(grouped.values())
+
+
+def validate(
+    user_text: str,
+    corrected_form: str,
+    raw_units: list[str],
+    mission_hint: str,
+) -> tuple[list[UnitRecord], list[UnitRecord], float]:
+    """Accepted units, rejected units and the turn's quality score."""
+    source_text = normalize_text(user_text)
+    corrected_text = normalize_text(corrected_form) if corrected_form else source_text
+    candidates = raw_units or extract_user_vocabulary(user_text)
+    items = canonicalize_candidates(candidates, corrected_text, source_text)
+    matcher = get_matcher()
+
+    tokens_of = _Tokens()
+    source_tokens = tokens_of.ids(source_text)
+    mission_kw = tokens_of.ids_of(_mission_keywords(mission_hint))
+    mission_size = max(1, len(mission_kw))
+
+    accepted: list[UnitRecord] = []
+    rejected: list[UnitRecord] = []
+    selected = _Coverage()
+    selected_patterns = _Coverage()
+
+    for item in items:
+        text, kind = item.text, item.kind
+        tokens = tokens_of.ids(text)
+        structural = kind in ("pattern", "sentence")
+
+        if not structural:
+            # Reject incomplete patterns (verb stubs without complements)
+            if kind == "chunk" and matcher.is_incomplete(text):
+                rejected.append(item.reject("incomplete_pattern", 0.45))
+                continue
+            if kind == "chunk" and len(tokens) >= 10 and not item.canonical_key.startswith("pattern:"):
+                rejected.append(item.reject("too_broad", 0.5))
+                continue
+            if len(text) <= 1:
+                rejected.append(item.reject("too_short", 0.3))
+                continue
+            if text in STOP_WORDS:
+                rejected.append(item.reject("stop_word", 0.35))
+                continue
+
+        mission_relevance = min(1.0, len(tokens & mission_kw) / mission_size) if mission_kw else 0.0
+        if structural:
+            mission_relevance = max(mission_relevance, 0.7)
+
+        # Strict user-text check: at least half the unit's tokens must appear
+        # in the user's actual spoken text. This prevents AI-generated words
+        # from leaking into the knowledge graph.
+        overlap_ratio = len(tokens & source_tokens) / len(tokens) if tokens and source_tokens else 0.0
+        if overlap_ratio < 0.5 and kind != "pattern":
+            rejected.append(item.reject("not_in_user_speech", 0.4))
+            continue
+
+        in_corrected = text in corrected_text or item.canonical_key.startswith("pattern:")
+        in_source = text in source_text or overlap_ratio >= 0.8
+        if corrected_form and not in_corrected and kind in ("chunk", "word"):
+            rejected.append(item.reject("grammar_invalid", 0.5, mission_relevance))
+            continue
+        confidence = 0.9 if (in_source and in_corrected) else (0.75 if (in_source or in_corrected) else 0.55)
+        if kind == "pattern":
+            confidence = max(confidence, 0.82)
+        if kind == "sentence":
+            confidence = max(confidence, 0.85)
+
+        # Borderline confidence needs mission relevance.
+        if confidence < 0.6:
+            rejected.append(item.reject("low_confidence", confidence, mission_relevance))
+            continue
+        if confidence < 0.72 and mission_relevance < 0.5:
+            rejected.append(item.reject("off_mission", confidence, mission_relevance))
+            continue
+        if kind in ("chunk", "word") and tokens and selected_patterns.covers(tokens):
+            rejected.append(item.reject("covered_by_pattern", confidence, mission_relevance))
+            continue
+        # Reject words fully covered by accepted sentences/chunks/patterns unless extremely mission-critical.
+        if kind == "word" and selected.covers(tokens) and mission_relevance < 0.95:
+            rejected.append(item.reject("covered_by_chunk", confidence, mission_relevance))
+            continue
+
+        item.confidence = confidence
+        item.mission_relevance = mission_relevance
+        accepted.append(item)
+        selected.add(tokens)
+        if structural:
+            selected_patterns.add(tokens)
+
+    accepted_ratio = len(accepted) / max(1, len(items))
+    correction_penalty = 0.2 if corrected_form and normalize_text(corrected_form) != source_text else 0.0
+    quality = max(0.0, min(1.0, accepted_ratio * 0.7 + (0.3 if accepted else 0.0) - correction_penalty))
+    return accepted, rejected, quality
+
+
+def validate_units(
+    user_text: str,
+    corrected_form: str,
+    raw_units: list[str],
+    mission_hint: str,
+) -> tuple[list[dict], list[dict], float]:
+    """validate() with units as ValidatedUnit-shaped dicts."""
+    accepted, rejected, quality = validate(user_text, corrected_form, raw_units, mission_hint)
+    return [u.as_dict() for u in accepted], [u.as_dict() for u in rejected], quality
@@ -0,0 +1,57 @@
+-- Run after supabase_migration.sql (Dashboard > SQL Editor > New Query)
+--
+-- Normalized session storage: the sessions row becomes a header, turns and
+-- mastery scores get one row each, so a save only writes what changed.
+-- Existing single-row sessions are migrated below; any row missed here is
+-- migrated by the backend on first load (format_version < 2).
+
+alter table sessions add column if not exists turn_count integer default 0;
+alter table sessions add column if not exists format_version integer default 1;
+
+create table if not exists session_turns (
+  profile_id uuid references profiles(id) on delete cascade,
+  turn_number integer not null,
+  payload jsonb not null,
+  created_at timestamptz default now(),
+  primary key (profile_id, turn_number)
+);
+
+create table if not exists session_mastery (
+  profile_id uuid references profiles(id) on delete cascade,
+  key text not null,
+  score real not null,
+  updated_at timestamptz default now(),
+  primary key (profile_id, key)
+);
+
+alter table session_turns enable row level security;
+alter table session_mastery enable row level security;
+
+create policy "anon_session_turns_select" on session_turns for select using (true);
+create policy "anon_session_turns_insert" on session_turns for insert with check (true);
+create policy "anon_session_turns_update" on session_turns for update using (true);
+create policy "anon_session_turns_delete" on session_turns for delete using (true);
+create policy "anon_session_mastery_select" on session_mastery for select using (true);
+create policy "anon_session_mastery_insert" on session_mastery for insert with check (true);
+create policy "anon_session_mastery_update" on session_mastery for update using (true);
+create policy "anon_session_mastery_delete" on session_mastery for delete using (true);
+
+-- Migrate single-row sessions (format 1)
+insert into session_turns (profile_id, turn_number, payload)
+select s.profile_id, (t.value->>'turn_number')::integer, t.value
+from sessions s, jsonb_array_elements(s.conversation_history) as t
+where coalesce(s.format_version, 1) < 2
+on conflict (profile_id, turn_number) do update set payload = excluded.payload;
+
+insert into session_mastery (profile_id, key, score)
+select s.profile_id, m.key, (m.value)::text::real
+from sessions s, jsonb_each(s.mastery_scores) as m
+where coalesce(s.format_version, 1) < 2
+on conflict (profile_id, key) do update set score = excluded.score;
+
+update sessions
+set turn_count = jsonb_array_length(conversation_history),
+    conversation_history = '[]'::jsonb,
+    mastery_scores = '{}'::jsonb,
+    format_version = 2
+where coalesce(format_version, 1) < 2;
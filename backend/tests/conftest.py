@@ -20,6 +20,37 @@ def mock_mode_env(monkeypatch):
     monkeypatch.setenv("OPENAI_ORG_ID", "")
 
 
+@pytest.fixture(autouse=True)
+def reset_provider_health():
+    """Start every test with closed breakers and no latency samples."""
+    from backend.services.provider_health import health
+    health.reset()
+    yield
+    health.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_response_cache():
+    """Start every test with an empty LLM response cache."""
+    from backend.services.openai_service import _response_cache
+    _response_cache.clear()
+    yield
+    _response_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def isolated_persistence_journal(tmp_path, monkeypatch):
+    """Fresh write-behind journal per test, with its file outside the repo."""
+    from backend.routes import session as session_routes
+    from backend.services.persistence_journal import PersistenceJournal
+    from backend.services.session_store import merge_deltas
+
+    journal = PersistenceJournal(
+        tmp_path / "persist_journal.jsonl", session_routes._write_session, merge=merge_deltas,
+    )
+    monkeypatch.setattr(session_routes, "_journal", journal)
+
+
 @pytest.fixture
 def test_client():
     """Create a FastAPI TestClient for route testing."""
@@ -73,3 +104,27 @@ def sample_conversation_turn(sample_tutor_response):
         "user_said": "Bonjour",
         "response": sample_tutor_response,
     }
+
+
+@pytest.fixture
+def make_turn():
+    """Return a ConversationTurn factory: make_turn(n, units=[(text, confidence)], **turn_fields).
+
+    Units become accepted validated_user_units; other keyword arguments
+    (user_said, recorded_at, ...) are passed to ConversationTurn.
+    """
+    from backend.models import ConversationTurn, TutorResponse
+
+    def _make(n: int, units: list[tuple[str, float]] = (), mastery: dict | None = None, **fields) -> ConversationTurn:
+        fields.setdefault("user_said", f"Phrase {n}")
+        response = TutorResponse(
+            spoken_response=f"Réponse {n}", translation_hint="", user_level_assessment="A1", border_update="",
+            validated_user_units=[
+                {"text": text, "kind": "word", "source": "as_said", "confidence": confidence, "is_accepted": True}
+                for text, confidence in units
+            ],
+            mastery_scores=mastery or {},
+        )
+        return ConversationTurn(turn_number=n, response=response, **fields)
+
+    return _make
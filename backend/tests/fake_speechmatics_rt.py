@@ -0,0 +1,81 @@
+"""
+Local fake of the Speechmatics real-time WebSocket API for tests.
+
+Speaks the subset of the RT v2 protocol the backend uses:
+StartRecognition → RecognitionStarted, binary audio → AudioAdded,
+EndOfStream → AddTranscript + EndOfTranscript. `handshake_delay`
+simulates the TLS/WebSocket/session-start cost so tests can measure
+what the warm pool saves.
+"""
+
+import asyncio
+import json
+
+from websockets.asyncio.server import serve
+
+
+class FakeSpeechmaticsRT:
+    """In-process fake RT server; use as an async context manager."""
+
+    def __init__(self, handshake_delay: float = 0.0, transcript: str = "bonjour"):
+        self.handshake_delay = handshake_delay
+        self.transcript = transcript
+        self.connections = 0
+        self.recognitions = 0
+        self.languages: list[str] = []
+        self.audio_bytes = 0
+        self.fail_next_connects = 0
+        self._server = None
+        self._open: set = set()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"ws://{host}:{port}/v2"
+
+    async def __aenter__(self) -> "FakeSpeechmaticsRT":
+        self._server = await serve(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    @property
+    def open_connections(self) -> int:
+        return len(self._open)
+
+    async def drop_all(self) -> None:
+        """Close every open connection (simulates a server-side reset)."""
+        for ws in list(self._open):
+            await ws.close()
+
+    async def _handle(self, ws) -> None:
+        self.connections += 1
+        if self.fail_next_connects > 0:
+            self.fail_next_connects -= 1
+            await ws.close(code=1011)
+            return
+        self._open.add(ws)
+        seq_no = 0
+        try:
+            async for raw in ws:
+                if isinstance(raw, bytes):
+                    seq_no += 1
+                    self.audio_bytes += len(raw)
+                    await ws.send(json.dumps({"message": "AudioAdded", "seq_no": seq_no}))
+                    continue
+                msg = json.loads(raw)
+                if msg.get("message") == "StartRecognition":
+                    await asyncio.sleep(self.handshake_delay)
+                    self.recognitions += 1
+                    self.languages.append(msg["transcription_config"]["language"])
+                    await ws.send(json.dumps({"message": "RecognitionStarted", "id": f"fake-{self.connections}"}))
+                elif msg.get("message") == "EndOfStream":
+                    await ws.send(json.dumps({
+                        "message": "AddTranscript",
+                        "metadata": {"transcript": self.transcript},
+                    }))
+                    await ws.send(json.dumps({"message": "EndOfTranscript"}))
+        finally:
+            self._open.discard(ws)
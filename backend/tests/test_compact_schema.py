@@ -0,0 +1,175 @@
+"""
+Tests for backend.services.compact_schema and its use by OpenAIService.
+
+Verifies:
+- encode_compact() / decode_compact() round-trip every pre-scripted reply
+  and validate_compact() yields the same TutorResponse as the verbose reply
+- The decoder is strict: unknown keys, wrong types and wrong row lengths
+  raise CompactSchemaError (a JSONStreamError)
+- With the compact schema on, Groq streaming fires on_spoken_ready from
+  "s" and returns TutorResponse keys; a verbose reply is rejected
+- Every compact prompt example decodes
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from backend.mock_data import MOCK_CONVERSATION
+from backend.models import TutorResponse
+from backend.services import openai_service
+from backend.services.compact_schema import (
+    LONG_KEYS,
+    CompactSchemaError,
+    decode_compact,
+    encode_compact,
+    validate_compact,
+)
+from backend.services.json_stream import JSONStreamError, parse_json_object
+from backend.services.openai_service import _ANALYSIS, _REPLY, _SPOKEN, OpenAIService
+
+REPLY = {
+    "spoken_response": "Super ! Tu aimes le café. Et le matin ?",
+    "translation_hint": "Great! You like coffee. And in the morning?",
+    "corrected_form": "",
+    "user_vocabulary": ["j'aime le café"],
+    "vocabulary_breakdown": [{"word": "café", "translation": "coffee", "part_of_speech": "noun"}],
+    "graph_links": [{"source": "j'aime", "target": "j'aime le café", "type": "semantic"}],
+    "new_elements": ["le matin"],
+    "reactivated_elements": ["aimer"],
+    "mastery_scores": {"café": 0.4},
+    "user_level_assessment": "A1+",
+    "border_update": "Can say what they like.",
+}
+
+
+class TestMapping:
+    """Tests for the compact ↔ TutorResponse mapping."""
+
+    @pytest.mark.parametrize("turn", range(len(MOCK_CONVERSATION)))
+    def test_round_trip_is_lossless(self, turn):
+        """Verify a scripted reply survives encode → JSON → decode and validates identically."""
+        response = MOCK_CONVERSATION[turn]["response"]
+        produced = {key: value for key, value in response.items() if key in LONG_KEYS}
+        wire = json.loads(json.dumps(encode_compact(response)))
+        assert decode_compact(wire) == produced
+        assert validate_compact(wire) == TutorResponse.model_validate(response)
+
+    def test_shorter_than_verbose(self):
+        """Verify the compact encoding is markedly shorter."""
+        assert len(json.dumps(encode_compact(REPLY))) < 0.8 * len(json.dumps(REPLY))
+
+    def test_validate_with_defaults(self):
+        """Verify partial replies validate with defaults and bad ones raise."""
+        partial = {"s": "Salut !", "t": "Hi!"}
+        response = validate_compact(partial, {"user_level_assessment": "A1", "border_update": ""})
+        assert response.spoken_response == "Salut !" and response.vocabulary_breakdown == []
+        with pytest.raises(CompactSchemaError):
+            validate_compact(partial)  # Required TutorResponse fields missing
+
+
+class TestStrictDecoder:
+    """Tests for decode_compact() rejections."""
+
+    @pytest.mark.parametrize("obj", [
+        {"s": "Salut", "spoken_response": "Salut"},
+        {"s": 3},
+        {"u": ["a", 1]},
+        {"v": [["café", "coffee"]]},
+        {"v": [{"word": "café", "translation": "coffee", "part_of_speech": "noun"}]},
+        {"g": [["a", "b", None]]},
+        {"m": {"café": "high"}},
+        {"m": {"café": True}},
+        ["s", "Salut"],
+    ])
+    def test_rejects(self, obj):
+        """Verify malformed compact objects raise a JSONStreamError subclass."""
+        with pytest.raises(CompactSchemaError):
+            decode_compact(obj)
+        assert issubclass(CompactSchemaError, JSONStreamError)
+
+
+class _FakeGroqStream:
+    def __init__(self, text: str, size: int):
+        self._chunks = [text[i:i + size] for i in range(0, len(text), size)]
+
+    def __aiter__(self):
+        return self._gen()
+
+    async def _gen(self):
+        for piece in self._chunks:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+
+def _groq_service(body: dict) -> tuple[OpenAIService, list]:
+    svc = OpenAIService()
+    svc.set_compact_schema(True)
+    seen = []
+
+    async def create(**kwargs):
+        seen.append(kwargs["messages"][0]["content"])
+        return _FakeGroqStream(json.dumps(body, ensure_ascii=False), 5)
+
+    svc._groq_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    svc._groq_model = "fake"
+    return svc, seen
+
+
+class TestServiceCompact:
+    """Tests for the compact schema inside OpenAIService."""
+
+    @pytest.mark.asyncio
+    async def test_streaming_decodes_compact(self):
+        """Verify "s" fires on_spoken_ready mid-stream and the reply comes back decoded."""
+        svc, prompts = _groq_service(encode_compact(REPLY))
+        heard, deltas = [], []
+
+        async def on_spoken_ready(text):
+            heard.append(text)
+
+        result, raw = await svc._groq_generate_streaming(
+            "J'aime le café", on_spoken_ready=on_spoken_ready, on_spoken_delta=deltas.append,
+        )
+        await asyncio.sleep(0)
+        assert prompts[0].startswith("You are a warm French") and '"s":' in prompts[0]
+        assert heard == [REPLY["spoken_response"]] and "".join(deltas) == REPLY["spoken_response"]
+        assert {key: result[key] for key in REPLY} == REPLY
+        assert json.loads(raw) == encode_compact(REPLY)
+
+    @pytest.mark.asyncio
+    async def test_verbose_reply_rejected(self):
+        """Verify a reply in the verbose schema fails the strict decoder."""
+        svc, _ = _groq_service(REPLY)
+        result, _ = await svc._groq_generate_streaming("J'aime le café")
+        assert result is None
+
+    @pytest.mark.asyncio
+    async def test_analysis_keeps_only_returned_fields(self, monkeypatch):
+        """Verify the analysis stage maps compact keys back and drops sanitizer defaults."""
+        body = {"u": ["j'aime le café"], "m": {"café": 0.5}}
+
+        async def run(attempts):
+            raw = json.dumps(body)
+            return SimpleNamespace(result=svc._from_wire(parse_json_object(raw), _ANALYSIS), raw=raw,
+                                   provider="groq", hedged=False)
+
+        svc = OpenAIService()
+        svc.set_compact_schema(True)
+        monkeypatch.setattr(openai_service, "_hedger", SimpleNamespace(run=run))
+        assert await svc._real_analyze("J'aime le café") == {
+            "user_vocabulary": ["j'aime le café"], "mastery_scores": {"café": 0.5},
+        }
+
+    def test_prompts_switch_and_examples_decode(self):
+        """Verify set_compact_schema() swaps stage prompts and every example decodes."""
+        svc = OpenAIService()
+        assert "reply" not in svc._stage_prompts
+        svc.set_compact_schema(True)
+        svc.set_language("es")
+        for stage in (_REPLY, _SPOKEN, _ANALYSIS):
+            prompt = svc._messages("Hola", stage)[0]["content"]
+            decode_compact(json.loads(prompt.rsplit("EXAMPLE: ", 1)[1]))
+        svc.set_compact_schema(False)
+        assert svc._messages("Hola", _REPLY)[0]["content"] == svc._system_prompt
@@ -0,0 +1,106 @@
+"""
+Tests for backend.services.grammar_patterns module.
+
+Verifies:
+- detect() finds the same patterns as one re.search per pattern (the
+  former implementation) on random texts, in pack order
+- canonical() applies prefix patterns first (in order), then whole-unit
+  phrases; incomplete stubs are recognized
+- Packs from an extra directory add patterns without code changes;
+  malformed packs and patterns are skipped
+- Unit validation's candidate extraction uses the packs
+"""
+
+import json
+import random
+import re
+
+from backend.services.grammar_patterns import _BUILTIN_PACKS, GrammarMatcher, get_matcher, load_packs
+from backend.services.unit_validation import canonicalize_candidates, extract_pattern_candidates
+
+_WORDS = [
+    "je", "suis", "j'aime", "ça", "ca", "va", "me", "llamo", "gusta", "ich", "bin", "mag",
+    "le", "chocolat", "marie", "étudiant", "bien", "ok", "x", "aime", "sujet", "vacances", "ichbin",
+]
+
+
+def _reference(matcher: GrammarMatcher, text: str) -> list[str]:
+    """One re.search per pattern, as the route did before the packs."""
+    keys = []
+    for p in matcher.patterns:
+        if p.prefix:
+            regex = rf"\b{re.escape(p.prefix)}\s+\w+" if p.slot == "word" else rf"\b{re.escape(p.prefix)}\s+.+"
+        else:
+            regex = rf"\b(?:{'|'.join(map(re.escape, p.phrases))})\b"
+        if re.search(regex, text):
+            keys.append(p.key)
+    return keys
+
+
+class TestDetect:
+    """Tests for GrammarMatcher.detect()."""
+
+    def test_matches_regex_reference(self):
+        """Verify the automaton agrees with per-pattern regexes on random texts."""
+        rng = random.Random(5)
+        matcher = get_matcher()
+        for _ in range(3000):
+            text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(0, 8)))
+            assert [p.key for p in matcher.detect(text)] == _reference(matcher, text), text
+
+    def test_known_patterns(self):
+        """Verify the built-in French/Spanish/German patterns fire."""
+        keys = [p.key for p in get_matcher().detect("bonjour ça va, je suis étudiant et me gusta el sol")]
+        assert keys == ["pattern:identity_je_suis_noun", "pattern:greeting_ca_va", "pattern:preference_me_gusta"]
+        assert get_matcher().detect("je suis") == []
+        assert get_matcher().detect("ça vaut le coup") == []
+
+
+class TestCanonical:
+    """Tests for GrammarMatcher.canonical() and is_incomplete()."""
+
+    def test_prefix_then_phrase(self):
+        """Verify units map onto their pattern, whole-unit phrases only when exact."""
+        matcher = get_matcher()
+        assert matcher.canonical("je suis étudiant").key == "pattern:identity_je_suis_noun"
+        assert matcher.canonical("ich mag kaffee").text == "ich mag + [object]"
+        assert matcher.canonical("ca va").text == "ça va"
+        assert matcher.canonical("ça va bien") is None
+        assert matcher.canonical("je suis") is None
+        assert matcher.is_incomplete("j'ai envie de") and matcher.is_incomplete("mi piace")
+        assert not matcher.is_incomplete("j'aime le chocolat")
+
+    def test_candidates(self):
+        """Verify candidate canonicalization promotes units to patterns through the packs."""
+        items = canonicalize_candidates(["je suis étudiant", "ça va", "étudiant"], "je suis étudiant", "je suis étudiant")
+        kinds = {item.canonical_key: item.kind for item in items}
+        assert kinds == {
+            "pattern:identity_je_suis_noun": "pattern",
+            "pattern:greeting_ca_va": "pattern",
+            "word:étudiant": "word",
+        }
+        assert extract_pattern_candidates("ich bin müde")[0].canonical_key == "pattern:identity_ich_bin"
+
+
+class TestPacks:
+    """Tests for load_packs()."""
+
+    def test_extra_pack_directory(self, tmp_path):
+        """Verify a pack dropped in a directory adds a pattern; broken packs are skipped."""
+        (tmp_path / "pt.json").write_text(json.dumps({
+            "language": "pt", "priority": 5,
+            "patterns": [
+                {"key": "pattern:identity_eu_sou", "text": "eu sou + [noun]", "prefix": "Eu Sou", "slot": "word"},
+                {"key": "pattern:broken", "text": "no trigger"},
+            ],
+            "incomplete": ["eu sou"],
+        }), encoding="utf-8")
+        (tmp_path / "bad.json").write_text("{not json", encoding="utf-8")
+        matcher = GrammarMatcher(load_packs(_BUILTIN_PACKS, tmp_path))
+        assert matcher.patterns[0].key == "pattern:identity_eu_sou"
+        assert [p.key for p in matcher.detect("eu sou professor e je suis ici")] == [
+            "pattern:identity_eu_sou", "pattern:identity_je_suis_noun",
+        ]
+        assert matcher.canonical("eu sou professor").text == "eu sou + [noun]"
+        assert matcher.is_incomplete("eu sou")
+        assert all(p.key != "pattern:broken" for p in matcher.patterns)
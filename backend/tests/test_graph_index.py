@@ -0,0 +1,506 @@
+"""
+Tests for backend.services.graph_index module.
+
+Verifies:
+- Nodes and links match a full rebuild of the graph (the pre-index route
+  logic, kept below as the reference) after every turn
+- A late analysis rewriting a recent turn is rolled back and re-applied
+- invalidate() and history resets trigger a rebuild
+- Cross-turn phrase links only compare phrases sharing a token, keep the
+  top-k by IDF weight and use the session language's stop list
+- publish() deltas keep a client copy equal to the graph, re-capping links
+  around the touched nodes only, and recompute only touched/decaying nodes
+"""
+
+import json
+import math
+import random
+
+import pytest
+
+from backend.models import ConversationTurn, GraphLink, GraphNode, SessionState, TutorResponse
+from backend.services.graph_index import _PHRASE_STOP_TOKENS, GraphIndex, norm_text, pedagogical_items, to_id
+
+_UNITS = [
+    ("j'aime le chocolat", "sentence", "pattern:aimer"),
+    ("j'aime la pizza", "sentence", "pattern:aimer"),
+    ("j'adore la pizza", "sentence", "pattern:adorer"),
+    ("le chocolat", "chunk", "noun:chocolat"),
+    ("la pizza", "chunk", "noun:pizza"),
+    ("chocolat", "word", "noun:chocolat"),
+    ("pizza", "word", "noun:pizza"),
+    ("ça va", "chunk", ""),
+    ("je m'appelle Marie", "sentence", "pattern:appeler"),
+    ("Marie", "word", ""),
+    ("je suis étudiant", "sentence", "pattern:être"),
+    ("étudiant", "word", "noun:étudiant"),
+    ("nous allons au cinéma", "sentence", "pattern:aller"),
+    ("au cinéma", "chunk", "place:cinéma"),
+    ("cinéma", "word", "place:cinéma"),
+    ("il fait beau", "sentence", ""),
+    ("beau", "word", ""),
+    ("je", "word", ""),
+    ("a", "word", ""),
+]
+
+
+def _response(rng: random.Random, tag: str = "") -> TutorResponse:
+    picked = rng.sample(_UNITS, rng.randint(0, 6))
+    units = [
+        {
+            "text": text, "kind": kind, "source": "as_said", "canonical_key": key,
+            "confidence": round(rng.uniform(0.4, 1.0), 2), "is_accepted": rng.random() < 0.85,
+            "mission_relevance": round(rng.random(), 2),
+        }
+        for text, kind, key in picked
+    ]
+    texts = [u[0] for u in _UNITS]
+    return TutorResponse(
+        spoken_response=f"Très bien {tag}", translation_hint="", user_level_assessment="A1", border_update="",
+        reactivated_elements=rng.sample(texts, rng.randint(0, 3)),
+        graph_links=[
+            {"source": rng.choice(texts), "target": rng.choice(texts),
+             "type": rng.choice(["semantic", "conjugation", "correction", "derivation", "other"])}
+            for _ in range(rng.randint(0, 2))
+        ],
+        validated_user_units=units,
+        mastery_scores={rng.choice(texts): round(rng.random(), 2)},
+    )
+
+
+def _add_turn(state: SessionState, response: TutorResponse) -> None:
+    state.conversation_history.append(ConversationTurn(turn_number=state.turn, user_said="...", response=response))
+    state.mastery_scores.update(response.mastery_scores)
+    state.turn += 1
+
+
+# ── Reference: graph rebuilt from the whole history ─────────────────
+
+
+def _rebuild_nodes(state: SessionState) -> list[dict]:
+    unit_stats: dict[str, dict] = {}
+    for t in state.conversation_history:
+        resp = t.model_dump()["response"]
+        tn = t.turn_number
+        accepted_units = [u for u in resp.get("validated_user_units") or [] if u.get("is_accepted")]
+        for word in pedagogical_items([u.get("text", "") for u in accepted_units]):
+            if not word:
+                continue
+            matched = [u for u in accepted_units if norm_text(u.get("text", "")) == norm_text(word)]
+            unit_kind = next((u.get("kind") for u in matched), "word")
+            canonical = next((u.get("canonical_key", "") for u in matched), "")
+            node_type = "sentence" if unit_kind in ("sentence", "chunk") or " " in word else ("grammar" if unit_kind == "pattern" else "vocab")
+            stat = unit_stats.get(word, {"count": 0, "sum_conf": 0.0, "first_turn": tn, "last_turn": tn, "canonical": canonical, "node_type": node_type, "unit_kind": unit_kind})
+            stat["count"] += 1
+            stat["sum_conf"] += float(next((u.get("confidence", 0.75) for u in matched), 0.75))
+            stat["last_turn"] = tn
+            stat["node_type"] = node_type
+            stat["unit_kind"] = unit_kind
+            unit_stats[word] = stat
+
+    nodes, seen_ids = [], set()
+    for word, stat in unit_stats.items():
+        avg_conf = stat["sum_conf"] / max(1, stat["count"])
+        reuse_score = min(1.0, (stat["count"] - 1) / 4)
+        recency_decay = max(0.0, 1.0 - ((state.turn - stat["last_turn"]) * 0.08))
+        learned = 0.22 + (avg_conf * 0.38) + (reuse_score * 0.30) + (recency_decay * 0.10)
+        if stat["unit_kind"] in ("pattern", "sentence"):
+            learned += 0.05
+        mastery = min(1.0, max(0.15, (learned * 0.65) + (state.mastery_scores.get(word, learned) * 0.35)))
+        node_id = to_id(word)
+        if not node_id or node_id in seen_ids:
+            continue
+        seen_ids.add(node_id)
+        nodes.append(GraphNode(id=node_id, label=word, type=stat["node_type"], mastery=min(1.0, max(0.0, mastery)),
+                               level=state.level, turn_introduced=stat["first_turn"], usage_count=stat["count"]).model_dump())
+    return nodes
+
+
+def _rebuild_links(state: SessionState) -> list[dict]:
+    turns = [(t.turn_number, t.model_dump()["response"]) for t in state.conversation_history]
+    node_ids = {
+        to_id(w)
+        for _, resp in turns
+        for w in pedagogical_items([u.get("text", "") for u in resp.get("validated_user_units") or [] if u.get("is_accepted")])
+        if w
+    }
+    links, seen = [], set()
+
+    def add(src, tgt, rel, turn, detail, evidence):
+        src_id, tgt_id = to_id(src), to_id(tgt)
+        if not src_id or not tgt_id or src_id == tgt_id or src_id not in node_ids or tgt_id not in node_ids:
+            return
+        key = (min(src_id, tgt_id), max(src_id, tgt_id))
+        if key in seen:
+            return
+        seen.add(key)
+        links.append(GraphLink(source=src_id, target=tgt_id, relationship=rel, reason=rel, reason_detail=detail,
+                               evidence_units=evidence[:2], turn_introduced=turn).model_dump())
+
+    def accepted_units(resp):
+        return [u for u in resp.get("validated_user_units") or [] if u.get("is_accepted")]
+
+    for tn, resp in turns:
+        units = accepted_units(resp)
+        for sent in [u for u in units if u.get("kind") == "sentence"]:
+            for ext in [u for u in units if u.get("kind") in ("chunk", "word")]:
+                if norm_text(ext["text"]) and norm_text(ext["text"]) in norm_text(sent["text"]):
+                    add(sent["text"], ext["text"], "semantic", tn, "Contextual extension of sentence structure.", [sent["text"], ext["text"]])
+    rel_map = {"semantic": "semantic", "conjugation": "conjugation", "prerequisite": "prerequisite",
+               "correction": "reactivation", "derivation": "semantic"}
+    for tn, resp in turns:
+        for gl in resp.get("graph_links") or []:
+            add(gl["source"], gl["target"], rel_map.get(gl["type"], "semantic"), tn,
+                "Explicit pedagogical relationship provided by tutor.", [gl["source"], gl["target"]])
+    for tn, resp in turns:
+        by_key: dict[str, list[str]] = {}
+        for u in accepted_units(resp):
+            if u.get("canonical_key") and u.get("text"):
+                by_key.setdefault(u["canonical_key"], []).append(u["text"])
+        for key, texts in by_key.items():
+            texts = list(dict.fromkeys(texts))
+            for i in range(len(texts) - 1):
+                add(texts[i], texts[i + 1], "conjugation" if key.startswith("pattern:") else "semantic", tn,
+                    f"Units share canonical key '{key}'.", [texts[i], texts[i + 1]])
+    for tn, resp in turns:
+        units = accepted_units(resp)
+        accepted = pedagogical_items([u["text"] for u in units])
+        if not accepted:
+            continue
+        mission = pedagogical_items([u["text"] for u in units if u["mission_relevance"] >= 0.55]) or accepted[:1]
+        for old in pedagogical_items(resp.get("reactivated_elements") or [])[:2]:
+            for new in mission[:2]:
+                if norm_text(old) != norm_text(new):
+                    add(old, new, "mission", tn, "Tutor reused fading knowledge inside a new mission objective.", [old, new])
+    for tn, resp in turns:
+        accepted = pedagogical_items([u["text"] for u in accepted_units(resp)])
+        for i in range(len(accepted) - 1):
+            add(accepted[i], accepted[i + 1], "semantic", tn, "Used together in the same utterance.", [accepted[i], accepted[i + 1]])
+    # Strategy 5 brute force: every earlier distinct phrase, IDF-weighted top-k per new phrase
+    stop = _PHRASE_STOP_TOKENS["fr"]
+    phrases, seen_norm = [], set()
+    for tn, resp in turns:
+        for u in accepted_units(resp):
+            norm = norm_text(u["text"])
+            if u["text"] and " " in u["text"] and norm not in seen_norm and set(norm.split()) - stop:
+                seen_norm.add(norm)
+                phrases.append((u["text"], set(norm.split()) - stop, tn))
+    pairs = []
+    for j, (t2, tok2, tn2) in enumerate(phrases):
+        idf = {t: math.log((j + 1) / (sum(t in p[1] for p in phrases[:j]) + 1)) + 1.0 for t in tok2}
+        weights = {i: sum(idf[t] for t in sorted(tok2) if t in tok1) for i, (_, tok1, _) in enumerate(phrases[:j]) if tok1 & tok2}
+        for i in sorted(weights, key=lambda i: (weights[i], i), reverse=True)[:3]:
+            pairs.append((i, j))
+    for i, j in sorted(pairs):
+        (t1, tok1, tn1), (t2, tok2, tn2) = phrases[i], phrases[j]
+        shared = sorted(tok1 & tok2, key=lambda t: (-math.log((j + 1) / (sum(t in p[1] for p in phrases[:j]) + 1)), t))
+        add(t1, t2, "semantic", max(tn1, tn2), f"Shared vocabulary: {', '.join(shared[:3])}.", [t1, t2])
+
+    priority = {"mission": 5, "reactivation": 4, "prerequisite": 3, "conjugation": 2, "semantic": 1}
+    degree: dict[str, int] = {}
+    capped = []
+    for link in sorted(links, key=lambda l: (priority.get(l["relationship"], 0), l["turn_introduced"]), reverse=True):
+        if degree.get(link["source"], 0) >= 6 or degree.get(link["target"], 0) >= 6:
+            continue
+        degree[link["source"]] = degree.get(link["source"], 0) + 1
+        degree[link["target"]] = degree.get(link["target"], 0) + 1
+        capped.append(link)
+    return capped
+
+
+def _assert_matches(index: GraphIndex, state: SessionState) -> None:
+    index.sync(state.conversation_history)
+    assert index.nodes(state) == _rebuild_nodes(state)
+    assert index.links() == _rebuild_links(state)
+
+
+class TestGraphIndex:
+    """Tests for GraphIndex against the full rebuild."""
+
+    def test_matches_rebuild_turn_by_turn(self):
+        """Verify nodes/links equal the rebuild after each of 60 random turns."""
+        for seed in range(5):
+            rng = random.Random(seed)
+            state, index = SessionState(), GraphIndex()
+            for _ in range(60):
+                _add_turn(state, _response(rng))
+                _assert_matches(index, state)
+            assert index.rebuilds == 0
+
+    def test_late_rewrite_of_recent_turn(self):
+        """Verify replacing a recent turn's response rolls back and re-applies."""
+        rng = random.Random(7)
+        state, index = SessionState(), GraphIndex(undo_depth=4)
+        for _ in range(20):
+            _add_turn(state, _response(rng))
+        _assert_matches(index, state)
+        # Late analysis on the previous turn while a newer turn was already applied
+        state.conversation_history[-2].response = _response(rng, "merged")
+        _assert_matches(index, state)
+        assert index.rebuilds == 0
+
+    def test_old_rewrite_and_reset_rebuild(self):
+        """Verify invalidate() and a replaced history rebuild the index."""
+        rng = random.Random(11)
+        state, index = SessionState(), GraphIndex(undo_depth=4)
+        for _ in range(20):
+            _add_turn(state, _response(rng))
+        _assert_matches(index, state)
+        state.conversation_history[-6].response = _response(rng, "merged")
+        index.invalidate()
+        _assert_matches(index, state)
+        assert index.rebuilds == 1
+
+        state = SessionState()
+        _add_turn(state, _response(rng))
+        _assert_matches(index, state)
+        assert index.turns_applied == 1
+
+    def test_sync_without_changes_is_noop(self):
+        """Verify a repeated sync applies nothing."""
+        rng = random.Random(3)
+        state, index = SessionState(), GraphIndex()
+        for _ in range(5):
+            _add_turn(state, _response(rng))
+        index.sync(state.conversation_history)
+        before = dict(index.links_by_key)
+        index.sync(state.conversation_history)
+        assert index.links_by_key == before
+        assert index.turns_applied == 5
+
+    def test_phrase_postings(self):
+        """Verify only phrases sharing a content token are paired."""
+        index = GraphIndex()
+        state = SessionState()
+        for text in ("j'aime le chocolat", "il fait beau", "le chocolat chaud"):
+            _add_turn(state, TutorResponse(
+                spoken_response="ok", translation_hint="", user_level_assessment="A1", border_update="",
+                validated_user_units=[{"text": text, "kind": "sentence", "source": "as_said",
+                                       "confidence": 0.9, "is_accepted": True}],
+            ))
+        index.sync(state.conversation_history)
+        assert index.postings["chocolat"] == [0, 2]
+        assert ("jaime_le_chocolat", "le_chocolat_chaud") in index.links_by_key
+        assert len(index.links_by_key) == 1
+
+    def _phrase_turns(self, texts: list[str]) -> SessionState:
+        state = SessionState()
+        for text in texts:
+            _add_turn(state, TutorResponse(
+                spoken_response="ok", translation_hint="", user_level_assessment="A1", border_update="",
+                validated_user_units=[{"text": text, "kind": "sentence", "source": "as_said",
+                                       "confidence": 0.9, "is_accepted": True}],
+            ))
+        return state
+
+    def test_top_k_prefers_rare_shared_tokens(self):
+        """Verify a new phrase links to the phrases sharing its rarest tokens."""
+        texts = [f"j'aime le sport {i}" for i in range(10)] + ["mon chat noir", "j'aime mon chat noir"]
+        index = GraphIndex(top_k=1)
+        index.sync(self._phrase_turns(texts).conversation_history)
+        last = to_id("j'aime mon chat noir")
+        linked = [key for key in index.links_by_key if last in key]
+        assert linked == [(to_id("j'aime mon chat noir"), to_id("mon chat noir"))]
+
+    def test_stop_list_follows_language(self):
+        """Verify Spanish function words do not link phrases in a Spanish session."""
+        state = self._phrase_turns(["el perro grande", "el gato negro"])
+        index = GraphIndex(language="es")
+        index.sync(state.conversation_history)
+        assert index.links_by_key == {}
+        index.set_language("fr")
+        index.sync(state.conversation_history)
+        assert len(index.links_by_key) == 1
+
+
+def _apply_delta(client: dict, delta: dict) -> None:
+    if delta["full"]:
+        client["nodes"], client["links"] = {}, {}
+    else:
+        assert delta["since"] == client["version"]
+    for node in delta["nodes"]["added"] + delta["nodes"]["updated"]:
+        client["nodes"][node["id"]] = node
+    for node_id in delta["nodes"]["removed"]:
+        del client["nodes"][node_id]
+    for link in delta["links"]["added"] + delta["links"]["updated"]:
+        client["links"][tuple(sorted((link["source"], link["target"])))] = link
+    for key in delta["links"]["removed"]:
+        del client["links"][tuple(key)]
+    client["version"] = delta["version"]
+
+
+def _assert_client_matches(client: dict, index: GraphIndex, state: SessionState) -> None:
+    assert client["nodes"] == {n["id"]: n for n in index.nodes(state)}
+    assert client["links"] == {tuple(sorted((l["source"], l["target"]))): l for l in index.links()}
+
+
+class TestGraphDeltas:
+    """Tests for GraphIndex.publish() and delta()."""
+
+    def test_turn_deltas_rebuild_client_graph(self):
+        """Verify applying each turn's delta keeps a client copy equal to the graph."""
+        rng = random.Random(21)
+        state, index = SessionState(), GraphIndex(undo_depth=4)
+        client = {"version": None, "nodes": {}, "links": {}}
+        _apply_delta(client, index.delta(None))
+        for n in range(40):
+            _add_turn(state, _response(rng))
+            if n % 7 == 3:
+                # Late analysis rewriting the previous turn
+                state.conversation_history[-2].response = _response(rng, "merged")
+            if n == 20:
+                state.level = "A2"
+            index.sync(state.conversation_history)
+            _apply_delta(client, index.publish(state))
+            _assert_client_matches(client, index, state)
+
+    def test_delta_since_older_version(self):
+        """Verify deltas compose across several versions and unknown versions get a snapshot."""
+        rng = random.Random(5)
+        state, index = SessionState(), GraphIndex()
+        client = {"version": None, "nodes": {}, "links": {}}
+        _apply_delta(client, index.delta(None))
+        for _ in range(3):
+            _add_turn(state, _response(rng))
+            index.sync(state.conversation_history)
+            index.publish(state)
+        _apply_delta(client, index.delta(client["version"]))
+        _assert_client_matches(client, index, state)
+
+        assert index.delta(index.version)["nodes"] == {"added": [], "updated": [], "removed": []}
+        assert index.delta(-1)["full"]
+        assert GraphIndex().delta(index.version)["full"]
+
+    def test_unchanged_publish_keeps_version(self):
+        """Verify publishing without changes neither bumps the version nor sends items."""
+        rng = random.Random(8)
+        state, index = SessionState(), GraphIndex()
+        _add_turn(state, _response(rng))
+        index.sync(state.conversation_history)
+        index.publish(state)
+        version = index.version
+        delta = index.publish(state)
+        assert index.version == version
+        assert delta["links"] == {"added": [], "updated": [], "removed": []}
+
+
+    def test_deltas_under_degree_cap(self):
+        """Verify incremental re-capping matches the full cap when dense links crowd the nodes."""
+        rng = random.Random(34)
+        words = [f"mot{i}" for i in range(14)]
+        state, index = SessionState(), GraphIndex(undo_depth=4)
+        client = {"version": None, "nodes": {}, "links": {}}
+        _apply_delta(client, index.delta(None))
+
+        def dense(tag: str = "") -> TutorResponse:
+            picked = rng.sample(words, rng.randint(1, 5))
+            return TutorResponse(
+                spoken_response=f"Très bien {tag}", translation_hint="", user_level_assessment="A1", border_update="",
+                graph_links=[
+                    {"source": rng.choice(words), "target": rng.choice(words),
+                     "type": rng.choice(["semantic", "conjugation", "correction", "prerequisite"])}
+                    for _ in range(rng.randint(0, 8))
+                ],
+                validated_user_units=[
+                    {"text": w, "kind": "word", "source": "as_said", "confidence": 0.8, "is_accepted": True}
+                    for w in picked
+                ],
+                mastery_scores={rng.choice(words): round(rng.random(), 2)},
+            )
+
+        for n in range(60):
+            _add_turn(state, dense())
+            if n % 5 == 2:
+                state.conversation_history[-3].response = dense("merged")
+            index.sync(state.conversation_history)
+            _apply_delta(client, index.publish(state))
+            _assert_client_matches(client, index, state)
+        assert max(sum(key.count(w) for key in client["links"]) for w in words) == 6
+
+    def test_publish_recomputes_touched_nodes_only(self, monkeypatch):
+        """Verify a turn recomputes the nodes it touched or that still decay, and no full link cap."""
+        state, index = SessionState(), GraphIndex()
+        for n in range(40):
+            a, b = f"mot{n}a", f"mot{n}b"
+            _add_turn(state, TutorResponse(
+                spoken_response="Bien", translation_hint="", user_level_assessment="A1", border_update="",
+                graph_links=[{"source": a, "target": b, "type": "semantic"}],
+                validated_user_units=[
+                    {"text": w, "kind": "word", "source": "as_said", "confidence": 0.8, "is_accepted": True}
+                    for w in (a, b)
+                ],
+            ))
+            index.sync(state.conversation_history)
+            index.publish(state, now=0)
+
+        recomputed = []
+        mastery = index.store.mastery
+        monkeypatch.setattr(index.store, "mastery", lambda rows, *args: recomputed.append(len(rows)) or mastery(rows, *args))
+        monkeypatch.setattr(index, "links", lambda: pytest.fail("publish() re-capped every link"))
+        last = state.conversation_history[-1].response
+        state.conversation_history[-1].response = TutorResponse(**{
+            **last.model_dump(), "graph_links": [{"source": "mot39a", "target": "mot38a", "type": "semantic"}],
+        })
+        index.sync(state.conversation_history)
+        delta = index.publish(state, now=0)
+        # Same turn and clock: only the rewritten turn's nodes
+        assert recomputed == [3]
+        assert [l["target"] for l in delta["links"]["added"]] == ["mot38a"]
+
+        _add_turn(state, state.conversation_history[-1].response)
+        index.sync(state.conversation_history)
+        index.publish(state, now=0)
+        # Next turn: the nodes still inside the 12.5-turn recency window
+        assert recomputed[-1] == 24 < len(index.id_words)
+
+
+class TestGraphDeltaRoute:
+    """Tests for the /api/graph/delta endpoint."""
+
+    def test_mock_delta_is_full_snapshot(self, test_client):
+        """Verify mock mode answers with a full, turn-versioned snapshot."""
+        res = test_client.get("/api/graph/delta", params={"since": 3, "session_id": "graph-delta"})
+        assert res.status_code == 200
+        body = res.json()
+        assert body["full"] and body["version"] == 1
+        assert body["nodes"]["added"] == []
+
+
+class TestGraphSnapshotRoute:
+    """Tests for the combined /api/graph endpoint."""
+
+    def test_etag_revalidation(self, test_client):
+        """Verify the snapshot carries a strong ETag and a matching If-None-Match gets 304."""
+        params = {"session_id": "graph-etag"}
+        first = test_client.get("/api/graph", params=params)
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert etag.startswith('"') and not etag.startswith("W/")
+        assert set(first.json()) == {"version", "nodes", "links"}
+
+        again = test_client.get("/api/graph", params=params, headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+
+        stale = test_client.get("/api/graph", params=params, headers={"If-None-Match": '"other"'})
+        assert stale.status_code == 200
+
+
+class TestGraphSnapshot:
+    """Tests for GraphIndex.snapshot_json()."""
+
+    def test_snapshot_cached_per_version(self):
+        """Verify the encoded snapshot is reused until a publish cuts a new version."""
+        rng = random.Random(13)
+        state, index = SessionState(), GraphIndex()
+        _add_turn(state, _response(rng))
+        index.sync(state.conversation_history)
+        index.publish(state)
+        body = index.snapshot_json()
+        assert index.publish(state)["version"] == index.version
+        assert index.snapshot_json() is body
+        while index.version == json.loads(body)["version"]:
+            _add_turn(state, _response(rng))
+            index.sync(state.conversation_history)
+            index.publish(state)
+        assert json.loads(index.snapshot_json())["version"] == index.version
@@ -0,0 +1,87 @@
+"""
+Tests for backend.services.graph_layout module.
+
+Verifies:
+- Every node gets a 3D position and linked nodes end up closer than average
+- Layouts are deterministic and cached per graph version
+- A warm start keeps existing nodes close to where they were
+- The Barnes-Hut cell approximation is used above the exact-repulsion limit
+- The /api/graph/layout endpoint returns positions for the current graph
+"""
+
+import random
+
+import numpy as np
+
+from backend.services.graph_layout import GraphLayout
+
+
+def _tree(n: int, seed: int = 1) -> tuple[list[str], list[tuple[str, str]]]:
+    rng = random.Random(seed)
+    ids = [f"n{i}" for i in range(n)]
+    return ids, [(ids[i], ids[rng.randrange(i)]) for i in range(1, n)]
+
+
+def _mean_distance(positions: dict, pairs) -> float:
+    return float(np.mean([np.linalg.norm(np.subtract(positions[a], positions[b])) for a, b in pairs]))
+
+
+class TestGraphLayout:
+    """Tests for GraphLayout.compute()."""
+
+    def test_positions_for_every_node(self):
+        """Verify each node gets three finite coordinates and links are short."""
+        ids, links = _tree(150)
+        positions = GraphLayout().compute(1, ids, links)
+        assert set(positions) == set(ids)
+        assert all(len(p) == 3 and np.all(np.isfinite(p)) for p in positions.values())
+        rng = random.Random(0)
+        random_pairs = [(rng.choice(ids), rng.choice(ids)) for _ in range(300)]
+        assert _mean_distance(positions, links) < 0.5 * _mean_distance(positions, random_pairs)
+
+    def test_deterministic_and_cached(self):
+        """Verify the same graph lays out identically and a version is computed once."""
+        ids, links = _tree(60)
+        layout = GraphLayout()
+        first = layout.compute(1, ids, links)
+        assert layout.compute(1, ids, links) is first
+        assert layout.runs == 1
+        assert GraphLayout().compute(1, ids, links) == first
+
+    def test_warm_start_is_stable(self):
+        """Verify adding a few nodes barely moves the existing ones."""
+        ids, links = _tree(200)
+        layout = GraphLayout()
+        before = layout.compute(1, ids, links)
+        more_ids = ids + ["new0", "new1", "new2"]
+        more_links = links + [("new0", "n3"), ("new1", "n40"), ("new2", "new1")]
+        after = layout.compute(2, more_ids, more_links)
+        assert layout.runs == 2
+        moved = float(np.mean([np.linalg.norm(np.subtract(before[i], after[i])) for i in ids]))
+        assert moved < 0.2 * _mean_distance(after, [(a, b) for a in ids[:20] for b in ids[20:40]])
+        assert _mean_distance(after, [("new0", "n3")]) < 1.0
+
+    def test_cell_approximation_for_large_graphs(self):
+        """Verify graphs above the exact limit still separate linked from unlinked nodes."""
+        ids, links = _tree(600)
+        positions = GraphLayout(exact_max_nodes=100, iterations=60).compute(1, ids, links)
+        rng = random.Random(0)
+        random_pairs = [(rng.choice(ids), rng.choice(ids)) for _ in range(300)]
+        assert _mean_distance(positions, links) < 0.5 * _mean_distance(positions, random_pairs)
+
+    def test_empty_and_single_node(self):
+        """Verify degenerate graphs do not fail."""
+        assert GraphLayout().compute(1, [], []) == {}
+        assert list(GraphLayout().compute(1, ["solo"], [])) == ["solo"]
+
+
+class TestGraphLayoutRoute:
+    """Tests for the /api/graph/layout endpoint."""
+
+    def test_layout_endpoint(self, test_client):
+        """Verify the endpoint returns the layout of the session graph."""
+        res = test_client.get("/api/graph/layout", params={"session_id": "graph-layout"})
+        assert res.status_code == 200
+        body = res.json()
+        assert "available" not in body
+        assert body["positions"] == {}
@@ -0,0 +1,226 @@
+"""
+Tests for backend.services.hedging module.
+
+Verifies:
+- A slow primary triggers a hedge once its latency threshold passes
+- The first valid spoken_response wins and the loser is cancelled
+- A failing provider is replaced immediately, without waiting
+- An exhausted token budget blocks hedging (plain fallback instead)
+- Only the winner's on_spoken_ready reaches the caller
+- A winner failing after its spoken_response is retracted via on_spoken_reset
+- Hedge thresholds follow the attempt's own latency histogram
+- OpenAIService commits the winning exchange to history exactly once
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services import openai_service
+from backend.services.hedging import HedgingScheduler, ProviderAttempt, TokenBudget
+from backend.services.provider_health import HealthRegistry
+from backend.services.openai_service import OpenAIService
+
+
+def _reply(name: str) -> dict:
+    return {"spoken_response": f"Réponse de {name}.", "provider": name}
+
+
+def _attempt(name: str, delay: float, log: list, fail: bool = False, spoken_early: bool = False):
+    """Fake provider: sleeps `delay`, then returns (or fails); records cancellation."""
+
+    async def run(gate):
+        log.append(("start", name))
+        try:
+            if spoken_early:
+                gate.on_spoken_delta(f"Réponse de {name}")
+                await gate.on_spoken_ready(f"Réponse de {name}.")
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            log.append(("cancelled", name))
+            raise
+        if fail:
+            return None, ""
+        reply = _reply(name)
+        return reply, json.dumps(reply)
+
+    return ProviderAttempt(name, run, est_tokens=100)
+
+
+def _scheduler(**kwargs) -> HedgingScheduler:
+    kwargs.setdefault("default_delay", 0.02)
+    kwargs.setdefault("min_delay", 0.0)
+    kwargs.setdefault("health", HealthRegistry())
+    return HedgingScheduler(**kwargs)
+
+
+class TestThresholds:
+    """Tests for latency percentiles and budgets."""
+
+    def test_threshold_default_and_clamp(self):
+        """Verify unknown providers use the default delay and values are clamped."""
+        registry = HealthRegistry()
+        sched = HedgingScheduler(min_delay=0.2, max_delay=1.0, default_delay=0.5, health=registry)
+        assert sched.threshold("groq") == 0.5
+        registry.get("groq").record_success(0.05)
+        assert sched.threshold("groq") == 0.2
+        registry.get("slow").record_success(9.0)
+        assert sched.threshold("slow") == 1.0
+
+    def test_budget_rolls_over(self):
+        """Verify spent tokens expire after the window."""
+        budget = TokenBudget(1000, window=60.0, cost_per_1k=0.01)
+        assert budget.try_charge(800, now=0.0)
+        assert not budget.try_charge(300, now=10.0)
+        assert budget.cost(now=10.0) == pytest.approx(0.008)
+        assert budget.try_charge(300, now=61.0)
+
+
+class TestRace:
+    """Tests for hedged provider races."""
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        """Verify the backup launches after the threshold, wins, and the primary is cancelled."""
+        log = []
+        sched = _scheduler()
+        outcome = await sched.run([_attempt("groq", 1.0, log), _attempt("openai", 0.01, log)])
+        assert outcome.provider == "openai"
+        assert outcome.hedged
+        await asyncio.sleep(0)  # losers are cancelled, not awaited
+        assert ("cancelled", "groq") in log
+        assert sched.stats["hedges"] == 1
+        assert sched.stats["hedge_wins"] == 1
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self):
+        """Verify no backup starts when the primary answers within its threshold."""
+        log = []
+        outcome = await _scheduler(default_delay=0.5).run([_attempt("groq", 0.01, log), _attempt("openai", 0.01, log)])
+        assert outcome.provider == "groq"
+        assert not outcome.hedged
+        assert log == [("start", "groq")]
+
+    @pytest.mark.asyncio
+    async def test_failure_falls_back_immediately(self):
+        """Verify a failed primary is replaced without waiting for the threshold."""
+        log = []
+        sched = _scheduler(default_delay=5.0)
+        outcome = await asyncio.wait_for(
+            sched.run([_attempt("groq", 0.0, log, fail=True), _attempt("openai", 0.0, log)]), timeout=1.0,
+        )
+        assert outcome.provider == "openai"
+        assert not outcome.hedged
+
+    @pytest.mark.asyncio
+    async def test_budget_blocks_hedge(self):
+        """Verify an exhausted budget keeps the backup from launching."""
+        log = []
+        sched = _scheduler(budgets={"openai": TokenBudget(50)})
+        outcome = await sched.run([_attempt("groq", 0.08, log), _attempt("openai", 0.0, log)])
+        assert outcome.provider == "groq"
+        assert ("start", "openai") not in log
+        assert sched.stats["budget_skips"] == 1
+
+    @pytest.mark.asyncio
+    async def test_all_failing_returns_no_result(self):
+        """Verify the outcome is empty when every provider fails."""
+        log = []
+        outcome = await _scheduler().run([_attempt("groq", 0.0, log, fail=True), _attempt("openai", 0.0, log, fail=True)])
+        assert outcome.result is None and outcome.provider is None
+
+    @pytest.mark.asyncio
+    async def test_only_winner_callbacks_forwarded(self):
+        """Verify the streamed winner's spoken text is forwarded once, the loser's never."""
+        log, ready, deltas = [], [], []
+
+        async def on_spoken_ready(text):
+            ready.append(text)
+
+        sched = _scheduler()
+        outcome = await sched.run(
+            [_attempt("groq", 1.0, log), _attempt("openai", 0.05, log, spoken_early=True)],
+            on_spoken_ready=on_spoken_ready, on_spoken_delta=deltas.append,
+        )
+        assert outcome.provider == "openai"
+        assert ready == ["Réponse de openai."]
+        assert deltas == ["Réponse de openai"]
+        # Streamed spoken_response claims the race before the reply finishes
+        await asyncio.sleep(0)
+        assert ("cancelled", "groq") in log
+
+    @pytest.mark.asyncio
+    async def test_failed_winner_spoken_reset(self):
+        """Verify a winner failing after its spoken_response is retracted before the next one fires."""
+        log, events = [], []
+
+        async def on_spoken_ready(text):
+            events.append(("ready", text))
+
+        async def on_spoken_reset():
+            events.append(("reset", None))
+
+        outcome = await _scheduler().run(
+            [_attempt("groq", 0.01, log, fail=True, spoken_early=True), _attempt("openai", 0.01, log)],
+            on_spoken_ready=on_spoken_ready, on_spoken_reset=on_spoken_reset,
+        )
+        assert outcome.provider == "openai"
+        assert events == [("ready", "Réponse de groq."), ("reset", None), ("ready", "Réponse de openai.")]
+
+    @pytest.mark.asyncio
+    async def test_threshold_uses_attempt_health_key(self):
+        """Verify a long call is hedged on its own histogram, not the fast spoken one."""
+        log = []
+        registry = HealthRegistry()
+        for _ in range(10):
+            registry.get("groq").record_success(0.01)
+            registry.get("groq:analysis").record_success(3.0)
+        sched = _scheduler(health=registry)
+        slow = _attempt("groq", 0.1, log)
+        slow.health_key = "groq:analysis"
+        outcome = await sched.run([slow, _attempt("openai", 0.0, log)])
+        assert outcome.provider == "groq"
+        assert not outcome.hedged
+        assert log == [("start", "groq")]
+
+
+class _SlowGroq:
+    async def create(self, **kwargs):
+        await asyncio.sleep(1.0)
+
+
+class _FastOpenAI:
+    def __init__(self, text: str):
+        self.text = text
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.text))])
+
+
+class TestOpenAIServiceHedging:
+    """Tests for the hedged provider chain in OpenAIService."""
+
+    @pytest.mark.asyncio
+    async def test_backup_reply_committed_once(self, monkeypatch):
+        """Verify a hedged win returns the backup reply and commits one exchange."""
+        reply = {"spoken_response": "Très bien !", "translation_hint": "Very good!"}
+        svc = OpenAIService()
+        svc._groq_client = SimpleNamespace(chat=SimpleNamespace(completions=_SlowGroq()))
+        svc._groq_model = "fake"
+        openai_fake = _FastOpenAI(json.dumps(reply))
+        svc._client = SimpleNamespace(chat=SimpleNamespace(completions=openai_fake))
+        svc._model = "fake"
+        monkeypatch.setattr(openai_service, "_hedger", _scheduler())
+
+        result, spoken = await svc._real_generate_streaming("Bonjour")
+        assert spoken == "Très bien !"
+        assert result["translation_hint"] == "Very good!"
+        assert openai_fake.calls == 1
+        assert svc.history.messages == [
+            {"role": "user", "content": "Bonjour"},
+            {"role": "assistant", "content": "Très bien !"},
+        ]
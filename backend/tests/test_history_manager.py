@@ -0,0 +1,221 @@
+"""
+Tests for backend.services.history_manager and its use by OpenAIService.
+
+Verifies:
+- window() returns the newest messages within the token budget, never
+  opening on a reply without its question, with the summary in front
+- Overflow is folded into the summary in the background by the given
+  summarizer, extractively when it fails or returns nothing
+- clear() drops a compaction that was still running
+- The summarizer input is capped, and replaying a stored session folds
+  extractively without calling it
+- OpenAIService prompts carry learner text and spoken replies only, and
+  stay bounded as a conversation grows
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services import openai_service
+from backend.services.history_manager import HistoryManager, count_tokens, extractive_summary
+from backend.models import ConversationTurn, SessionState, TutorResponse
+from backend.services.openai_service import _ANALYSIS, _SUMMARY, OpenAIService
+from backend.services.session_registry import LearnerSession
+
+
+def _fill(history: HistoryManager, count: int) -> None:
+    for i in range(count):
+        history.add(f"Je parle du sujet numéro {i}", f"Très bien, parlons du sujet {i} !")
+
+
+class TestWindow:
+    """Tests for counting and the budget window."""
+
+    def test_count_tokens(self):
+        """Verify token counts grow with text and count CJK characters individually."""
+        assert count_tokens("") == 0
+        assert 0 < count_tokens("Bonjour") < count_tokens("Bonjour, je m'appelle Marie et j'aime le café.")
+        assert count_tokens("今日は") >= 3
+
+    def test_budget_and_alignment(self):
+        """Verify the window fits the budget and starts on a learner message."""
+        history = HistoryManager(budget_tokens=60)
+        _fill(history, 2)
+        assert len(history.window()) == 4
+        _fill(history, 6)
+        window = history.window(with_summary=False)
+        assert window[0]["role"] == "user"
+        assert sum(count_tokens(m["content"]) + 4 for m in window) <= 60
+        assert window[-1]["content"] == "Très bien, parlons du sujet 5 !"
+        assert history.window(max_messages=1, with_summary=False) == window[-1:]
+
+    def test_summary_prepended(self):
+        """Verify the summary leads the window unless the stage opts out."""
+        history = HistoryManager()
+        history.summary = "Learner is Marie."
+        history.add("Salut", "Salut Marie !")
+        assert history.window()[0] == {"role": "system", "content": "Earlier in this conversation: Learner is Marie."}
+        assert history.window(with_summary=False)[0]["role"] == "user"
+
+
+class TestCompaction:
+    """Tests for background folding into the summary."""
+
+    @pytest.mark.asyncio
+    async def test_summarizer_folds_overflow(self):
+        """Verify overflowing messages reach the summarizer and leave the history."""
+        seen = []
+
+        async def summarize(summary, messages):
+            seen.append((summary, [m["content"] for m in messages]))
+            return "Learner talked about topics."
+
+        history = HistoryManager(budget_tokens=60, summarize=summarize)
+        _fill(history, 6)
+        await history.settle()
+        assert seen and seen[0][1][0] == "Je parle du sujet numéro 0"
+        assert history.summary == "Learner talked about topics."
+        assert history.tokens() <= 60 and history.messages[0]["role"] == "user"
+
+    @pytest.mark.asyncio
+    async def test_extractive_fallback(self):
+        """Verify a failing summarizer still folds, keeping what the learner said."""
+        async def summarize(summary, messages):
+            raise RuntimeError("provider down")
+
+        history = HistoryManager(budget_tokens=60, summary_tokens=40, summarize=summarize)
+        _fill(history, 6)
+        await history.settle()
+        assert history.summary.startswith("Learner: ")
+        assert count_tokens(history.summary) <= 40
+        assert "sujet numéro 0" not in history.summary  # Oldest lines dropped first
+
+    def test_without_loop_folds_immediately(self):
+        """Verify a synchronous caller gets an extractive fold on the spot."""
+        history = HistoryManager(budget_tokens=60)
+        _fill(history, 6)
+        assert history.tokens() <= 60
+        assert "Learner: Je parle du sujet numéro" in history.summary
+
+    @pytest.mark.asyncio
+    async def test_clear_drops_running_compaction(self):
+        """Verify a summary landing after clear() is discarded."""
+        release = asyncio.Event()
+
+        async def summarize(summary, messages):
+            await release.wait()
+            return "stale"
+
+        history = HistoryManager(budget_tokens=60, summarize=summarize)
+        _fill(history, 6)
+        await asyncio.sleep(0)
+        history.clear()
+        release.set()
+        await history.settle()
+        assert history.summary == "" and history.messages == []
+
+    @pytest.mark.asyncio
+    async def test_summarizer_input_capped(self):
+        """Verify a large overflow reaches the summarizer as at most two budgets of messages."""
+        seen = []
+
+        async def summarize(summary, messages):
+            seen.append(sum(count_tokens(m["content"]) + 4 for m in messages))
+            return "Learner talked about topics."
+
+        history = HistoryManager(budget_tokens=60, summarize=summarize)
+        _fill(history, 100)
+        await history.settle()
+        assert seen and max(seen) <= 120
+        assert history.tokens() <= 60
+
+    def test_extractive_summary_keeps_previous(self):
+        """Verify earlier summary lines are kept when there is room."""
+        messages = [{"role": "user", "content": "J'aime le thé"}, {"role": "assistant", "content": "Moi aussi !"}]
+        assert extractive_summary("Learner: Je suis Marie", messages, 100) == "Learner: Je suis Marie | Learner: J'aime le thé"
+
+
+class TestServiceHistory:
+    """Tests for the history inside OpenAIService prompts."""
+
+    @pytest.mark.asyncio
+    async def test_prompt_bounded_and_plain(self):
+        """Verify committed turns hold spoken text only and prompts stop growing."""
+        svc = OpenAIService()
+        svc._system_prompt = "system"
+        sizes = []
+        for i in range(30):
+            svc._commit_exchange(
+                f"[mission: travel] Je voudrais visiter la ville numéro {i}",
+                {"spoken_response": f"Bonne idée, la ville {i} est belle !", "user_vocabulary": ["ville"] * 20},
+            )
+            await svc.history.settle()
+            sizes.append(sum(count_tokens(m["content"]) for m in svc._messages("Et toi ?")))
+        messages = svc._messages("Et toi ?")
+        assert messages[1]["role"] == "system" and messages[1]["content"].startswith("Earlier in this conversation:")
+        assert not any("user_vocabulary" in m["content"] for m in messages)
+        assert max(sizes[10:]) <= sizes[10] + svc.history.summary_tokens * 2
+
+    def test_analysis_stage_has_no_summary(self):
+        """Verify the analysis call gets only the last message, without the summary."""
+        svc = OpenAIService()
+        svc.history.summary = "Learner is Marie."
+        svc.history.add("Salut", "Salut Marie !")
+        assert svc._history(_ANALYSIS) == [{"role": "assistant", "content": "Salut Marie !"}]
+        assert svc._history(_SUMMARY) == []
+
+    def test_language_switch_clears(self):
+        """Verify switching language drops both the messages and the summary."""
+        svc = OpenAIService()
+        svc.history.summary = "Learner is Marie."
+        svc.history.add("Bonjour", "Bonjour Marie !")
+        svc.set_language("es")
+        assert svc.history.messages == [] and svc.history.summary == ""
+
+    @pytest.mark.asyncio
+    async def test_summarize_uses_summary_stage(self, monkeypatch):
+        """Verify _summarize asks the summary stage and returns its text."""
+        async def run(attempts):
+            return SimpleNamespace(result={"summary": "Learner is Marie."})
+
+        svc = OpenAIService()
+        captured = {}
+        monkeypatch.setattr(svc, "_provider_attempts", lambda prompt, stage: captured.update(prompt=prompt, stage=stage) or [])
+        monkeypatch.setattr(openai_service, "_hedger", SimpleNamespace(run=run))
+        assert await svc._summarize("", [{"role": "user", "content": "Je suis Marie"}]) == "Learner is Marie."
+        assert captured["stage"].name == "summary" and "Learner: Je suis Marie" in captured["prompt"]
+
+    @pytest.mark.asyncio
+    async def test_reload_long_session_bounded(self):
+        """Verify loading a 200-turn session calls no summarizer and keeps the prompt bounded."""
+        calls = []
+
+        async def summarize(summary, messages):
+            calls.append(messages)
+            return "summary"
+
+        history = [
+            ConversationTurn(
+                turn_number=n, user_said=f"Je parle du sujet numéro {n}",
+                response=TutorResponse(
+                    spoken_response=f"Très bien, parlons du sujet {n} !", translation_hint="",
+                    user_level_assessment="A1", border_update="",
+                ),
+            )
+            for n in range(1, 201)
+        ]
+        session = LearnerSession("long", profile_id="p")
+        session.openai_service.mock_mode = False
+        session.openai_service.history.summarize = summarize
+        session.openai_service._system_prompt = "system"
+        session.load_state(SessionState(conversation_history=history, turn=201))
+        await session.openai_service.history.settle()
+        manager = session.openai_service.history
+        assert calls == []
+        assert manager.tokens() <= manager.budget_tokens
+        assert count_tokens(manager.summary) <= manager.summary_tokens
+        assert "sujet numéro 200" in manager.messages[-2]["content"]
+        prompt = sum(count_tokens(m["content"]) for m in session.openai_service._messages("Et toi ?"))
+        assert prompt <= count_tokens("system") + manager.budget_tokens + manager.summary_tokens + 40
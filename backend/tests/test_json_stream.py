@@ -0,0 +1,197 @@
+"""
+Tests for backend.services.json_stream module.
+
+Verifies:
+- Field, array-item, and done events for a streamed tutor reply
+- Identical results for every chunk split (including 1-char chunks)
+- String deltas survive escapes and split \\u / surrogate escapes
+- Leading markdown fences are skipped; malformed JSON raises
+- Groq streaming fires on_spoken_ready from the parser's field event
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services.json_stream import (
+    IncrementalJSONParser,
+    JSONStreamError,
+    parse_json_object,
+)
+from backend.services.openai_service import OpenAIService
+
+
+REPLY = {
+    "spoken_response": "Très bien ! Tu dis \"j'aime\" — parfait.\nEt toi ? 😀",
+    "translation_hint": "Very good!",
+    "vocabulary_breakdown": [
+        {"word": "aimer", "translation": "to like", "part_of_speech": "verb"},
+        {"word": "parfait", "translation": "perfect", "part_of_speech": "adjective"},
+    ],
+    "new_elements": ["aimer", "parfait"],
+    "mastery_scores": {"aimer": 0.4, "parfait": 0.2},
+    "quality_score": 0.75,
+    "is_done": False,
+    "nothing": None,
+}
+
+
+def _feed_all(text: str, size: int, stream_keys=()) -> tuple[IncrementalJSONParser, list]:
+    parser = IncrementalJSONParser(stream_keys=stream_keys)
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return parser, events
+
+
+class TestEvents:
+    """Tests for the emitted event sequence."""
+
+    def test_fields_emitted_in_order(self):
+        """Verify one field event per top-level key, in document order."""
+        _, events = _feed_all(json.dumps(REPLY), 7)
+        fields = [e.key for e in events if e.kind == "field"]
+        assert fields == list(REPLY)
+        assert events[-1].kind == "done"
+        assert events[-1].value == REPLY
+
+    def test_array_items_emitted_before_field(self):
+        """Verify each array element is reported as soon as it closes."""
+        _, events = _feed_all(json.dumps(REPLY), 5)
+        items = [(e.index, e.value) for e in events if e.kind == "item" and e.key == "new_elements"]
+        assert items == [(0, "aimer"), (1, "parfait")]
+        kinds = [(e.kind, e.key) for e in events if e.key == "vocabulary_breakdown"]
+        assert kinds == [("item", "vocabulary_breakdown")] * 2 + [("field", "vocabulary_breakdown")]
+
+    def test_spoken_field_ready_before_stream_ends(self):
+        """Verify spoken_response is complete before later fields arrive."""
+        text = json.dumps(REPLY)
+        cut = text.index('"translation_hint"')
+        parser = IncrementalJSONParser()
+        events = parser.feed(text[:cut])
+        assert ("field", "spoken_response") in [(e.kind, e.key) for e in events]
+        assert not parser.done
+
+    def test_scalar_arrays_and_empty_arrays(self):
+        """Verify numeric items and empty arrays parse correctly."""
+        text = '{"a": [1, 2.5, -3, true, null], "b": [], "c": [ [1], {"x": [2]} ]}'
+        for size in (1, 3, len(text)):
+            parser, _ = _feed_all(text, size)
+            assert parser.close() == json.loads(text)
+
+
+class TestChunkBoundaries:
+    """Tests that chunking never changes the result."""
+
+    @pytest.mark.parametrize("size", [1, 2, 3, 5, 8, 13, 64])
+    def test_every_chunk_size_matches_json_loads(self, size):
+        """Verify the parsed object equals json.loads for any chunk size."""
+        text = json.dumps(REPLY, ensure_ascii=True, indent=1)
+        parser, _ = _feed_all(text, size)
+        assert parser.close() == REPLY
+
+    @pytest.mark.parametrize("ensure_ascii", [True, False])
+    def test_string_deltas_rebuild_value_for_every_split(self, ensure_ascii):
+        """Verify string deltas concatenate to the decoded value at every split point."""
+        text = json.dumps(REPLY, ensure_ascii=ensure_ascii)
+        for split in range(1, len(text)):
+            parser = IncrementalJSONParser(stream_keys=("spoken_response",))
+            events = parser.feed(text[:split]) + parser.feed(text[split:])
+            deltas = "".join(e.value for e in events if e.kind == "string_delta")
+            assert deltas == REPLY["spoken_response"], split
+
+    def test_deltas_stream_before_string_closes(self):
+        """Verify decoded text is available while the string is still open."""
+        parser = IncrementalJSONParser(stream_keys=("spoken_response",))
+        events = parser.feed('{"spoken_response": "Bonjour. Comment')
+        assert [e.value for e in events if e.kind == "string_delta"] == ["Bonjour. Comment"]
+
+
+class TestRobustness:
+    """Tests for fences, trailing text, and malformed input."""
+
+    def test_markdown_fence_is_skipped(self):
+        """Verify a ```json fenced reply parses."""
+        assert parse_json_object('```json\n{"a": "b"}\n```') == {"a": "b"}
+
+    def test_key_text_inside_string_is_not_a_field(self):
+        """Verify a quoted key name inside a value does not confuse the parser."""
+        text = json.dumps({"hint": 'say "spoken_response": "x"', "spoken_response": "real"})
+        _, events = _feed_all(text, 4)
+        spoken = [e.value for e in events if e.kind == "field" and e.key == "spoken_response"]
+        assert spoken == ["real"]
+
+    def test_truncated_stream_raises_on_close(self):
+        """Verify close() raises when the object never closed."""
+        parser = IncrementalJSONParser()
+        parser.feed('{"spoken_response": "Bonjour"')
+        with pytest.raises(JSONStreamError):
+            parser.close()
+
+    @pytest.mark.parametrize("text", ['{"a" 1}', '{"a": tru}', '{"a": [1,,2]}', '{a: 1}'])
+    def test_malformed_json_raises(self, text):
+        """Verify malformed input raises JSONStreamError."""
+        with pytest.raises(JSONStreamError):
+            parse_json_object(text)
+
+
+class _FakeGroqStream:
+    def __init__(self, text: str, size: int):
+        self._chunks = [text[i:i + size] for i in range(0, len(text), size)]
+
+    def __aiter__(self):
+        return self._gen()
+
+    async def _gen(self):
+        for piece in self._chunks:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+
+class TestGroqStreamingIntegration:
+    """Tests for OpenAIService._groq_generate_streaming on the parser."""
+
+    @pytest.fixture
+    def service(self):
+        svc = OpenAIService()
+        text = json.dumps(REPLY)
+
+        async def create(**kwargs):
+            return _FakeGroqStream(text, 6)
+
+        svc._groq_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        svc._groq_model = "fake"
+        svc._system_prompt = "system"
+        return svc
+
+    @pytest.mark.asyncio
+    async def test_spoken_ready_callback_and_history(self, service):
+        """Verify the callback gets the decoded spoken_response and history is committed."""
+        heard = []
+
+        async def on_spoken_ready(text):
+            heard.append(text)
+
+        result, early = await service._real_generate_streaming("J'aime le café", on_spoken_ready=on_spoken_ready)
+        await asyncio.sleep(0)
+        assert early == REPLY["spoken_response"]
+        assert heard == [REPLY["spoken_response"]]
+        assert result["spoken_response"] == REPLY["spoken_response"]
+        assert service.history.messages[-1] == {"role": "assistant", "content": REPLY["spoken_response"]}
+
+    @pytest.mark.asyncio
+    async def test_provider_call_leaves_history_alone(self, service):
+        """Verify the raw reply is returned and history is left to the caller."""
+        result, raw = await service._groq_generate_streaming("Salut")
+        assert json.loads(raw) == REPLY
+        assert result["spoken_response"] == REPLY["spoken_response"]
+        assert service.history.messages == []
+
+    @pytest.mark.asyncio
+    async def test_spoken_deltas_forwarded(self, service):
+        """Verify on_spoken_delta receives the decoded text while it streams."""
+        deltas = []
+        result, _ = await service._groq_generate_streaming("Salut", on_spoken_delta=deltas.append)
+        assert len(deltas) > 1
+        assert "".join(deltas) == result["spoken_response"]
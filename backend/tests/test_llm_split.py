@@ -0,0 +1,208 @@
+"""
+Tests for the two-stage (spoken + analysis) LLM turn.
+
+Verifies:
+- Mock mode splits the scripted reply into spoken fields and a resolved analysis
+- merge_analysis overlays only the analysis fields that were produced
+- Real mode runs both calls concurrently and returns before the analysis lands
+- Only the spoken exchange is committed to history
+- The WebSocket route still sends turn_response, and a late analysis
+  arrives afterwards as turn_update, merged under the session lock
+- A late analysis for a turn removed by a reset is dropped
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from backend.routes import conversation
+from backend.services import openai_service
+from backend.services.hedging import HedgingScheduler
+from backend.services.openai_service import ANALYSIS_FIELDS, OpenAIService, merge_analysis
+from backend.services.provider_health import HealthRegistry
+
+
+class _StageAwareOpenAI:
+    """Fake completions API: short spoken replies, slow analysis replies."""
+
+    def __init__(self, spoken: dict, analysis: dict, analysis_delay: float):
+        self.spoken = spoken
+        self.analysis = analysis
+        self.analysis_delay = analysis_delay
+        self.calls = []
+
+    async def create(self, **kwargs):
+        is_analysis = kwargs["messages"][0]["content"].startswith("You analyze")
+        self.calls.append(("analysis" if is_analysis else "spoken", kwargs["max_tokens"]))
+        if is_analysis:
+            await asyncio.sleep(self.analysis_delay)
+        body = self.analysis if is_analysis else self.spoken
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(body)))])
+
+
+class TestMergeAnalysis:
+    """Tests for merge_analysis()."""
+
+    def test_overlays_only_produced_fields(self):
+        """Verify empty analysis values keep the response's own values."""
+        response = {"spoken_response": "Salut !", "user_vocabulary": ["salut"], "corrected_form": ""}
+        analysis = {"user_vocabulary": [], "corrected_form": "Je suis allé", "mastery_scores": {"aller": 0.4}}
+        merged = merge_analysis(response, analysis)
+        assert merged["spoken_response"] == "Salut !"
+        assert merged["user_vocabulary"] == ["salut"]
+        assert merged["corrected_form"] == "Je suis allé"
+        assert merged["mastery_scores"] == {"aller": 0.4}
+        assert "mastery_scores" not in response
+
+    def test_ignores_spoken_fields(self):
+        """Verify the analysis call can never overwrite what was spoken."""
+        merged = merge_analysis({"spoken_response": "A"}, {"spoken_response": "B"})
+        assert merged["spoken_response"] == "A"
+
+
+class TestSplitGeneration:
+    """Tests for OpenAIService.generate_response_split()."""
+
+    @pytest.mark.asyncio
+    async def test_mock_split_round_trips(self):
+        """Verify the mock reply splits into spoken fields plus an already-resolved analysis."""
+        svc = OpenAIService()
+        reply, spoken, task = await svc.generate_response_split("Bonjour", 0)
+        assert spoken == reply["spoken_response"]
+        assert task.done()
+        analysis = task.result()
+        assert analysis["mastery_scores"]
+        assert set(analysis) <= set(ANALYSIS_FIELDS)
+        assert merge_analysis(reply, analysis)["mastery_scores"] == svc._mock_generate(0)["mastery_scores"]
+
+    @pytest.mark.asyncio
+    async def test_spoken_returns_before_analysis(self, monkeypatch):
+        """Verify the spoken reply returns while the analysis call is still running."""
+        spoken = {"spoken_response": "Super ! Et toi ?", "translation_hint": "Great! And you?"}
+        analysis = {"corrected_form": "", "user_vocabulary": ["j'aime le café"], "mastery_scores": {"café": 0.5}}
+        fake = _StageAwareOpenAI(spoken, analysis, analysis_delay=0.1)
+        svc = OpenAIService()
+        svc._client = SimpleNamespace(chat=SimpleNamespace(completions=fake))
+        svc._model = "fake"
+        monkeypatch.setattr(openai_service, "_hedger", HedgingScheduler(default_delay=5.0, health=HealthRegistry()))
+
+        reply, early, task = await svc._real_generate_split("J'aime le café")
+        assert early == "Super ! Et toi ?"
+        assert not task.done()
+        assert sorted(fake.calls) == [("analysis", 700), ("spoken", 120)]
+
+        result = await task
+        # Only keys the model returned — sanitizer defaults are not merged over the reply
+        assert result == analysis
+        assert svc.history.messages == [
+            {"role": "user", "content": "J'aime le café"},
+            {"role": "assistant", "content": "Super ! Et toi ?"},
+        ]
+
+
+class TestSplitRoute:
+    """Tests for the split turn over /ws/conversation."""
+
+    def test_turn_response_in_split_mode(self, test_client):
+        """Verify mock split turns still carry the analysis in turn_response."""
+        with test_client.websocket_connect("/ws/conversation?session_id=split-test") as ws:
+            ws.send_json({"type": "text", "content": "Bonjour"})
+            while True:
+                msg = ws.receive_json()
+                if msg["type"] == "turn_response":
+                    break
+        assert msg["turn"]["response"]["mastery_scores"]["bonjour"] == 0.8
+        assert msg["pedagogy"]["accepted_units"]
+
+    def test_late_analysis_sent_as_turn_update(self, test_client, monkeypatch):
+        """Verify an analysis that misses the wait is pushed afterwards as turn_update."""
+        original = OpenAIService.generate_response_split
+
+        async def slow_analysis(self, *args, **kwargs):
+            reply, spoken, task = await original(self, *args, **kwargs)
+
+            async def later():
+                await asyncio.sleep(0.05)
+                return await task
+
+            return reply, spoken, asyncio.create_task(later())
+
+        monkeypatch.setattr(OpenAIService, "generate_response_split", slow_analysis)
+        monkeypatch.setattr(conversation, "LLM_ANALYSIS_WAIT_S", 0.0)
+        with test_client.websocket_connect("/ws/conversation?session_id=late-test") as ws:
+            ws.send_json({"type": "text", "content": "Bonjour"})
+            kinds = []
+            while True:
+                msg = ws.receive_json()
+                kinds.append(msg["type"])
+                if msg["type"] == "turn_response":
+                    assert msg["turn"]["response"]["mastery_scores"] == {}
+                if msg["type"] == "turn_update":
+                    break
+        assert kinds.index("turn_response") < kinds.index("turn_update")
+        assert msg["turn"]["response"]["mastery_scores"]["bonjour"] == 0.8
+        assert msg["turn"]["response"]["spoken_response"] == "Bonjour ! Comment tu t'appelles ?"
+
+    def test_late_analysis_holds_session_lock(self, test_client, monkeypatch):
+        """Verify the late merge runs under the session lock, like a turn."""
+        original = OpenAIService.generate_response_split
+        original_publish = conversation.publish_graph
+        locked = []
+
+        async def slow_analysis(self, *args, **kwargs):
+            reply, spoken, task = await original(self, *args, **kwargs)
+
+            async def later():
+                await asyncio.sleep(0.05)
+                return await task
+
+            return reply, spoken, asyncio.create_task(later())
+
+        def publish(session):
+            locked.append(session.lock.locked())
+            return original_publish(session)
+
+        monkeypatch.setattr(OpenAIService, "generate_response_split", slow_analysis)
+        monkeypatch.setattr(conversation, "publish_graph", publish)
+        monkeypatch.setattr(conversation, "LLM_ANALYSIS_WAIT_S", 0.0)
+        with test_client.websocket_connect("/ws/conversation?session_id=late-lock-test") as ws:
+            ws.send_json({"type": "text", "content": "Bonjour"})
+            while ws.receive_json()["type"] != "turn_update":
+                pass
+        assert len(locked) == 2 and all(locked)
+
+    def test_late_analysis_dropped_after_reset(self, test_client, monkeypatch):
+        """Verify an analysis landing after a reset neither merges nor publishes."""
+        original = OpenAIService.generate_response_split
+        original_publish = conversation.publish_graph
+        published = []
+
+        async def slow_analysis(self, *args, **kwargs):
+            reply, spoken, task = await original(self, *args, **kwargs)
+
+            async def later():
+                await asyncio.sleep(0.2)
+                return await task
+
+            return reply, spoken, asyncio.create_task(later())
+
+        def publish(session):
+            published.append(session.state.turn)
+            return original_publish(session)
+
+        monkeypatch.setattr(OpenAIService, "generate_response_split", slow_analysis)
+        monkeypatch.setattr(conversation, "publish_graph", publish)
+        monkeypatch.setattr(conversation, "LLM_ANALYSIS_WAIT_S", 0.0)
+        with test_client.websocket_connect("/ws/conversation?session_id=late-reset-test") as ws:
+            ws.send_json({"type": "text", "content": "Bonjour"})
+            while ws.receive_json()["type"] != "turn_response":
+                pass
+            test_client.post("/api/session/reset?session_id=late-reset-test")
+            time.sleep(0.4)
+        state = test_client.get("/api/session/state?session_id=late-reset-test").json()
+        assert published == [2]
+        assert state["mastery_scores"] == {}
+        assert state["conversation_history"] == []
@@ -0,0 +1,112 @@
+"""
+Tests for backend.services.mastery_store module.
+
+Verifies:
+- Batch mastery matches the scalar per-node formula exactly
+- The recency term halves every half-life since a unit was last seen, and
+  units with no known last-seen time do not decay
+- observe() undo callbacks restore the columns, including after growth
+- GraphIndex re-publishes nodes whose mastery decayed, at most once per
+  decay clock step
+"""
+
+import random
+
+import numpy as np
+
+from backend.models import SessionState
+from backend.services.graph_index import GraphIndex
+from backend.services.mastery_store import MasteryStore
+
+HOUR = 3600.0
+
+
+def _scalar_mastery(stat: dict, turn: int, scores: dict, word: str) -> float:
+    """The per-node formula GraphIndex used before the columnar store."""
+    avg_conf = stat["sum_conf"] / max(1, stat["count"])
+    reuse_score = min(1.0, (stat["count"] - 1) / 4)
+    recency_decay = max(0.0, 1.0 - ((turn - stat["last_turn"]) * 0.08))
+    learned_mastery = 0.22 + (avg_conf * 0.38) + (reuse_score * 0.30) + (recency_decay * 0.10)
+    if stat["unit_kind"] in ("pattern", "sentence"):
+        learned_mastery += 0.05
+    history_mastery = scores.get(word, learned_mastery)
+    return min(1.0, max(0.15, (learned_mastery * 0.65) + (history_mastery * 0.35)))
+
+
+def _filled(n_words: int, n_obs: int, seed: int = 0) -> MasteryStore:
+    rng = random.Random(seed)
+    store = MasteryStore(capacity=4)
+    for turn in range(1, n_obs + 1):
+        word = f"w{rng.randrange(n_words)}"
+        store.observe(word, turn, round(rng.uniform(0.3, 1.0), 2), None, "vocab",
+                      rng.choice(["word", "chunk", "sentence", "pattern"]), is_node=word not in store)
+    return store
+
+
+class TestMasteryKernel:
+    """Tests for MasteryStore.mastery() and decay()."""
+
+    def test_matches_scalar_formula(self):
+        """Verify the batch kernel is bit-identical to the per-node loop without time decay."""
+        store = _filled(300, 2000)
+        rows = store.node_rows()
+        scores = {f"w{i}": round(random.Random(i).random(), 2) for i in range(0, 300, 7)}
+        scores["unknown"] = 0.9
+        batch = store.mastery(rows, 2100, scores)
+        for row, value in zip(rows.tolist(), batch.tolist()):
+            word = store.words[row]
+            assert value == _scalar_mastery(store.get(word), 2100, scores, word)
+
+    def test_time_decay_half_life(self):
+        """Verify recency halves per half-life and unknown last use does not decay."""
+        store = MasteryStore()
+        store.observe("seen", 5, 0.8, 1000.0, "vocab", "word", is_node=True)
+        store.observe("legacy", 5, 0.8, None, "vocab", "word", is_node=True)
+        rows = store.node_rows()
+        fresh = store.decay(rows, 5, now=1000.0, half_life_s=HOUR)
+        later = store.decay(rows, 5, now=1000.0 + 2 * HOUR, half_life_s=HOUR)
+        assert fresh.tolist() == [1.0, 1.0]
+        assert later.tolist() == [0.25, 1.0]
+        assert store.mastery(rows[:1], 5, now=1000.0 + 2 * HOUR, half_life_s=HOUR)[0] < store.mastery(rows[:1], 5)[0]
+
+    def test_undo_restores_columns(self):
+        """Verify undo callbacks replayed backwards restore every row, across reallocations."""
+        store = _filled(20, 50, seed=3)
+        before = {word: store.get(word) for word in store.words}
+        undos = [
+            store.observe(f"w{i % 30}", 60 + i, 0.5, 5000.0 + i, "sentence", "sentence", "k",
+                          is_node=f"w{i % 30}" not in store)
+            for i in range(40)
+        ]
+        assert len(store) == 30
+        for undo in reversed(undos):
+            undo()
+        assert {word: store.get(word) for word in store.words} == before
+        assert len(store.node_rows()) == len(before)
+
+
+class TestGraphDecay:
+    """Tests for time-based decay in GraphIndex.nodes() and publish()."""
+
+    def test_decay_republishes_once_per_step(self, make_turn):
+        """Verify decayed nodes are re-published and the same clock step is a no-op."""
+        t0 = 1_699_999_800.0  # On the 600 s decay grid
+        state = SessionState()
+        index = GraphIndex(half_life_h=1.0, decay_step_s=600)
+        for i, word in enumerate(["bonjour", "merci", "fromage"]):
+            state.conversation_history.append(make_turn(i + 1, [(word, 0.8)], recorded_at=t0 if word != "fromage" else None))
+        state.turn = 4
+        index.sync(state.conversation_history)
+        index.publish(state, now=t0)
+        version = index.version
+
+        assert index.publish(state, now=t0 + 60)["version"] == version
+        delta = index.publish(state, now=t0 + HOUR)
+        assert delta["version"] != version
+        assert sorted(node["id"] for node in delta["nodes"]["updated"]) == ["bonjour", "merci"]
+        decayed = {node["id"]: node["mastery"] for node in index.nodes(state, now=t0 + HOUR)}
+        fresh = {node["id"]: node["mastery"] for node in index.nodes(state, now=t0)}
+        assert decayed["bonjour"] < fresh["bonjour"]
+        assert decayed["fromage"] == fresh["fromage"]
+        # No tutor scores: mastery is the learned value, whose recency term (0.10 × 0.76 at 3 turns) halved
+        assert np.isclose(fresh["bonjour"] - decayed["bonjour"], 0.10 * 0.76 * 0.5)
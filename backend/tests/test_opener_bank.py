@@ -0,0 +1,157 @@
+"""
+Tests for backend.services.opener_bank module.
+
+Verifies:
+- The built-in packs cover every tutor language, with a default opener
+  and one per frontend category
+- pick() prefers the category, falls back to the language default,
+  rotates variants by turn and returns None for unknown languages
+- Pack files are re-read when they change (checked at most every
+  OPENER_BANK_RECHECK_S); unchanged texts keep audio
+- prerender() synthesizes each reply and its sentences
+- Opener turns are answered over /ws/conversation without an LLM call,
+  except in mock mode
+"""
+
+import json
+
+import pytest
+
+from backend.routes import conversation
+from backend.services import opener_bank
+from backend.services.openai_service import _LANGUAGE_NAMES, OpenAIService
+from backend.services.opener_bank import _BUILTIN_BANK, OpenerBank, get_opener_bank
+
+_CATEGORIES = ("daily", "social", "travel", "work", "academic", "coding")
+
+
+def _write_pack(directory, language: str, openers: dict) -> None:
+    (directory / f"{language}.json").write_text(
+        json.dumps({"language": language, "openers": openers}), encoding="utf-8"
+    )
+
+
+class TestBuiltinPacks:
+    """Tests for the shipped opener packs."""
+
+    def test_every_language_and_category(self):
+        """Verify each tutor language has a default and a per-category opener."""
+        bank = OpenerBank.load(_BUILTIN_BANK)
+        assert bank.languages() == set(_LANGUAGE_NAMES)
+        for language in _LANGUAGE_NAMES:
+            assert bank.pick(language, None).category == "default"
+            for category in _CATEGORIES:
+                assert bank.pick(language, category).category == category
+
+
+class TestPick:
+    """Tests for OpenerBank.pick()."""
+
+    def test_category_default_and_rotation(self, tmp_path):
+        """Verify category first, default otherwise, variants rotated by turn."""
+        _write_pack(tmp_path, "fr", {
+            "default": [{"spoken_response": "Salut !"}, {"spoken_response": "Coucou !"}],
+            "Travel": [{"spoken_response": "Où vas-tu ?", "translation_hint": "Where are you going?"}],
+            "work": [{"spoken_response": "  "}],
+        })
+        bank = OpenerBank.load(tmp_path)
+        assert bank.pick("fr", "travel").translation_hint == "Where are you going?"
+        assert bank.pick("fr", "work").spoken_response == "Salut !"  # Empty entries skipped
+        assert [bank.pick("fr", "coding", turn).spoken_response for turn in (1, 2, 3)] == ["Coucou !", "Salut !", "Coucou !"]
+        assert bank.pick("xx", "travel") is None
+        assert bank.pick("fr", None).response("A2") == {
+            "spoken_response": "Salut !", "translation_hint": "", "user_level_assessment": "A2", "border_update": "",
+        }
+
+
+class TestReload:
+    """Tests for get_opener_bank() hot reload."""
+
+    def test_changed_pack_reloaded(self, tmp_path, monkeypatch):
+        """Verify an edited pack is picked up and unchanged entries keep their audio."""
+        monkeypatch.setattr(opener_bank, "OPENER_BANK_DIR", str(tmp_path))
+        monkeypatch.setattr(opener_bank, "OPENER_BANK_RECHECK_S", 0.0)
+        _write_pack(tmp_path, "fr", {"travel": [{"spoken_response": "Où vas-tu ?"}]})
+        bank = get_opener_bank()
+        assert get_opener_bank() is bank
+        assert bank.pick("fr", "travel").spoken_response == "Où vas-tu ?"
+        bank.pick("fr", "daily").tts = {"mode": "audio", "audio_base64": "AAAA"}
+
+        _write_pack(tmp_path, "fr", {"travel": [{"spoken_response": "Tu pars où ?"}]})
+        reloaded = get_opener_bank()
+        assert reloaded is not bank
+        assert reloaded.pick("fr", "travel").spoken_response == "Tu pars où ?"
+        assert reloaded.pick("fr", "daily").tts == {"mode": "audio", "audio_base64": "AAAA"}
+        assert reloaded.pick("fr", "travel").tts is None
+
+    def test_recheck_throttled(self, tmp_path, monkeypatch):
+        """Verify pack files are not re-checked again within the recheck interval."""
+        monkeypatch.setattr(opener_bank, "OPENER_BANK_DIR", str(tmp_path))
+        monkeypatch.setattr(opener_bank, "OPENER_BANK_RECHECK_S", 3600.0)
+        _write_pack(tmp_path, "fr", {"travel": [{"spoken_response": "Où vas-tu ?"}]})
+        bank = get_opener_bank()
+        _write_pack(tmp_path, "fr", {"travel": [{"spoken_response": "Tu pars où ?"}]})
+        assert get_opener_bank() is bank
+        monkeypatch.setattr(opener_bank, "OPENER_BANK_RECHECK_S", 0.0)
+        assert get_opener_bank().pick("fr", "travel").spoken_response == "Tu pars où ?"
+
+
+class TestPrerender:
+    """Tests for OpenerBank.prerender()."""
+
+    @pytest.mark.asyncio
+    async def test_prerender_reply_and_sentences(self, tmp_path):
+        """Verify each reply and each of its sentences is synthesized, for chosen languages only."""
+        _write_pack(tmp_path, "fr", {"default": [{"spoken_response": "Parlons de voyages. Où aimerais-tu aller ?"}]})
+        _write_pack(tmp_path, "es", {"default": [{"spoken_response": "¡Hola!"}]})
+        calls = []
+
+        class FakeTTS:
+            async def synthesize(self, text):
+                calls.append(text)
+                return {"mode": "audio", "audio_base64": "AAAA", "text": text}
+
+        bank = OpenerBank.load(tmp_path)
+        assert await bank.prerender(FakeTTS(), {"fr"}) == 1
+        assert calls == ["Parlons de voyages. Où aimerais-tu aller ?", "Parlons de voyages.", "Où aimerais-tu aller ?"]
+        assert bank.pick("fr", None).tts["text"] == calls[0]
+        assert bank.pick("es", None).tts is None
+
+
+class TestOpenerRoute:
+    """Tests for opener turns over /ws/conversation."""
+
+    def test_opener_skips_llm(self, test_client, monkeypatch):
+        """Verify an opener turn is answered from the bank and no LLM is called."""
+        async def no_llm(*args, **kwargs):
+            raise AssertionError("LLM should not be called for openers")
+
+        monkeypatch.setattr(conversation, "MOCK_MODE", False)
+        monkeypatch.setattr(OpenAIService, "generate_response_split", no_llm)
+        monkeypatch.setattr(OpenAIService, "generate_response_streaming", no_llm)
+        with test_client.websocket_connect("/ws/conversation?session_id=opener-test") as ws:
+            ws.send_json({
+                "type": "text", "content": "Allons-y !",
+                "mission_context": {"language": "fr", "category_focus": "travel", "is_opener": True},
+            })
+            while True:
+                msg = ws.receive_json()
+                if msg["type"] == "turn_response":
+                    break
+        response = msg["turn"]["response"]
+        assert response["spoken_response"] == get_opener_bank().pick("fr", "travel").spoken_response
+        assert response["user_vocabulary"] == []
+        assert msg["pedagogy"]["accepted_units"] == []
+
+    def test_mock_mode_keeps_scripted_reply(self, test_client):
+        """Verify mock mode answers an opener with its scripted turn, not the bank."""
+        with test_client.websocket_connect("/ws/conversation?session_id=opener-mock-test") as ws:
+            ws.send_json({
+                "type": "text", "content": "Allons-y !",
+                "mission_context": {"language": "fr", "category_focus": "travel", "is_opener": True},
+            })
+            while True:
+                msg = ws.receive_json()
+                if msg["type"] == "turn_response":
+                    break
+        assert msg["turn"]["response"]["spoken_response"] != get_opener_bank().pick("fr", "travel").spoken_response
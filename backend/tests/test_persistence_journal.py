@@ -0,0 +1,212 @@
+"""
+Tests for backend.services.persistence_journal module.
+
+Verifies:
+- record() returns without waiting on the backend writer
+- A burst of records for one profile is coalesced into one write
+- Failed writes stay pending (readable via pending()) and are retried
+- replay() re-queues only snapshots without a commit marker
+- A torn last journal line is skipped
+- Session saves go through the journal instead of the blocking writer
+- Resetting a non-resident profile loads it and records the reset
+- Reading a non-resident profile's state or graph loads it first
+"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from backend.services.persistence_journal import PersistenceJournal
+
+
+class _Writer:
+    """Blocking fake backend: records calls, can fail or block."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls: list[tuple[str, dict]] = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, profile_id: str, snapshot: dict) -> None:
+        self.release.wait(timeout=2)
+        if self.fail:
+            raise RuntimeError("backend down")
+        self.calls.append((profile_id, snapshot))
+
+
+def _journal(tmp_path, writer, **kwargs) -> PersistenceJournal:
+    kwargs.setdefault("flush_delay", 0.01)
+    kwargs.setdefault("retry_delay", 0.01)
+    return PersistenceJournal(tmp_path / "journal.jsonl", writer, **kwargs)
+
+
+def _lines(journal: PersistenceJournal) -> list[dict]:
+    return [json.loads(line) for line in journal.path.read_text().splitlines()]
+
+
+class TestWriteBehind:
+    """Tests for recording and flushing."""
+
+    @pytest.mark.asyncio
+    async def test_record_does_not_wait_for_writer(self, tmp_path):
+        """Verify record() returns while the backend write is still blocked."""
+        writer = _Writer()
+        writer.release.clear()
+        journal = _journal(tmp_path, writer)
+        journal.record("p1", {"turn": 2})
+        assert journal.pending("p1") == {"turn": 2}
+        assert writer.calls == []
+        writer.release.set()
+        assert await journal.drain()
+        assert writer.calls == [("p1", {"turn": 2})]
+        assert journal.pending("p1") is None
+        await journal.stop()
+
+    @pytest.mark.asyncio
+    async def test_burst_is_coalesced(self, tmp_path):
+        """Verify several records for one profile produce one write of the latest snapshot."""
+        writer = _Writer()
+        journal = _journal(tmp_path, writer)
+        for turn in range(1, 6):
+            journal.record("p1", {"turn": turn})
+        journal.record("p2", {"turn": 1})
+        await asyncio.sleep(0.1)
+        assert sorted(writer.calls, key=lambda c: c[0]) == [("p1", {"turn": 5}), ("p2", {"turn": 1})]
+        assert journal.stats["coalesced"] == 4
+        # Every record is journaled, followed by one commit per profile
+        entries = _lines(journal)
+        assert len([e for e in entries if "snapshot" in e]) == 6
+        assert {e["commit"] for e in entries if "commit" in e} == {"p1", "p2"}
+        await journal.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_write_is_retried(self, tmp_path):
+        """Verify a failing backend keeps the snapshot pending until a retry succeeds."""
+        writer = _Writer(fail=True)
+        journal = _journal(tmp_path, writer)
+        journal.record("p1", {"turn": 3})
+        await asyncio.sleep(0.05)
+        assert journal.stats["failures"] >= 1
+        assert journal.pending("p1") == {"turn": 3}
+        writer.fail = False
+        await asyncio.sleep(0.1)
+        assert writer.calls == [("p1", {"turn": 3})]
+        assert journal.backlog == 0
+        await journal.stop()
+
+    @pytest.mark.asyncio
+    async def test_compacts_when_idle(self, tmp_path):
+        """Verify the journal is truncated once everything is committed and it is large."""
+        journal = _journal(tmp_path, _Writer(), compact_bytes=10)
+        journal.record("p1", {"turn": 1})
+        assert await journal.drain()
+        assert journal.path.read_text() == ""
+
+
+class TestReplay:
+    """Tests for crash replay."""
+
+    @pytest.mark.asyncio
+    async def test_replays_uncommitted_only(self, tmp_path):
+        """Verify snapshots with a later commit marker are not written again."""
+        path = tmp_path / "journal.jsonl"
+        path.write_text("\n".join(json.dumps(e) for e in [
+            {"seq": 1, "profile_id": "p1", "snapshot": {"turn": 1}},
+            {"commit": "p1", "seq": 1},
+            {"seq": 2, "profile_id": "p2", "snapshot": {"turn": 4}},
+            {"seq": 3, "profile_id": "p2", "snapshot": {"turn": 5}},
+        ]) + "\n" + '{"seq": 4, "profile_id": "p1", "snap')
+        writer = _Writer()
+        journal = PersistenceJournal(path, writer, flush_delay=0.0)
+        assert await journal.replay() == 1
+        assert await journal.drain()
+        assert writer.calls == [("p2", {"turn": 5})]
+        # New records continue the sequence instead of reusing old numbers
+        journal.record("p3", {"turn": 1})
+        assert await journal.drain()
+        assert [e["seq"] for e in _lines(journal) if e.get("profile_id") == "p3"] == [4]
+        await journal.stop()
+
+
+class TestSessionPersistence:
+    """Tests for the session routes' use of the journal."""
+
+    @pytest.mark.asyncio
+    async def test_persist_session_only_records(self, monkeypatch):
+        """Verify _persist_session queues a snapshot and loads read it back before it is flushed."""
+        from backend.routes import session as session_routes
+        from backend.services.session_registry import LearnerSession
+
+        writer = _Writer()
+        writer.release.clear()
+        journal = session_routes.get_journal()
+        monkeypatch.setattr(journal, "_writer", writer)
+        learner = LearnerSession("s1", profile_id="p-journal")
+        learner.state.turn = 7
+
+        await session_routes._persist_session(learner)
+        assert writer.calls == []
+        assert journal.pending("p-journal")["header"]["turn"] == 7
+        assert session_routes._load_profile_state("p-journal") is None  # no history yet → fresh session
+        writer.release.set()
+        assert await journal.drain()
+        assert writer.calls[0][0] == "p-journal"
+        await journal.stop()
+
+    @pytest.mark.asyncio
+    async def test_reset_of_evicted_profile_is_persisted(self, monkeypatch, make_turn):
+        """Verify resetting a profile that is not resident loads it and records a reset."""
+        from backend.routes import session as session_routes
+        from backend.services.session_registry import LearnerSession
+        from backend.services.session_store import session_delta
+
+        writer = _Writer()
+        writer.release.clear()
+        journal = session_routes.get_journal()
+        monkeypatch.setattr(journal, "_writer", writer)
+        registry = session_routes.get_registry()
+        registry.discard("p-evicted")
+        saved = LearnerSession("old", profile_id="p-evicted")
+        saved.state.conversation_history = [make_turn(1), make_turn(2)]
+        journal.record("p-evicted", session_delta(saved))
+
+        assert await session_routes.session_reset("p-evicted") == {"status": "reset", "turn": 1}
+        assert journal.pending("p-evicted")["reset"] is True
+        assert session_routes._load_profile_state("p-evicted") is None  # Reload sees the reset
+        registry.discard("p-evicted")
+        writer.release.set()
+        assert await journal.drain()
+        await journal.stop()
+
+    @pytest.mark.asyncio
+    async def test_read_of_evicted_profile_loads_it(self, monkeypatch, make_turn):
+        """Verify state and graph reads of a non-resident profile return its saved history."""
+        from backend.routes import graph as graph_routes
+        from backend.routes import session as session_routes
+        from backend.services.session_registry import LearnerSession
+        from backend.services.session_store import session_delta
+
+        writer = _Writer()
+        writer.release.clear()
+        journal = session_routes.get_journal()
+        monkeypatch.setattr(journal, "_writer", writer)
+        registry = session_routes.get_registry()
+        registry.discard("p-read")
+        saved = LearnerSession("old", profile_id="p-read")
+        saved.state.conversation_history = [make_turn(1), make_turn(2)]
+        saved.state.turn = 3
+        journal.record("p-read", session_delta(saved))
+
+        state = await session_routes.session_state("p-read")
+        assert [t["turn_number"] for t in state["conversation_history"]] == [1, 2]
+        assert registry.get("p-read").profile_id == "p-read"
+        registry.discard("p-read")
+        delta = await graph_routes.graph_delta(session_id="p-read")
+        assert delta["version"] == 3
+        registry.discard("p-read")
+        writer.release.set()
+        assert await journal.drain()
+        await journal.stop()
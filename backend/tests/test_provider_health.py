@@ -0,0 +1,196 @@
+"""
+Tests for backend.services.provider_health module.
+
+Verifies:
+- Rolling histogram percentiles and slice expiry
+- Breaker opens on consecutive failures, error rate, and rate limits
+- Half-open allows a single probe; success closes, failure backs off
+- rank() routes by recent p95 and skips open breakers
+- Stage breakers ("groq:analysis") share their provider's settings
+- Services fail fast while their breaker is open
+"""
+
+import pytest
+
+from backend.services.provider_health import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    HealthRegistry,
+    ProviderHealth,
+    RollingHistogram,
+    classify_error,
+    health,
+)
+
+
+class TestRollingHistogram:
+    """Tests for latency percentiles."""
+
+    def test_percentiles(self):
+        """Verify p50/p95 land in the right log-spaced buckets."""
+        hist = RollingHistogram()
+        for _ in range(90):
+            hist.record(0.1, now=0.0)
+        for _ in range(10):
+            hist.record(2.0, now=0.0)
+        assert hist.percentile(0.5, now=0.0) == pytest.approx(0.1, rel=0.25)
+        assert hist.percentile(0.95, now=0.0) == pytest.approx(2.0, rel=0.25)
+
+    def test_old_slices_expire(self):
+        """Verify samples older than the window no longer count."""
+        hist = RollingHistogram(window=60.0, slices=6)
+        hist.record(5.0, now=0.0)
+        hist.record(0.1, now=30.0)
+        assert hist.count(now=30.0) == 2
+        assert hist.count(now=65.0) == 1
+        assert hist.percentile(0.99, now=65.0) == pytest.approx(0.1, rel=0.25)
+        assert hist.percentile(0.5, now=200.0) is None
+
+
+class TestBreaker:
+    """Tests for the circuit-breaker state machine."""
+
+    def test_consecutive_failures_open(self):
+        """Verify the breaker opens after the failure threshold and fails fast."""
+        ph = ProviderHealth("x", failure_threshold=3, open_s=10.0)
+        for _ in range(2):
+            ph.record_failure(now=0.0)
+        assert ph.state == CLOSED and ph.allow(now=0.0)
+        ph.record_failure(now=0.0)
+        assert ph.state == OPEN
+        assert not ph.allow(now=5.0)
+
+    def test_error_rate_opens(self):
+        """Verify interleaved failures trip the breaker via the error rate."""
+        ph = ProviderHealth("x", failure_threshold=100, min_calls=10, error_rate_threshold=0.5)
+        for i in range(10):
+            if i % 2:
+                ph.record_failure(now=float(i))
+            else:
+                ph.record_success(0.1, now=float(i))
+        assert ph.state == OPEN
+
+    def test_rate_limit_opens_immediately(self):
+        """Verify a single 429 opens the breaker for the rate-limit period."""
+        ph = ProviderHealth("x", rate_limit_open_s=300.0)
+        ph.record_failure("rate_limit", now=0.0)
+        assert ph.state == OPEN
+        assert not ph.available(now=299.0)
+        assert ph.available(now=301.0)
+
+    def test_half_open_single_probe_then_close(self):
+        """Verify one probe is allowed after the open period and success closes."""
+        ph = ProviderHealth("x", failure_threshold=1, open_s=10.0)
+        ph.record_failure(now=0.0)
+        assert ph.allow(now=11.0)
+        assert ph.state == HALF_OPEN
+        assert not ph.allow(now=11.5)
+        ph.record_success(0.2, now=12.0)
+        assert ph.state == CLOSED and ph.allow(now=12.0)
+
+    def test_failed_probe_backs_off(self):
+        """Verify a failed probe re-opens the breaker for twice as long."""
+        ph = ProviderHealth("x", failure_threshold=1, open_s=10.0)
+        ph.record_failure(now=0.0)
+        assert ph.allow(now=11.0)
+        ph.record_failure(now=11.0)
+        assert ph.state == OPEN
+        assert not ph.available(now=30.0)
+        assert ph.available(now=31.5)
+
+    def test_abandoned_probe_expires(self):
+        """Verify a cancelled probe does not block the provider forever."""
+        ph = ProviderHealth("x", failure_threshold=1, open_s=10.0, probe_timeout_s=5.0)
+        ph.record_failure(now=0.0)
+        assert ph.allow(now=11.0)
+        assert not ph.allow(now=12.0)
+        assert ph.allow(now=17.0)
+
+    def test_classify_error(self):
+        """Verify exceptions map to rate_limit / timeout / error."""
+        assert classify_error(RuntimeError("Error code: 429")) == "rate_limit"
+        assert classify_error(TimeoutError()) == "timeout"
+        assert classify_error(ValueError("bad")) == "error"
+
+
+class TestRouting:
+    """Tests for p95-based provider ranking."""
+
+    def test_rank_by_p95(self):
+        """Verify measured providers are ordered by p95, cold ones after."""
+        reg = HealthRegistry(min_samples=3)
+        for _ in range(3):
+            reg.get("groq").record_success(2.0)
+            reg.get("openai").record_success(0.3)
+        reg.get("backboard").record_success(0.1)
+        assert reg.rank(["groq", "backboard", "openai"]) == ["openai", "groq", "backboard"]
+
+    def test_rank_skips_open_breakers(self):
+        """Verify unavailable providers are dropped from the route."""
+        reg = HealthRegistry()
+        reg.get("groq").record_failure("rate_limit")
+        assert reg.rank(["groq", "openai"]) == ["openai"]
+
+    def test_unmeasured_keep_configured_order(self):
+        """Verify the configured order holds until there is data."""
+        assert HealthRegistry().rank(["edge_tts", "openai_tts"]) == ["edge_tts", "openai_tts"]
+
+    def test_stage_breakers_inherit_provider_settings(self):
+        """Verify "provider:stage" breakers use their provider's thresholds and cooldowns."""
+        reg = HealthRegistry()
+        reg.configure("groq", rate_limit_open_s=300.0)
+        stage = reg.get("groq:analysis")
+        assert stage.settings() == reg.get("groq").settings()
+        reg.configure("groq", open_s=20.0)
+        assert stage.open_s == 20.0
+        assert health.get("openai:analysis").rate_limit_open_s == health.get("openai").rate_limit_open_s == 30.0
+
+
+class TestServiceIntegration:
+    """Tests for services consulting the shared registry."""
+
+    @pytest.mark.asyncio
+    async def test_tts_skips_open_edge(self):
+        """Verify TTS goes straight to OpenAI while Edge's breaker is open."""
+        from backend.services.tts_service import TTSService
+
+        svc = TTSService()
+        svc.mock_mode = False
+
+        async def edge(text):
+            raise AssertionError("edge should be skipped")
+            yield b""
+
+        async def openai_audio(text):
+            return b"mp3"
+
+        svc._edge_stream = edge
+        svc._openai_audio = openai_audio
+        health.get("edge_tts").record_failure("rate_limit")
+        assert [c async for c in svc.stream("Bonjour")] == [b"mp3"]
+
+    @pytest.mark.asyncio
+    async def test_edge_failures_open_breaker(self):
+        """Verify repeated Edge failures open its breaker."""
+        from backend.services.tts_service import TTSService
+
+        svc = TTSService()
+        svc.mock_mode = False
+
+        async def edge(text):
+            raise RuntimeError("edge down")
+            yield b""
+
+        svc._edge_stream = edge
+        for _ in range(3):
+            assert await svc._edge_synthesize("Bonjour") is None
+        assert health.get("edge_tts").state == OPEN
+
+    def test_providers_endpoint(self, test_client):
+        """Verify /health/providers reports breaker state per provider."""
+        health.get("groq").record_success(0.4)
+        body = test_client.get("/health/providers").json()
+        assert body["groq"]["state"] == CLOSED
+        assert body["groq"]["samples"] == 1
+        assert "speechmatics" in body
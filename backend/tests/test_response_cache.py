@@ -0,0 +1,155 @@
+"""
+Tests for backend.services.response_cache and its use by OpenAIService.
+
+Verifies:
+- Exact keys ignore case, spacing and surrounding punctuation; near keys
+  also ignore accents and word order; context always separates keys
+- Entries expire after the TTL, the store is LRU-bounded, long inputs
+  are not cached and hits are copies
+- A repeated input with the same prompt context skips the provider and
+  still commits the exchange to history; sessions can opt out
+- In two-stage mode both the spoken reply and the analysis are cached
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services import openai_service
+from backend.services.hedging import HedgingScheduler
+from backend.services.openai_service import OpenAIService, _response_cache
+from backend.services.provider_health import HealthRegistry
+from backend.services.response_cache import ResponseCache, exact_text, token_set
+
+_CTX = ["fr", "reply", ""]
+
+
+class _CountingOpenAI:
+    """Fake completions API answering each stage with a fixed body."""
+
+    def __init__(self, reply: dict, analysis: dict | None = None):
+        self.reply = reply
+        self.analysis = analysis or {}
+        self.calls = []
+
+    async def create(self, **kwargs):
+        is_analysis = kwargs["messages"][0]["content"].startswith("You analyze")
+        self.calls.append("analysis" if is_analysis else "reply")
+        body = self.analysis if is_analysis else self.reply
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(body)))])
+
+
+def _service(fake: _CountingOpenAI) -> OpenAIService:
+    svc = OpenAIService()
+    svc._client = SimpleNamespace(chat=SimpleNamespace(completions=fake))
+    svc._model = "fake"
+    return svc
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setattr(openai_service, "_hedger", HedgingScheduler(default_delay=5.0, health=HealthRegistry()))
+
+
+class TestKeys:
+    """Tests for text normalization and keys."""
+
+    def test_normalization(self):
+        """Verify exact text and token sets fold what does not change the meaning."""
+        assert exact_text("  Bonjour  ! ") == exact_text("bonjour") == "bonjour"
+        assert exact_text("Ça va ?") == "ça va"
+        assert token_set("Ça va ?") == token_set("va, ca") == ("ca", "va")
+
+    def test_tiers_and_context(self):
+        """Verify near-duplicates hit the near tier and a different context misses."""
+        cache = ResponseCache()
+        cache.put(cache.keys(_CTX, "Ça va ?"), {"spoken_response": "Oui !"}, "raw")
+        assert cache.get(cache.keys(_CTX, "ça va")) == ({"spoken_response": "Oui !"}, "raw")
+        assert cache.get(cache.keys(_CTX, "ca va")) is not None
+        assert cache.get(cache.keys(["es", "reply", ""], "ça va")) is None
+        assert cache.get(cache.keys([*_CTX, "user:Bonjour"], "ça va")) is None
+        assert cache.get(cache.keys(_CTX, "ça va bien")) is None
+        assert (cache.stats["exact_hits"], cache.stats["near_hits"], cache.stats["misses"]) == (1, 1, 3)
+
+
+class TestBounds:
+    """Tests for TTL, size bound and copies."""
+
+    def test_ttl_and_lru(self):
+        """Verify expired entries miss and the oldest entry is evicted first."""
+        now = [0.0]
+        cache = ResponseCache(max_entries=2, ttl_s=10.0, clock=lambda: now[0])
+        for text in ("un", "deux"):
+            cache.put(cache.keys(_CTX, text), {"t": text}, "")
+        assert cache.get(cache.keys(_CTX, "un")) is not None  # "deux" is now least recent
+        cache.put(cache.keys(_CTX, "trois"), {"t": "trois"}, "")
+        assert cache.get(cache.keys(_CTX, "deux")) is None
+        now[0] = 10.0
+        assert cache.get(cache.keys(_CTX, "un")) is None
+        assert cache.stats["expired"] == 1 and len(cache) == 1
+
+    def test_long_input_and_copies(self):
+        """Verify long inputs get no key and hits can be mutated safely."""
+        cache = ResponseCache(max_chars=10)
+        assert cache.keys(_CTX, "je voudrais un café") is None
+        assert cache.keys(_CTX, " !? ") is None
+        keys = cache.keys(_CTX, "merci")
+        cache.put(keys, {"user_vocabulary": ["merci"]}, "")
+        cache.get(keys)[0]["user_vocabulary"].append("x")
+        assert cache.get(keys)[0] == {"user_vocabulary": ["merci"]}
+
+
+class TestServiceCache:
+    """Tests for the cache inside OpenAIService."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_skips_provider(self, scheduler):
+        """Verify a second learner saying the same thing gets the cached reply and history."""
+        reply = {"spoken_response": "Bonjour ! Ça va ?", "translation_hint": "Hello! How are you?"}
+        fake = _CountingOpenAI(reply)
+        first, second = _service(fake), _service(fake)
+        spoken_seen = []
+
+        async def on_spoken(text):
+            spoken_seen.append(text)
+
+        result, spoken = await first._real_generate_streaming("Bonjour")
+        cached, cached_spoken = await second._real_generate_streaming("bonjour !", on_spoken_ready=on_spoken)
+        await asyncio.sleep(0)
+        assert fake.calls == ["reply"]
+        assert cached == result and cached_spoken == spoken == "Bonjour ! Ça va ?"
+        assert spoken_seen == [spoken]
+        assert second.history.messages == [
+            {"role": "user", "content": "bonjour !"},
+            {"role": "assistant", "content": "Bonjour ! Ça va ?"},
+        ]
+        # The history window changed — same words, different prompt
+        await second._real_generate_streaming("Bonjour")
+        assert fake.calls == ["reply", "reply"]
+
+    @pytest.mark.asyncio
+    async def test_session_opt_out(self, scheduler):
+        """Verify a session with caching off neither reads nor writes the cache."""
+        fake = _CountingOpenAI({"spoken_response": "Salut !"})
+        svc = _service(fake)
+        svc.cache_responses = False
+        await svc._real_generate("Salut")
+        assert len(_response_cache) == 0
+        await _service(fake)._real_generate("Salut")
+        svc.history.clear()
+        await svc._real_generate("Salut")
+        assert fake.calls == ["reply", "reply", "reply"]
+
+    @pytest.mark.asyncio
+    async def test_split_caches_spoken_and_analysis(self, scheduler):
+        """Verify two-stage turns reuse both the spoken reply and the analysis."""
+        analysis = {"corrected_form": "", "user_vocabulary": ["merci"], "mastery_scores": {"merci": 0.6}}
+        fake = _CountingOpenAI({"spoken_response": "De rien !", "translation_hint": "You're welcome!"}, analysis)
+        _, _, task = await _service(fake)._real_generate_split("Merci")
+        assert await task == analysis
+        reply, spoken, task = await _service(fake)._real_generate_split("merci.")
+        assert spoken == "De rien !" and await task == analysis
+        assert sorted(fake.calls) == ["analysis", "reply"]
+        assert _response_cache.snapshot()["hit_rate"] == 0.5
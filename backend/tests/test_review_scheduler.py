@@ -0,0 +1,123 @@
+"""
+Tests for backend.services.review_scheduler module.
+
+Verifies:
+- SM-2 intervals: learning step, graduating interval, then interval × ease;
+  a shaky use resets the card and counts a lapse
+- due() returns the k earliest-due cards (same as sorting the whole deck),
+  skips stale heap entries and leaves the queue intact
+- A turn's units are graded once, even when the late analysis adds more
+- Loading a session replays its history into the deck
+- The /api/graph/due endpoint lists the session's due units
+"""
+
+import random
+
+from backend.models import SessionState, TutorResponse
+from backend.routes.session import get_session
+from backend.services.review_scheduler import ReviewScheduler, grade
+from backend.services.session_registry import LearnerSession
+
+MIN = 60.0
+DAY = 86400.0
+
+
+class TestReviewScheduling:
+    """Tests for ReviewScheduler.review()."""
+
+    def test_sm2_intervals(self):
+        """Verify confident uses step 10 min → 1 day → interval × ease."""
+        deck = ReviewScheduler(learning_step_s=10 * MIN, graduating_interval_s=DAY)
+        card = deck.review("bonjour", 5, now=0.0)
+        assert card.due == 10 * MIN and card.reps == 1
+        card = deck.review("bonjour", 5, now=card.due)
+        assert card.interval_s == DAY
+        ease = card.ease
+        card = deck.review("Bonjour", 4, now=card.due)
+        assert card.interval_s == DAY * ease and len(deck) == 1
+
+    def test_lapse_resets(self):
+        """Verify a failed recall resets to the learning step and lowers ease."""
+        deck = ReviewScheduler(learning_step_s=10 * MIN, graduating_interval_s=DAY)
+        for now in (0.0, 10 * MIN):
+            card = deck.review("merci", 5, now=now)
+        ease = card.ease
+        card = deck.review("merci", grade(0.4), now=DAY)
+        assert (card.reps, card.lapses, card.interval_s) == (0, 1, 10 * MIN)
+        assert card.ease < ease
+
+    def test_grade_thresholds(self):
+        """Verify confidence maps onto SM-2 qualities with < 0.6 failing."""
+        assert [grade(c) for c in (0.95, 0.8, 0.65, 0.5)] == [5, 4, 3, 2]
+
+
+class TestDueQueue:
+    """Tests for ReviewScheduler.due()."""
+
+    def test_matches_sorted_deck(self):
+        """Verify due() equals the k earliest due cards of a full sort, across many re-reviews."""
+        rng = random.Random(7)
+        deck = ReviewScheduler(learning_step_s=10 * MIN, graduating_interval_s=DAY)
+        now = 0.0
+        for _ in range(3000):
+            now += rng.uniform(0, 5 * MIN)
+            deck.review(f"mot{rng.randrange(400)}", rng.choice([2, 3, 4, 5]), now)
+        assert len(deck._heap) <= 2 * len(deck) + 64
+        for query in (now, now + DAY, now + 30 * DAY):
+            expected = sorted((c for c in deck.cards.values() if c.due <= query), key=lambda c: (c.due, c.seq))[:7]
+            assert deck.due(query, k=7) == expected
+            assert deck.due(query, k=7) == expected  # Queue left intact
+
+    def test_nothing_due(self):
+        """Verify an empty or not-yet-due deck returns nothing."""
+        deck = ReviewScheduler(learning_step_s=10 * MIN)
+        assert deck.due(0.0) == []
+        deck.review("salut", 5, now=0.0)
+        assert deck.due(5 * MIN) == []
+        assert [c.label for c in deck.due(10 * MIN)] == ["salut"]
+
+
+class TestReviewTurns:
+    """Tests for review_turn() and session replay."""
+
+    def test_turn_graded_once(self, make_turn):
+        """Verify re-feeding a turn only grades the units added since."""
+        deck = ReviewScheduler()
+        turn = make_turn(1, [("bonjour", 0.9)], recorded_at=1000.0)
+        assert deck.review_turn(turn) == 1
+        turn.response = TutorResponse(**{
+            **turn.response.model_dump(),
+            "validated_user_units": turn.response.model_dump()["validated_user_units"] + [
+                {"text": "merci", "kind": "word", "source": "as_said", "confidence": 0.5, "is_accepted": True},
+                {"text": "pas", "kind": "word", "source": "as_said", "confidence": 0.9, "is_accepted": False},
+            ],
+        })
+        assert deck.review_turn(turn) == 1
+        assert deck.cards["bonjour"].reps == 1
+        assert deck.cards["merci"].reps == 0 and "pas" not in deck.cards
+
+    def test_load_state_replays_history(self, make_turn):
+        """Verify a loaded session's deck reflects its history."""
+        session = LearnerSession("srs-load")
+        state = SessionState(conversation_history=[
+            make_turn(1, [("bonjour", 0.9)], recorded_at=1000.0),
+            make_turn(2, [("bonjour", 0.9)], recorded_at=2000.0),
+        ])
+        session.load_state(state)
+        card = session.reviews.cards["bonjour"]
+        assert card.reps == 2 and card.due == 2000.0 + session.reviews.graduating_interval_s
+
+
+class TestDueRoute:
+    """Tests for the /api/graph/due endpoint."""
+
+    def test_due_endpoint(self, test_client):
+        """Verify the endpoint lists due units, most overdue first."""
+        session = get_session("srs-route")
+        session.reviews.review("bonjour", 5, now=0.0)
+        session.reviews.review("merci", 5, now=100.0)
+        res = test_client.get("/api/graph/due", params={"session_id": "srs-route", "k": 1})
+        assert res.status_code == 200
+        body = res.json()
+        assert [item["label"] for item in body] == ["bonjour"]
+        assert body[0]["reps"] == 1 and body[0]["overdue_s"] > 0
@@ -0,0 +1,175 @@
+"""
+Tests for backend.services.session_registry module.
+
+Verifies:
+- Each session id gets isolated state and tutor services
+- LRU cap evicts the least recently used unpinned session
+- Idle TTL eviction persists sessions with a profile
+- Pinned sessions (open WebSockets) are never evicted
+- Profile sessions are loaded through the loader on acquire, off the event
+  loop, and concurrent reloads share one session
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from backend.models import SessionState
+from backend.services.session_registry import DEFAULT_SESSION_ID, SessionRegistry
+
+
+class TestSessionIsolation:
+    """Tests for per-learner isolation."""
+
+    def test_default_session_when_no_id(self):
+        """Verify calls without an id share the default session."""
+        registry = SessionRegistry()
+        assert registry.get().session_id == DEFAULT_SESSION_ID
+        assert registry.get() is registry.get(None)
+
+    def test_sessions_have_separate_state(self, make_turn):
+        """Verify two learners never share history or services."""
+        registry = SessionRegistry()
+        a = registry.get("alice")
+        b = registry.get("bob")
+        a.state.conversation_history.append(make_turn(1, user_said="Bonjour"))
+        assert b.state.conversation_history == []
+        assert a.openai_service is not b.openai_service
+        assert a.backboard_service is not b.backboard_service
+
+    def test_reset_keeps_profile(self):
+        """Verify reset clears state but keeps the profile binding."""
+        registry = SessionRegistry()
+        session = registry.get("alice")
+        session.profile_id = "alice"
+        session.state.turn = 4
+        session.reset()
+        assert session.state.turn == 1
+        assert session.profile_id == "alice"
+
+
+class TestSessionEviction:
+    """Tests for LRU cap and idle TTL eviction."""
+
+    def test_cap_evicts_least_recently_used(self):
+        """Verify the oldest session is dropped when the cap is exceeded."""
+        registry = SessionRegistry(max_sessions=2)
+        registry.get("a")
+        registry.get("b")
+        registry.get("a")  # refresh a → b is now LRU
+        registry.get("c")
+        assert "a" in registry
+        assert "b" not in registry
+        assert "c" in registry
+
+    def test_cap_skips_pinned_sessions(self):
+        """Verify sessions with open connections survive the cap."""
+        registry = SessionRegistry(max_sessions=1)
+        pinned = registry.get("a")
+        pinned.connections = 1
+        registry.get("b")
+        assert "a" in registry
+
+    @pytest.mark.asyncio
+    async def test_idle_ttl_persists_and_evicts(self):
+        """Verify idle sessions are persisted before being dropped."""
+        persisted = []
+
+        async def persist(session):
+            persisted.append(session.session_id)
+
+        registry = SessionRegistry(idle_ttl=60, persist=persist)
+        session = registry.get("alice")
+        session.profile_id = "alice"
+        registry.get("bob")
+        evicted = registry.evict_idle(now=session.last_active + 120)
+        await registry.drain()
+        assert evicted == 2
+        assert len(registry) == 0
+        # bob has no profile → nothing to persist
+        assert persisted == ["alice"]
+
+    def test_idle_ttl_keeps_pinned(self):
+        """Verify a connected session is not evicted while idle."""
+        registry = SessionRegistry(idle_ttl=1)
+        session = registry.get("alice")
+        session.connections = 1
+        assert registry.evict_idle(now=session.last_active + 100) == 0
+        assert "alice" in registry
+
+
+class TestSessionAcquire:
+    """Tests for loading profile sessions through the registry."""
+
+    @pytest.mark.asyncio
+    async def test_acquire_loads_profile_history(self, make_turn):
+        """Verify a profile's history is loaded and replay-ready."""
+        loaded = SessionState(conversation_history=[make_turn(1, user_said="Bonjour")], turn=2)
+        registry = SessionRegistry(loader=lambda pid: loaded if pid == "p1" else None)
+        session = await registry.acquire(profile_id="p1")
+        assert session.session_id == "p1"
+        assert session.state.turn == 2
+        assert len(session.state.conversation_history) == 1
+
+    @pytest.mark.asyncio
+    async def test_acquire_reuses_resident_session(self):
+        """Verify the loader runs only on a miss."""
+        calls = []
+
+        def loader(pid):
+            calls.append(pid)
+            return None
+
+        registry = SessionRegistry(loader=loader)
+        first = await registry.acquire(profile_id="p1")
+        second = await registry.acquire("p1", profile_id="p1")
+        assert first is second
+        assert calls == ["p1"]
+
+    @pytest.mark.asyncio
+    async def test_acquire_after_eviction_waits_for_persist(self):
+        """Verify a reload sees the data written by the eviction persist."""
+        store: dict[str, SessionState] = {}
+
+        async def persist(session):
+            store[session.profile_id] = session.state
+
+        registry = SessionRegistry(max_sessions=1, persist=persist, loader=store.get)
+        session = await registry.acquire(profile_id="p1")
+        session.state.turn = 7
+        await registry.acquire(profile_id="p2")
+        reloaded = await registry.acquire(profile_id="p1")
+        assert reloaded is not session
+        assert reloaded.state.turn == 7
+
+    @pytest.mark.asyncio
+    async def test_loader_runs_off_the_event_loop(self):
+        """Verify the blocking loader runs in a worker thread."""
+        threads = []
+
+        def loader(pid):
+            threads.append(threading.get_ident())
+            return None
+
+        registry = SessionRegistry(loader=loader)
+        await registry.acquire(profile_id="p1")
+        assert threads and threads[0] != threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_reload_returns_one_session(self):
+        """Verify two acquires waiting on the same eviction end up with one session."""
+        release = asyncio.Event()
+
+        async def persist(session):
+            await release.wait()
+
+        registry = SessionRegistry(max_sessions=1, persist=persist, loader=lambda pid: None)
+        await registry.acquire(profile_id="p1")
+        await registry.acquire(profile_id="p2")  # Evicts p1; its persist is pending
+        first = asyncio.create_task(registry.acquire(profile_id="p1"))
+        second = asyncio.create_task(registry.acquire(profile_id="p1"))
+        await asyncio.sleep(0)
+        release.set()
+        assert await first is await second
+        await registry.drain()
@@ -0,0 +1,199 @@
+"""
+Tests for backend.services.session_store module.
+
+Verifies:
+- A save sends only new turns (plus rewritten dirty ones) and changed mastery
+- A reset is detected and clears earlier turns when deltas are merged
+- apply_delta overlays a pending delta on loaded session data
+- Legacy single-row sessions convert to an equivalent delta
+- The session routes queue deltas and reload them before they are flushed
+- Only the loaded tail is resident; older turns are paged in on demand
+"""
+
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from backend.models import ConversationTurn, TutorResponse
+from backend.services.session_registry import LearnerSession
+from backend.services.session_store import (
+    apply_delta,
+    legacy_delta,
+    mastery_rows,
+    merge_deltas,
+    session_delta,
+    turn_rows,
+)
+
+
+def _add_turn(session: LearnerSession, n: int, mastery: dict | None = None) -> None:
+    response = TutorResponse(
+        spoken_response=f"Réponse {n}", translation_hint="", user_level_assessment="A1",
+        border_update="", mastery_scores=mastery or {},
+    )
+    session.state.conversation_history.append(ConversationTurn(turn_number=n, user_said=f"Phrase {n}", response=response))
+    session.state.mastery_scores.update(response.mastery_scores)
+    session.state.turn = n + 1
+
+
+class TestSessionDelta:
+    """Tests for session_delta()."""
+
+    def test_only_new_turns_and_changed_mastery(self):
+        """Verify the second save carries only the new turns and one mastery key."""
+        session = LearnerSession("s", profile_id="p")
+        _add_turn(session, 1, {"bonjour": 0.5})
+        first = session_delta(session)
+        assert list(first["turns"]) == ["1"]
+        assert first["mastery"] == {"bonjour": 0.5}
+
+        _add_turn(session, 2, {"café": 0.3})
+        _add_turn(session, 3, {"bonjour": 0.5})
+        second = session_delta(session)
+        assert sorted(second["turns"]) == ["2", "3"]
+        assert second["mastery"] == {"café": 0.3}
+        assert second["header"] == {"level": "A1", "turn": 4, "turn_count": 3}
+        assert not second["reset"]
+
+        third = session_delta(session)
+        assert third["turns"] == {}
+        assert third["mastery"] == {}
+
+    def test_dirty_turns_resent(self):
+        """Verify an already-saved turn rewritten by a late analysis is sent again, once."""
+        session = LearnerSession("s", profile_id="p")
+        for n in (1, 2, 3):
+            _add_turn(session, n)
+        session_delta(session)
+        session.state.conversation_history[1].response.translation_hint = "Analysed"
+        session.dirty_turns.add(2)
+        _add_turn(session, 4)
+        delta = session_delta(session)
+        assert sorted(delta["turns"]) == ["2", "4"]
+        assert delta["turns"]["2"]["response"]["translation_hint"] == "Analysed"
+        assert session_delta(session)["turns"] == {}
+
+    def test_reset_detected(self):
+        """Verify a shrunken history produces a reset delta."""
+        session = LearnerSession("s", profile_id="p")
+        _add_turn(session, 1, {"bonjour": 0.5})
+        session_delta(session)
+        session.reset()
+        delta = session_delta(session)
+        assert delta["reset"]
+        assert delta["turns"] == {}
+
+    def test_rows(self):
+        """Verify deltas map to one row per turn and per mastery key."""
+        session = LearnerSession("s", profile_id="p")
+        _add_turn(session, 1, {"bonjour": 0.5, "café": 0.2})
+        delta = session_delta(session)
+        assert [r["turn_number"] for r in turn_rows("p", delta)] == [1]
+        assert sorted(r["key"] for r in mastery_rows("p", delta)) == ["bonjour", "café"]
+
+
+class TestMergeAndApply:
+    """Tests for merge_deltas() and apply_delta()."""
+
+    def test_merge_unions_turns_and_mastery(self):
+        """Verify merged deltas keep every turn and the newest header/scores."""
+        a = {"header": {"turn": 2}, "turns": {"1": {"turn_number": 1}}, "mastery": {"x": 0.1}, "reset": False}
+        b = {"header": {"turn": 3}, "turns": {"2": {"turn_number": 2}}, "mastery": {"x": 0.4}, "reset": False}
+        merged = merge_deltas(a, b)
+        assert sorted(merged["turns"]) == ["1", "2"]
+        assert merged["mastery"] == {"x": 0.4}
+        assert merged["header"] == {"turn": 3}
+
+    def test_reset_drops_older_turns(self):
+        """Verify a reset delta replaces everything queued before it."""
+        a = {"header": {"turn": 5}, "turns": {"4": {"turn_number": 4}}, "mastery": {"x": 0.1}, "reset": False}
+        b = {"header": {"turn": 1}, "turns": {}, "mastery": {}, "reset": True}
+        assert merge_deltas(a, b) == b
+        c = {"header": {"turn": 2}, "turns": {"1": {"turn_number": 1}}, "mastery": {}, "reset": False}
+        assert merge_deltas(b, c)["reset"]
+
+    def test_apply_overlays_loaded_data(self):
+        """Verify a pending delta replaces rewritten turns and appends new ones."""
+        loaded = {
+            "level": "A1", "turn": 3, "mastery_scores": {"x": 0.1},
+            "conversation_history": [{"turn_number": 1, "v": "old"}, {"turn_number": 2, "v": "old"}],
+        }
+        delta = {
+            "header": {"level": "A2", "turn": 4, "turn_count": 3},
+            "turns": {"2": {"turn_number": 2, "v": "new"}, "3": {"turn_number": 3, "v": "new"}},
+            "mastery": {"y": 0.5}, "reset": False,
+        }
+        data = apply_delta(loaded, delta)
+        assert [t["v"] for t in data["conversation_history"]] == ["old", "new", "new"]
+        assert data["mastery_scores"] == {"x": 0.1, "y": 0.5}
+        assert (data["level"], data["turn"]) == ("A2", 4)
+
+    def test_legacy_row_round_trips(self):
+        """Verify a format-1 row converts to a delta that reloads identically."""
+        row = {
+            "level": "A2", "turn": 3, "mastery_scores": {"x": 0.4},
+            "conversation_history": [{"turn_number": 1}, {"turn_number": 2}],
+        }
+        assert apply_delta(None, legacy_delta(row)) == row
+
+
+class TestSessionRoutesDeltas:
+    """Tests for the session routes' delta persistence."""
+
+    @pytest.mark.asyncio
+    async def test_pending_delta_reloads(self, monkeypatch):
+        """Verify a queued delta is coalesced and visible to the loader before any flush."""
+        from backend.routes import session as session_routes
+
+        journal = session_routes.get_journal()
+        writes = []
+        monkeypatch.setattr(journal, "_writer", lambda profile_id, delta: writes.append(delta))
+        learner = LearnerSession("s", profile_id="p-delta")
+        _add_turn(learner, 1, {"bonjour": 0.5})
+        await session_routes._persist_session(learner)
+        _add_turn(learner, 2, {"café": 0.3})
+        await session_routes._persist_session(learner)
+
+        state = session_routes._load_profile_state("p-delta")
+        assert [t.turn_number for t in state.conversation_history] == [1, 2]
+        assert state.mastery_scores == {"bonjour": 0.5, "café": 0.3}
+
+        assert await journal.drain()
+        assert len(writes) == 1
+        assert sorted(writes[0]["turns"]) == ["1", "2"]
+        await journal.stop()
+
+    @pytest.mark.asyncio
+    async def test_tail_load_and_history_paging(self, monkeypatch, make_turn):
+        """Verify a tail-loaded session keeps the full turn count and pages older turns from storage."""
+        from backend.routes import session as session_routes
+
+        stored = [make_turn(n).model_dump() for n in range(1, 11)]
+
+        def load_turns(profile_id, before=None, limit=50):
+            older = [t for t in stored if before is None or t["turn_number"] < before]
+            return older[-limit:]
+
+        fake = SimpleNamespace(
+            load_session=lambda profile_id: {
+                "level": "A1", "turn": 11, "mastery_scores": {},
+                "conversation_history": stored[-3:], "earlier_turns": 7,
+            },
+            load_turns=load_turns,
+        )
+        monkeypatch.setitem(sys.modules, "backend.services.supabase_service", fake)
+        registry = session_routes.get_registry()
+        registry.discard("p-tail")
+        learner = await registry.acquire("p-tail", profile_id="p-tail")
+        assert [t.turn_number for t in learner.state.conversation_history] == [8, 9, 10]
+        assert learner.state.earlier_turns == 7
+
+        page = await session_routes.session_history("p-tail", limit=5)
+        assert [t["turn_number"] for t in page["turns"]] == [6, 7, 8, 9, 10]
+        page = await session_routes.session_history("p-tail", before=6, limit=5)
+        assert [t["turn_number"] for t in page["turns"]] == [1, 2, 3, 4, 5]
+
+        _add_turn(learner, 11)
+        assert session_delta(learner)["header"]["turn_count"] == 11
+        registry.discard("p-tail")
@@ -0,0 +1,172 @@
+"""
+Tests for backend.services.speechmatics_rt module (warm RT session pool).
+
+Runs against the local fake RT server in fake_speechmatics_rt.py.
+
+Verifies:
+- Transcription over the async-native RT protocol client; a failing audio
+  sender fails it immediately
+- Warm sessions skip the handshake on the turn path (measured)
+- Sessions are keyed by language
+- Dead/stale idle sessions are recycled by the health check
+- Failed connects are retried with backoff
+"""
+
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("websockets")
+
+from backend.services.speechmatics_rt import RealtimeError, RealtimeSessionPool
+from backend.tests.fake_speechmatics_rt import FakeSpeechmaticsRT
+
+
+async def _chunks(n: int = 4, size: int = 3200):
+    for _ in range(n):
+        yield b"\x00" * size
+
+
+async def _wait_warm(pool: RealtimeSessionPool, language: str, count: int = 1) -> None:
+    for _ in range(200):
+        if pool.idle_count(language) >= count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("pool never warmed")
+
+
+class TestRealtimeTranscription:
+    """Tests for the RT protocol client."""
+
+    @pytest.mark.asyncio
+    async def test_cold_transcribe_returns_transcript(self):
+        """Verify a transcript comes back with an empty pool."""
+        async with FakeSpeechmaticsRT(transcript="je suis content") as server:
+            pool = RealtimeSessionPool(server.url, min_idle=0)
+            result = await pool.transcribe("fr", _chunks())
+            await pool.close()
+        assert result == "je suis content"
+        assert server.audio_bytes == 4 * 3200
+        assert pool.stats["cold_starts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_session_is_single_use(self):
+        """Verify a used session cannot be reused for a second utterance."""
+        async with FakeSpeechmaticsRT() as server:
+            pool = RealtimeSessionPool(server.url, min_idle=0)
+            session = await pool.acquire("fr")
+            await session.transcribe(_chunks(1))
+            with pytest.raises(RealtimeError):
+                await session.transcribe(_chunks(1))
+            await pool.close()
+
+
+    @pytest.mark.asyncio
+    async def test_sender_failure_raises_immediately(self):
+        """Verify a failing audio source fails the transcription at once, not at the caller's timeout."""
+        async def failing_chunks():
+            yield b"\x00" * 3200
+            raise RuntimeError("decoder failed")
+
+        async with FakeSpeechmaticsRT() as server:
+            pool = RealtimeSessionPool(server.url, min_idle=0)
+            with pytest.raises(RuntimeError, match="decoder failed"):
+                await asyncio.wait_for(pool.transcribe("fr", failing_chunks()), timeout=2)
+            await pool.close()
+
+class TestWarmPool:
+    """Tests for warm session reuse and handshake savings."""
+
+    @pytest.mark.asyncio
+    async def test_warm_session_skips_handshake(self):
+        """Verify a warm acquire is much faster than a cold handshake."""
+        async with FakeSpeechmaticsRT(handshake_delay=0.15) as server:
+            cold_pool = RealtimeSessionPool(server.url, min_idle=0)
+            t0 = time.perf_counter()
+            await cold_pool.transcribe("fr", _chunks())
+            cold_s = time.perf_counter() - t0
+            await cold_pool.close()
+
+            pool = RealtimeSessionPool(server.url, min_idle=1)
+            pool.prewarm("fr")
+            await _wait_warm(pool, "fr")
+            t0 = time.perf_counter()
+            await pool.transcribe("fr", _chunks())
+            warm_s = time.perf_counter() - t0
+            await pool.close()
+
+        assert pool.stats["warm_hits"] == 1
+        assert cold_s >= 0.15
+        assert warm_s < cold_s - 0.1
+
+    @pytest.mark.asyncio
+    async def test_pool_replenishes_after_use(self):
+        """Verify a replacement session is warmed after each acquire."""
+        async with FakeSpeechmaticsRT() as server:
+            pool = RealtimeSessionPool(server.url, min_idle=1)
+            pool.prewarm("fr")
+            await _wait_warm(pool, "fr")
+            await pool.transcribe("fr", _chunks(1))
+            await _wait_warm(pool, "fr")
+            await pool.transcribe("fr", _chunks(1))
+            await pool.close()
+        assert pool.stats["warm_hits"] == 2
+        assert pool.stats["cold_starts"] == 0
+
+    @pytest.mark.asyncio
+    async def test_sessions_are_keyed_by_language(self):
+        """Verify a Spanish utterance does not take a French session."""
+        async with FakeSpeechmaticsRT() as server:
+            pool = RealtimeSessionPool(server.url, min_idle=1)
+            pool.prewarm("fr")
+            await _wait_warm(pool, "fr")
+            await pool.transcribe("es", _chunks(1))
+            await pool.close()
+        assert pool.stats["cold_starts"] == 1
+        assert "es" in server.languages
+
+
+class TestPoolHealth:
+    """Tests for health checks and reconnect with backoff."""
+
+    @pytest.mark.asyncio
+    async def test_dropped_sessions_are_recycled(self):
+        """Verify idle sessions closed by the server are replaced."""
+        async with FakeSpeechmaticsRT() as server:
+            pool = RealtimeSessionPool(server.url, min_idle=1, health_interval=3600)
+            pool.prewarm("fr")
+            await _wait_warm(pool, "fr")
+            await server.drop_all()
+            await asyncio.sleep(0.05)
+            await pool.check_health()
+            await _wait_warm(pool, "fr")
+            result = await pool.transcribe("fr", _chunks(1))
+            await pool.close()
+        assert result == "bonjour"
+        assert pool.stats["recycled"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_stale_sessions_are_recycled(self):
+        """Verify sessions older than max_idle_age are not handed out."""
+        async with FakeSpeechmaticsRT() as server:
+            pool = RealtimeSessionPool(server.url, min_idle=1, max_idle_age=0.05, health_interval=3600)
+            pool.prewarm("fr")
+            await _wait_warm(pool, "fr")
+            await asyncio.sleep(0.1)
+            await pool.transcribe("fr", _chunks(1))
+            await pool.close()
+        assert pool.stats["recycled"] == 1
+        assert pool.stats["cold_starts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_warmup_retries_with_backoff(self):
+        """Verify failed connects are retried until a session is warm."""
+        async with FakeSpeechmaticsRT() as server:
+            server.fail_next_connects = 2
+            pool = RealtimeSessionPool(server.url, min_idle=1, backoff_base=0.01)
+            pool.prewarm("fr")
+            await _wait_warm(pool, "fr")
+            await pool.close()
+        assert pool.stats["reconnects"] == 2
+        assert server.connections == 3
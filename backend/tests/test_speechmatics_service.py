@@ -6,11 +6,17 @@ Verifies:
 - Transcriptions match MOCK_CONVERSATION[turn].user_said
 - Out-of-bounds turns return empty string
 - Service initializes in mock mode by default
+- Streamed binary audio is fed to STT incrementally
+- Cancelling a streamed turn closes its RT session
 """
 
 import asyncio
 import pytest
-from backend.services.speechmatics_service import SpeechmaticsService
+from backend.services.speechmatics_service import (
+    SpeechmaticsService,
+    StreamingAudioInput,
+    _stream_pcm,
+)
 from backend.mock_data import MOCK_CONVERSATION
 
 
@@ -127,3 +133,116 @@ class TestSpeechmaticsServiceEdgeCases:
         result_empty = await service.transcribe(b"", 0)
         result_data = await service.transcribe(b"some_audio_data", 0)
         assert result_empty == result_data
+
+
+class TestStreamingAudioInput:
+    """Tests for binary streaming audio ingestion."""
+
+    @pytest.mark.asyncio
+    async def test_frames_are_yielded_in_order_until_end(self):
+        """Verify pushed frames come out in order and end() stops iteration."""
+        audio = StreamingAudioInput(encoding="pcm_s16le")
+        audio.push(b"aa")
+        audio.push(b"bb")
+        audio.end()
+        chunks = [c async for c in audio]
+        assert chunks == [b"aa", b"bb"]
+        assert audio.frames_received == 2
+        assert audio.bytes_received == 4
+
+    @pytest.mark.asyncio
+    async def test_frames_after_end_are_ignored(self):
+        """Verify late frames after end-of-utterance are dropped."""
+        audio = StreamingAudioInput()
+        audio.end()
+        audio.push(b"late")
+        assert [c async for c in audio] == []
+        assert audio.ended
+
+    @pytest.mark.asyncio
+    async def test_pcm_passthrough_is_incremental(self):
+        """Verify PCM frames reach the STT reader before the utterance ends."""
+        audio = StreamingAudioInput(encoding="pcm_s16le")
+        pcm_iter = _stream_pcm(audio).__aiter__()
+        audio.push(b"\x01\x00" * 100)
+        first = await asyncio.wait_for(pcm_iter.__anext__(), timeout=1)
+        assert first == b"\x01\x00" * 100
+        audio.end()
+        assert [c async for c in pcm_iter] == []
+
+    @pytest.mark.asyncio
+    async def test_mock_transcribe_stream_drains_and_returns_script(self):
+        """Verify mock mode consumes the stream and returns the scripted text."""
+        service = SpeechmaticsService()
+        audio = StreamingAudioInput(encoding="pcm_s16le")
+        task = asyncio.create_task(service.transcribe_stream(audio, 1))
+        audio.push(b"\x00" * 3200)
+        await asyncio.sleep(0)
+        assert not task.done()
+        audio.end()
+        assert await task == MOCK_CONVERSATION[1]["user_said"]
+
+    @pytest.mark.asyncio
+    async def test_webm_stream_decodes_before_end(self):
+        """Verify webm/opus frames decode to PCM while more frames are pending."""
+        av = pytest.importorskip("av")
+        np = pytest.importorskip("numpy")
+        import io
+
+        buf = io.BytesIO()
+        out = av.open(buf, mode="w", format="webm")
+        stream = out.add_stream("libopus", rate=48000)
+        stream.layout = "mono"
+        for i in range(50):
+            samples = (np.sin(np.arange(960) / 10.0) * 8000).astype(np.int16).reshape(1, -1)
+            frame = av.AudioFrame.from_ndarray(samples, format="s16", layout="mono")
+            frame.sample_rate = 48000
+            frame.pts = i * 960
+            for packet in stream.encode(frame):
+                out.mux(packet)
+        for packet in stream.encode(None):
+            out.mux(packet)
+        out.close()
+        data = buf.getvalue()
+
+        audio = StreamingAudioInput(encoding="webm")
+        half = len(data) // 2
+        audio.push(data[:half])
+        pcm_iter = _stream_pcm(audio).__aiter__()
+        first = await asyncio.wait_for(pcm_iter.__anext__(), timeout=5)
+        assert len(first) > 0
+        assert not audio.ended
+        audio.push(data[half:])
+        audio.end()
+        rest = [c async for c in pcm_iter]
+        assert sum(len(c) for c in rest) > 0
+
+    @pytest.mark.asyncio
+    async def test_cancel_mid_utterance_closes_rt_session(self):
+        """Verify cancelling a streamed turn closes its RT session and stops the stream."""
+        pytest.importorskip("websockets")
+        from backend.services.speechmatics_rt import RealtimeSessionPool
+        from backend.tests.fake_speechmatics_rt import FakeSpeechmaticsRT
+
+        async with FakeSpeechmaticsRT() as server:
+            service = SpeechmaticsService()
+            service.mock_mode = False
+            service._pool = RealtimeSessionPool(server.url, min_idle=0)
+            audio = StreamingAudioInput(encoding="pcm_s16le")
+            task = asyncio.create_task(service.transcribe_stream(audio, 1))
+            audio.push(b"\x00" * 3200)
+            for _ in range(200):
+                if server.audio_bytes:
+                    break
+                await asyncio.sleep(0.01)
+            assert server.open_connections == 1
+
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            for _ in range(200):
+                if not server.open_connections:
+                    break
+                await asyncio.sleep(0.01)
+            assert server.open_connections == 0
+            await service._pool.close()
@@ -0,0 +1,174 @@
+"""
+Tests for backend.services.tts_cache and its use by TTSService.
+
+Verifies:
+- Keys cover provider, voice, rate and whitespace-normalized text; long
+  texts are not cached
+- The memory tier is bounded by bytes (LRU); the disk tier survives a new
+  cache instance and is bounded too, also under concurrent puts
+- synthesize() and stream() serve repeated texts without calling a
+  provider; partial (broken) audio is never cached
+- Concurrent identical requests share one synthesis
+- /health/tts-cache reports the stats
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services.tts_cache import TTSCache
+from backend.services.tts_service import TTSService
+
+
+def _service(tmp_path=None) -> TTSService:
+    svc = TTSService(cache=TTSCache(memory_bytes=1024, disk_dir=tmp_path))
+    svc.mock_mode = False
+    return svc
+
+
+def _counting_edge(calls: list, parts=(b"a", b"b", b"c"), delay: float = 0.0):
+    async def edge(text):
+        calls.append(text)
+        for part in parts:
+            await asyncio.sleep(delay)
+            yield part
+    return edge
+
+
+class TestKeysAndTiers:
+    """Tests for TTSCache keys, memory and disk tiers."""
+
+    def test_key_normalization(self):
+        """Verify whitespace variants share a key; voice, rate and case do not."""
+        cache = TTSCache(max_chars=20)
+        key = cache.key("edge_tts", "v", "+15%", "Bonjour !")
+        assert cache.key("edge_tts", "v", "+15%", "  Bonjour \n!") == key
+        assert cache.key("edge_tts", "w", "+15%", "Bonjour !") != key
+        assert cache.key("edge_tts", "v", "+0%", "Bonjour !") != key
+        assert cache.key("edge_tts", "v", "+15%", "bonjour !") != key
+        assert cache.key("edge_tts", "v", "+15%", "x" * 21) is None
+
+    @pytest.mark.asyncio
+    async def test_memory_lru_bounded_by_bytes(self):
+        """Verify the least recently used entries go once the byte budget is exceeded."""
+        cache = TTSCache(memory_bytes=10)
+        await cache.put("a", b"1234", 100)
+        await cache.put("b", b"1234", 100)
+        assert await cache.lookup(["a"]) == ("a", b"1234")  # a is now most recent
+        await cache.put("c", b"1234", 100)
+        assert await cache.lookup(["b"]) is None
+        assert await cache.lookup(["a", "c"]) == ("a", b"1234")
+        snap = cache.snapshot()
+        assert snap["memory_bytes"] == 8 and snap["memory_hits"] == 2 and snap["saved_ms"] == 200
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_survives_restart(self, tmp_path):
+        """Verify raw bytes written to disk are found by a fresh cache, within the disk budget."""
+        cache = TTSCache(disk_dir=tmp_path, disk_bytes=10)
+        await cache.put("k1", b"mp3-1", 250)
+        await cache.put("k2", b"mp3-2", 250)
+        await cache.put("k3", b"mp3-3", 250)  # Evicts k1 from disk
+        assert len(list(tmp_path.glob("*/*.mp3"))) == 2
+
+        fresh = TTSCache(disk_dir=tmp_path, disk_bytes=10)
+        assert await fresh.lookup(["k1"]) is None
+        assert await fresh.lookup(["k2"]) == ("k2", b"mp3-2")
+        assert await fresh.lookup(["k2"]) == ("k2", b"mp3-2")
+        snap = fresh.snapshot()
+        assert (snap["disk_hits"], snap["memory_hits"], snap["saved_ms"]) == (1, 1, 500)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_disk_puts_stay_in_budget(self, tmp_path, monkeypatch):
+        """Verify concurrent puts never push the disk tier over budget or count a key twice."""
+        cache = TTSCache(disk_dir=tmp_path, disk_bytes=10)
+        write = cache._write
+        on_disk = []
+
+        def counting_write(key, audio, synth_ms):
+            on_disk.append(sum(path.stat().st_size for path in tmp_path.glob("*/*.mp3")) + len(audio))
+            write(key, audio, synth_ms)
+
+        monkeypatch.setattr(cache, "_write", counting_write)
+        await asyncio.gather(*(cache.put(key, b"mp3-" + key.encode(), 100) for key in ("a", "b", "b", "c", "d")))
+        assert max(on_disk) <= 10
+        files = sum(path.stat().st_size for path in tmp_path.glob("*/*.mp3"))
+        assert cache.snapshot()["disk_bytes"] == files == 10
+
+
+class TestServiceCaching:
+    """Tests for cached synthesize() and stream()."""
+
+    @pytest.mark.asyncio
+    async def test_synthesize_served_from_cache(self):
+        """Verify a repeated line is synthesized once and returned as the same payload."""
+        svc, calls = _service(), []
+        svc._edge_stream = _counting_edge(calls)
+        first = await svc.synthesize("Bonjour ! Comment ça va ?")
+        second = await svc.synthesize("Bonjour !  Comment ça va ?")
+        assert calls == ["Bonjour ! Comment ça va ?"]
+        assert first == {**second, "text": first["text"]}
+        assert first["content_type"] == "audio/mpeg"
+        snap = svc.cache.snapshot()
+        assert (snap["requests"], snap["misses"], snap["memory_hits"], snap["hit_rate"]) == (2, 1, 1, 0.5)
+
+    @pytest.mark.asyncio
+    async def test_stream_cached_after_complete_audio(self):
+        """Verify a streamed line is replayed from cache, also for synthesize()."""
+        svc, calls = _service(), []
+        svc._edge_stream = _counting_edge(calls)
+        assert [c async for c in svc.stream("Salut")] == [b"a", b"b", b"c"]
+        assert [c async for c in svc.stream("Salut")] == [b"abc"]
+        assert (await svc.synthesize("Salut"))["mode"] == "audio"
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_partial_audio_not_cached(self):
+        """Verify a stream that broke mid-way is synthesized again next time."""
+        svc, calls = _service(), []
+
+        async def edge(text):
+            calls.append(text)
+            yield b"a"
+            raise RuntimeError("connection reset")
+
+        svc._edge_stream = edge
+        assert [c async for c in svc.stream("Salut")] == [b"a"]
+        assert [c async for c in svc.stream("Salut")] == [b"a"]
+        assert len(calls) == 2 and svc.cache.snapshot()["memory_entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_synthesis(self):
+        """Verify identical concurrent streams and syntheses hit the provider once."""
+        svc, calls = _service(), []
+        svc._edge_stream = _counting_edge(calls, delay=0.01)
+
+        async def collect():
+            return [c async for c in svc.stream("Très bien !")]
+
+        streams = await asyncio.gather(collect(), collect(), svc.synthesize("Très bien !"))
+        assert calls == ["Très bien !"]
+        assert streams[0] == streams[1] == [b"a", b"b", b"c"]
+        assert streams[2]["mode"] == "audio"
+        snap = svc.cache.snapshot()
+        assert snap["coalesced"] == 2 and snap["in_flight"] == 0 and snap["hit_rate"] == pytest.approx(2 / 3, abs=1e-4)
+
+    @pytest.mark.asyncio
+    async def test_long_text_bypasses_cache(self):
+        """Verify texts beyond max_chars are synthesized every time."""
+        svc, calls = TTSService(cache=TTSCache(max_chars=5)), []
+        svc.mock_mode = False
+        svc._edge_stream = _counting_edge(calls)
+        for _ in range(2):
+            assert [c async for c in svc.stream("Bonjour à tous")] == [b"a", b"b", b"c"]
+        assert len(calls) == 2 and svc.cache.snapshot()["requests"] == 0
+
+
+class TestCacheEndpoint:
+    """Tests for GET /health/tts-cache."""
+
+    def test_stats_endpoint(self, test_client):
+        """Verify the endpoint returns the cache counters."""
+        res = test_client.get("/health/tts-cache")
+        assert res.status_code == 200
+        body = res.json()
+        assert {"requests", "memory_hits", "disk_hits", "coalesced", "misses", "saved_ms", "hit_rate"} <= set(body)
@@ -0,0 +1,327 @@
+"""
+Tests for backend.services.tts_pipeline module.
+
+Verifies:
+- Sentences are cut only at confirmed terminators (not decimals/titles)
+- Segments are sent in order even when a later sentence synthesizes first
+- The first segment goes out while the reply is still streaming
+- A provider fallback with different text resets queued segments, and a
+  retracted spoken_response (failed hedged winner) is replaced on the wire,
+  aborting the earlier binary audio stream
+- Binary audio frames carry stream id + seq between start/end markers
+- /ws/conversation?tts=segments sends tts_segment + tts_done instead of tts
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from backend.routes import conversation
+
+from backend.services.openai_service import OpenAIService
+from backend.services.tts_pipeline import (
+    AudioStreamSender,
+    SentenceSplitter,
+    SpeechPipeline,
+    decode_audio_frame,
+    encode_audio_frame,
+)
+
+
+class _FakeTTS:
+    """Synthesizes instantly, except texts listed in `delays`."""
+
+    def __init__(self, delays: dict[str, float] | None = None):
+        self.delays = delays or {}
+        self.calls: list[str] = []
+
+    async def synthesize(self, text: str) -> dict:
+        self.calls.append(text)
+        await asyncio.sleep(self.delays.get(text, 0))
+        return {"mode": "browser", "text": text}
+
+
+class _FakeStreamTTS(_FakeTTS):
+    """Yields three chunks per text; `delays` applies before each chunk."""
+
+    async def stream(self, text: str):
+        self.calls.append(text)
+        for i in range(3):
+            await asyncio.sleep(self.delays.get(text, 0))
+            yield f"{text}|{i}".encode()
+
+
+class _Recorder:
+    def __init__(self):
+        self.messages: list[dict] = []
+        self.frames: list[bytes] = []
+        self.log: list = []
+
+    async def send(self, message: dict) -> None:
+        self.messages.append(message)
+        self.log.append(message)
+
+    async def send_bytes(self, frame: bytes) -> None:
+        self.frames.append(frame)
+        self.log.append(frame)
+
+    def segments(self) -> list[str]:
+        return [m["tts"]["text"] for m in self.messages if m["type"] == "tts_segment"]
+
+
+class TestSentenceSplitter:
+    """Tests for streaming sentence segmentation."""
+
+    def test_splits_on_confirmed_terminators(self):
+        """Verify a sentence is emitted once whitespace follows its terminator."""
+        splitter = SentenceSplitter()
+        assert splitter.feed("Très bien, merci !") == []
+        assert splitter.feed(" Et toi, ça va ?") == ["Très bien, merci !"]
+        assert splitter.flush() == ["Et toi, ça va ?"]
+
+    def test_decimals_and_titles_do_not_split(self):
+        """Verify '3.5' and 'M. Dupont' stay inside one sentence."""
+        splitter = SentenceSplitter()
+        out = splitter.feed("Le café coûte 3.5 euros chez M. Dupont. Tu en veux ? ")
+        assert out == ["Le café coûte 3.5 euros chez M. Dupont.", "Tu en veux ?"]
+
+    def test_short_fragments_are_merged(self):
+        """Verify fragments below min_chars ride along with the next sentence."""
+        splitter = SentenceSplitter(min_chars=12)
+        out = splitter.feed("Oh ! Je comprends très bien. ")
+        assert out == ["Oh ! Je comprends très bien."]
+
+    def test_char_by_char_matches_whole_text(self):
+        """Verify streaming one char at a time yields the same sentences."""
+        text = "Bonjour Marie ! Comment vas-tu aujourd'hui ? Moi, je vais bien… Merci."
+        whole = SentenceSplitter()
+        expected = whole.feed(text) + whole.flush()
+        streamed = SentenceSplitter()
+        got = [s for ch in text for s in streamed.feed(ch)] + streamed.flush()
+        assert got == expected
+        assert len(got) == 4
+
+
+class TestSpeechPipeline:
+    """Tests for ordered, pipelined segment delivery."""
+
+    @pytest.mark.asyncio
+    async def test_segments_sent_in_order(self):
+        """Verify order holds when the first sentence is the slowest to synthesize."""
+        first = "Première phrase assez longue."
+        tts = _FakeTTS(delays={first: 0.05})
+        rec = _Recorder()
+        speech = SpeechPipeline(tts, rec.send, turn=3)
+        speech.feed(first + " Deuxième phrase, plus rapide. ")
+        speech.finish(first + " Deuxième phrase, plus rapide. Troisième !")
+        assert await speech.wait() == 3
+        assert rec.segments() == [first, "Deuxième phrase, plus rapide.", "Troisième !"]
+        assert [m["seq"] for m in rec.messages[:3]] == [0, 1, 2]
+        assert rec.messages[-1] == {"type": "tts_done", "turn": 3, "segments": 3}
+
+    @pytest.mark.asyncio
+    async def test_first_segment_sent_before_reply_finishes(self):
+        """Verify the first sentence is delivered while the reply is still streaming."""
+        rec = _Recorder()
+        speech = SpeechPipeline(_FakeTTS(), rec.send, turn=1)
+        speech.feed("Très bien, tu progresses vite. Et")
+        await asyncio.sleep(0.01)
+        assert rec.segments() == ["Très bien, tu progresses vite."]
+        speech.feed(" maintenant ?")
+        speech.finish("Très bien, tu progresses vite. Et maintenant ?")
+        await speech.wait()
+        assert rec.segments()[-1] == "Et maintenant ?"
+
+    @pytest.mark.asyncio
+    async def test_changed_text_resets_segments(self):
+        """Verify a fallback reply replaces already-streamed segments."""
+        rec = _Recorder()
+        speech = SpeechPipeline(_FakeTTS(), rec.send, turn=1)
+        speech.feed("Réponse du premier fournisseur. Coupée")
+        await asyncio.sleep(0.01)
+        speech.finish("Réponse de secours complète.")
+        await speech.wait()
+        kinds = [m["type"] for m in rec.messages]
+        assert kinds == ["tts_segment", "tts_reset", "tts_segment", "tts_done"]
+        assert rec.segments()[-1] == "Réponse de secours complète."
+
+    @pytest.mark.asyncio
+    async def test_no_reset_message_when_nothing_was_sent(self):
+        """Verify unsent stale segments are dropped silently."""
+        slow = "Réponse du premier fournisseur."
+        rec = _Recorder()
+        speech = SpeechPipeline(_FakeTTS(delays={slow: 0.05}), rec.send, turn=1)
+        speech.feed(slow + " ")
+        speech.finish("Autre réponse.")
+        await speech.wait()
+        assert [m["type"] for m in rec.messages] == ["tts_segment", "tts_done"]
+        assert rec.segments() == ["Autre réponse."]
+
+
+class TestAudioStreaming:
+    """Tests for binary TTS frames."""
+
+    def test_frame_roundtrip(self):
+        """Verify the 8-byte header carries stream id and chunk seq."""
+        frame = encode_audio_frame(7, 3, b"mp3-bytes")
+        assert len(frame) == 8 + len(b"mp3-bytes")
+        assert decode_audio_frame(frame) == (7, 3, b"mp3-bytes")
+
+    @pytest.mark.asyncio
+    async def test_sender_frames_between_markers(self):
+        """Verify start marker, sequenced frames, then end marker with totals."""
+        rec = _Recorder()
+        sender = AudioStreamSender(rec.send, rec.send_bytes)
+        total = await sender.send(_FakeStreamTTS().stream("Salut"), "Salut", turn=2)
+        start, end = rec.messages
+        assert start["type"] == "tts_stream_start" and start["text"] == "Salut"
+        decoded = [decode_audio_frame(f) for f in rec.frames]
+        assert [(sid, seq) for sid, seq, _ in decoded] == [(start["stream_id"], i) for i in range(3)]
+        assert end == {"type": "tts_stream_end", "stream_id": start["stream_id"], "turn": 2,
+                       "chunks": 3, "bytes": total}
+        assert rec.log[0] is start and rec.log[-1] is end
+
+    @pytest.mark.asyncio
+    async def test_sender_falls_back_without_audio(self):
+        """Verify an empty stream ends with the browser fallback payload."""
+        rec = _Recorder()
+        sender = AudioStreamSender(rec.send, rec.send_bytes)
+        await sender.send(_empty(), "Salut", turn=1)
+        assert rec.frames == []
+        assert rec.messages[-1]["fallback"] == {"mode": "browser", "text": "Salut"}
+
+    @pytest.mark.asyncio
+    async def test_streamed_segments_stay_ordered(self):
+        """Verify a fast later segment's frames wait behind the slow first one."""
+        first = "Première phrase assez longue."
+        rec = _Recorder()
+        speech = SpeechPipeline(_FakeStreamTTS(delays={first: 0.02}), rec.send, turn=1, send_bytes=rec.send_bytes)
+        speech.finish(first + " Deuxième phrase, plus rapide.")
+        assert await speech.wait() == 2
+        texts = [decode_audio_frame(f)[2].decode().split("|")[0] for f in rec.frames]
+        assert texts == [first] * 3 + ["Deuxième phrase, plus rapide."] * 3
+        starts = [m for m in rec.messages if m["type"] == "tts_stream_start"]
+        assert [m["seq"] for m in starts] == [0, 1]
+        assert rec.messages[-1]["type"] == "tts_done"
+
+
+async def _empty():
+    return
+    yield
+
+
+class TestConversationSegments:
+    """Tests for the tts=segments WebSocket opt-in."""
+
+    def test_segments_replace_single_tts_message(self, test_client):
+        """Verify opted-in clients get tts_segment/tts_done and no tts message."""
+        with test_client.websocket_connect("/ws/conversation?session_id=seg-test&tts=segments") as ws:
+            ws.send_json({"type": "text", "content": "Bonjour"})
+            kinds = []
+            while True:
+                msg = ws.receive_json()
+                kinds.append(msg["type"])
+                if msg["type"] == "tts_done":
+                    break
+        assert "turn_response" in kinds
+        assert "tts_segment" in kinds
+        assert "tts" not in kinds
+
+    def test_legacy_clients_still_get_tts(self, test_client):
+        """Verify clients without the opt-in keep the single tts message."""
+        with test_client.websocket_connect("/ws/conversation?session_id=legacy-test") as ws:
+            ws.send_json({"type": "text", "content": "Bonjour"})
+            while True:
+                msg = ws.receive_json()
+                if msg["type"] == "tts":
+                    break
+                assert msg["type"] not in ("tts_segment", "tts_done")
+
+    def test_stream_mode_sends_markers(self, test_client):
+        """Verify tts=stream replaces the tts message with stream markers."""
+        with test_client.websocket_connect("/ws/conversation?session_id=stream-test&tts=stream") as ws:
+            ws.send_json({"type": "text", "content": "Bonjour"})
+            kinds = []
+            while True:
+                msg = ws.receive_json()
+                kinds.append(msg["type"])
+                if msg["type"] == "tts_stream_end":
+                    break
+        assert "tts_stream_start" in kinds
+        assert "tts" not in kinds
+        # Mock TTS yields no audio — the end marker carries the browser fallback
+        assert msg["fallback"]["mode"] == "browser"
+
+
+_FAILED_SPOKEN = "Réponse du fournisseur en panne."
+
+
+def _retracting_split(monkeypatch):
+    """generate_response_split whose first spoken_response is taken back, as a failed hedged winner's is."""
+    original = OpenAIService.generate_response_split
+
+    async def split(self, user_text, turn_number, mission_context="", on_spoken_ready=None,
+                    on_spoken_delta=None, on_spoken_reset=None):
+        reply, spoken, analysis = await original(self, user_text, turn_number, mission_context=mission_context)
+        await on_spoken_ready(_FAILED_SPOKEN)
+        await asyncio.sleep(0.05)  # Its audio is already on the way
+        await on_spoken_reset()
+        await on_spoken_ready(spoken)
+        return reply, spoken, analysis
+
+    monkeypatch.setattr(OpenAIService, "generate_response_split", split)
+
+
+class TestRetractedSpoken:
+    """Tests for a spoken_response taken back after TTS started."""
+
+    def test_segments_replaced(self, test_client, monkeypatch):
+        """Verify the failed provider's segments are reset and the winner's text is spoken."""
+        _retracting_split(monkeypatch)
+        with test_client.websocket_connect("/ws/conversation?session_id=retract-seg&tts=segments") as ws:
+            ws.send_json({"type": "text", "content": "Bonjour"})
+            messages = []
+            while True:
+                msg = ws.receive_json()
+                messages.append(msg)
+                if msg["type"] == "turn_response":
+                    spoken = msg["turn"]["response"]["spoken_response"]
+                if msg["type"] == "tts_done" and any(m["type"] == "turn_response" for m in messages):
+                    break
+        kinds = [m["type"] for m in messages]
+        assert "tts_reset" in kinds
+        after = messages[len(kinds) - kinds[::-1].index("tts_reset"):]
+        segments = [m["tts"]["text"] for m in after if m["type"] == "tts_segment"]
+        assert " ".join(segments) == spoken != _FAILED_SPOKEN
+
+    def test_binary_stream_aborted(self, test_client, monkeypatch):
+        """Verify the failed provider's audio stream stops at the reset and only the winner's streams on."""
+        async def stream(text):
+            for i in range(3):
+                await asyncio.sleep(0.03)
+                yield f"{text}|{i}".encode()
+
+        _retracting_split(monkeypatch)
+        monkeypatch.setattr(conversation._tts_service, "stream", stream)
+        events, starts, ends = [], {}, {}
+        with test_client.websocket_connect("/ws/conversation?session_id=retract-stream&tts=stream") as ws:
+            ws.send_json({"type": "text", "content": "Bonjour"})
+            while True:
+                raw = ws.receive()
+                if raw.get("bytes") is not None:
+                    events.append(("frame", decode_audio_frame(raw["bytes"])[0]))
+                    continue
+                msg = json.loads(raw["text"])
+                events.append((msg["type"], msg.get("stream_id")))
+                if msg["type"] == "tts_stream_start":
+                    starts[msg["text"]] = msg["stream_id"]
+                if msg["type"] == "tts_stream_end":
+                    ends[msg["stream_id"]] = msg
+                if len(ends) == 2:
+                    break
+        failed, winner = starts[_FAILED_SPOKEN], next(sid for text, sid in starts.items() if text != _FAILED_SPOKEN)
+        reset_at = events.index(("tts_reset", None))
+        assert ("frame", failed) not in events[reset_at:]
+        assert ends[failed]["aborted"] is True
+        assert ends[winner]["chunks"] == 3 and "aborted" not in ends[winner]
@@ -6,6 +6,7 @@ Verifies:
 - Mock response has correct structure (mode='browser', text field)
 - Various text inputs produce correct mock output
 - Service initializes in mock mode by default
+- stream() forwards provider chunks and falls back before the first chunk
 """
 
 import pytest
@@ -120,3 +121,56 @@ class TestTTSServiceMockSynthesize:
         result = await service.synthesize(text)
         assert result["mode"] == "browser"
         assert result["text"] == text
+
+
+class TestTTSServiceStream:
+    """Tests for chunked MP3 streaming."""
+
+    @pytest.fixture
+    def service(self):
+        svc = TTSService()
+        svc.mock_mode = False
+        return svc
+
+    @pytest.mark.asyncio
+    async def test_mock_mode_streams_nothing(self):
+        """Verify mock mode yields no audio (caller uses browser fallback)."""
+        assert [c async for c in TTSService().stream("Bonjour")] == []
+
+    @pytest.mark.asyncio
+    async def test_edge_chunks_forwarded_as_they_arrive(self, service):
+        """Verify Edge chunks are yielded one by one, unjoined."""
+        async def edge(text):
+            for part in (b"a", b"b", b"c"):
+                yield part
+
+        service._edge_stream = edge
+        assert [c async for c in service.stream("Bonjour")] == [b"a", b"b", b"c"]
+
+    @pytest.mark.asyncio
+    async def test_openai_fallback_when_edge_fails_early(self, service):
+        """Verify OpenAI audio is used if Edge fails before any chunk."""
+        async def edge(text):
+            raise RuntimeError("edge down")
+            yield b""
+
+        async def openai_audio(text):
+            return b"openai-mp3"
+
+        service._edge_stream = edge
+        service._openai_audio = openai_audio
+        assert [c async for c in service.stream("Bonjour")] == [b"openai-mp3"]
+
+    @pytest.mark.asyncio
+    async def test_no_fallback_after_partial_audio(self, service):
+        """Verify a mid-stream Edge failure does not append a second voice."""
+        async def edge(text):
+            yield b"a"
+            raise RuntimeError("connection reset")
+
+        async def openai_audio(text):
+            raise AssertionError("should not be called")
+
+        service._edge_stream = edge
+        service._openai_audio = openai_audio
+        assert [c async for c in service.stream("Bonjour")] == [b"a"]
@@ -0,0 +1,295 @@
+"""
+Tests for backend.services.unit_validation module.
+
+Verifies:
+- validate_units() returns exactly what the former per-unit
+  implementation (kept below as the reference) returned, on random
+  utterances, corrections, candidate lists and mission hints
+- Reject reasons for the main cases (incomplete stub, not said by the
+  learner, covered by an accepted phrase)
+- UnitRecord is a __slots__ record with the ValidatedUnit dict shape
+"""
+
+import random
+
+import pytest
+
+from backend.models import ValidatedUnit
+from backend.services.grammar_patterns import get_matcher
+from backend.services.unit_validation import (
+    STOP_WORDS,
+    UnitRecord,
+    extract_pattern_candidates,
+    extract_user_vocabulary,
+    normalize_text,
+    tokenize,
+    validate,
+    validate_units,
+)
+
+_WORDS = [
+    "je", "suis", "j'aime", "ça", "ca", "va", "me", "llamo", "gusta", "ich", "bin", "mag", "le",
+    "chocolat", "marie", "étudiant", "bien", "paris", "habite", "à", "j'ai", "envie", "de", "manger",
+    "a", "x", "musées", "talk", "about",
+]
+
+
+# ── Reference: the validation gate before the engine ────────────────
+
+
+def _ref_mission_keywords(mission_hint: str) -> set[str]:
+    words = tokenize(mission_hint)
+    return {w for w in words if len(w) >= 4 and w not in STOP_WORDS}
+
+
+def _ref_canonicalize(raw_units: list[str], corrected_text: str, source_text: str) -> list[dict]:
+    """Canonicalize candidates with precedence pattern > sentence > chunk > word."""
+    items: list[dict] = [
+        {"text": u.text, "kind": u.kind, "source": u.source, "canonical_key": u.canonical_key}
+        for u in extract_pattern_candidates(corrected_text)
+    ]
+    seen_norm: set[str] = set()
+    matcher = get_matcher()
+
+    for idx, raw in enumerate(raw_units):
+        text = normalize_text(raw)
+        if not text or text in seen_norm:
+            continue
+        seen_norm.add(text)
+        tokens = tokenize(text)
+        # Sentence = multi-word phrase with 3+ tokens (typically the first item from the LLM)
+        if " " in normalize_text(text) and len(tokens) >= 3:
+            kind = "sentence"
+        elif " " in normalize_text(text):
+            kind = "chunk"
+        else:
+            kind = "word"
+        canonical_key = f"{kind}:{text}"
+        # Detect common patterns across languages and promote to pattern kind
+        pattern = matcher.canonical(text)
+        if pattern is not None:
+            canonical_key = pattern.key
+            kind = "pattern"
+            text = pattern.text
+        items.append({
+            "text": text,
+            "kind": kind,
+            "source": "as_said" if text in source_text else "corrected",
+            "canonical_key": canonical_key,
+        })
+
+    # Only add individual word fallbacks if we have zero sentence/chunk/pattern candidates
+    has_phrases = any(i["kind"] in ("sentence", "chunk", "pattern") for i in items)
+    if not has_phrases:
+        for tok in tokenize(corrected_text):
+            if tok in STOP_WORDS or len(tok) <= 1:
+                continue
+            key = f"word:{tok}"
+            if any(i.get("canonical_key") == key for i in items):
+                continue
+            items.append({
+                "text": tok,
+                "kind": "word",
+                "source": "corrected",
+                "canonical_key": key,
+            })
+
+    # Group by canonical key and keep best by precedence.
+    rank = {"pattern": 4, "sentence": 3, "chunk": 2, "word": 1}
+    grouped: dict[str, dict] = {}
+    for item in items:
+        key = item["canonical_key"]
+        if key not in grouped or rank.get(item["kind"], 0) > rank.get(grouped[key]["kind"], 0):
+            grouped[key] = item
+    return list(grouped.values())
+
+
+def _reference_validate(
+    user_text: str,
+    corrected_form: str,
+    raw_units: list[str],
+    mission_hint: str,
+) -> tuple[list[dict], list[dict], float]:
+    source_text = normalize_text(user_text)
+    corrected_text = normalize_text(corrected_form) if corrected_form else source_text
+    candidates = raw_units or extract_user_vocabulary(user_text)
+    canonical_items = _ref_canonicalize(candidates, corrected_text, source_text)
+    mission_kw = _ref_mission_keywords(mission_hint)
+    matcher = get_matcher()
+
+    accepted: list[dict] = []
+    rejected: list[dict] = []
+    selected_token_sets: list[set[str]] = []
+    selected_pattern_token_sets: list[set[str]] = []
+
+    for item in canonical_items:
+        text = item["text"]
+        kind = item["kind"]
+        canonical_key = item["canonical_key"]
+        tokens = set(tokenize(text))
+
+        if kind not in ("pattern", "sentence"):
+            # Reject incomplete patterns (verb stubs without complements)
+            if kind == "chunk" and matcher.is_incomplete(text):
+                rejected.append({
+                    "text": text, "kind": kind, "source": item["source"],
+                    "confidence": 0.45, "is_accepted": False, "reject_reason": "incomplete_pattern",
+                    "canonical_key": canonical_key, "mission_relevance": 0.0,
+                })
+                continue
+            if kind == "chunk" and len(tokens) >= 10 and not canonical_key.startswith("pattern:"):
+                rejected.append({
+                    "text": text, "kind": kind, "source": item["source"],
+                    "confidence": 0.5, "is_accepted": False, "reject_reason": "too_broad",
+                    "canonical_key": canonical_key, "mission_relevance": 0.0,
+                })
+                continue
+            if len(text) <= 1:
+                rejected.append({
+                    "text": text, "kind": kind, "source": item["source"],
+                    "confidence": 0.3, "is_accepted": False, "reject_reason": "too_short",
+                    "canonical_key": canonical_key, "mission_relevance": 0.0,
+                })
+                continue
+            if text in STOP_WORDS:
+                rejected.append({
+                    "text": text, "kind": kind, "source": item["source"],
+                    "confidence": 0.35, "is_accepted": False, "reject_reason": "stop_word",
+                    "canonical_key": canonical_key, "mission_relevance": 0.0,
+                })
+                continue
+
+        mission_relevance = 0.0
+        if mission_kw:
+            overlap = len(tokens.intersection(mission_kw))
+            mission_relevance = min(1.0, overlap / max(1, len(mission_kw)))
+        if kind in ("pattern", "sentence"):
+            mission_relevance = max(mission_relevance, 0.7)
+
+        # Strict user-text check: at least half the unit's tokens must appear
+        # in the user's actual spoken text. This prevents AI-generated words
+        # from leaking into the knowledge graph.
+        unit_tokens = set(tokenize(text))
+        source_tokens = set(tokenize(source_text))
+        if unit_tokens and source_tokens:
+            overlap = len(unit_tokens & source_tokens)
+            overlap_ratio = overlap / len(unit_tokens)
+        else:
+            overlap_ratio = 0.0
+        if overlap_ratio < 0.5 and kind != "pattern":
+            rejected.append({
+                "text": text, "kind": kind, "source": item["source"],
+                "confidence": 0.4, "is_accepted": False, "reject_reason": "not_in_user_speech",
+                "canonical_key": canonical_key, "mission_relevance": 0.0,
+            })
+            continue
+
+        in_corrected = text in corrected_text or canonical_key.startswith("pattern:")
+        in_source = text in source_text or overlap_ratio >= 0.8
+        if corrected_form and not in_corrected and kind in ("chunk", "word"):
+            rejected.append({
+                "text": text, "kind": kind, "source": item["source"],
+                "confidence": 0.5, "is_accepted": False, "reject_reason": "grammar_invalid",
+                "canonical_key": canonical_key, "mission_relevance": mission_relevance,
+            })
+            continue
+        confidence = 0.9 if (in_source and in_corrected) else (0.75 if (in_source or in_corrected) else 0.55)
+        if kind == "pattern":
+            confidence = max(confidence, 0.82)
+        if kind == "sentence":
+            confidence = max(confidence, 0.85)
+
+        # Borderline confidence needs mission relevance.
+        if confidence < 0.6:
+            rejected.append({
+                "text": text, "kind": kind, "source": item["source"],
+                "confidence": confidence, "is_accepted": False, "reject_reason": "low_confidence",
+                "canonical_key": canonical_key, "mission_relevance": mission_relevance,
+            })
+            continue
+        if confidence < 0.72 and mission_relevance < 0.5:
+            rejected.append({
+                "text": text, "kind": kind, "source": item["source"],
+                "confidence": confidence, "is_accepted": False, "reject_reason": "off_mission",
+                "canonical_key": canonical_key, "mission_relevance": mission_relevance,
+            })
+            continue
+
+        if kind in ("chunk", "word") and any(tokens and tokens.issubset(p) for p in selected_pattern_token_sets):
+            rejected.append({
+                "text": text, "kind": kind, "source": item["source"],
+                "confidence": confidence, "is_accepted": False, "reject_reason": "covered_by_pattern",
+                "canonical_key": canonical_key, "mission_relevance": mission_relevance,
+            })
+            continue
+
+        # Reject words fully covered by accepted sentences/chunks/patterns unless extremely mission-critical.
+        if kind == "word" and any(tokens.issubset(s) for s in selected_token_sets) and mission_relevance < 0.95:
+            rejected.append({
+                "text": text, "kind": kind, "source": item["source"],
+                "confidence": confidence, "is_accepted": False, "reject_reason": "covered_by_chunk",
+                "canonical_key": canonical_key, "mission_relevance": mission_relevance,
+            })
+            continue
+
+        accepted.append({
+            "text": text,
+            "kind": kind,
+            "source": item["source"],
+            "confidence": confidence,
+            "is_accepted": True,
+            "reject_reason": None,
+            "canonical_key": canonical_key,
+            "mission_relevance": mission_relevance,
+        })
+        selected_token_sets.append(tokens)
+        if kind in ("pattern", "sentence"):
+            selected_pattern_token_sets.append(tokens)
+
+    accepted_ratio = (len(accepted) / max(1, len(canonical_items)))
+    correction_penalty = 0.2 if corrected_form and normalize_text(corrected_form) != source_text else 0.0
+    quality = max(0.0, min(1.0, accepted_ratio * 0.7 + (0.3 if accepted else 0.0) - correction_penalty))
+    return accepted, rejected, quality
+
+
+def _phrase(rng: random.Random, lo: int, hi: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(lo, hi)))
+
+
+class TestValidateUnits:
+    """Tests for validate_units()."""
+
+    @pytest.mark.parametrize("seed", range(4))
+    def test_matches_reference(self, seed):
+        """Verify accepted/rejected units and quality match the former implementation."""
+        rng = random.Random(seed)
+        hints = ["", "Talk about chocolat and Paris", "Introduce yourself: marie habite paris"]
+        for _ in range(1500):
+            user_text = _phrase(rng, 0, 14)
+            corrected = rng.choice(["", user_text, _phrase(rng, 0, 14)])
+            units = [_phrase(rng, 1, 11) for _ in range(rng.randint(0, 7))]
+            hint = rng.choice(hints)
+            assert validate_units(user_text, corrected, units, hint) == _reference_validate(user_text, corrected, units, hint)
+
+    def test_reject_reasons(self):
+        """Verify the main rejection branches."""
+        accepted, rejected, quality = validate_units(
+            "j'adore le chocolat noir et je suis étudiant",
+            "j'adore le chocolat noir et je suis étudiant",
+            ["je suis", "le chocolat noir", "chocolat", "baguette"],
+            "Talk about food",
+        )
+        reasons = {u["text"]: u["reject_reason"] for u in rejected}
+        assert reasons == {"je suis": "incomplete_pattern", "chocolat": "covered_by_pattern", "baguette": "not_in_user_speech"}
+        assert [u["canonical_key"] for u in accepted] == ["pattern:identity_je_suis_noun", "sentence:le chocolat noir"]
+        assert 0.0 < quality <= 1.0
+        for unit in accepted + rejected:
+            ValidatedUnit(**unit)
+
+    def test_records(self):
+        """Verify validate() returns slotted records that serialize like the dicts."""
+        accepted, rejected, _ = validate("ça va bien", "", ["ça va", "bien"], "")
+        record = accepted[0]
+        assert isinstance(record, UnitRecord) and record.is_accepted
+        assert not hasattr(record, "__dict__")
+        assert record.as_dict() == validate_units("ça va bien", "", ["ça va", "bien"], "")[0][0]
@@ -5,7 +5,7 @@ import { Dashboard } from './components/Dashboard';
 import { ErrorBoundary } from './components/ErrorBoundary';
 import { Neuron, Synapse, NebulaState, Category, Message } from './types';
 import { analyzeInput, checkBackend, isUsingBackend, resetMockState, getMockTurnIndex, getTotalMockTurns } from './services/geminiService';
-import { onConnectionStatusChange, onStatusStep, onTTS, ConnectionStatus, hardResetSession, fetchProfiles, switchProfile, fetchGraphData, Profile } from './services/backendService';
+import { onConnectionStatusChange, onStatusStep, onTTS, onTTSSegment, onTurnUpdate, mapTurnAnalysis, TTSSegmentEvent, ConnectionStatus, hardResetSession, fetchProfiles, switchProfile, fetchGraphData, getCachedGraph, Profile } from './services/backendService';
 import { Send, Zap, Info, Loader2, Search, Filter, Mic, Clock, X, MessageSquare, User, Bot, ChevronDown, ChevronUp, RefreshCw, Wifi, WifiOff, CheckCircle2, Circle, Sparkles, LocateFixed, Trash2, Volume2, FlaskConical, BarChart2, Rocket } from 'lucide-react';
 import { motion, AnimatePresence } from 'motion/react';
 import { getDailyMissions, evaluateMissionTask as evalTask, MascotOverlay, loadDailyState, saveOnboarding, saveMissionProgress, SUPPORTED_LANGUAGES } from './missions';
@@ -524,6 +524,10 @@ export default function App() {
   const ttsFallbackTimerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
   const ttsPlaybackSettledRef = useRef(false);
   const ttsExpectedTurnRef = useRef(0);
+  // Per-sentence TTS queue for the current turn (segments play back to back)
+  const ttsSegmentsRef = useRef<{ turn: number; queue: any[]; playing: boolean; done: boolean }>({
+    turn: -1, queue: [], playing: false, done: false,
+  });
   const cachedVoiceRef = useRef<SpeechSynthesisVoice | null>(null);
   const cachedVoiceLangRef = useRef<string>('');
   const targetLanguageRef = useRef(targetLanguage);
@@ -629,7 +633,7 @@ export default function App() {
       window.speechSynthesis.cancel();
     }
 
-    if (tts.mode === 'audio' && tts.audio_base64) {
+    if (tts.mode === 'audio' && (tts.audio_base64 || tts.blob_url)) {
       try {
         // Stale check: if a new turn already started, don't play old audio
         if (ttsExpectedTurnRef.current !== myTurn) {
@@ -638,7 +642,7 @@ export default function App() {
         }
         const rawMime = (tts.content_type || 'audio/mpeg').toLowerCase();
         const mime = rawMime.includes('mp3') ? 'audio/mpeg' : rawMime;
-        const audio = new Audio(`data:${mime};base64,${tts.audio_base64}`);
+        const audio = new Audio(tts.blob_url || `data:${mime};base64,${tts.audio_base64}`);
         audio.preload = 'auto';
         audio.volume = 1;
         audio.onended = () => setAutoListenPending(true);
@@ -669,11 +673,100 @@ export default function App() {
     speakBrowser(fallbackText);
   }, []);
 
+  // ── Sentence-level TTS: play segments in order as they arrive ──────────
+  const handleTtsSegment = useCallback((event: TTSSegmentEvent) => {
+    const myTurn = ttsExpectedTurnRef.current;
+    if (ttsSegmentsRef.current.turn !== myTurn) {
+      ttsSegmentsRef.current = { turn: myTurn, queue: [], playing: false, done: false };
+    }
+    const current = ttsSegmentsRef.current;
+
+    const stopActive = () => {
+      if (activeAudioRef.current) {
+        activeAudioRef.current.pause();
+        activeAudioRef.current = null;
+      }
+      if ('speechSynthesis' in window) window.speechSynthesis.cancel();
+    };
+
+    const playNext = () => {
+      if (ttsExpectedTurnRef.current !== myTurn) return;  // a new turn started
+      const next = current.queue.shift();
+      if (!next) {
+        current.playing = false;
+        if (current.done) setAutoListenPending(true);
+        return;
+      }
+      current.playing = true;
+      const text = next.text || '';
+      const speakBrowser = () => {
+        if (!text || !('speechSynthesis' in window)) { playNext(); return; }
+        const utterance = new SpeechSynthesisUtterance(text);
+        const lang = targetLanguageRef.current;
+        const voice = window.speechSynthesis.getVoices().find((v) => (v.lang || '').toLowerCase().startsWith(lang));
+        if (voice) utterance.voice = voice;
+        utterance.lang = voice?.lang || lang;
+        utterance.rate = 1.02;
+        utterance.onend = playNext;
+        utterance.onerror = playNext;
+        window.speechSynthesis.speak(utterance);
+      };
+      if (next.mode === 'audio' && (next.blob_url || next.audio_base64)) {
+        const rawMime = (next.content_type || 'audio/mpeg').toLowerCase();
+        const mime = rawMime.includes('mp3') ? 'audio/mpeg' : rawMime;
+        const audio = new Audio(next.blob_url || `data:${mime};base64,${next.audio_base64}`);
+        audio.onended = () => {
+          if (next.blob_url) URL.revokeObjectURL(next.blob_url);
+          playNext();
+        };
+        audio.onerror = speakBrowser;
+        activeAudioRef.current = audio;
+        audio.play().catch(speakBrowser);
+        return;
+      }
+      speakBrowser();
+    };
+
+    if (event.kind === 'reset') {
+      current.queue = [];
+      current.playing = false;
+      stopActive();
+      return;
+    }
+    if (event.kind === 'done') {
+      current.done = true;
+      if (!current.playing && current.queue.length === 0) setAutoListenPending(true);
+      return;
+    }
+    current.queue.push(event.tts);
+    if (!current.playing) {
+      if (event.seq === 0) stopActive();
+      playNext();
+    }
+  }, []);
+
   // ── Initialize: check backend availability ───────────────────────────
   useEffect(() => {
     onConnectionStatusChange(setConnectionStatus);
     onStatusStep(setProcessingStep);
     onTTS(playTtsPayload);
+    onTTSSegment(handleTtsSegment);
+    // Late analysis: refresh the latest tutor message and the graph it fed
+    onTurnUpdate(async (payload) => {
+      const resp = payload.turn?.response;
+      if (!resp) return;
+      setState(prev => {
+        const idx = prev.messages.map(m => m.role).lastIndexOf('ai');
+        if (idx < 0 || prev.messages[idx].text !== resp.spoken_response) return prev;
+        const messages = [...prev.messages];
+        messages[idx] = { ...messages[idx], correctedForm: resp.corrected_form || '', analysis: mapTurnAnalysis(resp) };
+        return { ...prev, messages };
+      });
+      try {
+        const graph = payload.graphApplied ? getCachedGraph() : await fetchGraphData();
+        setState(prev => ({ ...prev, neurons: graph.neurons, synapses: graph.synapses }));
+      } catch { /* ignore */ }
+    });
 
     // Pre-load target language voice — getVoices() is empty on first call in Chrome
     const loadVoices = () => {
@@ -907,11 +1000,6 @@ export default function App() {
       language: targetLanguage,
       category_focus: categoryFocus || null,
       category_vocab: categoryVocab,
-      fading_targets: state.neurons
-        .filter(n => n.strength < 0.50 && n.strength >= 0.15)
-        .sort((a, b) => a.strength - b.strength)
-        .slice(0, 5)
-        .map(n => n.label),
       is_opener: isOpener,
     };
 
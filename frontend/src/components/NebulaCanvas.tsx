@@ -6,6 +6,7 @@ import { forceSimulation, forceLink, forceManyBody, forceCenter, forceX, forceY,
 import { Neuron, Synapse, Category } from '../types';
 import { EffectComposer, Bloom } from '@react-three/postprocessing';
 import { FlightCameraRig } from './navigation/FlightCameraRig';
+import { fetchGraphLayout } from '../services/backendService';
 import { FlightModeBranch, FlightModePhase } from './navigation/flightTypes';
 
 // Bloom post-processing wrapped in a React error boundary so it
@@ -358,6 +359,10 @@ function CameraController({ targetNode, positionedNodes }: { targetNode: Neuron
   return null;
 }
 
+// Node counts above which the layout is fetched from the backend instead of simulated here
+const SERVER_LAYOUT_MIN_NODES = 1500;
+const SERVER_LAYOUT_LOW_END_MIN_NODES = 400;
+
 export function NebulaCanvas({ neurons, synapses, onNeuronClick, onSynapseClick, filterCategory, searchTarget, timePulse, shootingStars, onShootingStarComplete, isFlying, streamingNewIds = new Set(), highlightedIds = new Set(), flightPhase = 'hidden' as FlightModePhase, flightBranch = null as FlightModeBranch, relightTargetId = null as string | null, relightGlowProgress = 1, onTravelArrive, onFocusComplete }: {
   neurons: Neuron[];
   synapses: Synapse[];
@@ -388,68 +393,95 @@ export function NebulaCanvas({ neurons, synapses, onNeuronClick, onSynapseClick,
     const nodes = neurons.map(n => ({ ...n }));
     const links = synapses.map(s => ({ ...s }));
 
-    const n = nodes.length;
-    const scale = Math.max(0.25, Math.min(1.0, 8 / Math.sqrt(n)));
-    const linkClose = 0.18 * scale;
-    const linkFar   = 0.35 * scale;
-
-    // Restore previous positions so existing nodes don't jump
-    const prevPos = prevPositionsRef.current;
-    const rng = (lo: number, hi: number) => lo + Math.random() * (hi - lo);
-    for (const node of nodes) {
-      const saved = prevPos.get(node.id);
-      if (saved) {
-        node.x = saved.x;
-        node.y = saved.y;
-        node.z = saved.z;
-      } else if (node.x === undefined) {
-        node.x = rng(-1, 1);
-        node.y = rng(-1, 1);
-        node.z = rng(-1, 1);
+    const savePositions = () => {
+      const newPos = new Map<string, { x: number; y: number; z: number }>();
+      for (const nd of nodes) {
+        newPos.set(nd.id, { x: nd.x ?? 0, y: nd.y ?? 0, z: nd.z ?? 0 });
       }
+      prevPositionsRef.current = newPos;
+      setPositionedNodes(nodes);
+    };
+
+    // Large nebulas (or low-end devices) use the backend's precomputed layout
+    const lowEnd = (navigator.hardwareConcurrency || 8) <= 4;
+    if (nodes.length >= SERVER_LAYOUT_MIN_NODES || (lowEnd && nodes.length >= SERVER_LAYOUT_LOW_END_MIN_NODES)) {
+      let cancelled = false;
+      fetchGraphLayout().then((layout) => {
+        if (cancelled) return;
+        if (!layout || nodes.some(nd => !layout.has(nd.id))) {
+          simulate();
+          return;
+        }
+        for (const nd of nodes) {
+          const [x, y, z] = layout.get(nd.id)!;
+          nd.x = x;
+          nd.y = y;
+          nd.z = z;
+        }
+        savePositions();
+      });
+      return () => { cancelled = true; };
     }
+    simulate();
+
+    function simulate() {
+      const n = nodes.length;
+      const scale = Math.max(0.25, Math.min(1.0, 8 / Math.sqrt(n)));
+      const linkClose = 0.18 * scale;
+      const linkFar   = 0.35 * scale;
+
+      // Restore previous positions so existing nodes don't jump
+      const prevPos = prevPositionsRef.current;
+      const rng = (lo: number, hi: number) => lo + Math.random() * (hi - lo);
+      for (const node of nodes) {
+        const saved = prevPos.get(node.id);
+        if (saved) {
+          node.x = saved.x;
+          node.y = saved.y;
+          node.z = saved.z;
+        } else if (node.x === undefined) {
+          node.x = rng(-1, 1);
+          node.y = rng(-1, 1);
+          node.z = rng(-1, 1);
+        }
+      }
 
-    const categories = [...new Set(nodes.map(d => d.category))];
-    const catCount = categories.length || 1;
-    const ringR = Math.max(0.5, 1.6 * scale);
-    const catAnchors: Record<string, { x: number; y: number; z: number }> = {};
-    categories.forEach((cat, idx) => {
-      const phi   = Math.acos(1 - 2 * (idx + 0.5) / catCount);
-      const theta = Math.PI * (1 + Math.sqrt(5)) * idx;
-      catAnchors[cat] = {
-        x: ringR * Math.sin(phi) * Math.cos(theta),
-        y: ringR * Math.cos(phi),
-        z: ringR * Math.sin(phi) * Math.sin(theta),
-      };
-    });
-
-    const sim = forceSimulation<Neuron>(nodes, 3)
-      .force('link', forceLink<Neuron, any>(links).id(d => d.id).distance((link: any) => {
-        return link.type === 'logical' ? linkClose : linkFar;
-      }).strength(0.7))
-      .force('charge', forceManyBody().strength(-1.5 * scale))
-      .force('center', forceCenter(0, 0, 0).strength(0.05))
-      .force('catX', forceX<Neuron>(d => catAnchors[d.category]?.x ?? 0).strength(0.5))
-      .force('catY', forceY<Neuron>(d => {
-        const base = catAnchors[d.category]?.y ?? 0;
-        return base + (d.type === 'soma' ? 0.06 * scale : -0.06 * scale);
-      }).strength(0.5))
-      .force('catZ', forceZ<Neuron>(d => catAnchors[d.category]?.z ?? 0).strength(0.5))
-      .stop();
-
-    // Fewer ticks if most nodes already have positions (incremental update)
-    const hasPositions = nodes.filter(nd => prevPos.has(nd.id)).length;
-    const ticks = hasPositions > nodes.length * 0.5 ? 80 : 500;
-    for (let i = 0; i < ticks; i++) sim.tick();
-
-    // Save positions for next re-simulation
-    const newPos = new Map<string, { x: number; y: number; z: number }>();
-    for (const nd of nodes) {
-      newPos.set(nd.id, { x: nd.x ?? 0, y: nd.y ?? 0, z: nd.z ?? 0 });
-    }
-    prevPositionsRef.current = newPos;
+      const categories = [...new Set(nodes.map(d => d.category))];
+      const catCount = categories.length || 1;
+      const ringR = Math.max(0.5, 1.6 * scale);
+      const catAnchors: Record<string, { x: number; y: number; z: number }> = {};
+      categories.forEach((cat, idx) => {
+        const phi   = Math.acos(1 - 2 * (idx + 0.5) / catCount);
+        const theta = Math.PI * (1 + Math.sqrt(5)) * idx;
+        catAnchors[cat] = {
+          x: ringR * Math.sin(phi) * Math.cos(theta),
+          y: ringR * Math.cos(phi),
+          z: ringR * Math.sin(phi) * Math.sin(theta),
+        };
+      });
 
-    setPositionedNodes(nodes);
+      const sim = forceSimulation<Neuron>(nodes, 3)
+        .force('link', forceLink<Neuron, any>(links).id(d => d.id).distance((link: any) => {
+          return link.type === 'logical' ? linkClose : linkFar;
+        }).strength(0.7))
+        .force('charge', forceManyBody().strength(-1.5 * scale))
+        .force('center', forceCenter(0, 0, 0).strength(0.05))
+        .force('catX', forceX<Neuron>(d => catAnchors[d.category]?.x ?? 0).strength(0.5))
+        .force('catY', forceY<Neuron>(d => {
+          const base = catAnchors[d.category]?.y ?? 0;
+          return base + (d.type === 'soma' ? 0.06 * scale : -0.06 * scale);
+        }).strength(0.5))
+        .force('catZ', forceZ<Neuron>(d => catAnchors[d.category]?.z ?? 0).strength(0.5))
+        .stop();
+
+      // Fewer ticks if most nodes already have positions (incremental update)
+      const hasPositions = nodes.filter(nd => prevPos.has(nd.id)).length;
+      const ticks = hasPositions > nodes.length * 0.5 ? 80 : 500;
+      for (let i = 0; i < ticks; i++) sim.tick();
+
+      // Save positions for next re-simulation
+      savePositions();
+    }
   }, [neurons, synapses]);
 
   // Find the actual positioned node for searching
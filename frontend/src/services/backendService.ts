@@ -16,13 +16,24 @@ function getBaseUrl(): string {
   return import.meta.env.VITE_BACKEND_URL || '';
 }
 
+// Active learner profile — the backend keeps one isolated session per profile.
+let activeProfileId: string | null = null;
+
+/** Append the learner session selector to a backend URL. */
+function withSession(url: string, param: 'session_id' | 'profile_id' = 'session_id'): string {
+  if (!activeProfileId) return url;
+  const sep = url.includes('?') ? '&' : '?';
+  return `${url}${sep}${param}=${encodeURIComponent(activeProfileId)}`;
+}
+
 function getWsUrl(): string {
   const base = getBaseUrl();
+  // tts=segments,stream: reply audio arrives per sentence as binary MP3 frames
   if (base) {
-    return base.replace(/^http/, 'ws') + '/ws/conversation';
+    return withSession(base.replace(/^http/, 'ws') + '/ws/conversation?tts=segments,stream', 'profile_id');
   }
   const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-  return `${protocol}//${window.location.host}/ws/conversation`;
+  return withSession(`${protocol}//${window.location.host}/ws/conversation?tts=segments,stream`, 'profile_id');
 }
 
 // ── Data Mapping: Backend → Frontend types ───────────────────────────────
@@ -166,6 +177,90 @@ function mapLinkToSynapse(link: any): Synapse {
   };
 }
 
+// ── Versioned graph cache ────────────────────────────────────────────────
+// The backend versions the knowledge graph; turn messages and /api/graph/delta
+// carry only what changed since the version held here.
+
+let graphVersion: number | null = null;
+const graphNodes = new Map<string, any>();
+const graphLinks = new Map<string, any>();
+
+function graphLinkKey(source: string, target: string): string {
+  return source < target ? `${source}|${target}` : `${target}|${source}`;
+}
+
+/** Apply a graph delta to the cache; false when it does not follow the cached version. */
+export function applyGraphDelta(delta: any): boolean {
+  if (!delta) return false;
+  if (!delta.full && delta.since !== graphVersion) return false;
+  if (delta.full) {
+    graphNodes.clear();
+    graphLinks.clear();
+  }
+  for (const node of [...(delta.nodes?.added || []), ...(delta.nodes?.updated || [])]) graphNodes.set(node.id, node);
+  for (const id of delta.nodes?.removed || []) graphNodes.delete(id);
+  for (const link of [...(delta.links?.added || []), ...(delta.links?.updated || [])]) {
+    graphLinks.set(graphLinkKey(link.source, link.target), link);
+  }
+  for (const [a, b] of delta.links?.removed || []) graphLinks.delete(graphLinkKey(a, b));
+  graphVersion = delta.version;
+  return true;
+}
+
+export function getCachedGraph(): { neurons: Neuron[]; synapses: Synapse[] } {
+  return {
+    neurons: [...graphNodes.values()].map(mapNodeToNeuron),
+    synapses: [...graphLinks.values()].map(mapLinkToSynapse),
+  };
+}
+
+/** Fold the top-level pedagogy/timings of a turn_response/turn_update into turn.response. */
+export function mergeTurnPayload(payload: any): void {
+  const resp = payload.turn?.response;
+  if (!resp) return;
+  if (payload.pedagogy) {
+    resp.quality_score = payload.pedagogy.quality_score;
+    resp.validated_user_units = [
+      ...(payload.pedagogy.accepted_units || []),
+      ...(payload.pedagogy.rejected_units || []),
+    ];
+    resp.canonical_units = payload.pedagogy.canonical_units || [];
+    resp.next_mission_hint = payload.pedagogy.next_mission_hint || '';
+    resp.mission_progress = payload.pedagogy.mission_progress || undefined;
+    resp.mission_tasks = payload.pedagogy.mission_tasks || undefined;
+  }
+  if (payload.timings) {
+    resp.latency_ms = payload.timings;
+  }
+}
+
+export function mapTurnAnalysis(resp: any): NonNullable<Message['analysis']> {
+  return {
+    vocabulary: ((resp.validated_user_units || []).filter((u: any) => u?.is_accepted)).map((u: any) => {
+      const matched = (resp.vocabulary_breakdown || []).find((v: any) => (v?.word || '').toLowerCase() === (u?.text || '').toLowerCase());
+      return {
+        word: u.text,
+        translation: matched?.translation || '',
+        type: u.kind || 'unit',
+        isNew: true,
+      };
+    }),
+    newElements: resp.new_elements || [],
+    level: resp.user_level_assessment || 'A1',
+    progress: resp.border_update || '',
+    qualityScore: typeof resp.quality_score === 'number' ? resp.quality_score : undefined,
+    acceptedUnits: (resp.validated_user_units || []).filter((u: any) => u?.is_accepted).map((u: any) => u.text),
+    rejectedUnits: (resp.validated_user_units || []).filter((u: any) => !u?.is_accepted).map((u: any) => u.text),
+    canonicalUnits: (resp.validated_user_units || [])
+      .filter((u: any) => u?.is_accepted)
+      .map((u: any) => ({ text: u.text, kind: u.kind, canonicalKey: u.canonical_key || '' })),
+    missionHint: resp.next_mission_hint || '',
+    missionProgress: resp.mission_progress || undefined,
+    missionTasks: resp.mission_tasks || undefined,
+    latencyMs: resp.latency_ms || undefined,
+  };
+}
+
 export function mapTurnToMessages(turn: any, existingMessages: Message[]): Message[] {
   const ts = Date.now();
   const resp = turn.response;
@@ -183,30 +278,7 @@ export function mapTurnToMessages(turn: any, existingMessages: Message[]): Messa
     text: resp.spoken_response,
     timestamp: ts + 1,
     correctedForm: resp.corrected_form || '',
-    analysis: {
-      vocabulary: ((resp.validated_user_units || []).filter((u: any) => u?.is_accepted)).map((u: any) => {
-        const matched = (resp.vocabulary_breakdown || []).find((v: any) => (v?.word || '').toLowerCase() === (u?.text || '').toLowerCase());
-        return {
-          word: u.text,
-          translation: matched?.translation || '',
-          type: u.kind || 'unit',
-          isNew: true,
-        };
-      }),
-      newElements: resp.new_elements || [],
-      level: resp.user_level_assessment || 'A1',
-      progress: resp.border_update || '',
-      qualityScore: typeof resp.quality_score === 'number' ? resp.quality_score : undefined,
-      acceptedUnits: (resp.validated_user_units || []).filter((u: any) => u?.is_accepted).map((u: any) => u.text),
-      rejectedUnits: (resp.validated_user_units || []).filter((u: any) => !u?.is_accepted).map((u: any) => u.text),
-      canonicalUnits: (resp.validated_user_units || [])
-        .filter((u: any) => u?.is_accepted)
-        .map((u: any) => ({ text: u.text, kind: u.kind, canonicalKey: u.canonical_key || '' })),
-      missionHint: resp.next_mission_hint || '',
-      missionProgress: resp.mission_progress || undefined,
-      missionTasks: resp.mission_tasks || undefined,
-      latencyMs: resp.latency_ms || undefined,
-    },
+    analysis: mapTurnAnalysis(resp),
   };
 
   return [...existingMessages, userMsg, aiMsg];
@@ -229,7 +301,31 @@ let connectionStatus: ConnectionStatus = 'disconnected';
 let statusCallback: ((s: ConnectionStatus) => void) | null = null;
 let statusStepCallback: ((step: string) => void) | null = null;
 let ttsCallback: ((tts: any) => void) | null = null;
+let ttsSegmentCallback: ((event: TTSSegmentEvent) => void) | null = null;
+let turnUpdateCallback: ((payload: any) => void) | null = null;
 let pendingRequest: PendingResolve | null = null;
+
+// Streamed TTS: binary frames (4-byte stream id | 4-byte chunk seq | MP3) collected until tts_stream_end
+type AudioStream = { turn: number; seq?: number; text: string; contentType: string; chunks: ArrayBuffer[] };
+const audioStreams = new Map<number, AudioStream>();
+const AUDIO_FRAME_HEADER = 8;
+
+function finishAudioStream(data: any) {
+  const stream = audioStreams.get(data.stream_id);
+  audioStreams.delete(data.stream_id);
+  if (!stream || data.aborted) return;
+  const tts = data.fallback ?? {
+    mode: 'audio',
+    blob_url: URL.createObjectURL(new Blob(stream.chunks, { type: stream.contentType })),
+    content_type: stream.contentType,
+    text: stream.text,
+  };
+  if (stream.seq !== undefined) {
+    ttsSegmentCallback?.({ kind: 'segment', turn: stream.turn, seq: stream.seq, tts });
+  } else {
+    ttsCallback?.(tts);
+  }
+}
 let requestSeq = 0;
 
 const MAX_RECONNECTS = 5;
@@ -253,6 +349,22 @@ export function onTTS(cb: (tts: any) => void) {
   ttsCallback = cb;
 }
 
+/** Sentence-level TTS stream for one turn: ordered segments, optional reset, then done. */
+export type TTSSegmentEvent =
+  | { kind: 'segment'; turn: number; seq: number; tts: any }
+  | { kind: 'reset'; turn: number }
+  | { kind: 'done'; turn: number; segments: number };
+
+/** Register a callback for per-sentence TTS segments (may arrive before the text response). */
+export function onTTSSegment(cb: (event: TTSSegmentEvent) => void) {
+  ttsSegmentCallback = cb;
+}
+
+/** Register a callback for late pedagogical analysis of an already-sent turn (turn_update). */
+export function onTurnUpdate(cb: (payload: any) => void) {
+  turnUpdateCallback = cb;
+}
+
 export function getConnectionStatus(): ConnectionStatus {
   return connectionStatus;
 }
@@ -302,7 +414,13 @@ export function connect(): Promise<boolean> {
       resolve(true);
     };
 
+    ws.binaryType = 'arraybuffer';
     ws.onmessage = (event) => {
+      if (event.data instanceof ArrayBuffer) {
+        const streamId = new DataView(event.data).getUint32(0);
+        audioStreams.get(streamId)?.chunks.push(event.data.slice(AUDIO_FRAME_HEADER));
+        return;
+      }
       try {
         const data = JSON.parse(event.data);
 
@@ -317,6 +435,40 @@ export function connect(): Promise<boolean> {
           ttsCallback?.(data.tts);
           return;
         }
+        if (data.type === 'tts_segment') {
+          ttsSegmentCallback?.({ kind: 'segment', turn: data.turn, seq: data.seq, tts: data.tts });
+          return;
+        }
+        if (data.type === 'tts_reset') {
+          ttsSegmentCallback?.({ kind: 'reset', turn: data.turn });
+          return;
+        }
+        if (data.type === 'tts_stream_start') {
+          audioStreams.set(data.stream_id, {
+            turn: data.turn, seq: data.seq, text: data.text || '', contentType: data.content_type || 'audio/mpeg', chunks: [],
+          });
+          return;
+        }
+        if (data.type === 'tts_stream_end') {
+          finishAudioStream(data);
+          return;
+        }
+        if (data.type === 'tts_done') {
+          ttsSegmentCallback?.({ kind: 'done', turn: data.turn, segments: data.segments });
+          return;
+        }
+
+        // Analysis that missed the turn_response — the request already resolved
+        if (data.type === 'turn_update') {
+          mergeTurnPayload(data);
+          data.graphApplied = applyGraphDelta(data.graph);
+          turnUpdateCallback?.(data);
+          return;
+        }
+
+        if (data.type === 'turn_response') {
+          data.graphApplied = applyGraphDelta(data.graph);
+        }
 
         // All other messages resolve the pending request
         if (pendingRequest) {
@@ -405,29 +557,34 @@ export async function sendMessage(content: string, type: 'text' | 'audio' = 'tex
 export async function fetchGraphData(): Promise<{ neurons: Neuron[]; synapses: Synapse[] }> {
   const base = getBaseUrl();
   try {
-    const [nodesRes, linksRes] = await Promise.all([
-      fetch(`${base}/api/graph/nodes`),
-      fetch(`${base}/api/graph/links`),
-    ]);
-
-    if (!nodesRes.ok || !linksRes.ok) throw new Error('API error');
-
-    const nodes = await nodesRes.json();
-    const links = await linksRes.json();
-
-    return {
-      neurons: nodes.map(mapNodeToNeuron),
-      synapses: links.map(mapLinkToSynapse),
-    };
+    const since = graphVersion === null ? '' : `?since=${graphVersion}`;
+    const res = await fetch(withSession(`${base}/api/graph/delta${since}`));
+    if (!res.ok) throw new Error('API error');
+    if (!applyGraphDelta(await res.json())) throw new Error('Stale graph delta');
+    return getCachedGraph();
   } catch {
     return { neurons: [], synapses: [] };
   }
 }
 
+/** Server-computed 3D positions for the current graph, or null when unavailable. */
+export async function fetchGraphLayout(): Promise<Map<string, [number, number, number]> | null> {
+  const base = getBaseUrl();
+  try {
+    const res = await fetch(withSession(`${base}/api/graph/layout`));
+    if (!res.ok) return null;
+    const body = await res.json();
+    if (!body.available) return null;
+    return new Map(Object.entries(body.positions || {}) as [string, [number, number, number]][]);
+  } catch {
+    return null;
+  }
+}
+
 export async function fetchSessionState(): Promise<any> {
   const base = getBaseUrl();
   try {
-    const res = await fetch(`${base}/api/session/state`);
+    const res = await fetch(withSession(`${base}/api/session/state`));
     if (!res.ok) throw new Error('API error');
     return await res.json();
   } catch {
@@ -438,7 +595,7 @@ export async function fetchSessionState(): Promise<any> {
 export async function resetSession(): Promise<boolean> {
   const base = getBaseUrl();
   try {
-    const res = await fetch(`${base}/api/session/reset`, { method: 'POST' });
+    const res = await fetch(withSession(`${base}/api/session/reset`), { method: 'POST' });
     return res.ok;
   } catch {
     return false;
@@ -448,7 +605,7 @@ export async function resetSession(): Promise<boolean> {
 export async function hardResetSession(): Promise<boolean> {
   const base = getBaseUrl();
   try {
-    const res = await fetch(`${base}/api/session/reset-hard`, { method: 'POST' });
+    const res = await fetch(withSession(`${base}/api/session/reset-hard`), { method: 'POST' });
     return res.ok;
   } catch {
     return false;
@@ -492,6 +649,13 @@ export async function switchProfile(profileId: string): Promise<boolean> {
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ profile_id: profileId }),
     });
+    if (res.ok && activeProfileId !== profileId) {
+      activeProfileId = profileId;
+      // Reconnect so the WebSocket is bound to the new learner session
+      if (ws) {
+        ws.close();
+      }
+    }
     return res.ok;
   } catch {
     return false;
@@ -313,25 +313,11 @@ export async function analyzeInput(
 
       if (response.type === 'turn_response') {
         // Merge top-level pedagogy/timings into the turn response payload for unified mapping
-        if (response.turn?.response) {
-          if (response.pedagogy) {
-            response.turn.response.quality_score = response.pedagogy.quality_score;
-            response.turn.response.validated_user_units = [
-              ...(response.pedagogy.accepted_units || []),
-              ...(response.pedagogy.rejected_units || []),
-            ];
-            response.turn.response.canonical_units = response.pedagogy.canonical_units || [];
-            response.turn.response.next_mission_hint = response.pedagogy.next_mission_hint || '';
-            response.turn.response.mission_progress = response.pedagogy.mission_progress || undefined;
-            response.turn.response.mission_tasks = response.pedagogy.mission_tasks || undefined;
-          }
-          if (response.timings) {
-            response.turn.response.latency_ms = response.timings;
-          }
-        }
+        backend.mergeTurnPayload(response);
         const updatedMessages = backend.mapTurnToMessages(response.turn, currentState.messages);
+        // The turn carries its graph delta; only fetch when it could not be applied.
         // Keep the tutor response snappy: don't block too long on graph refresh.
-        const graphData = await Promise.race([
+        const graphData = response.graphApplied ? backend.getCachedGraph() : await Promise.race([
           backend.fetchGraphData(),
           new Promise<null>((resolve) => setTimeout(() => resolve(null), 800)),
         ]);